@@ -0,0 +1,36 @@
+''' Compare the n-ary booleans with chained pairwise booleans, for an increasing number of tools
+
+	run with:  python -m benchmarks.boolean_many
+'''
+from time import perf_counter
+
+from madcad import *
+from madcad.boolean import difference_many
+
+
+def holes(n):
+	''' plate with `n` disjoint holes '''
+	side = int(n**0.5 + 0.999)
+	plate = brick(width=vec3(2*side, 2*side, 1))
+	tools = [
+		cylinder(vec3(2*(i%side) - side + 1, 2*(i//side) - side + 1, -1), vec3(2*(i%side) - side + 1, 2*(i//side) - side + 1, 1), 0.4)
+		for i in range(n)]
+	return plate, tools
+
+def chained(base, tools):
+	for tool in tools:
+		base = difference(base, tool)
+	return base
+
+def measure(function, *args):
+	start = perf_counter()
+	function(*args)
+	return perf_counter() - start
+
+if __name__ == '__main__':
+	print('{:>6} {:>12} {:>12} {:>8}'.format('tools', 'chained (s)', 'many (s)', 'speedup'))
+	for n in (1, 2, 4, 8, 16, 32, 64):
+		base, tools = holes(n)
+		pairwise = measure(chained, base, tools)
+		many = measure(difference_many, base, tools)
+		print('{:>6} {:>12.3f} {:>12.3f} {:>8.1f}'.format(n, pairwise, many, pairwise/many))
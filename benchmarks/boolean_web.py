@@ -0,0 +1,40 @@
+''' Compare the native web booleans with their former pure python implementations, on gear outlines of increasing size and on the standard sections
+
+	The python implementations are in `tests/boolean_web_reference.py`, the native ones must give the same results.
+
+	run with:  python -m benchmarks.boolean_web
+'''
+from time import perf_counter
+from copy import deepcopy
+
+from madcad import *
+from madcad import boolean
+from tests import boolean_web_reference as reference
+from tests.boolean_web_reference import outlines, sections, same
+
+
+def measure(function, *args):
+	start = perf_counter()
+	result = function(*args)
+	return perf_counter() - start, result
+
+if __name__ == '__main__':
+	cases = [('gear {}'.format(teeth), *outlines(teeth))  for teeth in (10, 30, 100, 300)]
+	cases.extend(sections())
+	print('{:>14} {:>8} {:>12} {:>12} {:>8} {:>6}'.format('case', 'edges', 'python (s)', 'native (s)', 'speedup', 'same'))
+	for case, profile, circle in cases:
+		for name, operation, former in [
+				('cut web', boolean.cut_web, reference.cut_web),
+				('pierce web', boolean.pierce_web, reference.pierce_web),
+				('cut mesh', boolean.cut_web_mesh, reference.cut_web_mesh),
+				('pierce mesh', boolean.pierce_web_mesh, reference.pierce_web_mesh),
+				]:
+			ref = circle if name.endswith('web') else extrusion(circle, Z, alignment=0.5)
+			python, expected = measure(former, deepcopy(profile), ref)
+			native, result = measure(operation, profile, ref)
+			if name.startswith('cut'):
+				valid = same(result[0], expected[0]) and same(result[1], expected[1])
+			else:
+				valid = same(result, expected)
+			print('{:>14} {:>8} {:>12.3f} {:>12.3f} {:>8.1f} {:>6}  {}'.format(
+				case, len(profile.edges), python, native, python/native, str(valid), name))
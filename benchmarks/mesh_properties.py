@@ -0,0 +1,111 @@
+''' Compare the bulk mesh properties with the per face loops they replace, on meshes of increasing size
+
+	run with:  python -m benchmarks.mesh_properties
+'''
+from time import perf_counter
+import numpy as np
+
+from madcad import *
+from madcad.mesh import numpy_to_typedlist
+from madcad.hashing import edgekey, suites
+
+
+def sheet(n):
+	''' wavy open surface with about `n` faces '''
+	side = int((n/2)**0.5) + 1
+	x, y = np.meshgrid(np.arange(side, dtype='f8'), np.arange(side, dtype='f8'), indexing='ij')
+	points = np.stack([x, y, np.sin(x*0.3) * np.cos(y*0.2)], axis=-1).reshape(-1, 3)
+	corners = (np.arange(side-1)[:,None]*side + np.arange(side-1)[None,:]).ravel()
+	faces = np.concatenate([
+		np.stack([corners, corners+side, corners+side+1], axis=1),
+		np.stack([corners, corners+side+1, corners+1], axis=1),
+		])
+	return Mesh(numpy_to_typedlist(points, vec3), numpy_to_typedlist(faces, uvec3), [0]*len(faces), [None])
+
+
+# reference implementations with loops over faces
+
+def facenormals(mesh):
+	return typedlist(map(mesh.facenormal, mesh.faces), vec3)
+
+def surface(mesh):
+	s = 0
+	for f in mesh.faces:
+		a,b,c = mesh.facepoints(f)
+		s += length(cross(a-b, a-c))
+	return s /2
+
+def barycenter(mesh):
+	acc = vec3(0)
+	tot = 0
+	for f in mesh.faces:
+		a,b,c = mesh.facepoints(f)
+		weight = length(cross(b-a, c-a))
+		tot += weight
+		acc += weight*(a+b+c)
+	return acc / (3*tot)
+
+def volume(mesh):
+	o = barycenter(mesh)
+	s = 0
+	for f in mesh.faces:
+		a,b,c = mesh.facepoints(f)
+		s += glm.determinant(mat3(a-o, b-o, c-o))
+	return s /6
+
+def edgenormals(mesh):
+	normals = {}
+	for face in mesh.faces:
+		normal = mesh.facenormal(face)
+		for edge in ((face[0], face[1]), (face[1], face[2]), (face[2],face[0])):
+			e = edgekey(*edge)
+			normals[e] = normals.get(e,0) + normal
+	for e,normal in normals.items():
+		normals[e] = normalize(normal)
+	return normals
+
+def tangents(mesh):
+	edges = {}
+	for face in mesh.faces:
+		for e in ((face[0], face[1]), (face[1], face[2]), (face[2],face[0])):
+			if e in edges:	del edges[e]
+			else:			edges[(e[1], e[0])] = mesh.facenormal(face)
+	tangents = {}
+	for loop in suites(edges, cut=False):
+		loop.pop()
+		for i in range(len(loop)):
+			c = cross(	edges[(loop[i-2],loop[i-1])],
+						edges[(loop[i-1],loop[i])] )
+			o = cross(  mesh.points[loop[i-2]] - mesh.points[loop[i]],
+			            edges[(loop[i-2],loop[i-1])] + edges[(loop[i-1],loop[i])] )
+			tangents[loop[i-1]] = normalize(mix(o, c, clamp(length2(c)/length2(o)/NUMPREC, 0, 1) ))
+	return tangents
+
+
+def measure(function, *args):
+	start = perf_counter()
+	result = function(*args)
+	return perf_counter() - start, result
+
+def same(a, b):
+	if isinstance(a, dict):
+		return a.keys() == b.keys() and same([a[k] for k in a], [b[k] for k in a])
+	return np.allclose(array(a), array(b))
+
+def array(values):
+	if isinstance(values, (int, float)):
+		return np.array(values)
+	if isinstance(values, vec3):
+		return np.array(tuple(values))
+	return np.array([tuple(v)  for v in values])
+
+if __name__ == '__main__':
+	properties = ['facenormals', 'surface', 'barycenter', 'volume', 'edgenormals', 'tangents']
+	print('{:>8} {:>12} {:>10} {:>10} {:>8}'.format('faces', 'property', 'loop (s)', 'bulk (s)', 'speedup'))
+	for n in (10_000, 100_000, 1_000_000):
+		mesh = sheet(n)
+		for name in properties:
+			loop, expected = measure(globals()[name], mesh)
+			bulk, result = measure(getattr(mesh, name))
+			assert same(result, expected), name
+			print('{:>8} {:>12} {:>10.3f} {:>10.3f} {:>8.1f}'.format(len(mesh.faces), name, loop, bulk, loop/bulk))
@@ -161,7 +161,7 @@ from .mathutils import (
 		uvec3, vec1, vec2, vec3, vec4,
 	)
 from .box import Box
-from .mesh import Mesh, Web, Wire, MeshError, web, wire
+from .mesh import Mesh, Web, Wire, Instances, MeshError, web, wire
 from .boolean import pierce, difference, union, intersection
 from .bevel import chamfer, filet, edgecut, planeoffsets
 from .generation import (
@@ -197,7 +197,7 @@ from .standard import (
 
 __all__ = [
 	"Angle","ArcCentered", "ArcTangent", "ArcThrough", "Axis", "Box",
-	"COMPREC", "Chain", "Circle", "Distance", "Ellipsis", "Interpolated",
+	"COMPREC", "Chain", "Circle", "Distance", "Ellipsis", "Instances", "Interpolated",
 	"Joint", "Kinematic", "KinematicError", "Mesh", "MeshError", "NUMPREC",
 	"O", "OnPlane", "Parallel", "Point", "PointOn", "Radius", "Screw",
 	"Segment", "Softened", "Solid", "SolveError", "Tangent", "TangentEllipsis",
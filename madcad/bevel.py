@@ -9,7 +9,7 @@
 from . import generation as gt
 from . import hashing
 from . import settings
-from .hashing import connef, edgekey, connpp, suites, connpe
+from .hashing import connef, edgekey, connpp, suites, connpe, invalidate
 from .mathutils import (
 		NUMPREC, vec3, noproject, interpol1, interpol2, anglebt, arclength,
 		dirbase, unproject, isfinite, normalize, dot, cross, distance, length,
@@ -406,6 +406,7 @@ def mesh_edgecut(mesh, edges, conn=None, prec=None, removal=None, **cutter):
 			frontier.extend(edges)
 		finalize(mesh, outlines, propagate(mesh, frontier, conn, prec), prec)
 		#finalize(mesh, outlines, removal, prec)	# NOTE this is faster but also leads to not removing all faces
+	invalidate(mesh)
 	return outlines
 
 def finalize(mesh, outlines, removal, prec):
@@ -618,7 +619,7 @@ def mesh_filet(mesh, edges, resolution=None, **cutter):
 	# cut faces
 	segments = mesh_edgecut(mesh, edges, conn, **cutter)
 	mesh.check()
-	conn = connef(mesh.faces)
+	topology = mesh.topology()
 	pts = mesh.points
 	
 	# edges for corners surfaces
@@ -652,7 +653,7 @@ def mesh_filet(mesh, edges, resolution=None, **cutter):
 						l,r = lp[:i], lp[i:]
 						break
 				cornerreg(e[0], (lp[0],lp[-1]))
-				if (lp[i], lp[i-1]) in conn:
+				if topology.faceof(lp[i], lp[i-1]) >= 0:
 					ends.append((lp[i-1], lp[i]))
 			# two parts: cutted edge
 			elif len(frags) == 2:
@@ -683,13 +684,14 @@ def mesh_filet(mesh, edges, resolution=None, **cutter):
 	# normals neighbooring corners
 	for e,s in corners.items():
 		for a,b in s:
-			if (b,a) in conn:
-				n = mesh.facenormal(conn[(b,a)])
+			face = topology.faceof(b, a)
+			if face >= 0:
+				n = mesh.facenormal(face)
 				normals[b] = normals.get(b, 0) + n
 				normals[a] = normals.get(a, 0) + n
 	# normals neighbooring cut ends
 	for a,b in ends:
-		n = mesh.facenormal(conn[(b,a)])
+		n = mesh.facenormal(topology.faceof(b, a))
 		normals[a] = noproject(normals[a], n)
 		normals[b] = noproject(normals[b], n)
 	# normalize all contributions
@@ -718,7 +720,7 @@ def mesh_filet(mesh, edges, resolution=None, **cutter):
 		new += tangentcorner(pts, lp, normals, div)
 	# fill gap between existing surface and round extremities
 	for edge in ends:
-		n = mesh.facenormal(conn[(edge[1],edge[0])])
+		n = mesh.facenormal(topology.faceof(edge[1], edge[0]))
 		new += tangentend(pts, edge, normals, div)
 	# round cutted edges
 	for match in junctions:
@@ -25,17 +25,24 @@ Note:
 	To solve ambiguities of interior and exterior, the most outer part of first mesh argument is always considered to belong to the exterior. And the information is propagated through the web.
 '''
 
-from .hashing import connef, connpe, PointSet, PositionMap, meshcellsize, edgekey
+from .hashing import connef, connpe, PointSet, PositionMap, SurfaceIndex, meshcellsize, edgekey
 from .mathutils import (
 		vec3, NUMPREC, distance_pe, isfinite, noproject, dot, cross, normalize,
 		distance2, uvec2, uvec3, typedlist, unproject
 		)
 from operator import itemgetter
 from . import core
-from .mesh import Mesh, Web, Wire, web, line_simplification
+from .mesh import Mesh, Web, Wire, Builder, web, line_simplification, typedlist_to_numpy, numpy_to_typedlist
 from . import triangulation
 
-__all__ = ['pierce', 'boolean', 'intersection', 'union', 'difference']
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+__all__ = [
+	'pierce', 'boolean', 'intersection', 'union', 'difference',
+	'union_many', 'difference_many',
+	]
 
 
 
@@ -44,7 +51,7 @@ __all__ = ['pierce', 'boolean', 'intersection', 'union', 'difference']
 
 
 
-def cut_mesh(m1, m2, prec=None) -> '(Mesh, Web)':
+def cut_mesh(m1, m2, prec=None, threads=None, index=None) -> '(Mesh, Web)':
 	''' Cut m1 faces at their intersections with m2.
 
 	Return:
@@ -56,25 +63,105 @@ def cut_mesh(m1, m2, prec=None) -> '(Mesh, Web)':
 
 	Returning the intersection edges in m1 and associated m2 faces.
 	The algorithm is using ngon intersections and retriangulation, in order to avoid infinite loops and intermediate triangles.
+
+	The triangle intersections are computed on `threads` threads (all available cores if `None`), and the GIL is released meanwhile so other python threads can keep running.
+
+	`index` can be a `SurfaceIndex` of `m1` or `m2`, it is used to only pass the faces of the indexed mesh that are close to the other mesh to the intersection algorithm.
 	'''
 	if not prec:	prec = m1.precision()
-	mn, frontier = core.cut_surface(m1, m2, prec)
+	if index is None:
+		mn, frontier = _cut_surface(m1, m2, prec, threads)
+	elif index.mesh is m2:
+		near = index.near(m1, prec)
+		mn, frontier = _cut_surface(m1, _submesh(m2, near)[0], prec, threads)
+		frontier.tracks = typedlist(near[typedlist_to_numpy(frontier.tracks, 'i8')].astype('u4'), 'I')
+	elif index.mesh is m1:
+		near = index.near(m2, prec)
+		sub, used = _submesh(m1, near)
+		cutted, frontier = _cut_surface(sub, m2, prec, threads)
+		# the points of the cutted part are the points of the submesh followed by the intersection points
+		# intersection points can also land on points of faces outside the submesh
+		new = typedlist_to_numpy(cutted.points, 'f8')[len(used):]
+		merged = _merge_indexed(index, new, prec)
+		fresh = merged < 0
+		merged[fresh] = np.arange(len(m1.points), len(m1.points) + np.count_nonzero(fresh))
+		remap = np.concatenate([used, merged])
+		points = m1.points + numpy_to_typedlist(new[fresh], vec3)
+		kept = np.ones(len(m1.faces), dtype=bool)
+		kept[near] = False
+		mn = Mesh(
+			points,
+			numpy_to_typedlist(np.concatenate([
+				typedlist_to_numpy(m1.faces, 'i8')[kept],
+				remap[typedlist_to_numpy(cutted.faces, 'i8')],
+				]).astype('u4'), uvec3),
+			typedlist(np.concatenate([
+				typedlist_to_numpy(m1.tracks, 'u4')[kept],
+				typedlist_to_numpy(cutted.tracks, 'u4'),
+				]), 'I'),
+			m1.groups,
+			)
+		frontier = Web(
+			points,
+			numpy_to_typedlist(remap[typedlist_to_numpy(frontier.edges, 'i8')].astype('u4'), uvec2),
+			frontier.tracks,
+			)
+	else:
+		raise ValueError('the index must be built on one of the meshes')
 	frontier.groups = m2.faces
 
 	return mn, frontier
 
+def _merge_indexed(index, points, prec) -> np.ndarray:
+	''' index of a point of the indexed mesh closer than `prec` to each given point, or -1 '''
+	merged = np.full(len(points), -1, dtype=np.int64)
+	near = index.around(points, prec)
+	if not len(near):
+		return merged
+	candidates = np.unique(typedlist_to_numpy(index.mesh.faces, 'i8')[near])
+	known = PointSet(prec, manage=numpy_to_typedlist(typedlist_to_numpy(index.mesh.points, 'f8')[candidates], vec3))
+	for i, point in enumerate(points):
+		point = vec3(point)
+		if point in known:
+			merged[i] = candidates[known[point]]
+	return merged
+
+def _cut_surface(m1, m2, prec, threads):
+	return core.cut_surface(m1, m2, prec, **_options(threads=threads))
 
-def pierce_mesh(m1, m2, side=False, prec=None, strict=False) -> Mesh:
+
+def pierce_mesh(m1, m2, side=False, prec=None, strict=False, threads=None, index=None) -> Mesh:
 
 	if not prec:	prec = m1.precision()
-	return core.pierce_surface(m1, m2, side, prec, strict)
+	if index is not None:
+		m2 = _prune(m1, m2, prec, index)
+	return core.pierce_surface(m1, m2, side, prec, strict, **_options(threads=threads))
 
-def boolean_mesh(m1, m2, sides=(False,True), prec=None) -> Mesh:
+def _prune(m1, m2, prec, index) -> Mesh:
+	''' m2 with only its faces close to m1, found using an index of either mesh
+
+		The core also retriangulates the faces of m1 sharing a cell with faces of m2 that do not intersect them, so the faces closer than the core cellsize are kept. The other faces are collapsed on their first point instead of being removed, so the core sees the same points, cellsize and face indices, and gives the same result as with the whole m2
+	'''
+	margin = max(meshcellsize(m1), meshcellsize(m2)) + prec
+	if index.mesh is m2:
+		near = index.near(m1, margin)
+	elif index.mesh is m1:
+		near = index.touching(m2, margin)
+	else:
+		raise ValueError('the index must be built on one of the meshes')
+	faces = typedlist_to_numpy(m2.faces, 'u4')
+	far = np.ones(len(faces), dtype=bool)
+	far[near] = False
+	pruned = faces.copy()
+	pruned[far] = faces[far][:,:1]
+	return Mesh(m2.points, numpy_to_typedlist(pruned, uvec3), m2.tracks, m2.groups)
+
+def boolean_mesh(m1, m2, sides=(False,True), prec=None, threads=None, index=None) -> Mesh:
 
 	if not prec:	prec = max(m1.precision(), m2.precision())
 
-	mc1 = pierce_mesh(m1, m2, sides[0], prec)
-	mc2 = pierce_mesh(m2, m1, sides[1], prec)
+	mc1 = pierce_mesh(m1, m2, sides[0], prec, threads=threads, index=index)
+	mc2 = pierce_mesh(m2, m1, sides[1], prec, threads=threads, index=index)
 	if sides[0] and not sides[1]:		mc1 = mc1.flip()
 	if not sides[0] and sides[1]:		mc2 = mc2.flip()
 	res = mc1 + mc2
@@ -83,6 +170,206 @@ def boolean_mesh(m1, m2, sides=(False,True), prec=None) -> Mesh:
 
 
 
+def boolean_mesh_many(base, tools, sides=(False,True), prec=None) -> Mesh:
+	''' boolean between a mesh and many other meshes, whose boxes must not intersect each other
+
+		It is equivalent to a `boolean_mesh` between `base` and the union of `tools`, but the base is cutted in one only pass against all the tools, and each tool is cutted only against the part of the base that is close to it.
+	'''
+	tools = list(tools)
+	if not prec:	prec = max(m.precision() for m in (base, *tools))
+	base_arrays = _face_boxes(base)
+	tools_arrays = [_face_boxes(tool)  for tool in tools]
+
+	# cut the tools against the base faces close to them
+	result = Builder(Mesh)
+	others = Builder(Mesh)
+	for tool, arrays in zip(tools, tools_arrays):
+		if not tool.faces:	continue
+		low, high = arrays[2].min(axis=0) - prec, arrays[3].max(axis=0) + prec
+		others += _crop(tool, arrays, low, high)
+		mc2 = _pierce_regions(tool, _crop(base, base_arrays, low, high), [base], sides[1], prec)
+		if not sides[0] and sides[1]:	mc2 = mc2.flip()
+		result += mc2
+
+	# cut the base against all the tools at once
+	mc1 = _pierce_regions(base, others.build(), tools, sides[0], prec)
+	if sides[0] and not sides[1]:	mc1 = mc1.flip()
+	result += mc1
+	result = result.build()
+	result.mergeclose()
+	return result
+
+def _pierce_regions(m1, m2, envelopes, side, prec) -> Mesh:
+	''' same as `pierce_mesh` but the side of every region of the cutted mesh is decided at once using the intersection frontier
+		regions not touching the frontier are decided using `envelopes`, the closed meshes `m2` was cropped from
+	'''
+	if m2.faces:
+		cutted, frontier = cut_mesh(m1, m2, prec)
+	else:
+		cutted, frontier = m1, Web()
+	return _select_regions(cutted, frontier, m2, envelopes, side, prec)
+
+def _select_regions(cutted, frontier, m2, envelopes, side, prec, strict=False) -> Mesh:
+	''' keep the regions of the cutted mesh on the given side of m2
+		regions not touching the frontier are decided using `envelopes` when given, else they are kept only when there is no frontier at all and `side` is False, just like `pierce_mesh`
+	'''
+	if frontier.edges:
+		labels = _regions(cutted, frontier)
+	else:
+		labels = np.zeros(len(cutted.faces), dtype=np.int64)
+	count = int(labels.max(initial=-1)) + 1
+	points = typedlist_to_numpy(cutted.points, 'f8')
+	faces = typedlist_to_numpy(cutted.faces, 'i8')
+
+	# every face adjacent to the frontier votes for its region, the vote is its side relative to the face of m2 causing the frontier
+	votes = np.zeros(count)
+	conflicts = np.zeros((2, count), dtype=bool)
+	if frontier.edges:
+		stops = typedlist_to_numpy(frontier.edges, 'i8')
+		n = len(points)
+		stopkeys = np.minimum(stops[:,0], stops[:,1]) * n + np.maximum(stops[:,0], stops[:,1])
+		order = np.argsort(stopkeys)
+		stopkeys = stopkeys[order]
+		causes = typedlist_to_numpy(frontier.tracks, 'i8')[order]
+
+		corners = typedlist_to_numpy(m2.points, 'f8')[typedlist_to_numpy(m2.faces, 'i8')]
+		normals = np.cross(corners[:,1]-corners[:,0], corners[:,2]-corners[:,0])
+		norms = np.linalg.norm(normals, axis=1)
+		# degenerated faces of m2 have no side, so they do not vote
+		normals /= np.where(norms > 0, norms, 1)[:,np.newaxis]
+		for k in range(3):
+			a, b, c = faces[:,k], faces[:,(k+1)%3], faces[:,(k+2)%3]
+			keys = np.minimum(a,b) * n + np.maximum(a,b)
+			found = np.minimum(np.searchsorted(stopkeys, keys), len(stopkeys)-1)
+			adjacent = np.flatnonzero(stopkeys[found] == keys)
+			proj = np.einsum('ij,ij->i',
+				points[c[adjacent]] - points[a[adjacent]],
+				normals[causes[found[adjacent]]])
+			np.add.at(votes, labels[adjacent], np.sign(proj) * (np.abs(proj) > prec))
+			conflicts[0, labels[adjacent[proj > prec]]] = True
+			conflicts[1, labels[adjacent[proj < -prec]]] = True
+	if strict and np.any(conflicts[0] & conflicts[1]):
+		raise ValueError('the pierced surface is both side of the piercing surface')
+	selected = (votes > 0) != side
+	# regions not touched by the frontier are islands entirely inside or outside
+	untouched = np.flatnonzero(votes == 0)
+	if len(untouched) and envelopes is None:
+		selected[untouched] = not frontier.edges and not side
+	elif len(untouched):
+		samples = _region_samples(cutted, labels, count)[untouched]
+		inside = np.zeros(len(untouched), dtype=bool)
+		for envelope in envelopes:
+			inside |= _winding(envelope, samples) > 0.5
+		selected[untouched] = inside == side
+
+	selected = selected[labels]
+	return Mesh(
+		cutted.points,
+		numpy_to_typedlist(faces[selected].astype('u4'), uvec3),
+		typedlist(typedlist_to_numpy(cutted.tracks, 'u4')[selected], 'I'),
+		cutted.groups,
+		)
+
+def _face_boxes(mesh) -> '(np.ndarray, np.ndarray, np.ndarray, np.ndarray)':
+	''' points and faces arrays, and bounding box corners of each face '''
+	points = typedlist_to_numpy(mesh.points, 'f8')
+	faces = typedlist_to_numpy(mesh.faces, 'u4')
+	corners = points[faces]
+	return points, faces, corners.min(axis=1), corners.max(axis=1)
+
+def _crop(mesh, arrays, low, high) -> Mesh:
+	''' new mesh with only the faces intersecting the given box and the points they use '''
+	points, faces, fmin, fmax = arrays
+	selected = np.all(fmax >= low, axis=1) & np.all(fmin <= high, axis=1)
+	return _submesh(mesh, np.flatnonzero(selected))[0]
+
+def _submesh(mesh, selected) -> '(Mesh, np.ndarray)':
+	''' new mesh with only the selected faces and the points they use, and the indices of these points in the original mesh '''
+	faces = typedlist_to_numpy(mesh.faces, 'u4')[selected]
+	used, reindex = np.unique(faces, return_inverse=True)
+	return Mesh(
+		numpy_to_typedlist(typedlist_to_numpy(mesh.points, 'f8')[used], vec3),
+		numpy_to_typedlist(reindex.reshape(faces.shape).astype('u4'), uvec3),
+		typedlist(typedlist_to_numpy(mesh.tracks, 'u4')[selected], 'I'),
+		mesh.groups,
+		), used
+
+def _disjoint_layers(meshes, prec) -> list:
+	''' split the meshes in layers of meshes whose boxes do not intersect each other '''
+	# each layer keeps the bounds of its meshes in an array growing by doubling, so testing a box against a layer is a single vectorized operation
+	layers = []
+	for mesh in meshes:
+		if not mesh.faces:	continue
+		box = mesh.box()
+		bound = np.concatenate([np.array(box.min) - prec, np.array(box.max) + prec])
+		for layer in layers:
+			members, bounds = layer
+			used = bounds[:len(members)]
+			if not np.any(np.all(used[:,3:] >= bound[:3], axis=1) & np.all(used[:,:3] <= bound[3:], axis=1)):
+				if len(members) == len(bounds):
+					bounds = layer[1] = np.concatenate([bounds, np.empty_like(bounds)])
+				bounds[len(members)] = bound
+				members.append(mesh)
+				break
+		else:
+			bounds = np.empty((4, 6))
+			bounds[0] = bound
+			layers.append([[mesh], bounds])
+	return [members  for members, bounds in layers]
+
+def _regions(mesh, frontier) -> np.ndarray:
+	''' label the faces by connected regions, regions are separated by the frontier edges '''
+	faces = typedlist_to_numpy(mesh.faces, 'i8')
+	n = len(mesh.points)
+	# unoriented keys of all face edges
+	a, b = faces.ravel(), np.roll(faces, -1, axis=1).ravel()
+	keys = np.minimum(a,b) * n + np.maximum(a,b)
+	owners = np.repeat(np.arange(len(faces)), 3)
+	# frontier edges are not crossed
+	if frontier.edges:
+		stops = typedlist_to_numpy(frontier.edges, 'i8')
+		free = ~np.isin(keys, np.minimum(stops[:,0], stops[:,1]) * n + np.maximum(stops[:,0], stops[:,1]))
+		keys, owners = keys[free], owners[free]
+	# faces sharing an edge are connected
+	order = np.argsort(keys, kind='stable')
+	keys, owners = keys[order], owners[order]
+	same = keys[1:] == keys[:-1]
+	graph = coo_matrix(
+		(np.ones(np.count_nonzero(same), dtype=np.int8), (owners[:-1][same], owners[1:][same])),
+		shape=(len(faces), len(faces)))
+	return connected_components(graph, directed=False)[1]
+
+def _region_samples(mesh, labels, count) -> np.ndarray:
+	''' a point inside the biggest face of each region '''
+	corners = typedlist_to_numpy(mesh.points, 'f8')[typedlist_to_numpy(mesh.faces, 'u4')]
+	areas = np.linalg.norm(np.cross(corners[:,1]-corners[:,0], corners[:,2]-corners[:,0]), axis=1)
+	# sort by region then by decreasing area, the first face of each region is the biggest
+	order = np.lexsort((-areas, labels))
+	first = order[np.searchsorted(labels[order], np.arange(count))]
+	return corners[first].mean(axis=1)
+
+def _winding(mesh, points) -> np.ndarray:
+	''' generalized winding number of the mesh around each point
+		it is close to 1 for points inside a closed envelope and 0 outside
+	'''
+	corners = typedlist_to_numpy(mesh.points, 'f8')[typedlist_to_numpy(mesh.faces, 'u4')]
+	result = np.empty(len(points))
+	chunk = max(1, 2**20 // max(1, len(corners)))
+	for start in range(0, len(points), chunk):
+		# solid angle of each triangle seen from each point (Van Oosterom & Strackee)
+		v = corners[np.newaxis] - points[start:start+chunk, np.newaxis, np.newaxis]
+		l = np.linalg.norm(v, axis=-1)
+		a, b, c = v[...,0,:], v[...,1,:], v[...,2,:]
+		det = np.einsum('...i,...i', a, np.cross(b, c))
+		div = (   l[...,0]*l[...,1]*l[...,2]
+				+ np.einsum('...i,...i', a, b) * l[...,2]
+				+ np.einsum('...i,...i', b, c) * l[...,0]
+				+ np.einsum('...i,...i', c, a) * l[...,1] )
+		result[start:start+chunk] = np.arctan2(det, div).sum(axis=-1) / (2*np.pi)
+	return result
+
+
+
 def cut_web(w1: Web, ref: Web, prec=None) -> '(Web, Wire)':
 	''' Cut the web edges at their intersectsions with the `ref` web
 
@@ -91,104 +378,22 @@ def cut_web(w1: Web, ref: Web, prec=None) -> '(Web, Wire)':
 
 				:cutted(Web):	is `w1` with the edges cutted, but representing the same lines as before
 				:frontier(Wire): is a Web where edges are the intersection edges, and whose groups are the causing faces in `ref`
+
+		`w1` is left untouched: `cutted` and `frontier` share a new points buffer, made of the points of `w1` followed by the intersection points
 		'''
 	if not prec:  prec = w1.precision()
-	frontier = Wire(w1.points, [], [], groups=ref.edges)
-
-	# topology informations for optimization
-	points = PointSet(prec, manage=w1.points)
-	prox = PositionMap(meshcellsize(ref))
-	for e in range(len(ref.edges)):
-		prox.add(ref.edgepoints(e), e)
-	conn = connpe(w1.edges)
-
-	mn = Web(w1.points, groups=w1.groups)  # resulting web
-	for e1 in range(len(w1.edges)):
-		processed = False  # flag enabled when the edge is reconstructed
-
-		# collect edges in ref that can have intersection with e1
-		close = set( prox.get(w1.edgepoints(e1)) )
-		if close:
-			# no need to get the straight zone around because on the case of an edge, it will not grow in complexity more than the number of cut segments
-			# and an edge is easy to reweb after multiple intersections
-			# compute intersections
-			segts = {}
-			for e2 in close:
-				intersect = intersect_edges(w1.edgepoints(e1), ref.edgepoints(e2), prec)
-				if intersect:
-					seg = points.add(intersect)
-					segts.setdefault(seg, e2)
-
-			# reconstruct the geometries
-			if segts:
-				e = w1.edges[e1]
-				# reweb the cutted edge
-				direction = w1.points[e[1]] - w1.points[e[0]]
-				sorted_segts = sorted(segts.items(), key=lambda s: dot(w1.points[s[0]], direction))
-				# append the rewebed edge in association with the original track
-				frontier += Wire(
-						w1.points,
-						map(itemgetter(0), sorted_segts),
-						map(itemgetter(1), sorted_segts),
-						ref.edges,
-						)
-
-				suite = list(map(itemgetter(0), sorted_segts))
-				if suite[0] != e[0]:	suite.insert(0, e[0])
-				if suite[-1] != e[-1]:	suite.append(e[-1])
-				mn += web(Wire(
-						w1.points,
-						suite,
-						[w1.tracks[e1]] * len(suite),
-						w1.groups,
-						))
-				processed = True
-
-		# keep the non intersected faces as is
-		if not processed:
-			mn.edges.append(w1.edges[e1])
-			mn.tracks.append(w1.tracks[e1])
-
-	mn.check()
+	mn, frontier = core.cut_web(w1, ref, prec)
+	frontier.points = mn.points
+	frontier.groups = ref.edges
 	return mn, frontier
 
 def pierce_web(web, ref, side=False, prec=None) -> Web:
+	''' Cut the web edges at their intersections with the `ref` web, and keep the islands on the given side
 
+		Unlike the former python implementation, an island can also be started from the first edge of the web.
+	'''
 	if not prec:	prec = web.precision()
-	web, frontier = cut_web(web, ref, prec)
-	conn = connpe(web.edges)		# connectivity
-	stops = set(frontier.indices)	# propagation stop points
-
-	used = [0] * len(web.edges)		# whether to keep the matching edges or not
-
-	# sort points by distance to a "center"
-	center = web.barycenter()
-	order = sorted(range(len(web.points)), key=lambda i:  distance2(web.points[i], center))
-
-	# always start an island from the most exterior
-	for start in order:
-		if start in stops:	continue
-		ei = next(conn[start], None)
-		if not ei or used[ei]:	continue
-
-		# propagate
-		front = [(start, not side)]		# points on the propagation front
-		while front:
-			last, keep = front.pop()
-			for ei in conn[last]:
-				if used[ei]:	continue
-				used[ei] = 1 if keep else 2
-				direction = int(web.edges[ei][0] == last)
-				current = web.edges[ei][direction]
-				front.append((current, keep ^ (current in stops)))
-
-	# filter web content to keep
-	return Web(
-				web.points,
-				[e  for u,e in zip(used, web.edges) if u == 1],
-				[t  for u,t in zip(used, web.tracks) if u == 1],
-				web.groups,
-				)
+	return core.pierce_web(web, ref, side, prec)
 
 def boolean_web(w1, w2, sides, prec=None) -> Web:
 
@@ -255,109 +460,24 @@ def intersect_edges(e1: '(vec3,vec3)', e2: '(vec3,vec3)', prec) -> vec3:
 
 
 def cut_web_mesh(w1: Web, ref: Mesh, prec=None) -> '(Web, Wire)':
-	''' Cut the web inplace at its intersections with the `ref` web.
+	''' Cut the web edges at their intersections with the `ref` mesh.
 
 	Return:
 		`(cutted, frontier)`
+
+	`w1` is left untouched, see `cut_web`
 	'''
 	if not prec:  prec = w1.precision()
-	frontier = Wire(w1.points, [], [], groups=ref.faces)
-
-	# topology informations for optimization
-	points = PointSet(prec, manage=w1.points)
-	prox = PositionMap(meshcellsize(ref))
-	for f in range(len(ref.faces)):
-		prox.add(ref.facepoints(f), f)
-	conn = connpe(w1.edges)
-
-	mn = Web(w1.points, groups=w1.groups)  # resulting web
-	for e1 in range(len(w1.edges)):
-		processed = False	# flag enabled when the edge is reconstructed
-
-		# collect edges in ref that can have intersection with e1
-		close = set(prox.get(w1.edgepoints(e1)))
-		if close:
-
-			# no need to get the straight zone around because on the case of an edge, it will not grow in complexity more than the number of cut segments
-			# and an edge is easy to remesh after multiple intersections
-			# compute intersections
-			segts = {}
-			for f2 in close:
-				intersect = intersect_edge_face(w1.edgepoints(e1), ref.facepoints(f2), prec)
-				if intersect:
-					seg = points.add(intersect)
-					segts.setdefault(seg, f2)
-
-			# reconstruct the geometries
-			if segts:
-				e = w1.edges[e1]
-				# reweb the cutted edge
-				direction = w1.points[e[1]] - w1.points[e[0]]
-				sorted_segts = sorted(segts.items(), key=lambda s: dot(w1.points[s[0]], direction))
-				# append the rewebed edge in association with the original track
-				frontier += Wire(
-						w1.points,
-						list(map(itemgetter(0), sorted_segts)),
-						list(map(itemgetter(1), sorted_segts)),
-						ref.faces,
-						)
-				mn += web(Wire(
-						w1.points,
-						[e[0]] + list(map(itemgetter(0), sorted_segts)) + [e[1]],
-						[w1.tracks[e1]] * (len(sorted_segts)+2),
-						w1.groups,
-						))
-				processed = True
-
-		# keep the non intersected faces as is
-		if not processed:
-			mn.edges.append(w1.edges[e1])
-			mn.tracks.append(w1.tracks[e1])
-
+	mn, frontier = core.cut_web_mesh(w1, ref, prec)
+	frontier.points = mn.points
+	frontier.groups = ref.faces
 	return mn, frontier
 
 
 def pierce_web_mesh(w1: Web, ref: Mesh, side=False, prec=None) -> Web:
 
 	if not prec:	prec = w1.precision()
-
-	w1, frontier = cut_web_mesh(w1, ref, prec)
-	conn = connpe(w1.edges)			# connectivity
-	stops = set(frontier.indices)	# propagation stop points
-
-	used = [False] * len(w1.edges)	# whether to keep the matching edges
-
-	for p1, fi in zip(frontier.indices, frontier.tracks):
-		front = []	# points on the propagation front
-
-		# check which side to keep
-		normal = ref.facenormal(fi)
-		for ei in conn[p1]:
-			e1 = w1.edges[ei]
-			direction = int(e1[0] == p1)
-			if side ^ (dot(w1.points[e1[direction]] - w1.points[p1], normal) > 0):
-				front.append(e1[direction])
-				used[ei] = True
-
-		# propagate
-		while front:
-			last = front.pop()
-			if last in stops:	continue
-
-			for ei in conn[last]:
-				if used[ei]:	continue
-				used[ei] = True
-				direction = int(w1.edges[ei][0] == last)
-				next = w1.edges[ei][direction]
-				front.append(next)
-
-	# filter web content to keep
-	return Web(
-			w1.points,
-			[e  for u,e in zip(used, w1.edges) if u],
-			[t  for u,t in zip(used, w1.tracks) if u],
-			w1.groups,
-			)
+	return core.pierce_web_mesh(w1, ref, side, prec)
 
 def intersect_edge_face(edge: '(vec3, vec3)', face: '(vec3, vec3, vec3)', prec) -> vec3:
 	''' Intersection between a segment and a triangle
@@ -391,7 +511,7 @@ pierce_ops = {
 	(Web,Web):		pierce_web,
 	(Web,Mesh):		pierce_web_mesh,
 	}
-def pierce(m, ref, side=False, prec=None):
+def pierce(m, ref, side=False, prec=None, threads=None, index=None):
 	''' Cut a web/mesh and remove its parts considered inside the `ref` shape
 
 		Overloads:
@@ -404,18 +524,23 @@ def pierce(m, ref, side=False, prec=None):
 
 		 - False keeps the exterior part (part exclusive to the other mesh)
 		 - True keeps the interior part (the common part)
+
+		Options only supported between `Mesh`:
+
+		 - `threads` is the number of threads used to intersect meshes, all available cores are used if `None`
+		 - `index` is a `SurfaceIndex` of one of the meshes, to reuse when many operations involve the same mesh
 	'''
 	op = pierce_ops.get((type(m), type(ref)))
 	if not op:
 		raise TypeError('pierce is not possible between {} and {}'.format(type(m).__name__, type(ref).__name__))
-	return op(m, ref, side, prec)
+	return op(m, ref, side, prec, **_options(threads=threads, index=index))
 
 
 boolean_ops = {
 	(Mesh,Mesh):	boolean_mesh,
 	(Web,Web):		boolean_web,
 	}
-def boolean(a, b, sides=(False,True), prec=None):
+def boolean(a, b, sides=(False,True), prec=None, threads=None, index=None):
 	''' Cut two web/mesh and keep its interior or exterior parts
 
 		Overloads:
@@ -427,26 +552,67 @@ def boolean(a, b, sides=(False,True), prec=None):
 
 		 - False keeps the exterior part (part exclusive to the other mesh)
 		 - True keeps the common part
+
+		Options only supported between `Mesh`:
+
+		 - `threads` is the number of threads used to intersect meshes, all available cores are used if `None`
+		 - `index` is a `SurfaceIndex` of one of the meshes, to reuse when many operations involve the same mesh
 	'''
 	op = boolean_ops.get((type(a), type(b)))
 	if not op:
 		raise TypeError('boolean is not possible between {} and {}'.format(type(a), type(b)))
-	return op(a, b, sides, prec)
+	return op(a, b, sides, prec, **_options(threads=threads, index=index))
+
+def _options(**options) -> dict:
+	''' only the options that are set, so operations not supporting them can still be called when they are not '''
+	return {key: value  for key, value in options.items()  if value is not None}
 
-def union(a, b) -> Mesh:
+def union(a, b, threads=None, index=None) -> Mesh:
 	''' Return a mesh for the union of the volumes.
-		It is a boolean with selector `(False,False)`
+		It is a boolean with selector `(False,False)`, `threads` and `index` are passed to `boolean`
 	'''
-	return boolean(a,b, (False,False))
+	return boolean(a,b, (False,False), threads=threads, index=index)
 
-def intersection(a, b) -> Mesh:
+def intersection(a, b, threads=None, index=None) -> Mesh:
 	''' Return a mesh for the common volume.
-		It is a boolean with selector `(True, True)`
+		It is a boolean with selector `(True, True)`, `threads` and `index` are passed to `boolean`
 	'''
-	return boolean(a,b, (True,True))
+	return boolean(a,b, (True,True), threads=threads, index=index)
 
-def difference(a, b) -> Mesh:
+def difference(a, b, threads=None, index=None) -> Mesh:
 	''' Return a mesh for the volume of `a` less the common volume with `b`
-		It is a boolean with selector `(False, True)`
+		It is a boolean with selector `(False, True)`, `threads` and `index` are passed to `boolean`
+	'''
+	return boolean(a,b, (False,True), threads=threads, index=index)
+
+def union_many(meshes, prec=None) -> Mesh:
+	''' Return a mesh for the union of the volumes of all the given meshes.
+
+		This is equivalent to chaining `union` on all the meshes, but the meshes are processed by packs of meshes whose boxes do not intersect, and the union is cutted only once per pack. So the cost is mostly linear with the number of meshes instead of quadratic.
+	'''
+	meshes = list(meshes)
+	if not meshes:
+		return Mesh()
+	if not prec:	prec = max(m.precision() for m in meshes)
+	layers = _disjoint_layers(meshes, prec)
+	if not layers:
+		return Mesh()
+	result = Mesh.concat(layers[0])
+	for layer in layers[1:]:
+		result = boolean_mesh_many(result, layer, (False,False), prec)
+	return result
+
+def difference_many(base, tools, prec=None) -> Mesh:
+	''' Return a mesh for the volume of `base` less the volumes of all the `tools`
+
+		This is equivalent to chaining `difference` for each tool, but the tools are processed by packs of tools whose boxes do not intersect, and the base is cutted only once per pack. So the cost is mostly linear with the number of tools instead of quadratic.
+
+		Example:
+			>>> part = difference_many(part, [bolt_slot(...)  for hole in holes])
 	'''
-	return boolean(a,b, (False,True))
+	tools = list(tools)
+	if not prec:	prec = max(m.precision() for m in (base, *tools))
+	result = base
+	for layer in _disjoint_layers(tools, prec):
+		result = boolean_mesh_many(result, layer, (False,True), prec)
+	return result
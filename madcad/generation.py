@@ -10,6 +10,7 @@ from copy import copy
 from . import triangulation
 from . import settings
 from . import primitives
+from . import mathutils
 from .mathutils import (
 		angleAxis, cross, distance, dot, length, mat3_cast, normalize, quat,
 		translate, uvec2, uvec3, Axis, NUMPREC, O, Z, anglebt, arclength,
@@ -692,13 +693,22 @@ def repeat(pattern, repetitions:int, transform):
 		repetitions:   the number of repetitions
 		transform:     is the transformation between each duplicate
 	'''
-	current = pattern
-	pool = type(pattern)(groups=pattern.groups)
-	if repetitions:	pool += current
+	step = None if callable(transform) else mathutils.transform(transform)
+	if step is not None:
+		transforms = [mat4()] if repetitions else []
+		for i in range(1, repetitions):
+			transforms.append(step * transforms[-1])
+		result = pattern.transform_many(transforms)
+		# the result is a new mesh, it must not grow the groups of the pattern
+		result.groups = list(pattern.groups)
+		return result
+	
+	copies = [pattern] if repetitions else []
 	for i in range(1, repetitions):
-		current = current.transform(transform)
-		pool += current
-	return pool
+		copies.append(copies[-1].transform(transform))
+	if not copies:
+		return type(pattern)(groups=list(pattern.groups))
+	return type(pattern).concat(copies)
 
 def repeataround(pattern, repetitions:int=None, axis=Axis(O,Z), angle=2*pi):
 	''' same as [repeat] using [rotatearound] '''
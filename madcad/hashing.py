@@ -10,6 +10,10 @@ from .mathutils import vec3, NUMPREC, floor, ceil, sqrt, inf, cross, i64vec3, le
 from . import core
 from . import mesh
 from functools import reduce
+from collections import OrderedDict
+from weakref import WeakSet
+from zlib import crc32
+import numpy as np
 
 
 # ------ connectivity tools -------
@@ -75,6 +79,139 @@ def connexity(links):
 			reach[p] = reach.get(p,0) +1
 	return reach
 
+class Topology:
+	''' Adjacency of the faces of a `Mesh`, built at once in the compiled core and shared by the algorithms needing connectivity
+
+		It is usually obtained with `Mesh.topology()`, which caches it until the faces change. It can be passed to the `conn` argument of `Mesh.propagate`, `Mesh.islands`, `Mesh.orient` and `mesh_curvatures` in place of the connectivity they would build otherwise.
+
+		Side `k` of a face `f` is its edge `(f[k-1], f[k])`. Compressed rows are tuples `(offsets, items)` where row `i` is `items[offsets[i]:offsets[i+1]]`, see `row()`
+
+		Attributes:
+			faces:        `(f,3)` array of the faces the topology was built from
+			edges:        `(e,2)` array of the unoriented edges, in order of first appearance in the faces
+			faceedges:    `(f,3)` array of the index in `edges` of each side of each face
+			neighbours:   `(f,3)` array of the face owning the reverse of each side of each face, `-1` if none
+			edgefaces:    compressed rows of the faces around each edge
+			pointfaces:   compressed rows of the faces around each point
+			pointpoints:  compressed rows of the points linked to each point by an edge
+	'''
+	__slots__ = 'faces', 'edges', 'faceedges', 'neighbours', 'edgefaces', 'pointfaces', 'pointpoints', '_connef'
+
+	def __init__(self, surface):
+		(	edges, faceedges, neighbours, 
+			edgefaces, edgefaces_items,
+			pointfaces, pointfaces_items,
+			pointpoints, pointpoints_items,
+		) = core.topology_surface(surface)
+		tonumpy = mesh.typedlist_to_numpy
+		self.faces = tonumpy(surface.faces, 'i8').reshape(-1, 3)
+		self.edges = tonumpy(edges, 'i8').reshape(-1, 2)
+		self.faceedges = tonumpy(faceedges, 'i8').reshape(-1, 3)
+		self.neighbours = tonumpy(neighbours, 'i8').reshape(-1, 3)
+		self.neighbours[self.neighbours == 0xffffffff] = -1
+		self.edgefaces = (tonumpy(edgefaces, 'i8'), tonumpy(edgefaces_items, 'i8'))
+		self.pointfaces = (tonumpy(pointfaces, 'i8'), tonumpy(pointfaces_items, 'i8'))
+		self.pointpoints = (tonumpy(pointpoints, 'i8'), tonumpy(pointpoints_items, 'i8'))
+		self._connef = None
+
+	@staticmethod
+	def row(rows: tuple, i: int) -> np.ndarray:
+		''' Items of row `i` in the given compressed rows '''
+		offsets, items = rows
+		return items[offsets[i]:offsets[i+1]]
+
+	def faceof(self, a: int, b: int) -> int:
+		''' Face owning the oriented edge `(a,b)` or `-1` if none, like `connef(faces).get((a,b), -1)`
+		
+			The oriented edges are hashed on first call, so the next lookups are constant time and this can be used in loops
+		'''
+		return self._sides().get((a,b), -1)
+
+	def connef(self) -> dict:
+		''' Oriented edge to face connectivity, as a new dict identical to `connef(faces)` '''
+		return dict(self._sides())
+
+	def _sides(self) -> dict:
+		''' oriented edge to face dict, built once and shared by the lookups '''
+		if self._connef is None:
+			sides = np.stack([self.faces, np.roll(self.faces, -1, axis=1)], axis=2).reshape(-1, 2)
+			owners = np.repeat(np.arange(len(self.faces)), 3)
+			self._connef = dict(zip(map(tuple, sides.tolist()), owners.tolist()))
+		return self._connef
+
+	def connpp(self) -> dict:
+		''' Point to point connectivity, as a new dict with the same content as `connpp(faces)` '''
+		return _rows_dict(range(len(self.pointpoints[0])-1), self.pointpoints)
+
+	def connuf(self) -> dict:
+		''' Unoriented edge to faces connectivity, as a new dict `{edgekey: [faces]}` '''
+		return _rows_dict(map(tuple, self.edges.tolist()), self.edgefaces)
+
+def _rows_dict(keys, rows) -> dict:
+	''' dict of the non-empty rows, as lists '''
+	offsets, items = rows[0].tolist(), rows[1].tolist()
+	return {key: items[start:stop]
+		for key, start, stop in zip(keys, offsets, offsets[1:])
+		if stop > start}
+
+
+class MeshCache:
+	''' Small cache of structures derived from the buffers of meshes, like `Topology` or `madcad.query.Tree`
+
+		Entries are keyed by the identity of a mesh and checked against the identity, length and a checksum of the content of the buffers they derive from. So the structure is rebuilt on next access when a buffer is replaced, resized or modified in place, and a cache hit only costs a pass over the buffers, much faster than building the structure. The least recently used entries are dropped above `size` entries
+	'''
+	# all the caches, for `invalidate`
+	instances = WeakSet()
+
+	def __init__(self, size=16):
+		self.size = size
+		self.entries = OrderedDict()
+		MeshCache.instances.add(self)
+
+	def get(self, mesh, kind, depends: tuple, create: callable):
+		''' Return the structure of the given kind for `mesh`, calling `create()` if it is not cached or if the `depends` buffers have changed '''
+		key = (id(mesh), kind)
+		stamp = tuple(map(_stamp, depends))
+		cached = self.entries.get(key)
+		if cached and cached[0] == stamp:
+			self.entries.move_to_end(key)
+			return cached[1]
+		value = create()
+		# the buffers are kept alive so their identities cannot be reused by other buffers
+		self.entries[key] = (stamp, value, tuple(depends))
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.size:
+			self.entries.popitem(last=False)
+		return value
+
+	def discard(self, mesh):
+		''' Drop the structures of `mesh` from this cache '''
+		for key in [key  for key in self.entries  if key[0] == id(mesh)]:
+			del self.entries[key]
+
+	def clear(self):
+		self.entries.clear()
+
+def _stamp(buffer) -> tuple:
+	''' identity of a buffer, its length and a checksum of its content '''
+	if isinstance(buffer, (int, str)):
+		return buffer
+	try:
+		content = crc32(buffer)
+	except TypeError:
+		# not a contiguous buffer, like a list of vectors
+		content = hash(tuple(map(tuple, buffer)))
+	return (id(buffer), len(buffer), content)
+
+def invalidate(mesh):
+	''' Drop the cached structures derived from `mesh`, like its `topology()` or its query trees, to release them before the mesh is modified or deleted '''
+	for cache in MeshCache.instances:
+		cache.discard(mesh)
+
+# cached topologies of meshes, see `Mesh.topology()`
+topologies = MeshCache()
+
+
 def suites(lines, oriented=True, cut=True, loop=False):
 	''' Return a list of the suites that can be formed with lines.
 		`lines` is an iterable of edges
@@ -302,6 +439,38 @@ class PositionMap:
 			if k not in self.dict:	self.dict[k] = [obj]
 			else:					self.dict[k].append(obj)
 	
+	def keysfor_mesh(self, surface) -> '(np.ndarray, np.ndarray)':
+		''' Rasterize all the faces of a `Mesh` or all the edges of a `Web` in one native call
+		
+			Return:
+				`(keys, owners)` with keys an int64 array of shape `(n,3)` of position keys, and owners the index of the face or edge each key belongs to. The keys of each primitive are the same as `keysfor` would yield.
+		'''
+		if isinstance(surface, mesh.Mesh):
+			keys, owners = core.rasterize_triangles(surface, self.cellsize)
+		elif isinstance(surface, mesh.Web):
+			keys, owners = core.rasterize_segments(surface, self.cellsize)
+		else:
+			raise TypeError("keysfor_mesh only supports Mesh and Web")
+		return mesh.typedlist_to_numpy(keys, 'i8'), mesh.typedlist_to_numpy(owners, 'i8')
+	
+	def add_mesh(self, surface):
+		''' Add all the faces of a `Mesh`, associated with their index '''
+		assert isinstance(surface, mesh.Mesh)
+		self._ingest(*self.keysfor_mesh(surface))
+	
+	def add_web(self, web):
+		''' Add all the edges of a `Web`, associated with their index '''
+		assert isinstance(web, mesh.Web)
+		self._ingest(*self.keysfor_mesh(web))
+	
+	def _ingest(self, keys, objs):
+		''' Insert objects at the given keys, as if they were added in order '''
+		if not len(keys):	return
+		# the objects are grouped by cell and merged in the dict in one native call
+		core.positionmap_ingest(self.dict, 
+			mesh.numpy_to_typedlist(np.asarray(keys, dtype=np.int64), i64vec3), 
+			mesh.numpy_to_typedlist(np.asarray(objs, dtype=np.uint32), 'I'))
+	
 	def get(self, space):
 		''' 
 			get the objects potentially intersecting the given primitive 
@@ -348,6 +517,145 @@ def meshcellsize(mesh):
 	return length(mesh.box().size) / sqrt(len(mesh.points))
 
 
+class SurfaceIndex:
+	''' Spatial index of the faces of a mesh, meant to be built once and reused for many boolean operations against the same mesh.
+		
+		Every face is registered in the cells its bounding box covers. The index is stored in sorted numpy arrays, so it can be pickled and queried for many faces at once.
+		
+		The index is only valid as long as the indexed faces and points are not modified, but faces can be appended to the mesh: they are indexed at the next query or `update`.
+		
+		Attributes defined here:
+			:mesh:       the indexed mesh
+			:cellsize:   the boxing parameter
+			:origin:     the cell the keys are relative to
+			:keys:       sorted packed keys of the cells occupied by faces
+			:faces:      the face index for each key
+			:extent:     the lowest and highest cells occupied by faces, relative to `origin`
+			:count:      the number of faces of the mesh already indexed
+		
+		Example:
+			>>> index = SurfaceIndex(housing)
+			>>> for tool in tools:
+			...     results.append(difference(housing, tool, index=index))
+	'''
+	__slots__ = 'mesh', 'cellsize', 'origin', 'keys', 'faces', 'extent', 'count'
+	
+	# number of bits per coordinate in packed keys
+	_bits = 21
+	
+	def __init__(self, mesh, cellsize=None):
+		self.mesh = mesh
+		self.cellsize = cellsize or meshcellsize(mesh)
+		self.origin = None
+		self.keys = np.empty(0, dtype=np.int64)
+		self.faces = np.empty(0, dtype=np.int64)
+		self.extent = None
+		self.count = 0
+		self.update()
+	
+	def update(self):
+		''' Index the faces appended to the mesh since the last update. If faces were removed, the whole index is rebuilt '''
+		if len(self.mesh.faces) < self.count:
+			self.origin = None
+			self.keys = self.keys[:0]
+			self.faces = self.faces[:0]
+			self.extent = None
+			self.count = 0
+		if len(self.mesh.faces) == self.count:
+			return
+		low, high = self._cells(self.mesh, self.count)
+		if self.origin is None:
+			self.origin = low.min(axis=0) - (1 << (self._bits-1))
+		low, high = low - self.origin, high - self.origin
+		if low.min() < 0 or high.max() >= 1 << self._bits:
+			raise ValueError('faces are too far from the indexed ones, rebuild the index with a bigger cellsize')
+		extent = (low.min(axis=0), high.max(axis=0))
+		if self.extent is not None:
+			extent = (np.minimum(self.extent[0], extent[0]), np.maximum(self.extent[1], extent[1]))
+		self.extent = extent
+		keys, owners = self._pack(low, high)
+		keys = np.concatenate([self.keys, keys])
+		owners = np.concatenate([self.faces, owners + self.count])
+		order = np.argsort(keys, kind='stable')
+		self.keys = keys[order]
+		self.faces = owners[order]
+		self.count = len(self.mesh.faces)
+	
+	def near(self, surface, prec=0) -> np.ndarray:
+		''' Indices of the indexed faces whose cells intersect the bounding box of any face of the given mesh, extended by `prec` '''
+		if not surface.faces:
+			return np.empty(0, dtype=np.int64)
+		return self._query(*self._cells(surface, 0, prec))
+	
+	def touching(self, surface, prec=0) -> np.ndarray:
+		''' Indices of the faces of the given mesh whose bounding box, extended by `prec`, intersects the cells of any indexed face '''
+		if not surface.faces:
+			return np.empty(0, dtype=np.int64)
+		self.update()
+		if not len(self.keys):
+			return np.empty(0, dtype=np.int64)
+		inside, low, high = self._clip(*self._cells(surface, 0, prec))
+		keys, owners = self._pack(low, high)
+		found = np.minimum(np.searchsorted(self.keys, keys), len(self.keys)-1)
+		return np.unique(inside[owners[self.keys[found] == keys]])
+	
+	def around(self, points, prec=0) -> np.ndarray:
+		''' Indices of the indexed faces whose cells are closer than `prec` to any of the given points, given as an array of shape `(n,3)` '''
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+		return self._query(
+			np.floor((points - prec) / self.cellsize).astype(np.int64),
+			np.floor((points + prec) / self.cellsize).astype(np.int64),
+			)
+	
+	def _query(self, low, high) -> np.ndarray:
+		''' indices of the indexed faces in the given absolute cell ranges '''
+		self.update()
+		if not len(self.keys) or not len(low):
+			return np.empty(0, dtype=np.int64)
+		_, low, high = self._clip(low, high)
+		keys = np.unique(self._pack(low, high)[0])
+		start = np.searchsorted(self.keys, keys, 'left')
+		stop = np.searchsorted(self.keys, keys, 'right')
+		return np.unique(self.faces[_ranges(start, stop)])
+	
+	def _clip(self, low, high) -> '(np.ndarray, np.ndarray, np.ndarray)':
+		''' the given absolute cell ranges that reach the occupied extent, and these ranges clipped to it relative to `origin`
+			cells outside the occupied extent are empty anyway
+		'''
+		low, high = low - self.origin, high - self.origin
+		inside = np.flatnonzero(np.all(high >= self.extent[0], axis=1) & np.all(low <= self.extent[1], axis=1))
+		return inside, np.maximum(low[inside], self.extent[0]), np.minimum(high[inside], self.extent[1])
+	
+	def _cells(self, surface, start=0, prec=0) -> '(np.ndarray, np.ndarray)':
+		''' lowest and highest cell of the bounding box of each face of the mesh from `start` '''
+		points = mesh.typedlist_to_numpy(surface.points, 'f8')
+		corners = points[mesh.typedlist_to_numpy(surface.faces[start:], 'i8')]
+		return (
+			np.floor((corners.min(axis=1) - prec) / self.cellsize).astype(np.int64),
+			np.floor((corners.max(axis=1) + prec) / self.cellsize).astype(np.int64),
+			)
+	
+	def _pack(self, low, high) -> '(np.ndarray, np.ndarray)':
+		''' packed keys of all the cells in the given positive cell ranges, and the range each key comes from '''
+		size = high - low + 1
+		owners = np.repeat(np.arange(len(low)), size.prod(axis=1))
+		# position of each cell in its range
+		rank = _ranges(np.zeros(len(low), dtype=np.int64), size.prod(axis=1))
+		size = size[owners]
+		cells = low[owners] + np.stack([
+			rank // (size[:,1] * size[:,2]),
+			rank // size[:,2] % size[:,1],
+			rank % size[:,2],
+			], axis=1)
+		keys = (cells[:,0] << (2*self._bits)) | (cells[:,1] << self._bits) | cells[:,2]
+		return keys, owners
+
+def _ranges(start, stop) -> np.ndarray:
+	''' concatenation of the integer ranges `[start, stop)` '''
+	size = stop - start
+	return np.repeat(start - np.cumsum(size) + size, size) + np.arange(size.sum())
+
+
 class PointSet:
 	''' Holds a list of points and hash them.
 		The points are holds using indices, that allows to get the point buffer at any time, or to retrieve only a point index.
@@ -403,6 +711,18 @@ class PointSet:
 	def update(self, iterable):
 		''' add points from an iterable '''
 		for pt in iterable:	self.add(pt)
+	def update_array(self, points) -> np.ndarray:
+		''' Add points from a numpy array of shape `(n,3)` or a typedlist of `vec3` in one native call
+			
+			Return an array of the index of each given point in the set, as successive calls to `add` would return
+		'''
+		if isinstance(points, typedlist):
+			points = mesh.typedlist_to_numpy(points, 'f8')
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+		# the native side only reads the cells the new points can fall in and writes the new entries, so the cost does not depend on the size of the set
+		indices, inserted = core.pointset_update(self.cellsize, self.dict, len(self.points), mesh.numpy_to_typedlist(points, vec3))
+		self.points.extend(mesh.numpy_to_typedlist(points[mesh.typedlist_to_numpy(inserted, 'i8')], vec3))
+		return mesh.typedlist_to_numpy(indices, 'i8')
 	def difference_update(self, iterable):
 		''' Remove the points from an iterable '''
 		for pt in iterable:	self.discard(pt)
@@ -3,13 +3,16 @@
 import json
 import numpy as np
 import os
+import re
+import mmap
 import tempfile
 from functools import wraps
 from math import inf
-from hashlib import md5
+from hashlib import blake2b
+from collections import OrderedDict
 
-from .mathutils import vec2, vec3, vec4, mat2, mat3, mat4, quat, uvec3, typedlist
-from .mesh import Mesh, Wire
+from .mathutils import vec2, vec3, vec4, mat2, mat3, mat4, quat, uvec2, uvec3, typedlist
+from .mesh import Mesh, Web, Wire, numpy_to_typedlist, typedlist_to_numpy, typedlist_view, ensure_typedlist
 
 class FileFormatError(Exception):	pass
 
@@ -72,31 +75,159 @@ def cache(filename: str, create: callable=None, name=None, storage=None, **opts)
 	
 	
 
-def cachefunc(f):
+class Cache:
+	''' Persistent storage of function results, indexed by the content of their arguments
+	
+		Results are stored as files in `directory` (meshes in the native `.madcad` format, other objects pickled) and the most recent ones are also kept in memory. Once the files exceed `size` bytes, the least recently used are removed.
+		
+		Writing a result is atomic, so concurrent processes can compute and store the same entry.
+		
+		Attributes:
+			directory:  the folder containing the cache files
+			size:       maximum total size of the cache files (bytes)
+			memory:     maximum number of results kept in memory
+			hits:       number of results found in memory
+			loads:      number of results found in files
+			misses:     number of results computed
+	'''
+	def __init__(self, directory: str, size: int=2**30, memory: int=32):
+		self.directory = directory
+		self.size = size
+		self.memory = memory
+		self.recent = OrderedDict()
+		self.hits = self.loads = self.misses = 0
+	
+	def key(self, f: callable, args: tuple, kwargs: dict) -> str:
+		''' Name of the cache entry for a call of `f` '''
+		digest = blake2b(digest_size=16)
+		_digest((args, sorted(kwargs.items())), digest)
+		return '{}{}-{}'.format(
+			f.__module__ + '.' if f.__module__ else '',
+			f.__qualname__,
+			digest.hexdigest(),
+			)
+	
+	def get(self, key: str, create: callable):
+		''' Return the result stored under `key`, or call `create()` to get and store it '''
+		if key in self.recent:
+			self.recent.move_to_end(key)
+			self.hits += 1
+			return self.recent[key]
+		
+		for extension in ('.madcad', '.pickle'):
+			filename = os.path.join(self.directory, key+extension)
+			try:
+				result = read(filename)
+				# the modification date is used as access date for eviction
+				os.utime(filename)
+			except OSError:	
+				continue
+			self.loads += 1
+			break
+		else:
+			result = create()
+			self.misses += 1
+			extension = '.madcad' if type(result).__name__ in _madcad_buffers else '.pickle'
+			os.makedirs(self.directory, exist_ok=True)
+			# write to a temporary file then rename it, so readers never get partial files
+			descriptor, tmp = tempfile.mkstemp(extension, '.'+key, self.directory)
+			os.close(descriptor)
+			try:
+				write(result, tmp)
+				os.replace(tmp, os.path.join(self.directory, key+extension))
+			except BaseException:
+				os.remove(tmp)
+				raise
+			self.evict()
+		
+		self.recent[key] = result
+		while len(self.recent) > self.memory:
+			self.recent.popitem(last=False)
+		return result
+	
+	def evict(self):
+		''' Remove the least recently used files until the cache fits in its size '''
+		entries = []
+		for entry in os.scandir(self.directory):
+			if entry.name.startswith('.') or not entry.is_file():	continue
+			stat = entry.stat()
+			entries.append((stat.st_mtime, stat.st_size, entry.path))
+		total = sum(size for _, size, _ in entries)
+		for _, size, path in sorted(entries):
+			if total <= self.size:	break
+			try:	os.remove(path)
+			except OSError:	pass   # already removed by an other process or still opened
+			total -= size
+	
+	def clear(self):
+		''' Remove all the entries in memory and files '''
+		self.recent.clear()
+		if os.path.exists(self.directory):
+			for entry in os.scandir(self.directory):
+				if entry.is_file():	os.remove(entry.path)
+	
+	def stats(self) -> dict:
+		''' Return the hits, loads and misses counts and the current memory and files usage '''
+		files = [entry.stat().st_size  
+			for entry in (os.scandir(self.directory) if os.path.exists(self.directory) else ())
+			if entry.is_file() and not entry.name.startswith('.')]
+		return dict(
+			hits = self.hits, 
+			loads = self.loads, 
+			misses = self.misses, 
+			memory = len(self.recent),
+			files = len(files),
+			size = sum(files),
+			)
+
+def _digest(obj, digest):
+	''' Feed a hash with the content of an object. Meshes and buffers are hashed from their memory '''
+	digest.update(type(obj).__qualname__.encode())
+	if type(obj).__name__ in _madcad_buffers and isinstance(obj, _madcad_buffers[type(obj).__name__][0]):
+		for name, dtype in _madcad_buffers[type(obj).__name__][1].items():
+			buffer = getattr(obj, name)
+			_digest(ensure_typedlist(buffer, dtype) if buffer is not None else None, digest)
+		_digest(obj.groups, digest)
+		_digest(obj.options, digest)
+	elif isinstance(obj, (list, tuple)):
+		digest.update(len(obj).to_bytes(8, 'little'))
+		for item in obj:
+			_digest(item, digest)
+	elif isinstance(obj, dict):
+		digest.update(len(obj).to_bytes(8, 'little'))
+		for key, value in obj.items():
+			_digest(key, digest)
+			_digest(value, digest)
+	elif isinstance(obj, (str, int, float, complex, type(None))):
+		digest.update(repr(obj).encode())
+	else:
+		try:
+			view = memoryview(obj)
+		except TypeError:
+			try:	digest.update(pickle.dumps(obj))
+			except Exception:	digest.update(repr(obj).encode())
+		else:
+			digest.update('{}{}'.format(view.format, view.shape).encode())
+			digest.update(view if view.ndim == 1 and view.c_contiguous else view.tobytes())
+
+results = Cache(cachedir)
+
+def cachefunc(f=None, storage: Cache=None):
 	''' Decorator to cache a function results.
 		
-		Use it if you want to cache their result associated with the argument set used 
+		Use it if you want to cache their result associated with the argument set used. The arguments are identified by their content, so meshes passed as arguments are properly distinguished.
+		
+		If specified, storage is the `Cache` to use, defaults to `io.results`
 	'''
+	if f is None:
+		return lambda f: cachefunc(f, storage)
 	# special case: do not cache if running in a caching interpreter
 	if f.__module__ == '__madcad__':
 		return f
 	@wraps(f)
 	def repl(*args, **kwargs):
-		if not os.path.exists(cachedir):
-			os.makedirs(cachedir)
-		key = '{}/{}{}-{}.pickle'.format(
-			cachedir,
-			f.__module__ + '.' if f.__module__ else '',
-			f.__name__,
-			hex(int.from_bytes(
-				md5(repr((
-					*args, 
-					sorted(list(kwargs.items()))
-					)).encode())
-					.digest(),
-				'little')),
-			)
-		return cache(key, lambda: f(*args, **kwargs))
+		used = storage or results
+		return used.get(used.key(f, args, kwargs), lambda: f(*args, **kwargs))
 	return repl
 
 	
@@ -111,6 +242,80 @@ def pickle_read(file, **opts):
 def pickle_write(obj, file, **opts):
 	return pickle.dump(obj, open(file, 'wb'))
 
+'''
+	MADCAD files are a native container for meshes, their buffers are stored raw so they can be mapped back to memory without any conversion.
+	
+	The layout is: magic bytes, header size (u32), json header, the buffers aligned on 64 bytes, pickled groups and options
+'''
+_madcad_magic = b'MADCAD\x00\x01'
+_madcad_align = 64
+_madcad_buffers = {
+	'Mesh': (Mesh, {'points': vec3, 'faces': uvec3, 'tracks': 'I'}),
+	'Web':  (Web,  {'points': vec3, 'edges': uvec2, 'tracks': 'I'}),
+	'Wire': (Wire, {'points': vec3, 'indices': 'I', 'tracks': 'I'}),
+	}
+
+def _madcad_aligned(offset):
+	return -(-offset // _madcad_align) * _madcad_align
+
+def madcad_write(obj, file, **opts):
+	''' Write a `Mesh`, `Web` or `Wire` to a `.madcad` file '''
+	kind = type(obj).__name__
+	if kind not in _madcad_buffers:
+		raise FileFormatError('madcad files only store Mesh, Web and Wire, not {}'.format(kind))
+	
+	buffers = {}
+	layout = {}
+	offset = 0
+	for name, dtype in _madcad_buffers[kind][1].items():
+		buffer = getattr(obj, name)
+		if buffer is None:
+			layout[name] = None
+			continue
+		buffers[name] = buffer = memoryview(ensure_typedlist(buffer, dtype)).cast('B')
+		layout[name] = {'offset': offset, 'size': len(buffer), 'itemsize': memoryview(typedlist(dtype=dtype)).itemsize}
+		offset = _madcad_aligned(offset + len(buffer))
+	table = pickle.dumps((obj.groups, obj.options))
+	header = json.dumps({'type': kind, 'buffers': layout, 'table': offset, 'tablesize': len(table)}).encode()
+	
+	with open(file, 'wb') as stream:
+		stream.write(_madcad_magic)
+		stream.write(len(header).to_bytes(4, 'little'))
+		stream.write(header)
+		start = _madcad_aligned(stream.tell())
+		for name, buffer in buffers.items():
+			stream.write(bytes(start + layout[name]['offset'] - stream.tell()))
+			stream.write(buffer)
+		stream.write(bytes(start + offset - stream.tell()))
+		stream.write(table)
+
+def madcad_read(file, **opts):
+	''' Read a `.madcad` file
+	
+		The buffers are memory-mapped copy-on-write: the data is only loaded when accessed and modifying it never changes the file
+	'''
+	data = np.memmap(file, dtype='u1', mode='c')
+	if bytes(data[:len(_madcad_magic)]) != _madcad_magic:
+		raise FileFormatError('not a madcad file or unsupported version')
+	size = int.from_bytes(data[8:12], 'little')
+	header = json.loads(bytes(data[12:12+size]))
+	start = _madcad_aligned(12+size)
+	
+	kind, dtypes = _madcad_buffers[header['type']]
+	buffers = {}
+	for name, dtype in dtypes.items():
+		layout = header['buffers'][name]
+		if layout is None:
+			buffers[name] = None
+			continue
+		if layout['itemsize'] != memoryview(typedlist(dtype=dtype)).itemsize:
+			raise FileFormatError('buffer {} has an incompatible item size'.format(name))
+		offset = start + layout['offset']
+		buffers[name] = typedlist(data[offset:offset+layout['size']], dtype)
+	table = start + header['table']
+	groups, options = pickle.loads(bytes(data[table:table+header['tablesize']]))
+	return kind(**buffers, groups=groups, options=options)
+
 '''
 	PLY is loaded using plyfile module 	https://github.com/dranjan/python-plyfile
 	using the specifications from 	https://web.archive.org/web/20161221115231/http://www.cs.virginia.edu/~gfx/Courses/2001/Advanced.spring.01/plylib/Ply.txt
@@ -123,71 +328,228 @@ else:
 	from . import triangulation
 
 	def ply_read(file, **opts):
-		mesh = Mesh()
-		
 		data = PlyData.read(file)
 		if 'vertex' not in data:	raise FileFormatError('file must have a vertex buffer')
 		if 'face' not in data:		raise FileFormatError('file must have a face buffer')
 		
 		# collect points
-		mesh.points = typedlist(data['vertex'].data.astype('f8, f8, f8'), dtype=vec3)
+		points = typedlist(data['vertex'].data.astype('f8, f8, f8'), dtype=vec3)
 		
 		# collect faces
 		faces = data['face'].data
 		if faces.dtype.names[0] == 'vertex_indices':
-			for face in faces['vertex_indices']:
-				#print('  ', type(face), face, face.dtype, face.strides)
-				if len(face) == 3:	# triangle
-					mesh.faces.append(face)
-				elif len(face) > 3:	# quad or other extended face
-					mesh += triangulation.triangulation_outline(Wire(mesh.points, face))
+			triangles, owners = _ply_triangulate(points, faces['vertex_indices'])
 		else:
-			mesh.faces = numpy_to_typedlist(faces.astype('u4'), dtype=uvec3)
-
-		# collect tracks
+			triangles = faces.astype('u4')
+			owners = np.arange(len(faces))
+		
+		# collect tracks, polygons split in triangles keep their group
 		if 'group' in faces.dtype.names:
-			mesh.tracks = typedlist(faces['group'].astype('u4'), dtype='I')
+			tracks = faces['group'][owners].astype('u4')
 		else:
-			mesh.tracks = typedlist.full(0, len(mesh.faces), 'I')
+			tracks = np.zeros(len(triangles), 'u4')
 		
 		# create groups  (TODO find a way to get it from the file, PLY doesn't support non-scalar types)
-		mesh.groups = [None] * (max(mesh.tracks, default=-1)+1)
+		groups = [None] * (int(tracks.max())+1 if len(tracks) else 0)
+		return Mesh(points, numpy_to_typedlist(triangles, uvec3), typedlist(tracks, dtype='I'), groups)
+	
+	_ply_fan = 8	# convex polygons up to this size are triangulated with numpy
+	
+	def _ply_triangulate(points, polygons) -> '(np.ndarray, np.ndarray)':
+		''' Triangulate polygons grouped by number of corners.
+			Quads and small convex polygons are split at once in numpy, other polygons are given to `triangulation_outline`
+			
+			Return the triangles and for each the index of the polygon it comes from, in the polygons order
+		'''
+		if not len(polygons):
+			return np.empty((0,3), 'u4'), np.empty(0, int)
+		lengths = np.fromiter(map(len, polygons), dtype=int, count=len(polygons))
+		flat = np.concatenate(list(polygons)).astype(int)
+		starts = np.cumsum(lengths) - lengths
+		positions = typedlist_view(ensure_typedlist(points, vec3))
 		
-		return mesh
+		triangles = []
+		owners = []
+		remains = []
+		for arity in np.unique(lengths):
+			if arity < 3:	continue
+			selected = np.flatnonzero(lengths == arity)
+			corners = flat[starts[selected,None] + np.arange(arity)]
+			
+			if arity == 3:
+				triangles.append(corners)
+				owners.append(selected)
+			elif arity == 4:
+				# split on the diagonal AC unless the quad is concave at B or D
+				a, b, c, d = positions[corners.T]
+				normal = np.cross(c-a, d-b)
+				ac = (	(np.cross(b-a, c-a) * normal).sum(axis=1) > 0 ) & ( (np.cross(c-a, d-a) * normal).sum(axis=1) > 0 )
+				triangles.append(np.where(ac[:,None], corners[:,[0,1,2]], corners[:,[0,1,3]]))
+				triangles.append(np.where(ac[:,None], corners[:,[0,2,3]], corners[:,[1,2,3]]))
+				owners.extend((selected, selected))
+			elif arity <= _ply_fan:
+				# fan triangulation for convex polygons
+				corner = positions[corners]
+				following = np.roll(corner, -1, axis=1)
+				normal = np.cross(corner, following).sum(axis=1)
+				turns = np.cross(following - corner, np.roll(corner, -2, axis=1) - following)
+				convex = ((turns * normal[:,None]).sum(axis=2) >= 0).all(axis=1)
+				fan = corners[convex]
+				for i in range(1, arity-1):
+					triangles.append(fan[:,[0,i,i+1]])
+					owners.append(selected[convex])
+				remains.extend(selected[~convex])
+			else:
+				remains.extend(selected)
+		
+		# polygons too complex for a fan
+		if remains:
+			prec = Mesh(points).precision()
+			for i in remains:
+				outline = Wire(points, typedlist(flat[starts[i]:starts[i]+lengths[i]].astype('u4'), 'I'))
+				faces = typedlist_to_numpy(triangulation.triangulation_outline(outline, prec=prec).faces, 'i8')
+				triangles.append(faces)
+				owners.append(np.full(len(faces), i))
+		
+		if not triangles:
+			return np.empty((0,3), 'u4'), np.empty(0, int)
+		owners = np.concatenate(owners)
+		order = np.argsort(owners, kind='stable')
+		return np.concatenate(triangles).astype('u4')[order], owners[order]
 
 	def ply_write(mesh, file, **opts):
-		vertices = np.asarray(mesh.points).astype(np.dtype([('x', 'f4'), ('y', 'f4'), ('z', 'f4')]))
+		vertices = np.asarray(ensure_typedlist(mesh.points, vec3)).astype(np.dtype([('x', 'f4'), ('y', 'f4'), ('z', 'f4')]))
 		faces = np.empty(len(mesh.faces), dtype=[('vertex_indices', 'u4', (3,)), ('group', 'u2')])
-		faces['vertex_indices'] = typedlist_to_numpy(mesh.faces, 'u4')
-		faces['group'] = typedlist_to_numpy(mesh.tracks, 'u4')
+		faces['vertex_indices'] = typedlist_view(ensure_typedlist(mesh.faces, uvec3))
+		faces['group'] = typedlist_view(ensure_typedlist(mesh.tracks, 'I'))
 		ev = PlyElement.describe(vertices, 'vertex')
 		ef = PlyElement.describe(faces, 'face')
 		PlyData([ev,ef], opts.get('text', False)).write(file)
 
 
 '''
-	STL is loaded using numpy-stl module 	https://github.com/WoLpH/numpy-stl
+	STL is read and written by a builtin codec, supporting both binary and ASCII files
+	using the specifications from	https://en.wikipedia.org/wiki/STL_(file_format)
 '''
-try:	
-	import stl
-except ImportError:	pass
-else:
+_stl_dtype = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3,3)), ('attribute', '<u2')])
+_stl_chunk = 1<<16	# number of triangles converted at once
+_stl_text_chunk = 1<<22	# number of bytes of an ASCII file parsed at once
 
-	from .mesh import numpy_to_typedlist, typedlist_to_numpy
-	def stl_read(file, **opts):
-		stlmesh = stl.mesh.Mesh.from_file(file, calculate_normals=False)
-		trinum = stlmesh.points.shape[0]
-		mesh = Mesh(
-			numpy_to_typedlist(stlmesh.points.reshape(trinum*3, 3), vec3), 
-			typedlist(uvec3(i, i+1, i+2)  for i in range(0, 3*trinum, 3)),
-			)
-		mesh.options['name'] = stlmesh.name
-		return mesh
+def stl_read(file, merge=False, **opts) -> Mesh:
+	''' Read a binary or ASCII STL file
+	
+		The file is memory-mapped and the triangles are parsed and converted by chunks into the mesh buffers, so the file is never loaded or copied as a whole.
+		If `merge` is True, points with the exact same coordinates are shared between triangles, otherwise each triangle has its own 3 points.
+	'''
+	with open(file, 'rb') as stream:
+		if os.fstat(stream.fileno()).st_size < 84:
+			data = stream.read()
+		else:
+			data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+	
+	count = int.from_bytes(data[80:84], 'little') if len(data) >= 84 else None
+	# binary files can start with 'solid' too, so the size is checked first
+	if count is not None and len(data) == 84 + count*_stl_dtype.itemsize:
+		chunks = _stl_binary_chunks(data, count)
+		name = bytes(data[:80]).rstrip(b'\0 ').decode(errors='replace')
+	elif data[:5] == b'solid':
+		header = re.match(rb'solid[ \t]*([^\r\n]*)', data[:_stl_text_chunk])
+		chunks = _stl_text_chunks(data, header.end())
+		name = header.group(1).strip().decode(errors='replace')
+	else:
+		raise FileFormatError('file is neither a binary nor an ASCII STL')
+	
+	points = typedlist(dtype=vec3)
+	faces = typedlist(dtype=uvec3)
+	# with merge, the distinct points of each chunk are merged across chunks at the end
+	distincts = []
+	corners = []
+	offset = 0
+	for vertices in chunks:
+		# adding zero turns -0 into 0 so they get the same bytes
+		flat = np.ascontiguousarray(vertices.reshape(-1,3), dtype='f8') + 0
+		if not merge:
+			faces.extend(numpy_to_typedlist(np.arange(len(points), len(points)+len(flat)).reshape(-1,3), uvec3))
+			points.extend(numpy_to_typedlist(flat, vec3))
+			continue
+		distinct, inverse = _stl_distinct(flat)
+		corners.append(inverse + offset)
+		distincts.append(distinct)
+		offset += len(distinct)
+	if merge and distincts:
+		distinct, inverse = _stl_distinct(np.concatenate(distincts))
+		points = numpy_to_typedlist(distinct, vec3)
+		faces = numpy_to_typedlist(inverse[np.concatenate(corners)].reshape(-1,3), uvec3)
+	
+	mesh = Mesh(points, faces)
+	if name:
+		mesh.options['name'] = name
+	return mesh
+
+def _stl_distinct(flat) -> '(np.ndarray, np.ndarray)':
+	''' the distinct points of an array of shape `(n,3)` in order of first appearance, and the index of each point in them '''
+	keys = flat.view(np.dtype((np.void, flat.itemsize*3))).ravel()
+	_, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+	order = np.argsort(first)
+	rank = np.empty_like(order)
+	rank[order] = np.arange(len(order))
+	return flat[first[order]], rank[inverse.ravel()]
+
+def _stl_binary_chunks(data, count):
+	''' arrays of shape `(n,3,3)` of the vertices of successive chunks of triangles of a binary STL '''
+	for start in range(0, count, _stl_chunk):
+		yield np.frombuffer(data, _stl_dtype, min(_stl_chunk, count-start), 84 + start*_stl_dtype.itemsize)['vertices']
+
+def _stl_text_chunks(data, start):
+	''' arrays of shape `(n,3,3)` of the vertices of successive chunks of triangles of an ASCII STL, each chunk being cut after a facet '''
+	while start < len(data):
+		stop = data.rfind(b'endfacet', start, start + _stl_text_chunk)
+		if start + _stl_text_chunk >= len(data) or stop <= start:
+			stop = len(data)
+		yield np.array(re.findall(rb'vertex\s+(\S+)\s+(\S+)\s+(\S+)', data[start:stop]), dtype='f8').reshape(-1,3,3)
+		start = stop
 
-	def stl_write(mesh, file, **opts):
-		stlmesh = stl.mesh.Mesh(np.zeros(len(mesh.faces), dtype=stl.mesh.Mesh.dtype), name=mesh.options.get('name'))
-		stlmesh.vectors[:] = typedlist_to_numpy(mesh.points, 'f4')[typedlist_to_numpy(mesh.faces, 'i4')]
-		stlmesh.save(file, **opts)
+def stl_write(mesh, file, text=False, **opts):
+	''' Write a mesh to a binary STL file, or an ASCII one if `text` is True
+	
+		The triangles are converted and written by chunks, so the mesh is never copied as a whole.
+	'''
+	points = typedlist_view(ensure_typedlist(mesh.points, vec3))
+	faces = typedlist_view(ensure_typedlist(mesh.faces, uvec3))
+	name = mesh.options.get('name') or ''
+	
+	with open(file, 'w' if text else 'wb') as stream:
+		if text:
+			stream.write('solid {}\n'.format(name))
+		else:
+			stream.write(name.encode()[:80].ljust(80, b'\0'))
+			stream.write(len(faces).to_bytes(4, 'little'))
+		
+		for start in range(0, len(faces), _stl_chunk):
+			triangles = points[faces[start:start+_stl_chunk]]
+			normals = np.cross(triangles[:,1]-triangles[:,0], triangles[:,2]-triangles[:,0])
+			lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+			normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths>0)
+			if text:
+				stream.write(''.join(_stl_facet % tuple(facet)  
+					for facet in np.concatenate([normals, triangles.reshape(-1,9)], axis=1).tolist()))
+			else:
+				records = np.zeros(len(triangles), _stl_dtype)
+				records['normal'] = normals
+				records['vertices'] = triangles
+				stream.write(records.tobytes())
+		
+		if text:
+			stream.write('endsolid {}\n'.format(name))
+
+_stl_facet = '''facet normal %e %e %e
+  outer loop
+    vertex %e %e %e
+    vertex %e %e %e
+    vertex %e %e %e
+  endloop
+endfacet
+'''
 
 '''
 	OBJ is loaded using the pywavefront module	https://github.com/pywavefront/PyWavefront
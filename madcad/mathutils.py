@@ -355,9 +355,10 @@ def distance_pt(p, triangle):
 	''' Point - triangle distance '''
 	normal = cross(triangle[1]-triangle[0], triangle[2]-triangle[0])
 	for i in range(3):
-		if dot(p-triangle[i-1], cross(triangle[i-2]-triangle[i-1], normal)) > 0:
-			return distance_pe(p, (triangle[i-1],triangle[i-2]))
-	return length(project(normal, p-triangle[0]))
+		# outside of a side, the closest point is on the outline
+		if dot(p-triangle[i], cross(normal, triangle[i-1]-triangle[i])) >= 0:
+			return min(distance_pe(p, (triangle[j-1],triangle[j]))  for j in range(3))
+	return length(project(p-triangle[0], normal))
 
 
 #-- algorithmic functions ---------
@@ -59,16 +59,17 @@ from ..mathutils import (
 from .mesh import Mesh, mkquad, mktri
 from .web import Web
 from .wire import Wire
+from .instances import Instances
 from .container import (
-	MeshError, striplist, typedlist_to_numpy, numpy_to_typedlist,
-	ensure_typedlist,
+	MeshError, Builder, striplist, typedlist_to_numpy, numpy_to_typedlist,
+	typedlist_view, ensure_typedlist,
 	)
 from .conversions import web, mesh, wire
 
 __all__ = [
-		'Mesh', 'Web', 'Wire', 'MeshError', 'web', 'wire', 'mesh',
+		'Mesh', 'Web', 'Wire', 'Instances', 'Builder', 'MeshError', 'web', 'wire', 'mesh',
 		'line_simplification', 'mesh_distance', 'striplist',
-		'typedlist_to_numpy', 'numpy_to_typedlist', 'ensure_typedlist',
+		'typedlist_to_numpy', 'numpy_to_typedlist', 'typedlist_view', 'ensure_typedlist',
 		'mkquad', 'mktri',
 		]
 
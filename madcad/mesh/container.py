@@ -2,15 +2,20 @@
 from __future__ import annotations
 
 from copy import copy, deepcopy
+from numbers import Integral
 import numpy as np
 import numpy.lib.recfunctions as rfn
 
 from ..box import Box
+from .. import core
 from ..hashing import PointSet
-from ..mathutils import NUMPREC, isfinite, vec3, transformer, typedlist, distance
+from ..mathutils import (
+		NUMPREC, isfinite, vec3, transformer, typedlist, distance, 
+		dvec3, fvec3, dmat3, fmat3, dmat4, fmat4, dquat, fquat, mat3_cast,
+		)
 
 __all__ = [
-		"MeshError", "NMesh", "numpy_to_typedlist", "typedlist_to_numpy",
+		"MeshError", "NMesh", "Builder", "numpy_to_typedlist", "typedlist_to_numpy", "typedlist_view",
 		"ensure_typedlist", "reprarray", "striplist",
 	]
 
@@ -40,6 +45,26 @@ class NMesh(object):
 				setattr(new, name, deepcopy(getattr(self, name)))
 		return new
 	
+	def arrays(self) -> dict:
+		''' Return writable numpy views sharing memory with the buffers of the mesh, by attribute name. The buffers are converted to typedlists first if they are not already
+		
+		Example:
+			>>> arrays = mesh.arrays()
+			>>> arrays['points'] *= 2     # scales the mesh in place
+			>>> arrays['faces'].shape
+			(12, 3)
+		
+		See `typedlist_view` for the layout and lifetime of the views
+		'''
+		arrays = {}
+		for name, dtype in self._buffers.items():
+			buffer = getattr(self, name)
+			if buffer is None:	continue
+			buffer = ensure_typedlist(buffer, dtype)
+			setattr(self, name, buffer)
+			arrays[name] = typedlist_view(buffer)
+		return arrays
+	
 	def option(self, **kwargs) -> NMesh:
 		''' Update the internal options with the given dictionary and the keywords arguments.
 			This is only a shortcut to set options in a method style.
@@ -48,26 +73,100 @@ class NMesh(object):
 		return self
 	
 	def transform(self, trans) -> NMesh:
-		''' Apply the transform to the points of the mesh, returning the new transformed mesh'''
-		trans = transformer(trans)
+		''' Apply the transform to the points of the mesh, returning the new transformed mesh
+		
+			Affine transforms (see `transformer`) are applied as a single matrix product over the whole points buffer, other callables point by point
+		'''
 		transformed = copy(self)
-		transformed.points = typedlist((trans(p) for p in self.points), dtype=vec3)
+		matrix = _affine(trans)
+		if matrix is None:
+			trans = transformer(trans)
+			transformed.points = typedlist((trans(p) for p in self.points), dtype=vec3)
+		else:
+			points = typedlist_view(ensure_typedlist(self.points, vec3))
+			transformed.points = numpy_to_typedlist(points @ matrix[:3,:3].T + matrix[:3,3], vec3)
 		return transformed
+	
+	def transform_many(self, transforms) -> NMesh:
+		''' Return a mesh concatenating one copy of this mesh per given transform, all copies sharing the groups of this mesh
+		
+			The transforms must be affine (see `transformer`). All the copies are computed at once and each buffer of the result is allocated only once, so this is much faster than concatenating transformed meshes
 			
-	def mergeclose(self, limit=None) -> dict:
+			Example:
+				>>> teeth = tooth.transform_many([rotate(i*2*pi/200, Z)  for i in range(200)])
+		'''
+		matrices = [_affine(trans)  for trans in transforms]
+		if any(matrix is None  for matrix in matrices):
+			raise TypeError('transform_many only supports affine transforms')
+		matrices = np.array(matrices, dtype='f8').reshape(-1, 4, 4)
+		count = len(matrices)
+		result = copy(self)
+		
+		points = typedlist_view(ensure_typedlist(self.points, vec3))
+		transformed = np.matmul(points[None], matrices[:, :3, :3].transpose(0, 2, 1))
+		transformed += matrices[:, None, :3, 3]
+		result.points = numpy_to_typedlist(transformed.reshape(-1, 3), vec3)
+		
+		for name, dtype in self._buffers.items():
+			buffer = getattr(self, name)
+			if name == 'points' or buffer is None:	continue
+			array = typedlist_view(ensure_typedlist(buffer, dtype))
+			storage = _allocate(count*len(array), dtype)
+			copies = storage.reshape((count,) + array.shape)
+			copies[:] = array
+			if name != 'tracks':
+				# indices are offset to the points of each copy
+				copies += (np.arange(count, dtype=array.dtype) * len(points)).reshape((count,) + (1,)*array.ndim)
+			setattr(result, name, numpy_to_typedlist(storage, dtype))
+		return result
+	
+	@classmethod
+	def concat(cls, parts) -> NMesh:
+		''' Return a new mesh concatenating all the given meshes at once
+		
+			The size of the result is computed first, then each buffer is allocated once and filled with the offset indices of every part. So the cost is linear with the total size, where chaining `+=` reallocates the buffers and offsets the indices in python at each part.
+			Like with `+=`, parts sharing their points or groups buffers with a previous part do not duplicate them in the result. The result never shares its buffers with the parts.
+			
+			Example:
+				>>> Mesh.concat(part.transform(vec3(i,0,0))  for i in range(1000))
+		'''
+		parts = list(parts)
+		result = cls()
+		if not parts:
+			return result
+		points, pointoffsets = _shared([part.points  for part in parts])
+		groups, groupoffsets = _shared([part.groups  for part in parts])
+		result.points = typedlist(points[0], vec3) if len(points) == 1 else _concatenate(
+			_rows(points, vec3), np.zeros(len(points), np.int64), vec3)
+		result.groups = [group  for buffer in groups  for group in buffer]
+		
+		# the first index buffer gives the number of simplices, used for parts without tracks
+		simplices = next(name  for name in cls._buffers  if name not in ('points', 'tracks'))
+		for name, dtype in cls._buffers.items():
+			if name == 'points':	continue
+			if name == 'tracks':
+				if all(part.tracks is None  for part in parts):	continue
+				arrays = _rows([part.tracks if part.tracks is not None 
+							else typedlist.full(0, len(getattr(part, simplices)), dtype)
+							for part in parts], dtype)
+				offsets = groupoffsets
+			else:
+				arrays = _rows([getattr(part, name)  for part in parts], dtype)
+				offsets = pointoffsets
+			setattr(result, name, _concatenate(arrays, offsets, dtype))
+		return result
+	
+	def mergeclose(self, limit=None) -> np.ndarray:
 		''' Merge points below the specified distance, or below the precision 
-			return a dictionary of points remapping  {src index: dst index}
+			return an array of points remapping, giving the new index of each former point
 			
-			O(n) implementation thanks to hashing
+			O(n) implementation thanks to hashing, done natively on the whole point buffer
 		'''
 		if limit is None:	limit = self.precision()
 		
-		merges = {}
-		points = PointSet(limit)
-		for i in range(len(self.points)):
-			used = points.add(self.points[i])
-			if used != i:	merges[i] = used
-		self.points = points.points
+		points, merges = core.mergeclose(ensure_typedlist(self.points, vec3), limit)
+		merges = typedlist_to_numpy(merges, 'i8')
+		self.points = points
 		self.mergepoints(merges)
 		return merges
 	
@@ -113,6 +212,14 @@ class NMesh(object):
 		self.check()
 		return self
 	
+	def _divisions(self, div) -> typedlist:
+		''' number of cuts for each group, from one number for all groups or a sequence with a number per group '''
+		if isinstance(div, Integral):
+			return typedlist.full(div, len(self.groups), 'I')
+		if len(div) < len(self.groups):
+			raise ValueError('expected a number of cuts for each of the {} groups, got {}'.format(len(self.groups), len(div)))
+		return typedlist(div, 'I')
+	
 	# END BEGIN --- verification methods ---
 		
 	def isvalid(self):
@@ -125,13 +232,15 @@ class NMesh(object):
 	
 	def pointat(self, point: vec3, neigh=NUMPREC) -> int:
 		''' Return the index of the first point at the given location, or None '''
-		for i,p in enumerate(self.points):
-			if distance(p,point) <= neigh:	return i
+		from ..query import tree
+		if not self.points:	return None
+		found = tree(self, 'points').index.query_ball_point(point, neigh)
+		return min(found) if found else None
 	
 	def pointnear(self, point: vec3) -> int:
 		''' Return the nearest point the the given location '''
-		return min(	range(len(self.points)), 
-					lambda i: distance(self.points[i], point))
+		from ..query import nearest
+		return int(nearest(self, point, 'points')[0][0])
 	
 	def qualify(self, *quals, select=None, replace=False) -> NMesh:
 		''' Set a new qualifier for the given groups 
@@ -215,12 +324,9 @@ class NMesh(object):
 	
 	def maxnum(self) -> float:
 		''' Maximum numeric value of the mesh, use this to get an hint on its size or to evaluate the numeric precision '''
-		m = 0
-		for p in self.points:
-			for v in p:
-				a = abs(v)
-				if a > m:	m = a
-		return m
+		if not len(self.points):	return 0
+		# fmax ignores nan coordinates
+		return float(np.fmax.reduce(np.abs(typedlist_to_numpy(self.points, 'f8')), axis=None))
 	
 	def precision(self, propag=3) -> float:
 		''' Numeric coordinate precision of operations on this mesh, allowed by the floating point precision '''
@@ -228,11 +334,12 @@ class NMesh(object):
 		
 	def usepointat(self, point, neigh=NUMPREC) -> int:
 		''' Return the index of the first point in the mesh at the location. If none is found, insert it and return the index '''
-		i = self.pointat(point, neigh=neigh)
-		if i is None:
-			i = len(self.points)
-			self.points.append(point)
-		return i
+		# a linear search, since the points tree of `pointat` would be rebuilt after each insertion
+		found = np.flatnonzero(np.linalg.norm(typedlist_to_numpy(self.points, 'f8').reshape(-1, 3) - np.asarray(point, dtype=np.float64), axis=1) <= neigh)
+		if len(found):
+			return int(found[0])
+		self.points.append(point)
+		return len(self.points)-1
 					
 	def box(self) -> Box:
 		''' Return the extreme coordinates of the mesh (vec3, vec3) '''
@@ -253,29 +360,87 @@ class NMesh(object):
 	# END
 
 
-
+class Builder(object):
+	''' Accumulate meshes to concatenate them all at once when the result is needed
+	
+		This is meant to replace loops chaining `+=` on a mesh: adding a part only keeps a reference to it, and `build()` concatenates them with `NMesh.concat`, so the cost is linear with the number of parts.
+		
+		Attributes:
+			type:   the class of the mesh to build, `Mesh`, `Web` or `Wire`
+			parts:  the meshes added so far
+		
+		Example:
+			>>> builder = Builder(Mesh)
+			>>> for i in range(1000):
+			... 	builder += part.transform(vec3(i,0,0))
+			>>> result = builder.build()
+	'''
+	__slots__ = 'type', 'parts'
+	
+	def __init__(self, type, parts=()):
+		self.type = type
+		self.parts = list(parts)
+	
+	def add(self, part) -> Builder:
+		''' Append a part to the result, the part must not be modified until `build()` is called '''
+		if not isinstance(part, self.type):
+			raise TypeError('expected a {}, got a {}'.format(self.type.__name__, type(part).__name__))
+		self.parts.append(part)
+		return self
+	
+	def __iadd__(self, part):
+		return self.add(part)
+	
+	def __len__(self):
+		return len(self.parts)
+	
+	def build(self) -> NMesh:
+		''' Concatenate all the parts added '''
+		return self.type.concat(self.parts)
 
 
 def numpy_to_typedlist(array: np.ndarray, dtype) -> typedlist:
-	''' Convert a numpy.ndarray into a typedlist with the given dtype, if the conversion is possible term to term '''
-	ndtype = np.array(typedlist(dtype)).dtype
+	''' Convert a numpy.ndarray into a typedlist with the given dtype, if the conversion is possible term to term 
+	
+		The array memory is adopted without copy when it already has the layout of the typedlist, like a C-contiguous `(n,3) f8` array for `vec3` or a view returned by `typedlist_view`. Modifications of the array are then visible in the typedlist until it reallocates.
+	'''
+	ndtype = np.array(typedlist(dtype=dtype)).dtype
 	if ndtype.fields:
+		storage = _storage(array, ndtype)
+		if storage is not None:
+			return typedlist(storage, dtype)
 		return typedlist(rfn.unstructured_to_structured(array).astype(ndtype, copy=False), dtype)
 	else:
 		return typedlist(array.astype(ndtype, copy=False), dtype)
 	
 def typedlist_to_numpy(array: 'typedlist', dtype) -> np.ndarray:
-	''' Convert a typedlist to a numpy.ndarray with the given dtype, if the conversion is possible term to term '''
+	''' Convert a typedlist to a numpy.ndarray with the given dtype, if the conversion is possible term to term. The result is always a copy, see `typedlist_view` for sharing memory '''
 	tmp = np.asarray(array)
 	if tmp.dtype.fields:
 		return rfn.structured_to_unstructured(tmp, dtype)
 	else:
 		return tmp.astype(dtype)
+
+def typedlist_view(array: 'typedlist') -> np.ndarray:
+	''' Writable numpy.ndarray sharing memory with a typedlist. Vectors are exposed as rows of their components, like `(n,3) f8` for `vec3` or `(n,3) u4` for `uvec3` (their padding excluded)
+	
+		The view keeps the memory alive, but no longer shares it once the typedlist reallocates, for instance when it grows by appending
+	'''
+	tmp = np.asarray(array)
+	interface = dict(tmp.__array_interface__, data=(tmp.__array_interface__['data'][0], False))
+	view = np.asarray(_Exposed(interface, tmp))
+	if not tmp.dtype.fields:
+		return view
+	component = _component(tmp.dtype)
+	rows = view.view(component).reshape(len(view), tmp.dtype.itemsize // component.itemsize)
+	return rows[:, :len(tmp.dtype.fields)]
 		
 def ensure_typedlist(obj, dtype):
-	''' Return a typedlist with the given dtype, create it from whatever is in obj if needed '''
+	''' Return a typedlist with the given dtype, create it from whatever is in obj if needed. numpy arrays are converted with `numpy_to_typedlist` '''
 	if isinstance(obj, typedlist) and obj.dtype == dtype:
 		return obj
+	elif isinstance(obj, np.ndarray):
+		return numpy_to_typedlist(obj, dtype)
 	else:
 		return typedlist(obj, dtype)
 
@@ -283,6 +448,100 @@ def ensure_typedlist(obj, dtype):
 # ----- internal helpers ------
 
 
+class _Exposed:
+	''' expose memory to numpy with the given array interface, keeping its owner alive '''
+	__slots__ = '__array_interface__', 'owner'
+	def __init__(self, interface, owner):
+		self.__array_interface__ = interface
+		self.owner = owner
+
+def _affine(trans) -> np.ndarray:
+	''' (4,4) matrix of an affine transform accepted by `transformer`, or None if it is an arbitrary function '''
+	if isinstance(trans, (dquat, fquat)):	trans = mat3_cast(trans)
+	matrix = np.identity(4)
+	if isinstance(trans, (dvec3, fvec3)):			matrix[:3,3] = trans
+	elif isinstance(trans, (dmat3, fmat3)):			matrix[:3,:3] = trans
+	elif isinstance(trans, (dmat4, fmat4)):			matrix[:] = trans
+	elif isinstance(trans, (int, float)):			matrix[:3,:3] *= trans
+	else:
+		return None
+	return matrix
+
+def _component(ndtype):
+	''' dtype of the components of a structured dtype of identical fields '''
+	return next(iter(ndtype.fields.values()))[0]
+
+def _storage(array, ndtype):
+	''' return a contiguous array of the given array memory, padding included, if it has the layout of the structured `ndtype`, else None '''
+	component = _component(ndtype)
+	width = ndtype.itemsize // component.itemsize
+	if not (array.ndim == 2 
+			and array.dtype == component 
+			and array.shape[1] == len(ndtype.fields)
+			and array.strides[1] == component.itemsize
+			and (len(array) <= 1 or array.strides[0] == ndtype.itemsize)
+			):
+		return None
+	if array.shape[1] == width:
+		return array if array.flags.c_contiguous else None
+	# the padding of the last row must lie in the memory the array was sliced from
+	base = array
+	while isinstance(base.base, np.ndarray):
+		base = base.base
+	start = array.__array_interface__['data'][0]
+	origin = base.__array_interface__['data'][0]
+	if not (base.flags.c_contiguous 
+			and origin <= start 
+			and start + len(array)*ndtype.itemsize <= origin + base.nbytes
+			):
+		return None
+	return np.lib.stride_tricks.as_strided(array, (len(array), width), (ndtype.itemsize, component.itemsize))
+
+def _allocate(count, dtype) -> np.ndarray:
+	''' zeroed array of `count` items in the memory layout of a typedlist of `dtype`, shaped like `typedlist_view`. `numpy_to_typedlist` adopts it without copy and the padding is zero for comparisons '''
+	ndtype = np.array(typedlist(dtype=dtype)).dtype
+	if not ndtype.fields:
+		return np.zeros(count, ndtype)
+	component = _component(ndtype)
+	return np.zeros((count, ndtype.itemsize // component.itemsize), component)[:, :len(ndtype.fields)]
+
+def _shared(buffers) -> tuple:
+	''' distinct buffers in order of first appearance, and for each given buffer the offset of its first item in their concatenation '''
+	distinct = {}
+	offsets = np.empty(len(buffers), np.int64)
+	total = 0
+	for i, buffer in enumerate(buffers):
+		if id(buffer) not in distinct:
+			distinct[id(buffer)] = (buffer, total)
+			total += len(buffer)
+		offsets[i] = distinct[id(buffer)][1]
+	return [buffer  for buffer, _ in distinct.values()], offsets
+
+def _concatenate(arrays, offsets, dtype) -> typedlist:
+	''' typedlist concatenating the given arrays, each one incremented by its offset '''
+	storage = _allocate(sum(len(array)  for array in arrays), dtype)
+	start = 0
+	for array, offset in zip(arrays, offsets):
+		np.add(array, offset, out=storage[start:start+len(array)], casting='unsafe')
+		start += len(array)
+	return numpy_to_typedlist(storage, dtype)
+
+def _offset(buffer, offset, dtype) -> typedlist:
+	''' copy of an index buffer with `offset` added to all its indices '''
+	return _concatenate(_rows([buffer], dtype), [offset], dtype)
+
+def _rows(buffers, dtype) -> list:
+	''' read-only arrays shaped like `typedlist_view` for each of the given buffers
+		the layout is decoded once for all, which is much cheaper than a view per buffer when there are many small ones
+	'''
+	ndtype = np.array(typedlist(dtype=dtype)).dtype
+	if not ndtype.fields:
+		return [np.frombuffer(ensure_typedlist(buffer, dtype), ndtype)  for buffer in buffers]
+	component = _component(ndtype)
+	width = ndtype.itemsize // component.itemsize
+	return [np.frombuffer(ensure_typedlist(buffer, dtype), component).reshape(-1, width)[:, :len(ndtype.fields)]
+			for buffer in buffers]
+
 def reprarray(array, name) -> str:
 	content = ', '.join((repr(e) for e in array))
 	return '['+content+']'
@@ -310,3 +569,14 @@ def striplist(points, indices):
 		else:
 			reindices.append([reindex[i]   for i in index])
 	return optimized, reindices, reindex
+
+def split_labels(labels: np.ndarray, count: int, *buffers) -> list:
+	''' split the given typedlists in `count` parts according to the label of each item, keeping the items order in each part
+	
+		return a list of tuples with the part of each buffer for each label
+	'''
+	order = np.argsort(labels, kind='stable')
+	bounds = np.searchsorted(labels[order], np.arange(count+1)).tolist()
+	buffers = [typedlist(np.asarray(buffer)[order], buffer.dtype)  for buffer in buffers]
+	return [tuple(buffer[start:stop]  for buffer in buffers)
+			for start, stop in zip(bounds, bounds[1:])]
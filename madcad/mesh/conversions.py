@@ -23,9 +23,7 @@ def mesh(*arg, resolution=None) -> Mesh:
 	elif hasattr(arg, 'mesh'):
 		return mesh(arg.mesh(resolution=resolution))
 	elif hasattr(arg, '__iter__'):
-		pool = Mesh()
-		for primitive in arg:
-			pool += mesh(primitive, resolution=resolution)
+		pool = Mesh.concat(mesh(primitive, resolution=resolution)  for primitive in arg)
 		pool.mergeclose()
 		return pool
 	else:
@@ -59,9 +57,7 @@ def web(*arg, resolution=None) -> Web:
 	elif isinstance(arg, (typedlist,list,tuple)) and isinstance(arg[0], vec3):
 		return Web(arg, [(i,i+1) for i in range(len(arg)-1)])
 	elif hasattr(arg, '__iter__'):
-		pool = Web()
-		for primitive in arg:
-			pool += web(primitive, resolution=resolution)
+		pool = Web.concat(web(primitive, resolution=resolution)  for primitive in arg)
 		pool.mergeclose()
 		return pool
 	else:
@@ -98,9 +94,7 @@ def wire(*arg, resolution=None) -> Wire:
 		except TypeError:
 			pass
 	if hasattr(arg, '__iter__'):
-		pool = Wire()
-		for primitive in arg:
-			pool += wire(primitive, resolution=resolution)
+		pool = Wire.concat(wire(primitive, resolution=resolution)  for primitive in arg)
 		pool.mergeclose()
 		return pool
 	else:
@@ -7,15 +7,23 @@ from .. import settings
 from ..mathutils import fvec3, fmat4, normalize, dot, length, fvec4
 from ..common import resourcedir
 from ..rendering import Display
-from ..rendering.d3 import npboundingbox, load_shader_wire, load_shader_subident
+from .instances import instances_box
+from ..rendering.d3 import (
+	npboundingbox, instanced,
+	load_shader_wire, load_shader_subident, 
+	load_shader_wire_instanced, load_shader_subident_instanced,
+	)
 
 __all__ = ['MeshDisplay', 'WebDisplay']
 
 
 class MeshDisplay(Display):
-	''' Display render Meshes '''
-	def __init__(self, scene, positions, normals, faces, lines, idents, color=None):
-		self.box = npboundingbox(positions, ignore=True)
+	''' Display render Meshes 
+	
+		`instances` is an optional array of poses, see `Vertices`. The mesh is then drawn once per pose using GPU instancing
+	'''
+	def __init__(self, scene, positions, normals, faces, lines, idents, color=None, instances=None):
+		self.box = instances_box(npboundingbox(positions, ignore=True), instances)
 		
 		color = fvec3(color or settings.colors['surface'])
 		line = ( (length(settings.colors['line']) + dot(
@@ -25,7 +33,7 @@ class MeshDisplay(Display):
 		#if length(s['line_color']) > length(color)
 		reflect = normalize(color + 1e-6) * settings.display['solid_reflectivity']
 		
-		self._vertices = Vertices(scene.context, positions, idents)
+		self._vertices = Vertices(scene.context, positions, idents, instances)
 		self._disp_faces = FacesDisplay(scene, self._vertices, normals, faces, color=color, reflect=reflect, layer=0)
 		self._disp_ghost = GhostDisplay(scene, self._vertices, normals, faces, color=line, layer=0)
 		self._disp_groups = LinesDisplay(scene, self._vertices, lines, color=line, alpha=1, layer=-2e-6)
@@ -84,10 +92,10 @@ class MeshDisplay(Display):
 
 class WebDisplay(Display):
 	''' Display to render Webs '''
-	def __init__(self, scene, positions, lines, points, idents, color=None):
-		self.box = npboundingbox(positions, ignore=True)
+	def __init__(self, scene, positions, lines, points, idents, color=None, instances=None):
+		self.box = instances_box(npboundingbox(positions, ignore=True), instances)
 		color = color or settings.colors['line']
-		self._vertices = Vertices(scene.context, positions, idents)
+		self._vertices = Vertices(scene.context, positions, idents, instances)
 		self._disp_edges = LinesDisplay(scene, self._vertices, lines, color=color, alpha=1, layer=-2e-6)
 		self._disp_groups = PointsDisplay(scene, self._vertices, points, layer=-3e-6)
 		self._disp_points = PointsDisplay(scene, self._vertices, range(len(positions)), layer=-1e-6)
@@ -133,12 +141,15 @@ class WebDisplay(Display):
 
 
 class Vertices:
-	''' convenient class to share vertices between SolidDisplay, WebDisplay, PointsDisplay '''
+	''' convenient class to share vertices between SolidDisplay, WebDisplay, PointsDisplay 
+	
+		`instances` is an optional `(n,16) f4` array of column-major poses, the vertices are then drawn once per pose
+	'''
 	# vertex flags for shaders
 	HOVERED = 1<<0
 	SELECTED = 1<<1
 	
-	def __init__(self, ctx, positions, idents):
+	def __init__(self, ctx, positions, idents, instances=None):
 		self.idents = idents
 		self.nident = int(max(idents))+1
 		self.u_flags = 0
@@ -152,6 +163,13 @@ class Vertices:
 		self.vb_idents = ctx.buffer(np.asarray(idents, dtype='u2', order='C'))
 		self.vb_flags = ctx.buffer(self.v_flags, dynamic=True)
 		self.world = fmat4(1)
+		# per instance attributes to add to the vertex arrays
+		self.instances = 1
+		self.instanced = []
+		if instances is not None:
+			self.instances = len(instances)
+			self.vb_instances = ctx.buffer(np.asarray(instances, dtype='f4', order='C'))
+			self.instanced = [(self.vb_instances, '16f/i', 'i_pose')]
 		
 	def prerender(self, view):
 		if self.flags_updated:
@@ -183,8 +201,12 @@ class FacesDisplay:
 		self.reflectmap = scene.share('skybox', load)
 		
 		# load the shader
-		self.shader = scene.share(type(self), self._share)
-		self.ident_shader = scene.share(load_shader_subident, load_shader_subident)
+		if vertices.instanced:
+			self.shader = scene.share((type(self), instanced), lambda scene: self._share(scene, instanced))
+			self.ident_shader = scene.share(load_shader_subident_instanced, load_shader_subident_instanced)
+		else:
+			self.shader = scene.share(type(self), self._share)
+			self.ident_shader = scene.share(load_shader_subident, load_shader_subident)
 		# allocate buffers
 		if faces is not None and len(faces) and vertices.vb_positions:
 			self.vb_faces = scene.context.buffer(np.asarray(faces, 'u4', order='C'))
@@ -193,7 +215,8 @@ class FacesDisplay:
 					self.shader, 
 					[	(vertices.vb_positions, '3f', 'v_position'), 
 						(self.vb_normals, '3f', 'v_normal'),
-						(vertices.vb_flags, 'u1', 'v_flags')],
+						(vertices.vb_flags, 'u1', 'v_flags'),
+						*vertices.instanced],
 					self.vb_faces,
 					mode=mgl.TRIANGLES,
 					)
@@ -201,16 +224,17 @@ class FacesDisplay:
 			self.va_ident = scene.context.vertex_array(
 					self.ident_shader, 
 					[	(vertices.vb_positions, '3f', 'v_position'),
-						(vertices.vb_idents, 'u2', 'item_ident')], 
+						(vertices.vb_idents, 'u2', 'item_ident'),
+						*vertices.instanced], 
 					self.vb_faces,
 					mode=mgl.TRIANGLES,
 					)
 		else:
 			self.va = None
 	
-	def _share(self, scene):
+	def _share(self, scene, source=lambda source: source):
 		shader = scene.context.program(
-			vertex_shader=open(resourcedir+'/shaders/solid.vert').read(),
+			vertex_shader=source(open(resourcedir+'/shaders/solid.vert').read()),
 			fragment_shader=open(resourcedir+'/shaders/solid.frag').read(),
 			)
 		# setup some uniforms
@@ -230,7 +254,7 @@ class FacesDisplay:
 			self.va.program['world'].write(self._vertices.world)
 			self.va.program['view'].write(view.uniforms['view'])
 			self.va.program['proj'].write(view.uniforms['proj'])
-			self.va.render()
+			self.va.render(instances=self._vertices.instances)
 	
 	def identify(self, view):
 		if self.va:
@@ -238,7 +262,7 @@ class FacesDisplay:
 			self.va_ident.program['start_ident'] = view.identstep(self._vertices.nident)
 			self.va_ident.program['view'].write(view.uniforms['view'] * self._vertices.world)
 			self.va_ident.program['proj'].write(view.uniforms['proj'])
-			self.va_ident.render()
+			self.va_ident.render(instances=self._vertices.instances)
 
 class GhostDisplay:
 	def __init__(self, scene, vertices, normals, faces, color, layer=0):
@@ -246,8 +270,12 @@ class GhostDisplay:
 		self.layer = layer
 		self._vertices = vertices
 		
-		self.shader = scene.share(type(self), self._share)
-		self.ident_shader = scene.share(load_shader_subident, load_shader_subident)
+		if vertices.instanced:
+			self.shader = scene.share((type(self), instanced), lambda scene: self._share(scene, instanced))
+			self.ident_shader = scene.share(load_shader_subident_instanced, load_shader_subident_instanced)
+		else:
+			self.shader = scene.share(type(self), self._share)
+			self.ident_shader = scene.share(load_shader_subident, load_shader_subident)
 		# allocate buffers
 		if faces is not None and len(faces) and vertices.vb_positions:
 			self.vb_faces = scene.context.buffer(np.asarray(faces, 'u4', order='C'))
@@ -256,7 +284,8 @@ class GhostDisplay:
 					self.shader, 
 					[	(vertices.vb_positions, '3f', 'v_position'), 
 						(self.vb_normals, '3f', 'v_normal'),
-						(vertices.vb_flags, 'u1', 'v_flags')],
+						(vertices.vb_flags, 'u1', 'v_flags'),
+						*vertices.instanced],
 					self.vb_faces,
 					mode=mgl.TRIANGLES,
 					)
@@ -264,16 +293,17 @@ class GhostDisplay:
 			self.va_ident = scene.context.vertex_array(
 					self.ident_shader, 
 					[	(vertices.vb_positions, '3f', 'v_position'),
-						(vertices.vb_idents, 'u2', 'item_ident')], 
+						(vertices.vb_idents, 'u2', 'item_ident'),
+						*vertices.instanced], 
 					self.vb_faces,
 					mode=mgl.TRIANGLES,
 					)
 		else:
 			self.va = None
 	
-	def _share(self, scene):
+	def _share(self, scene, source=lambda source: source):
 		return scene.context.program(
-			vertex_shader=open(resourcedir+'/shaders/solid.vert').read(),
+			vertex_shader=source(open(resourcedir+'/shaders/solid.vert').read()),
 			fragment_shader=open(resourcedir+'/shaders/ghost.frag').read(),
 			)
 	
@@ -289,7 +319,7 @@ class GhostDisplay:
 			self.va.program['view'].write(view.uniforms['view'])
 			self.va.program['proj'].write(view.uniforms['proj'])
 			self.va.program['layer'] = self.layer
-			self.va.render()
+			self.va.render(instances=self._vertices.instances)
 			view.scene.context.enable_only(mgl.BLEND | mgl.DEPTH_TEST)
 	
 	def identify(self, view):
@@ -299,7 +329,7 @@ class GhostDisplay:
 			self.ident_shader['proj'].write(view.uniforms['proj'])
 			self.ident_shader['layer'] = self.layer
 			# render on self.context
-			self.va_ident.render()
+			self.va_ident.render(instances=self._vertices.instances)
 
 class LinesDisplay:
 	def __init__(self, scene, vertices, lines, color, alpha=1, layer=0):
@@ -308,22 +338,28 @@ class LinesDisplay:
 		self._vertices = vertices
 		
 		# load the line shader
-		self.shader = scene.share(load_shader_wire, load_shader_wire)
-		self.ident_shader = scene.share(load_shader_subident, load_shader_subident)
+		if vertices.instanced:
+			self.shader = scene.share(load_shader_wire_instanced, load_shader_wire_instanced)
+			self.ident_shader = scene.share(load_shader_subident_instanced, load_shader_subident_instanced)
+		else:
+			self.shader = scene.share(load_shader_wire, load_shader_wire)
+			self.ident_shader = scene.share(load_shader_subident, load_shader_subident)
 		if lines is not None and len(lines) and vertices.vb_positions:
 			# allocate buffers
 			self.vb_lines = scene.context.buffer(np.asarray(lines, dtype='u4', order='C'))
 			self.va = scene.context.vertex_array(
 						self.shader,
 						[	(vertices.vb_positions, '3f', 'v_position'),
-							(vertices.vb_flags, 'u1', 'v_flags')],
+							(vertices.vb_flags, 'u1', 'v_flags'),
+							*vertices.instanced],
 						self.vb_lines,
 						mode = mgl.LINES,
 						)
 			self.va_ident = scene.context.vertex_array(
 					self.ident_shader, 
 					[	(vertices.vb_positions, '3f', 'v_position'),
-						(vertices.vb_idents, 'u2', 'item_ident')], 
+						(vertices.vb_idents, 'u2', 'item_ident'),
+						*vertices.instanced], 
 					self.vb_lines,
 					mode = mgl.LINES,
 					)
@@ -339,7 +375,7 @@ class LinesDisplay:
 			self.va.program['view'].write(view.uniforms['view'] * self._vertices.world)
 			self.va.program['proj'].write(view.uniforms['proj'])
 			self.va.program['layer'] = self.layer
-			self.va.render()
+			self.va.render(instances=self._vertices.instances)
 		
 	def identify(self, view):
 		if self.va:
@@ -347,7 +383,7 @@ class LinesDisplay:
 			self.va_ident.program['view'].write(view.uniforms['view'] * self._vertices.world)
 			self.va_ident.program['proj'].write(view.uniforms['proj'])
 			self.va_ident.program['layer'] = self.layer
-			self.va_ident.render()
+			self.va_ident.render(instances=self._vertices.instances)
 		
 class PointsDisplay:
 	def __init__(self, scene, vertices, indices=None, color=None, ptsize=3, layer=0):
@@ -358,22 +394,28 @@ class PointsDisplay:
 		self._vertices = vertices
 		
 		# load the line shader
-		self.shader = scene.share(load_shader_wire, load_shader_wire)
-		self.ident_shader = scene.share(load_shader_subident, load_shader_subident)
+		if vertices.instanced:
+			self.shader = scene.share(load_shader_wire_instanced, load_shader_wire_instanced)
+			self.ident_shader = scene.share(load_shader_subident_instanced, load_shader_subident_instanced)
+		else:
+			self.shader = scene.share(load_shader_wire, load_shader_wire)
+			self.ident_shader = scene.share(load_shader_subident, load_shader_subident)
 		# allocate GPU objects
 		if indices is not None and len(indices) and vertices.vb_positions:
 			self.vb_indices = scene.context.buffer(np.asarray(indices, dtype='u4', order='C'))
 			self.va = scene.context.vertex_array(
 				self.shader,
 				[	(vertices.vb_positions, '3f', 'v_position'),
-					(vertices.vb_flags, 'u1', 'v_flags')],
+					(vertices.vb_flags, 'u1', 'v_flags'),
+					*vertices.instanced],
 				self.vb_indices,
 				mode=mgl.POINTS,
 				)
 			self.va_ident = scene.context.vertex_array(
 				self.ident_shader, 
 				[	(vertices.vb_positions, '3f', 'v_position'),
-					(vertices.vb_idents, 'u2', 'item_ident')], 
+					(vertices.vb_idents, 'u2', 'item_ident'),
+					*vertices.instanced], 
 				self.vb_indices,
 				mode=mgl.POINTS,
 				)
@@ -390,7 +432,7 @@ class PointsDisplay:
 			self.va.program['hovered_color'].write(settings.display['hover_color'])
 			self.va.program['view'].write(view.uniforms['view'] * self._vertices.world)
 			self.va.program['proj'].write(view.uniforms['proj'])
-			self.va.render()
+			self.va.render(instances=self._vertices.instances)
 	
 	def identify(self, view):
 		if self.va:
@@ -399,4 +441,4 @@ class PointsDisplay:
 			self.va_ident.program['start_ident'] = view.identstep(self._vertices.nident)
 			self.va_ident.program['view'].write(view.uniforms['view'] * self._vertices.world)
 			self.va_ident.program['proj'].write(view.uniforms['proj'])
-			self.va_ident.render()
+			self.va_ident.render(instances=self._vertices.instances)
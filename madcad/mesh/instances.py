@@ -0,0 +1,82 @@
+# This file is part of pymadcad,  distributed under license LGPL v3
+from __future__ import annotations
+
+import numpy as np
+
+from ..box import Box
+from ..mathutils import mat4, typedlist, transform
+from .container import typedlist_view
+
+__all__ = ['Instances']
+
+
+class Instances(object):
+	''' Lazy repetition of a base mesh at several poses
+
+		The copies are not computed until a concatenated mesh is asked with `mesh()`, so repeating a part many times costs only one matrix per copy. When displayed, the base mesh is uploaded once to the GPU and drawn at all the poses in a single instanced call.
+
+		It can be put in a `Solid` or passed to `mesh()` like any other geometry.
+
+		Attributes:
+			base:        the repeated `Mesh`, `Web` or `Wire`
+			transforms:  `typedlist` of `mat4`, the pose of each copy
+
+		Example:
+			>>> bolts = Instances(bolt, [translate(vec3(cos(t), sin(t), 0))  for t in linrange(0, 2*pi, div=12)])
+			>>> bolts.box()
+			Box(...)
+			>>> bolts.mesh()   # concatenation of all the copies
+			<Mesh ...>
+	'''
+	__slots__ = 'base', 'transforms'
+
+	def __init__(self, base, transforms=()):
+		self.base = base
+		if not (isinstance(transforms, typedlist) and transforms.dtype == mat4):
+			transforms = typedlist(map(transform, transforms), mat4)
+		self.transforms = transforms
+
+	def __len__(self):
+		return len(self.transforms)
+
+	def __repr__(self):
+		return '<{} of {} {} copies>'.format(type(self).__name__, len(self.transforms), type(self.base).__name__)
+
+	def transform(self, trans) -> Instances:
+		''' Return new instances of the same base, with all the poses moved by the given transform '''
+		trans = transform(trans)
+		return Instances(self.base, typedlist((trans * pose  for pose in self.transforms), mat4))
+
+	def box(self) -> Box:
+		''' Return a box containing all the copies
+
+			It is the box of the base corners placed at each pose, so it can be slightly bigger than the copies when the poses are rotating
+		'''
+		if not self.transforms:
+			return Box()
+		return instances_box(self.base.box(), self._poses())
+
+	def mesh(self, resolution=None):
+		''' Return the concatenation of all the copies, see `NMesh.transform_many` '''
+		return self.base.transform_many(self.transforms)
+
+	def display(self, scene):
+		from ..rendering import Display
+		if not self.transforms:
+			return Display()
+		return self.base.display(scene, instances=self._poses().astype('f4'))
+
+	def _poses(self) -> np.ndarray:
+		''' the poses as an array of shape `(n,16)` of column-major matrices '''
+		return np.asarray(typedlist_view(self.transforms))
+
+
+def instances_box(box, instances) -> Box:
+	''' boundingbox of the given box placed at all the poses of `instances` (an array of column-major matrices, see `Vertices`), or the box itself if there is no instances '''
+	if instances is None or box.isempty():
+		return box
+	poses = np.asarray(instances).reshape(-1, 4, 4)
+	corners = np.array([[x, y, z, 1]  for x in (box.min.x, box.max.x)  for y in (box.min.y, box.max.y)  for z in (box.min.z, box.max.z)], poses.dtype)
+	# the matrices are column-major, so each (4,4) block is the transposed pose
+	placed = (corners @ poses)[..., :3].reshape(-1, 3)
+	return Box(type(box.min)(placed.min(axis=0)), type(box.max)(placed.max(axis=0)))
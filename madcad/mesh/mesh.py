@@ -1,12 +1,13 @@
 from __future__ import annotations
 from math import inf, cos
-from copy import deepcopy, copy
+from copy import copy
 from numbers import Integral
 from collections import OrderedDict
+import numpy as np
 
-from .. import settings
-from .container import ensure_typedlist, NMesh, typedlist_to_numpy, reprarray, MeshError, striplist
-from ..hashing import Asso, edgekey, suites, arrangeface, connef
+from .. import settings, core
+from .container import ensure_typedlist, NMesh, typedlist_to_numpy, numpy_to_typedlist, reprarray, _offset, MeshError, striplist, split_labels
+from ..hashing import Asso, edgekey, suites, arrangeface, Topology, topologies, invalidate
 from ..mathutils import (
 		vec3, isfinite, anglebt, NUMPREC, mat3, distance_pt, uvec2, cross,
 		length2, length, dot, normalize, uvec3, distance2, mix, clamp, glm,
@@ -30,6 +31,8 @@ class Mesh(NMesh):
 		options:	custom informations for the entire mesh
 	'''
 	__slots__ = 'points', 'faces', 'tracks', 'groups', 'options'
+	# buffers exposed by `arrays()`
+	_buffers = {'points': vec3, 'faces': uvec3, 'tracks': 'I'}
 
 	# BEGIN --- special methods ---
 
@@ -62,13 +65,13 @@ class Mesh(NMesh):
 			else:
 				lp = len(self.points)
 				self.points.extend(other.points)
-				self.faces.extend(f+lp  for f in other.faces)
+				self.faces.extend(_offset(other.faces, lp, uvec3))
 			if self.groups is other.groups:
 				self.tracks.extend(other.tracks)
 			else:
 				lt = len(self.groups)
 				self.groups.extend(other.groups)
-				self.tracks.extend(track+lt  for track in other.tracks)
+				self.tracks.extend(_offset(other.tracks, lt, 'I'))
 			return self
 		else:
 			return NotImplemented
@@ -97,9 +100,16 @@ class Mesh(NMesh):
 		return reindex
 	
 	def mergepoints(self, merges) -> Mesh:
-		''' merge points with the merge dictionnary {src index: dst index}
+		''' merge points with the merge dictionnary {src index: dst index}, or a remapping array giving the new index of every point
 			merged points are not removed from the buffer.
 		'''
+		if isinstance(merges, np.ndarray):
+			faces = merges[typedlist_to_numpy(self.faces, 'i8')]
+			keep = (faces[:,0] != faces[:,1]) & (faces[:,1] != faces[:,2]) & (faces[:,2] != faces[:,0])
+			self.faces = numpy_to_typedlist(faces[keep], uvec3)
+			self.tracks = typedlist(typedlist_to_numpy(self.tracks, 'u4')[keep], 'I')
+			return self
+		
 		j = 0
 		for i,f in enumerate(self.faces):
 			f = uvec3(
@@ -113,6 +123,7 @@ class Mesh(NMesh):
 				j += 1
 		del self.faces[j:]
 		del self.tracks[j:]
+		invalidate(self)
 		return self
 
 
@@ -156,8 +167,8 @@ class Mesh(NMesh):
 
 	def facenear(self, point) -> int:
 		''' return the index of the closest triangle to the given point '''
-		return min(	range(len(self.faces)),
-					key=lambda i: distance_pt(point, self.facepoints(i)) )
+		from ..query import nearest
+		return int(nearest(self, point, 'faces')[0][0])
 	
 	def group(self, quals) -> Mesh:
 		''' extract a part of the mesh corresponding to the designated groups.
@@ -205,6 +216,7 @@ class Mesh(NMesh):
 		del self.faces[j:]
 		del self.tracks[j:]
 		self += mesh
+		invalidate(self)
 		return self
 
 
@@ -227,47 +239,22 @@ class Mesh(NMesh):
 
 	def facenormals(self) -> '[vec3]':
 		''' list normals for each face '''
-		return typedlist(map(self.facenormal, self.faces), vec3)
+		return core.facenormals(self)
 
 	def edgenormals(self) -> '{uvec2: vec3}':
 		''' dict of normals for each UNORIENTED edge '''
-		normals = {}
-		for face in self.faces:
-			normal = self.facenormal(face)
-			for edge in ((face[0], face[1]), (face[1], face[2]), (face[2],face[0])):
-				e = edgekey(*edge)
-				normals[e] = normals.get(e,0) + normal
-		for e,normal in normals.items():
-			normals[e] = normalize(normal)
-		return normals
+		edges, normals = core.edgenormals(self)
+		return dict(zip(map(tuple, edges), normals))
 
 
 	def vertexnormals(self) -> '[vec3]':
 		''' list of normals for each point '''
-		from madcad import core
 		return core.vertexnormals(self)
 		
 	def tangents(self) -> '{int: vec3}':
 		''' tangents to outline points '''
-		# outline with associated face normals
-		edges = {}
-		for face in self.faces:
-			for e in ((face[0], face[1]), (face[1], face[2]), (face[2],face[0])):
-				if e in edges:	del edges[e]
-				else:			edges[(e[1], e[0])] = self.facenormal(face)
-
-		# cross neighbooring normals
-		tangents = {}
-		for loop in suites(edges, cut=False):
-			assert loop[-1] == loop[0],  "non-manifold mesh"
-			loop.pop()
-			for i in range(len(loop)):
-				c = cross(	edges[(loop[i-2],loop[i-1])],
-							edges[(loop[i-1],loop[i])] )
-				o = cross(  self.points[loop[i-2]] - self.points[loop[i]],
-				            edges[(loop[i-2],loop[i-1])] + edges[(loop[i-1],loop[i])] )
-				tangents[loop[i-1]] = normalize(mix(o, c, clamp(length2(c)/length2(o)/NUMPREC, 0, 1) ))
-		return tangents
+		points, tangents = core.tangents(self)
+		return dict(zip(points, tangents))
 
 	def edges(self) -> set[uvec2]:
 		''' set of UNORIENTED edges present in the mesh '''
@@ -390,40 +377,32 @@ class Mesh(NMesh):
 
 	def surface(self) -> float:
 		''' total surface of triangles '''
-		s = 0
-		for f in self.faces:
-			a,b,c = self.facepoints(f)
-			s += length(cross(a-b, a-c))
-		return s /2
+		return core.surface(self)
 
 	def volume(self) -> float:
 		''' return the volume enclosed by the mesh if composed of envelopes (else it has no meaning) '''
-		o = self.barycenter()
-		s = 0
-		for f in self.faces:
-			a,b,c = self.facepoints(f)
-			s += glm.determinant(mat3(a-o, b-o, c-o))
-		return s /6
+		return core.volume(self)
 
 	def barycenter(self) -> vec3:
-		''' surface barycenter of the mesh '''
-		if not self.faces:
-			return None
-		acc = vec3(0)
-		tot = 0
-		for f in self.faces:
-			a,b,c = self.facepoints(f)
-			weight = length(cross(b-a, c-a))
-			tot += weight
-			acc += weight*(a+b+c)
-		return acc / (3*tot)
+		''' surface barycenter of the mesh, `vec3(0)` if it has no face. The faces are weighted by their area, or equally if they are all degenerated '''
+		barycenter = core.barycenter_surface(self)
+		if barycenter is None:	return vec3(0)
+		return vec3(barycenter)
 
 	def propagate(self, atface, atisland=None, find=None, conn=None):
-		''' return the unconnected parts of the mesh as several meshes '''
-		if not conn:
-			conn = connef(self.faces)
+		''' propagate through the neighbouring faces, calling `atface(face, reached)` for each face reached and `atisland(reached)` once an island is complete. `find(stack, reached)` pushes the face to start the next island from, the first unreached face by default
+		
+			This is the generic traversal for custom connectivities or callbacks, `islandlabels()` is much faster for labelling the islands.
+			`conn` can be a `Topology` or an edge to face connectivity like given by `connef`, the cached topology is used if not given
+		'''
 		if not self.faces:
 			return
+		if not conn:
+			conn = self.topology()
+		if isinstance(conn, Topology):
+			neighbours = conn.neighbours.tolist()
+		else:
+			neighbours = [[conn.get((f[i],f[i-1]), -1)  for i in range(3)]  for f in self.faces]
 
 		reached = [False] * len(self.faces)	# faces reached
 		stack = []
@@ -448,11 +427,9 @@ class Mesh(NMesh):
 				if reached[i]:	continue	# make sure this face has not been stacked twice
 				reached[i] = True
 				atface(i, reached)
-				f = self.faces[i]
-				for i in range(3):
-					e = f[i],f[i-1]
-					if e in conn and not reached[conn[e]]:
-						stack.append(conn[e])
+				for n in neighbours[i]:
+					if n >= 0 and not reached[n]:
+						stack.append(n)
 			if atisland:
 				atisland(reached)
 
@@ -501,20 +478,38 @@ class Mesh(NMesh):
 		self.points, self.faces = core.split_surface(self, typedlist(edges, dtype=uvec2))
 		return self
 
+	def topology(self) -> Topology:
+		''' adjacency of the faces, computed once and cached until the faces buffer is replaced or resized. See `Topology` and `invalidate` '''
+		return topologies.get(self, 'topology', (self.faces, len(self.points)), lambda: Topology(self))
+
+	def islandlabels(self) -> tuple[np.ndarray, int]:
+		''' label of the island each face belongs to, and the number of islands
+		
+			Islands are numbered in order of their first face. Faces are connected when one owns the reverse of a side of the other, like in `propagate`
+		'''
+		labels, count = core.components_surface(self)
+		return np.asarray(labels), count
+
 	def islands(self, conn=None) -> list[Mesh]:
-		''' return the unconnected parts of the mesh as several meshes '''
-		islands = []
-		faces = typedlist(dtype=uvec3)
-		tracks = typedlist(dtype='I')
-		def atface(i, reached):
-			faces.append(self.faces[i])
-			tracks.append(self.tracks[i])
-		def atisland(reached):
-			islands.append(Mesh(self.points, deepcopy(faces), deepcopy(tracks), self.groups))
-			faces.clear()
-			tracks.clear()
-		self.propagate(atface, atisland, conn=conn)
-		return islands
+		''' return the unconnected parts of the mesh as several meshes, all sharing the points buffer of this mesh
+		
+			`conn` is only needed for a custom connectivity, see `propagate`
+		'''
+		if conn is not None and not isinstance(conn, Topology):
+			labels = np.empty(len(self.faces), dtype=np.uint32)
+			count = 0
+			def atface(i, reached):
+				labels[i] = count
+			def atisland(reached):
+				nonlocal count
+				count += 1
+			self.propagate(atface, atisland, conn=conn)
+		else:
+			labels, count = self.islandlabels()
+		return [Mesh(self.points, faces, tracks, self.groups)
+			for faces, tracks in split_labels(labels, count, 
+				ensure_typedlist(self.faces, uvec3), 
+				ensure_typedlist(self.tracks, 'I'))]
 	
 	def flip(self) -> Mesh:
 		''' flip all faces, getting the normals opposite '''
@@ -541,10 +536,22 @@ class Mesh(NMesh):
 			metric = lambda p, n: (length2(p-center), abs(dot(n, p-center)))
 			orient = lambda p, n: dot(n, p-center)
 		if not conn:
-			conn = Asso(  (edgekey(*e),i)
-							for i,f in enumerate(self.faces)
-							for e in ((f[0],f[1]), (f[1],f[2]), (f[2],f[0]))
-							)
+			conn = self.topology()
+		if isinstance(conn, Topology):
+			# edges around each face and faces around each edge, read from the compressed rows
+			faceedges = conn.faceedges.tolist()
+			edges = conn.edges.tolist()
+			offsets, items = conn.edgefaces[0].tolist(), conn.edgefaces[1].tolist()
+			def neighbours(i, f):
+				for e in faceedges[i]:
+					a, b = edges[e]
+					if arrangeface(f, a)[1] != b:
+						a, b = b, a
+					yield a, b, items[offsets[e]:offsets[e+1]]
+		else:
+			def neighbours(i, f):
+				for k in range(3):
+					yield f[k-1], f[k], conn[edgekey(f[k-1], f[k])]
 
 		faces = self.faces
 		normals = self.facenormals()
@@ -576,56 +583,36 @@ class Mesh(NMesh):
 				if reached[i]:	continue	# make sure this face has not been stacked twice
 				reached[i] = True
 
-				f = faces[i]
-				for i in range(3):
-					e = f[i], f[i-1]
-					for n in conn[edgekey(*e)]:
+				for a, b, around in neighbours(i, faces[i]):
+					for n in around:
 						if reached[n]:	continue
 						nf = faces[n]
 						# check for orientation continuity
-						if arrangeface(nf,f[i-1])[1] == f[i]:
+						if arrangeface(nf,a)[1] == b:
 							faces[n] = (nf[2],nf[1],nf[0])
 						# propagate
 						stack.append(n)
 
+		invalidate(self)
 		return self
 	
 	def subdivide(self, div=1) -> Mesh:
-		''' Subdivide all edges by the number of cuts '''
-		n = div+2
-		pts = typedlist(dtype=vec3)
-		faces = typedlist(dtype=uvec3)
-		tracks = typedlist(dtype='I')
-		c = 0
-		for f,t in enumerate(self.tracks):
-			# place the points
-			o,p0,p1 = self.facepoints(f)
-			x = p0-o
-			y = p1-o
-			for i in range(n):
-				u = i/(n-1)
-				for j in range(n-i):
-					v = j/(n-1)
-					p = o + u*x + v*y
-					pts.append(p)
-			# create the faces
-			for i in reversed(range(1,n+1)):
-				for j in range(i-1):
-					s = c+j
-					faces.append(uvec3(s, s+i, s+1))
-				for j in range(1,i-1):
-					s = c+j
-					faces.append(uvec3(s, s+i-1, s+i))
-				c += i
-			tracks.extend([t] * (len(faces)-len(tracks)))
-
-		new = Mesh(pts, faces, tracks, self.groups)
-		new.mergeclose()
-		return new
+		''' Subdivide all edges by the number of cuts
+		
+			`div` is either a number of cuts for the whole mesh, or a list giving the number of cuts for each group.
+			An edge between groups with different numbers is cut like the group with the most cuts, and the faces along it are adapted to stay connected.
+			
+			The points are shared between faces by construction: the original points keep their indices and the new points are appended after them.
+			
+			Example:
+				>>> part.subdivide([0 if group.get('flat') else 4  for group in part.groups])
+		'''
+		return core.subdivide_surface(self, self._divisions(div))
 
 	# END BEGIN ----- output methods ------
 
-	def display(self, scene):
+	def display(self, scene, instances=None):
+		''' display of the mesh, drawn once per pose if `instances` is given as an `(n,16) f4` array of column-major matrices '''
 		from ..rendering import Display
 		from .displays import MeshDisplay
 		from madcad import core
@@ -642,6 +629,7 @@ class Mesh(NMesh):
 				typedlist_to_numpy(edges, 'u4'),
 				typedlist_to_numpy(idents, 'u4'),
 				color = self.options.get('color'),
+				instances = instances,
 				)
 
 	def __repr__(self):
@@ -1,9 +1,11 @@
 from __future__ import annotations
 from numbers import Integral
 from collections import OrderedDict
+import numpy as np
 
-from .container import ensure_typedlist, NMesh, typedlist_to_numpy, reprarray, MeshError, striplist
-from ..hashing import Asso, edgekey, suites, connpe
+from .. import core
+from .container import ensure_typedlist, NMesh, typedlist_to_numpy, numpy_to_typedlist, reprarray, _offset, MeshError, striplist, split_labels
+from ..hashing import Asso, edgekey, suites, connpe, invalidate
 from ..mathutils import (
 		vec3, distance_pe, uvec2, cross, length2, distance, length, dot,
 		normalize, typedlist, inf
@@ -26,13 +28,15 @@ class Web(NMesh):
 		options:	custom informations for the entire web
 	'''
 	__slots__ = 'points', 'edges', 'tracks', 'groups', 'options'
+	# buffers exposed by `arrays()`
+	_buffers = {'points': vec3, 'edges': uvec2, 'tracks': 'I'}
 
 	# BEGIN --- special methods ---
 
 	def __init__(self, points=None, edges=None, tracks=None, groups=None, options=None):
 		self.points = ensure_typedlist(points, vec3)
 		self.edges = ensure_typedlist(edges, uvec2)
-		self.tracks = ensure_typedlist(tracks or typedlist.full(0, len(self.edges), 'I'), 'I')
+		self.tracks = ensure_typedlist(tracks if tracks is not None else typedlist.full(0, len(self.edges), 'I'), 'I')
 		self.groups = groups if groups is not None else [None] * (max(self.tracks, default=-1)+1)
 		self.options = options or {}
 
@@ -58,13 +62,13 @@ class Web(NMesh):
 			else:
 				lp = len(self.points)
 				self.points.extend(other.points)
-				self.edges.extend(e+lp  for e in other.edges)
+				self.edges.extend(_offset(other.edges, lp, uvec2))
 			if self.groups is other.groups:
 				self.tracks.extend(other.tracks)
 			else:
 				lt = len(self.groups)
 				self.groups.extend(other.groups)
-				self.tracks.extend(t+lt   for t in other.tracks)
+				self.tracks.extend(_offset(other.tracks, lt, 'I'))
 			return self
 		else:
 			raise NotImplementedError()
@@ -93,9 +97,16 @@ class Web(NMesh):
 		return reindex
 	
 	def mergepoints(self, merges) -> Web:
-		''' merge points with the merge dictionnary {src index: dst index}
+		''' merge points with the merge dictionnary {src index: dst index}, or a remapping array giving the new index of every point
 			merged points are not removed from the buffer.
 		'''
+		if isinstance(merges, np.ndarray):
+			edges = merges[typedlist_to_numpy(self.edges, 'i8')]
+			keep = edges[:,0] != edges[:,1]
+			self.edges = numpy_to_typedlist(edges[keep], uvec2)
+			self.tracks = typedlist(typedlist_to_numpy(self.tracks, 'u4')[keep], 'I')
+			return self
+		
 		j = 0
 		for i,f in enumerate(self.edges):
 			f = uvec2(
@@ -108,6 +119,7 @@ class Web(NMesh):
 				j += 1
 		del self.edges[j:]
 		del self.tracks[j:]
+		invalidate(self)
 		return self
 
 
@@ -150,8 +162,8 @@ class Web(NMesh):
 
 	def edgenear(self, point: vec3) -> int:
 		''' return the index of the closest edge to the given point '''
-		return min( range(len(self.edges)),
-					key=lambda i: distance_pe(point, self.edgepoints(i)) )
+		from ..query import nearest
+		return int(nearest(self, point, 'edges')[0][0])
 	
 	def group(self, quals) -> Web:
 		''' extract a part of the mesh corresponding to the designated groups.
@@ -199,6 +211,7 @@ class Web(NMesh):
 		del self.edges[j:]
 		del self.tracks[j:]
 		self += mesh
+		invalidate(self)
 		return self
 
 	# END BEGIN --- extraction methods ---
@@ -238,30 +251,12 @@ class Web(NMesh):
 					)
 	
 	def subdivide(self, div=1) -> Web:
-		''' Subdivide all edges by the number of cuts '''
-		n = div+2
-		pts = typedlist(dtype=vec3)
-		edges = typedlist(dtype=uvec2)
-		tracks = typedlist(dtype='I')
-		c = 0
-		for e,t in enumerate(self.tracks):
-			# place the points
-			o,p0 = self.edgepoints(e)
-			x = p0-o
-			for i in range(n):
-				u = i/(n-1)
-				p = o + u*x
-				pts.append(p)
-			# create the edges
-			for i in range(n-1):
-				s = c+i
-				edges.append(uvec2(s, s+1))
-			c += n
-			tracks.extend([t] * (len(indices)-len(tracks)))
-
-		new = Web(pts, edges, tracks, self.groups)
-		new.mergeclose()
-		return new
+		''' Subdivide all edges by the number of cuts
+		
+			`div` is either a number of cuts for the whole web, or a list giving the number of cuts for each group.
+			Edges joining the same points share their new points and are cut like the one with the most cuts. The original points keep their indices.
+		'''
+		return core.subdivide_web(self, self._divisions(div))
 
 	def extremities(self) -> Wire:
 		''' return the points that are ending arcs
@@ -399,52 +394,32 @@ class Web(NMesh):
 			acc += weight*(a+b)
 		return acc / (2*tot)
 
+	def islandlabels(self) -> tuple[np.ndarray, int]:
+		''' label of the island each edge belongs to, and the number of islands
+		
+			Islands are numbered in order of their first edge. Edges are connected when they share a point, whatever their orientation
+		'''
+		labels, count = core.components_web(self)
+		return np.asarray(labels), count
+
 	def assignislands(self) -> 'Web':
-		conn = connpe(self.edges)
-		reached = [False] * len(self.edges)
-		stack = []
-		start = 0
-		group = 0
-		while True:
-			# search start point
-			for start in range(start,len(reached)):
-				if not reached[start]:
-					stack.append(start)
-					break
-			# end when everything reached
-			if not stack:	break
-			# propagate
-			island = Web(points=self.points, groups=self.groups)
-			while stack:
-				i = stack.pop()
-				if reached[i]:	continue	# make sure this face has not been stacked twice
-				reached[i] = True
-				yield i, group
-				for p in self.edges[i]:
-					stack.extend(n	for n in conn[p] if not reached[n])
-			group += 1
+		''' yield couples `(edge, island)` for all edges, island after island '''
+		labels, count = self.islandlabels()
+		order = np.argsort(labels, kind='stable')
+		yield from zip(order.tolist(), labels[order].tolist())
 
 	def groupislands(self) -> 'Web':
 		''' return the same web but with a new group each island '''
-		tracks = typedlist.full(0, len(self.edges), dtype='I')
-		track = 0
-		for edge, track in self.assignislands():
-			tracks[edge] = track
-		return Web(self.points, self.edges, tracks, [None]*(track+1))
+		labels, count = core.components_web(self)
+		return Web(self.points, self.edges, labels, [None]*count)
 
 	def islands(self) -> '[Web]':
-		''' return the unconnected parts of the mesh as several meshes '''
-		islands = []
-		island = Web(points=self.points, groups=self.groups)
-		for edge, group in self.assignislands():
-			if group > len(islands):
-				islands.append(island)
-				island = Web(points=self.points, groups=self.groups)
-			else:
-				island.edges.append(self.edges[edge])
-				island.tracks.append(self.tracks[edge])
-		islands.append(island)
-		return islands
+		''' return the unconnected parts of the mesh as several meshes, all sharing the points buffer of this mesh '''
+		labels, count = self.islandlabels()
+		return [Web(self.points, edges, tracks, self.groups)
+			for edges, tracks in split_labels(labels, count, 
+				ensure_typedlist(self.edges, uvec2), 
+				ensure_typedlist(self.tracks, 'I'))]
 
 	def arcs(self) -> '[Wire]':
 		''' return the contiguous portions of this web '''
@@ -533,7 +508,8 @@ class Web(NMesh):
 					reprarray(self.groups, 'groups'),
 					repr(self.options))
 
-	def display(self, scene):
+	def display(self, scene, instances=None):
+		''' display of the web, drawn once per pose if `instances` is given as an `(n,16) f4` array of column-major matrices '''
 		from ..rendering import Display
 		from .displays import WebDisplay
 
@@ -570,6 +546,7 @@ class Web(NMesh):
 				typedlist_to_numpy(edges, 'u4'),
 				typedlist_to_numpy(frontiers, 'u4'),
 				typedlist_to_numpy(idents, 'u4'),
-				color=self.options.get('color'))
+				color=self.options.get('color'),
+				instances=instances)
 
 	# END
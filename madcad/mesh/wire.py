@@ -1,7 +1,9 @@
 from __future__ import annotations
 from copy import deepcopy
+import numpy as np
 
-from .container import NMesh, ensure_typedlist, reprarray, MeshError
+from .container import NMesh, ensure_typedlist, reprarray, MeshError, typedlist_view, numpy_to_typedlist, _offset
+from ..hashing import invalidate
 from ..mathutils import (
 		vec3, noproject, distance_pe, uvec2, isnan, dot, normalize, cross,
 		length, distance, distance2, glm, typedlist
@@ -30,6 +32,8 @@ class Wire(NMesh):
 		options:	custom informations for the entire wire
 	'''
 	__slots__ = 'points', 'indices', 'tracks', 'groups', 'options'
+	# buffers exposed by `arrays()`
+	_buffers = {'points': vec3, 'indices': 'I', 'tracks': 'I'}
 
 	# BEGIN ----- special methods -----
 
@@ -75,7 +79,7 @@ class Wire(NMesh):
 			else:
 				lp = len(self.points)
 				self.points.extend(other.points)
-				self.indices.extend(i+lp  for i in other.indices)
+				self.indices.extend(_offset(other.indices, lp, 'I'))
 
 			if self.groups is other.groups:
 				if self.tracks or other.tracks:
@@ -88,7 +92,7 @@ class Wire(NMesh):
 				if not self.tracks:
 					self.tracks = typedlist.full(0, li, 'I')
 				if other.tracks:
-					self.tracks.extend(track+lg	for track in other.tracks)
+					self.tracks.extend(_offset(other.tracks, lg, 'I'))
 				else:
 					self.tracks.extend(typedlist.full(lg, len(other.indices), 'I'))
 			return self
@@ -134,6 +138,7 @@ class Wire(NMesh):
 					self.tracks[j] = self.tracks[i]
 				j += 1
 		del self.indices[j:]
+		invalidate(self)
 		return self
 
 	def mergeclose(self, limit=None):
@@ -154,6 +159,7 @@ class Wire(NMesh):
 			self.indices[-1] = self.indices[0]
 			if self.tracks:
 				self.tracks[-1] = self.tracks[0]
+		invalidate(self)
 		return merges
 
 	# END BEGIN ----- mesh checks -----
@@ -183,8 +189,8 @@ class Wire(NMesh):
 
 	def edgenear(self, point: vec3) -> int:
 		''' return the index of the closest edge to the given point '''
-		return min( range(len(self.indices)-1),
-					key=lambda i: distance_pe(point, self.edgepoints(i)) )
+		from ..query import nearest
+		return int(nearest(self, point, 'edges')[0][0])
 
 	def group(self, groups):
 		''' extract a part of the mesh corresponding to the designated groups.
@@ -370,40 +376,46 @@ class Wire(NMesh):
 					)
 	
 	def subdivide(self, div=1) -> Wire:
-		''' Subdivide all faces by the number of cuts '''
-		n = div+2
-		pts = typedlist(dtype=vec3)
-		indices = typedlist(dtype='I')
-		tracks = typedlist(dtype='I') if self.tracks else None
-		c = 0
-		for i in range(len(self.indices)-1):
-			# place the points
-			e = self.indices[i:i+2]
-			o,p0 = self.edgepoints(e)
-			x = p0-o
-			for j in range(n):
-				u = j/(n-1)
-				p = o + u*x
-				pts.append(p)
-			# create the faces
-			indices.extend(range(c, c+n))
-			c += n
-			if self.tracks:
-				tracks.extend([self.tracks[i]] * (len(indices)-len(tracks)))
-
-		new = Wire(pts, indices, tracks, self.groups)
-		new.mergeclose()
-		new.check()
-		return new
+		''' Subdivide all edges by the number of cuts
+		
+			`div` is either a number of cuts for the whole wire, or a list giving the number of cuts for each group.
+			The original points keep their indices and the new points are appended after them, in the order of the edges.
+		'''
+		points = typedlist_view(ensure_typedlist(self.points, vec3))
+		indices = typedlist_view(ensure_typedlist(self.indices, 'I')).astype(np.int64)
+		tracks = typedlist_view(ensure_typedlist(self.tracks, 'I')) if self.tracks else np.zeros(len(indices), np.uint32)
+		cuts = typedlist_view(self._divisions(div)).astype(np.int64)[tracks[:-1]]
+		
+		# new points, edge by edge
+		edge = np.repeat(np.arange(len(cuts)), cuts)
+		start = np.cumsum(cuts) - cuts
+		ratio = (np.arange(len(edge)) - start[edge] + 1) / (cuts[edge] + 1)
+		a, b = points[indices[:-1][edge]], points[indices[1:][edge]]
+		new = a + (b - a) * ratio[:, None]
+		
+		# each edge is followed by its new points in the indices
+		placed = np.arange(len(indices)) + np.concatenate([[0], np.cumsum(cuts)])[:len(indices)]
+		result = np.empty(len(indices) + len(edge), np.uint32)
+		inserted = np.ones(len(result), bool)
+		inserted[placed] = False
+		result[placed] = indices
+		result[inserted] = len(points) + np.arange(len(edge))
+		
+		return Wire(
+			numpy_to_typedlist(np.concatenate([points, new]), vec3),
+			numpy_to_typedlist(result, 'I'),
+			numpy_to_typedlist(np.concatenate([np.repeat(tracks[:-1], cuts + 1), tracks[-1:]]).astype(np.uint32), 'I') if self.tracks else None,
+			self.groups,
+			)
 
 	# END BEGIN ----- ouput methods -----
 
-	def display(self, scene):
+	def display(self, scene, instances=None):
 		from .conversions import web
 
 		w = web(self)
 		w.options = self.options
-		return w.display(scene)
+		return w.display(scene, instances)
 
 	def __repr__(self):
 		return '<Wire with {} points {} indices>'.format(len(self.points), len(self.indices))
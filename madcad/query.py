@@ -0,0 +1,185 @@
+# This file is part of pymadcad,  distributed under license LGPL v3
+'''
+	This module provides batched proximity queries on meshes, accelerated by space partitioning trees.
+
+	The trees are built on first use and kept in a small cache, so repeated queries on the same mesh don't pay their construction again. A cached tree is rebuilt when a buffer of its mesh is replaced, resized or modified in place, see `madcad.hashing.MeshCache`.
+
+	All queries take batches of points and return numpy arrays, the computations are done in the compiled core and spread on all cores.
+
+	Examples:
+		>>> indices, distances = nearest(mesh, [vec3(0), vec3(1,2,3)])
+		>>> mesh.facenear(vec3(1,2,3)) == indices[1]
+		True
+
+		>>> # clearance between two parts
+		>>> clearance = signed_distance(part1, part2.points).min()
+'''
+
+from __future__ import annotations
+import numpy as np
+import scipy.spatial
+
+from . import core
+from .mathutils import vec3, uvec2, uvec3, typedlist
+from .mesh import Mesh, Web, Wire, typedlist_to_numpy, numpy_to_typedlist, ensure_typedlist
+from .hashing import MeshCache
+
+__all__ = ['Tree', 'tree', 'nearest', 'closest_points', 'signed_distance', 'raycast']
+
+
+class Tree:
+	''' Acceleration structure for nearest queries on the points, edges or faces of a mesh
+
+		Attributes:
+			kind:  the primitives indexed, `'points'`, `'edges'` or `'faces'`
+			index: the underlying tree, a `scipy.spatial.cKDTree` for points and a `core.Bvh` for edges and faces
+
+		Edges of a `Wire` are indexed by their position in the wire, just like in `Wire.edges()`
+	'''
+	__slots__ = 'kind', 'index'
+
+	def __init__(self, mesh, kind:str):
+		self.kind = kind
+		points = ensure_typedlist(mesh.points, vec3)
+		if kind == 'points':
+			self.index = scipy.spatial.cKDTree(typedlist_to_numpy(points, 'f8'))
+		elif kind == 'faces' and isinstance(mesh, Mesh):
+			self.index = core.Bvh.triangles(points, ensure_typedlist(mesh.faces, uvec3))
+		elif kind == 'edges' and isinstance(mesh, Web):
+			self.index = core.Bvh.segments(points, ensure_typedlist(mesh.edges, uvec2))
+		elif kind == 'edges' and isinstance(mesh, Wire):
+			indices = np.asarray(mesh.indices, dtype=np.uint32)
+			edges = np.stack([indices[:-1], indices[1:]], axis=1)
+			self.index = core.Bvh.segments(points, numpy_to_typedlist(edges, uvec2))
+		else:
+			raise TypeError('cannot index {} of a {}'.format(kind, type(mesh).__name__))
+
+	def __len__(self):
+		if self.kind == 'points':
+			return self.index.n
+		return len(self.index)
+
+	def nearest(self, points) -> tuple[np.ndarray, np.ndarray]:
+		''' Index of the nearest primitive to each of the given points, and its distance
+
+			Raises:
+				ValueError: if there is no primitive to query
+		'''
+		if not len(self):
+			raise ValueError('no primitive to query')
+		points = _queries(points)
+		if self.kind == 'points':
+			distances, indices = self.index.query(typedlist_to_numpy(points, 'f8'), workers=-1)
+			return indices.astype(np.uint32), distances
+		indices, distances = self.index.nearest(points)
+		return np.asarray(indices), np.asarray(distances)
+
+	def closest(self, points) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+		''' Like `nearest` but also return the closest point on the primitive found, as an array of shape `(n,3)` '''
+		if not len(self):
+			raise ValueError('no primitive to query')
+		points = _queries(points)
+		if self.kind == 'points':
+			distances, indices = self.index.query(typedlist_to_numpy(points, 'f8'), workers=-1)
+			return indices.astype(np.uint32), distances, self.index.data[indices]
+		indices, distances, closest = self.index.closest(points)
+		return np.asarray(indices), np.asarray(distances), typedlist_to_numpy(closest, 'f8')
+
+	def signed_distance(self, points) -> tuple[np.ndarray, np.ndarray]:
+		''' Like `nearest` but the distances are negative for points inside the surface
+
+			The side is given by the angle weighted pseudo-normals of the faces, edges and vertices. It is meaningful only for a closed and consistently oriented surface (see `Mesh.isenvelope`)
+		'''
+		if self.kind != 'faces':
+			raise ValueError('signed distance is only defined for faces')
+		if not len(self):
+			raise ValueError('no primitive to query')
+		indices, distances = self.index.signed_distance(_queries(points))
+		return np.asarray(indices), np.asarray(distances)
+
+	def raycast(self, origins, directions) -> tuple[np.ndarray, np.ndarray]:
+		''' Index of the first face hit by each ray, and the ray parameter at the hit point: `origin + parameter*direction`
+
+			A single origin or direction is used for all the rays. The index is `-1` and the parameter is `inf` for rays hitting no face.
+		'''
+		if self.kind != 'faces':
+			raise ValueError('raycast is only defined for faces')
+		origins, directions = np.broadcast_arrays(
+			typedlist_to_numpy(_queries(origins), 'f8'),
+			typedlist_to_numpy(_queries(directions), 'f8'),
+			)
+		indices, parameters = self.index.raycast(
+			numpy_to_typedlist(np.ascontiguousarray(origins), vec3),
+			numpy_to_typedlist(np.ascontiguousarray(directions), vec3),
+			)
+		parameters = np.asarray(parameters)
+		indices = np.where(np.isfinite(parameters), np.asarray(indices).astype(np.int64), -1)
+		return indices, parameters
+
+
+# cached trees by mesh and kind
+_trees = MeshCache()
+
+def tree(mesh, kind:str=None) -> Tree:
+	''' Return the acceleration structure for the given primitives of a mesh, from the cache if the mesh buffers did not change since its last query
+
+		Parameters:
+			mesh:  a `Mesh`, `Web` or `Wire`
+			kind:  the primitives to index, `'points'`, `'edges'` or `'faces'`. Defaults to faces for a `Mesh` and edges for `Web` and `Wire`
+	'''
+	if kind is None:
+		kind = 'faces' if isinstance(mesh, Mesh) else 'edges'
+	depends = [mesh.points]
+	if kind == 'faces':		depends.append(mesh.faces)
+	elif kind == 'edges':	depends.append(mesh.edges if isinstance(mesh, Web) else mesh.indices)
+	return _trees.get(mesh, kind, depends, lambda: Tree(mesh, kind))
+
+def nearest(mesh, points, kind:str=None) -> tuple[np.ndarray, np.ndarray]:
+	''' Index of the nearest primitive of `mesh` to each of the given points, and its distance
+
+		Parameters:
+			mesh:    a `Mesh`, `Web` or `Wire`
+			points:  a `vec3` or an iterable of `vec3`, or a numpy array of shape `(n,3)`
+			kind:    the primitives to search, see `tree()`
+
+		Returns:
+			a tuple `(indices, distances)` of numpy arrays with one item per query point
+	'''
+	return tree(mesh, kind).nearest(points)
+
+def closest_points(mesh, points, kind:str=None) -> tuple[np.ndarray, np.ndarray]:
+	''' Closest point on `mesh` to each of the given points, and the index of the primitive it lies on
+
+		Returns:
+			a tuple `(closest, indices)` with `closest` of shape `(n,3)`
+	'''
+	indices, distances, closest = tree(mesh, kind).closest(points)
+	return closest, indices
+
+def signed_distance(mesh: Mesh, points) -> np.ndarray:
+	''' Distance from each of the given points to the surface of `mesh`, negative for points inside it
+
+		`mesh` must be a closed and consistently oriented surface for the sign to be meaningful
+	'''
+	return tree(mesh, 'faces').signed_distance(points)[1]
+
+def raycast(mesh: Mesh, origins, directions) -> tuple[np.ndarray, np.ndarray]:
+	''' First face of `mesh` hit by each ray, see `Tree.raycast`
+
+		Parameters:
+			origins:     ray starting points, a `vec3` or an array of them
+			directions:  ray directions, a `vec3` or an array of them. The parameters returned are in units of their lengths
+
+		Returns:
+			a tuple `(indices, parameters)`, the hit points are `origins + parameters*directions`
+	'''
+	return tree(mesh, 'faces').raycast(origins, directions)
+
+
+def _queries(points) -> typedlist:
+	''' convert query points to a typedlist of vec3 '''
+	if isinstance(points, vec3):
+		return typedlist([points], vec3)
+	if isinstance(points, np.ndarray):
+		return numpy_to_typedlist(points.reshape(-1, 3), vec3)
+	return ensure_typedlist(points, vec3)
@@ -2,6 +2,7 @@
 '''
 	implementation of views and displays for 3D
 '''
+import re
 import numpy as np
 from .view import (
 	GLView3D, Offscreen3D, Orbit, Turntable, Perspective, Orthographic
@@ -15,6 +16,7 @@ __all__ = [
 	'GLView3D', 'Offscreen3D', 'QView3D', 'Orbit', 'Turntable', 'Perspective',
 	'Orthographic', "load_shader_ident", "load_shader_subident",
 	"load_shader_wire", "load_shader_uniformcolor", "npboundingbox",
+	"load_shader_subident_instanced", "load_shader_wire_instanced", "instanced",
 ]
 
 def load_shader_ident(scene):
@@ -35,6 +37,22 @@ def load_shader_wire(scene):
 		fragment_shader=open(resourcedir+'/shaders/wire.frag').read(),
 		)
 	
+def load_shader_subident_instanced(scene):
+	return scene.context.program(
+		vertex_shader=instanced(open(resourcedir+'/shaders/object-item-ident.vert').read()),
+		fragment_shader=open(resourcedir+'/shaders/ident.frag').read(),
+		)
+
+def load_shader_wire_instanced(scene):
+	return scene.context.program(
+		vertex_shader=instanced(open(resourcedir+'/shaders/wire.vert').read()),
+		fragment_shader=open(resourcedir+'/shaders/wire.frag').read(),
+		)
+
+def instanced(source: str) -> str:
+	''' enable the per instance pose attribute `i_pose` in the source of a vertex shader supporting it '''
+	return re.sub(r'(#version[^\n]*\n)', r'\1#define INSTANCED\n', source, count=1)
+
 def load_shader_uniformcolor(scene):
 	return scene.context.program(
 		vertex_shader=open(resourcedir+'/shaders/uniformcolor.vert').read(),
@@ -1,16 +1,20 @@
+from . import core
 from .mathutils import (
 		anglebt, vec3, noproject, project, cross, dot, length, length2,
-		distance, sign, quat, normalize, inf
+		distance, sign, quat, normalize, inf, uvec2, NUMPREC,
 	)
-from .mesh import Mesh
-from .hashing import connef, edgekey
+from .mesh import Mesh, typedlist_view, typedlist_to_numpy, numpy_to_typedlist
+from .hashing import edgekey, MeshCache
 from .constraints import SolveError
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from scipy.optimize import least_squares
 
-__all__ = [	'segmentation',
-			'guessjoint', 'guesssurface',
+__all__ = [	'segmentation', 'simplify', 'remesh', 'homogenize', 'subdivide',
+			'guessjoint', 'guesssurface', 'guesssurfaces',
 			]
 
 
@@ -45,106 +49,39 @@ def segmentation(mesh, tolerance=5, sharp=0.2) -> Mesh:
 		>>> part = segmentation(part)
 	'''
 	# pick informations from the mesh
-	pts = mesh.points
-	conn = connef(mesh.faces)
-	facenormals = mesh.facenormals()
+	points = typedlist_view(mesh.points)
+	faces = typedlist_view(mesh.faces).astype(np.int64)
+	normals = typedlist_to_numpy(mesh.facenormals(), 'f8')
 	prec = 1 / mesh.maxnum()  # curvature precision, curvature is rad/m, so 1rad/max dist seems to be a fairly low curvature
 
-	# this is what this functions is working to create: new groups and tracks to assign it to faces
-	tracks = [-1] * len(mesh.faces)
-	groups = []
-
 	# evaluate curvature around every edge
-	edgecurve = {}
-	facecurve = [0.] * len(mesh.faces)
-	weight = [0.] * len(mesh.faces)
-	for e, fa in conn.items():
-		if edgekey(*e) in edgecurve:	continue
-		fb = conn.get((e[1],e[0]))
-		if not fb:	continue
-
-		curve = dot(pts[e[1]] - pts[e[0]], cross(facenormals[fa], facenormals[fb]))
-		edgecurve[edgekey(*e)] = angle = anglebt(facenormals[fa], facenormals[fb])
-
-		# report average curvature to neighboring faces
-		if sharp > angle:
-			w = max(0, 0.5-angle)  # empirical weighting
-			facecurve[fa] += curve * w  # multiply angle at edge by   (triangle height) ~= surface/(edge length)
-			facecurve[fb] += curve * w
-			weight[fa] += w
-			weight[fb] += w
+	edges, fa, fb = _facepairs(mesh)
+	curves = np.einsum('ij,ij->i', points[edges[:,1]] - points[edges[:,0]], np.cross(normals[fa], normals[fb]))
+	angles = np.arccos(np.clip(np.einsum('ij,ij->i', normals[fa], normals[fb]), -1, 1))
+
+	# report average curvature to neighboring faces
+	smooth = angles < sharp
+	fa, fb, curves, angles = fa[smooth], fb[smooth], curves[smooth], angles[smooth]
+	weights = np.maximum(0, 0.5-angles)  # empirical weighting
+	facecurve = np.zeros(len(faces))
+	weight = np.zeros(len(faces))
+	for owners in (fa, fb):
+		np.add.at(facecurve, owners, curves * weights)  # multiply angle at edge by   (triangle height) ~= surface/(edge length)
+		np.add.at(weight, owners, weights)
 
 	# divide contributions to face curvatures
-	for i,f in enumerate(mesh.faces):
-		area = 0.5 * length(cross(pts[f[1]]-pts[f[0]], pts[f[2]]-pts[f[0]])) * weight[i]
-		if area:	facecurve[i] /= area
-		else:		facecurve[i] = 0
-		#debug.append(text.Text(
-							#(pts[f[0]] + pts[f[1]] + pts[f[2]]) /3,
-							#'{:.2g}'.format(facecurve[i]),
-							#size=8,
-							#align=('left', 'center'),
-							#))
+	corners = points[faces]
+	areas = 0.5 * np.linalg.norm(np.cross(corners[:,1]-corners[:,0], corners[:,2]-corners[:,0]), axis=1) * weight
+	facecurve = np.divide(facecurve, areas, out=np.zeros(len(faces)), where=areas != 0)
 
 	# groupping gives priority to the less curved faces, so they can extend to the ambiguous limits if there is
-	sortedfaces = sorted(range(len(mesh.faces)), key=lambda i:  abs(facecurve[i]))
-	index = 0
-
-	while True:
-		# pick a non assigned face
-		for index in range(index, len(sortedfaces)):
-			if tracks[sortedfaces[index]] == -1:	break
-		if index >= len(sortedfaces):	break
-		i = sortedfaces[index]
-		f = mesh.faces[i]
-
-		# start propagation for this face
-		tracks[i] = len(groups)
-		estimate = facecurve[i]   # average curvature of the group
-		sample = 1   # samples used in the average curvature of the group
-		front = [(f[k-1], f[k-2])  for k in range(3)]   # propagation frontline
-		reached = {i}  # faces reached by propagation
-
-		# for triangles on the frontier of a curved surface, the curvature may appear to be null (or close), in this case look for a paired triangle
-		if abs(facecurve[i]) < prec:
-			best = None
-			fence = inf
-			for i,e in enumerate(front):
-				j = conn.get(e)
-				if j is None or tracks[j] != -1 or j in reached:	continue
-				if edgecurve[edgekey(*e)] >= sharp:	continue
-				score = abs(facecurve[j]-facecurve[i])
-				if score < fence:
-					best, fence = j, score
-			if best is not None:
-				estimate = facecurve[best]
-
-		# propagation
-		while front:
-			e = front.pop()
-			j = conn.get(e)
-			# check if already processed
-			if j is None or tracks[j] != -1 or j in reached:	continue
-			reached.add(j)
-			# check criterions:
-			# split groups at maximum curvature
-			if edgecurve[edgekey(*e)] >= sharp:	continue
-			# split groups when curvature is too far from average curvature
-			if abs(facecurve[j]-estimate) / (abs(estimate)+prec) > tolerance:	continue
-
-			# improve estimation of average curvature
-			tracks[j] = len(groups)
-			estimate = (estimate*sample + facecurve[j]) / (sample+1)
-			sample += 1
-
-			# propagate
-			f = mesh.faces[j]
-			front.extend((f[k-1], f[k-2])  for k in range(3))
-
-		groups.append(estimate)
-		index += 1
-
-	return Mesh(mesh.points, mesh.faces, tracks, groups)
+	# groups never extend across sharp edges
+	tracks, groups = core.grow_regions(
+		numpy_to_typedlist(facecurve, float),
+		numpy_to_typedlist(np.stack([fa, fb], axis=1).astype('u4'), uvec2),
+		tolerance, prec)
+
+	return Mesh(mesh.points, mesh.faces, tracks, list(groups))
 
 
 
@@ -180,131 +117,507 @@ def guessjoint(solid1, solid2, surface1, surface2, guess=quat(), precision=1e-5)
 			p1 = p1[0], -p1[1]
 	return joint_type(solid1, solid2, p1, p2)
 
-from operator import itemgetter
-
 def guesssurface(surface, precision=1e-5, attempt=False):
 	''' Guess the surface kind, returns its parameters.
 
-	Return a tuple `('surface_type', parameters)`
+	Return a tuple `('surface_type', parameters)` with one of
+	
+	- `('plane', (origin, normal))`
+	- `('sphere', center)`
+	- `('cylinder', (origin, direction))`
+	- `('cone', (apex, direction))`
+	
+	The surface kinds are fitted to the points and face centers of the mesh, and the simplest kind fitting as well as the best one is returned.
 
 	Parameters:
 		surface(Mesh):      mesh from which to find the surface kind
-		precision(float):	typical distance error from mesh to ideal surface in the surface regression
+		precision(float):	typical square distance error from mesh to ideal surface in the surface regression
 		attempt(bool):      if True, will not raise an error if the acheived error is too big
 	'''
 	if not isinstance(surface, Mesh):
 		return surface
 
-	center = surface.barycenter()
-	scores = []
+	points = typedlist_view(surface.points)
+	samples, normals = _samples(points[typedlist_view(surface.faces).astype(np.int64)])
+	scores = _fit_surfaces(samples, normals, precision)
+	if not scores:
+		raise SolveError('unable to find a suitable surface type')
+	best = _select(scores, precision)
+	if not attempt and best[0] > precision:
+		raise SolveError('unable to find a suitable surface type')
+
+	return best[1], best[2]
 
-	solverargs = dict(
+def guesssurfaces(mesh, precision=None, samples=4000, draws=4, workers=-1) -> list:
+	''' Guess the surface kind of every group of a mesh at once, as `guesssurface` does for one surface. This is typically used after a `segmentation`
+	
+	Groups with more than `samples` sample points are fitted on `draws` random subsets of their faces, and the fit with the lowest error over all the group samples is kept.
+	The regressions of each surface kind are spread across a process pool when there is enough work to amortize it. The pool needs the calling script to be importable without side effects, so guard its entry point with `if __name__ == '__main__'`, or pass `workers=1`
+
+	Return a list with for each group a tuple `(kind, parameters, error)` as in `guesssurface` with the mean square distance from the group to its surface, or `None` if no surface kind fits the group with the required precision
+	
+	Parameters:
+		mesh(Mesh):         mesh whose groups are to be recognized
+		precision(float):	typical square distance error from groups to ideal surfaces, by default the square of a tenth of the mean edge length of each group
+		samples(int):       maximum number of sample points in each regression
+		draws(int):         number of random subsets fitted for large groups
+		workers(int):       number of processes used, `-1` (default) means as many as cpus, `1` fits in the current process
+		
+	Example:
+		>>> part = segmentation(read('myfile.stl'))
+		>>> for group, fit in enumerate(guesssurfaces(part)):
+		...     if fit:
+		...         print(group, fit[0], fit[2])
+	'''
+	points = typedlist_view(mesh.points)
+	faces = typedlist_view(mesh.faces).astype(np.int64)
+	tracks = typedlist_view(mesh.tracks).astype(np.int64)
+	order = np.argsort(tracks, kind='stable')
+	bounds = np.searchsorted(tracks[order], np.arange(len(mesh.groups)+1))
+	generator = np.random.default_rng(0)
+	
+	# a regression for each group, or for each subset of the large groups
+	groups, tasks = [], []
+	for group in range(len(mesh.groups)):
+		corners = points[faces[order[bounds[group]:bounds[group+1]]]]
+		if not len(corners):
+			groups.append(None)
+			continue
+		if precision is None:
+			edges = np.linalg.norm(corners - np.roll(corners, 1, axis=1), axis=2)
+			tolerance = (0.1 * edges.mean()) ** 2
+		else:
+			tolerance = precision
+		groups.append((corners, tolerance))
+		if 4*len(corners) > samples:
+			for draw in range(draws):
+				chosen = generator.choice(len(corners), samples//4, replace=False)
+				tasks.append((group, *_samples(corners[chosen]), tolerance))
+		else:
+			tasks.append((group, *_samples(corners), tolerance))
+	
+	if workers == -1:
+		workers = os.cpu_count() or 1
+	if workers > 1 and sum(len(task[1])  for task in tasks) > 10_000:
+		# each surface kind is fitted in a separate job, so even a single large group is spread across the processes
+		jobs = [(kind, *task[1:])  for task in tasks  for kind in _kinds]
+		with ProcessPoolExecutor(min(workers, len(jobs))) as pool:
+			kinds = list(pool.map(_fit_kind, *zip(*jobs), chunksize=max(1, len(jobs) // (4*workers))))
+		fits = [[fit  for fit in kinds[i:i+len(_kinds)]  if fit]
+				for i in range(0, len(kinds), len(_kinds))]
+	else:
+		fits = [_fit_surfaces(*task[1:])  for task in tasks]
+	
+	# keep the hypothesis with the lowest error over all the samples of its group
+	candidates = [[]  for group in groups]
+	for task, scores in zip(tasks, fits):
+		candidates[task[0]].append(scores)
+	results = []
+	for group, scores in zip(groups, candidates):
+		if group is None or not any(scores):
+			results.append(None)
+			continue
+		corners, tolerance = group
+		if len(scores) > 1:
+			allsamples = _samples(corners)[0]
+			scores = [(np.mean(_residuals(kind, parameters, allsamples)**2), kind, parameters)
+				for draw in scores
+				for score, kind, parameters in draw]
+			# sort by complexity of surface kinds, so the simpler ones are prefered
+			scores.sort(key=lambda fit: _kinds.index(fit[1]))
+		else:
+			scores = scores[0]
+		best = _select(scores, tolerance)
+		if best[0] > tolerance:
+			results.append(None)
+		else:
+			results.append((best[1], best[2], float(best[0])))
+	return results
+
+# surface kinds ordered from the simplest to the most complex
+_kinds = ['plane', 'sphere', 'cylinder', 'cone']
+
+def _samples(corners) -> tuple:
+	''' sample points and normals of an array of triangles of shape (n,3,3). The regressions use the face centers and face points '''
+	samples = np.concatenate([corners.mean(axis=1), corners.reshape(-1,3)])
+	normals = np.cross(corners[:,1]-corners[:,0], corners[:,2]-corners[:,0])
+	normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), NUMPREC)
+	return samples, normals
+
+def _select(scores, precision) -> tuple:
+	''' pick best regression of all, simpler surfaces are prefered when they fit as well '''
+	best = min(score  for score, kind, parameters in scores)
+	return next(fit  for fit in scores  if fit[0] <= best + 1e-2*precision)
+
+def _residuals(kind, parameters, samples) -> np.ndarray:
+	''' signed distances from samples to a surface fitted by `_fit_surfaces`, the radius or angle of the surface being the one fitting best the samples '''
+	if kind == 'plane':
+		origin, normal = np.array(parameters[0]), np.array(normalize(parameters[1]))
+		return (samples - origin) @ normal
+	elif kind == 'sphere':
+		distances = np.linalg.norm(samples - np.array(parameters), axis=1)
+		return distances - distances.mean()
+	origin, direction = np.array(parameters[0]), np.array(normalize(parameters[1]))
+	offsets = samples - origin
+	heights = offsets @ direction
+	radii = np.linalg.norm(offsets - np.outer(heights, direction), axis=1)
+	if kind == 'cylinder':
+		return radii - radii.mean()
+	elif kind == 'cone':
+		# the best angle is given by the least singular vector
+		coordinates = np.stack([radii, -heights], axis=1)
+		return coordinates @ np.linalg.svd(coordinates, full_matrices=False)[2][1]
+	else:
+		raise ValueError('unknown surface kind {}'.format(repr(kind)))
+
+def _fit_surfaces(samples, normals, precision) -> list:
+	''' fit all the known surface kinds to the sample points, return a list of tuples `(score, kind, parameters)` ordered from the simplest kind to the most complex '''
+	cylinder = _fit_cylinder(samples, normals, precision)
+	fits = [
+		_fit_plane(samples, normals, precision),
+		_fit_sphere(samples, normals, precision),
+		cylinder,
+		_fit_cone(samples, normals, precision, cylinder),
+		]
+	return [fit  for fit in fits  if fit]
+
+def _fit_kind(kind, samples, normals, precision) -> tuple:
+	''' fit the given surface kind to the sample points, return a tuple `(score, kind, parameters)` or `None` if the kind cannot fit '''
+	return _fitters[kind](samples, normals, precision)
+
+def _solverargs(precision) -> dict:
+	return dict(
 				ftol = precision,
 				max_nfev = 300,
 				method = 'lm')
 
-	# plane regression
-	def evaluate(x):
-		# retreive surface parameters
-		origin, normal = vec3(x[:3]), normalize(vec3(x[3:]))
-		# allocate residuals
-		residual = np.zeros((len(surface.faces)+2, 4), dtype='f8')
-		# compute residuals
-		residual[-1,0] = (length(vec3(x[3:])) - 1)**2
-		residual[-2,0] = length2(noproject(center-origin, normal))
-		for i,f in enumerate(surface.faces):
-			fp = surface.facepoints(f)
-			p = (fp[0]+fp[1]+fp[2]) / 3
-			residual[i,0] = dot(p-origin, normal)**2  # distance to the face center
-			for j,p in enumerate(fp):
-				residual[i,j+1] = dot(p-origin, normal)**2  # distance to each point
-		return residual.ravel()
-
-	res = least_squares(evaluate, [*center, 1,1,1], **solverargs)
-	scores.append((
-			np.mean(res.fun),
+def _fit_plane(samples, normals, precision) -> tuple:
+	''' plane regression has an exact solution '''
+	center = samples.mean(axis=0)
+	offsets = samples - center
+	normal = np.linalg.svd(offsets, full_matrices=False)[2][2]
+	return (
+			np.mean((offsets @ normal) ** 2),
 			'plane',
-			(vec3(res.x[:3]), vec3(res.x[3:])),
-			))
-	#print('plane', res.nfev, np.mean(res.fun), '\t', list(res.x))
-
-	# sphere regression
+			(vec3(center), vec3(normal)),
+			)
+
+def _fit_sphere(samples, normals, precision) -> tuple:
+	''' sphere regression, starting from the algebraic solution of  |p|**2 = 2 c.p + k '''
+	if len(samples) < 4:
+		return None
+	center = samples.mean(axis=0)
+	offsets = samples - center
+	algebraic = np.linalg.lstsq(
+		np.concatenate([2*offsets, np.ones((len(offsets),1))], axis=1), 
+		np.sum(offsets**2, axis=1), 
+		rcond=None)[0]
+	radius = np.sqrt(max(algebraic[3] + algebraic[:3] @ algebraic[:3], 0))
 	def evaluate(x):
-		# retreive surface parameters
-		origin, radius = vec3(x[:3]), float(x[3])
-		# allocate residuals
-		residual = np.zeros((len(surface.faces), 4), dtype='f8')
-		# compute residuals
-		for i,f in enumerate(surface.faces):
-			fp = surface.facepoints(f)
-			p = (fp[0]+fp[1]+fp[2]) / 3
-			residual[i,0] = (distance(p, origin) - radius) **2
-			for j,p in enumerate(fp):
-				residual[i,j+1] = (distance(p, origin) - radius) **2
-		return residual.ravel()
-
-	res = least_squares(evaluate, [*center, 1], **solverargs)
-	scores.append((
-			np.mean(res.fun),
+		return np.linalg.norm(samples - x[:3], axis=1) - x[3]
+	def jacobian(x):
+		directions = samples - x[:3]
+		directions /= np.maximum(np.linalg.norm(directions, axis=1, keepdims=True), NUMPREC)
+		return np.concatenate([-directions, np.full((len(samples),1), -1.)], axis=1)
+	res = least_squares(evaluate, [*(center + algebraic[:3]), radius], jac=jacobian, **_solverargs(precision))
+	return (
+			np.mean(res.fun**2),
 			'sphere',
 			vec3(res.x[:3]),
-			))
-	#print('sphere', res.nfev, np.mean(res.fun), '\t', list(res.x))
-
-	# cylinder regression
+			)
+
+def _fit_cylinder(samples, normals, precision) -> tuple:
+	''' cylinder regression '''
+	center = samples.mean(axis=0)
+	offsets = samples - center
+	# estimate a first axis to avoid the solver to fall into a local extremum: the direction the most orthogonal to face normals
+	eigenvalues, eigenvectors = np.linalg.eigh(normals.T @ normals)
+	# if the normals are all parallel, then we are sure it's not a cylinder
+	if len(samples) < 8 or eigenvalues[1] <= NUMPREC * eigenvalues[2]:
+		return None
+	direction = eigenvectors[:,0]
+	# start from the circle fitting the samples projected along the axis
+	x, y = eigenvectors[:,1], eigenvectors[:,2]
+	planar = np.stack([offsets @ x, offsets @ y], axis=1)
+	algebraic = np.linalg.lstsq(
+		np.concatenate([2*planar, np.ones((len(planar),1))], axis=1),
+		np.sum(planar**2, axis=1),
+		rcond=None)[0]
+	origin = center + algebraic[0]*x + algebraic[1]*y
+	radius = np.sqrt(max(algebraic[2] + algebraic[:2] @ algebraic[:2], 0))
+	
 	def evaluate(x):
-		# retreive surface parameters
-		origin, direction, radius = vec3(x[:3]), vec3(x[3:6]), float(x[6])
-		# allocate residuals
-		residual = np.zeros((len(surface.faces)+2, 4), dtype='f8')
-		# compute residuals
-		residual[-1,0] = (length(vec3(x[3:6])) - 1) **2
-		residual[-2,0] = length2(project(center-origin, direction))
-		for i,f in enumerate(surface.faces):
-			fp = surface.facepoints(f)
-			p = (fp[0]+fp[1]+fp[2]) / 3
-			residual[i,0] = (length(noproject(p-origin, direction)) - radius) **2
-			for j,p in enumerate(fp):
-				residual[i,j+1] = (length(noproject(p-origin, direction)) - radius) **2
-		return residual.ravel()
-	# estimate a first axis to avoid the solver to fall into a local extremum
-	# sum contrbutions of curvature at edges
-	direction = vec3(0)
-	conn = connef(surface.faces)
-	for e in conn:
-		if (e[1], e[0]) in conn and e[0] < e[1]:
-			edge = cross(surface.facenormal(conn[e]), surface.facenormal(conn[(e[1],e[0])]))
-			direction += edge * (sign(dot(edge, direction)) or 1)
-	# if the initial direction is too weak, then we are sure it's not a cylinder
-	if length2(direction):
-		if -min(direction) > max(direction):	direction = -direction
-		# solve
-		res = least_squares(evaluate, [*center, *normalize(direction), 1], **solverargs)
-		scores.append((
-				np.mean(res.fun),
-				'cylinder',
-				(vec3(res.x[:3]), vec3(res.x[3:])),
-				))
-		#print('cylinder', res.nfev, np.mean(res.fun), '\t', list(res.x))
-
-	# pick best regression of all
-	best = min(scores, key=itemgetter(0))
-	if attempt or best[0] > precision:
-		raise SolveError('unable to find a suitable surface type')
+		origin, direction, radius = x[:3], x[3:6], x[6]
+		norm = np.linalg.norm(direction)
+		direction = direction / norm
+		radial = samples - origin
+		radial -= np.outer(radial @ direction, direction)
+		residual = np.empty(len(samples)+2)
+		residual[:-2] = np.linalg.norm(radial, axis=1) - radius
+		# the direction is normalized and the origin is the closest to the center
+		residual[-2] = norm - 1
+		residual[-1] = (center - origin) @ direction
+		return residual
+	def jacobian(x):
+		origin, direction = x[:3], x[3:6]
+		norm = np.linalg.norm(direction)
+		direction = direction / norm
+		offsets = samples - origin
+		heights = offsets @ direction
+		radial = offsets - np.outer(heights, direction)
+		radial /= np.maximum(np.linalg.norm(radial, axis=1, keepdims=True), NUMPREC)
+		jac = np.zeros((len(samples)+2, 7))
+		jac[:-2,:3] = -radial
+		jac[:-2,3:6] = -heights[:,None] * radial / norm
+		jac[:-2,6] = -1
+		jac[-2,3:6] = direction
+		jac[-1,:3] = -direction
+		jac[-1,3:6] = ((center - origin) - ((center - origin) @ direction) * direction) / norm
+		return jac
+	
+	res = least_squares(evaluate, [*origin, *direction, radius], jac=jacobian, **_solverargs(precision))
+	origin, direction = res.x[:3], res.x[3:6] / np.linalg.norm(res.x[3:6])
+	return (
+			np.mean(res.fun[:-2]**2),
+			'cylinder',
+			(vec3(origin), vec3(direction)),
+			)
+
+def _fit_cone(samples, normals, precision, cylinder=None) -> tuple:
+	''' cone regression, starting from the given cylinder fit or from a new one '''
+	# start from the cylinder axis and the linear regression of the radius along it
+	if cylinder is None:
+		cylinder = _fit_cylinder(samples, normals, precision)
+	if cylinder is None:
+		return None
+	origin, direction = np.array(cylinder[2][0]), np.array(cylinder[2][1])
+	offsets = samples - origin
+	heights = offsets @ direction
+	radii = np.linalg.norm(offsets - np.outer(heights, direction), axis=1)
+	slope, intercept = np.polyfit(heights, radii, 1)
+	# a cone with a null slope is a cylinder
+	if abs(slope) <= 1e-3:
+		return None
+	if slope < 0:
+		direction, heights, slope = -direction, -heights, -slope
+	apex = origin - direction * intercept / slope
+	
+	def evaluate(x):
+		apex, direction, angle = x[:3], x[3:6], x[6]
+		norm = np.linalg.norm(direction)
+		direction = direction / norm
+		offsets = samples - apex
+		heights = offsets @ direction
+		radii = np.linalg.norm(offsets - np.outer(heights, direction), axis=1)
+		residual = np.empty(len(samples)+1)
+		residual[:-1] = radii * np.cos(angle) - heights * np.sin(angle)
+		residual[-1] = norm - 1
+		return residual
+	def jacobian(x):
+		apex, direction, angle = x[:3], x[3:6], x[6]
+		norm = np.linalg.norm(direction)
+		direction = direction / norm
+		offsets = samples - apex
+		heights = offsets @ direction
+		radial = offsets - np.outer(heights, direction)
+		radii = np.linalg.norm(radial, axis=1)
+		radial /= np.maximum(radii, NUMPREC)[:,None]
+		cos, sin = np.cos(angle), np.sin(angle)
+		jac = np.zeros((len(samples)+1, 7))
+		jac[:-1,:3] = -cos * radial + sin * direction
+		jac[:-1,3:6] = -((heights * cos + radii * sin) / norm)[:,None] * radial
+		jac[:-1,6] = -radii * sin - heights * cos
+		jac[-1,3:6] = direction
+		return jac
+	
+	res = least_squares(evaluate, [*apex, *direction, np.arctan(slope)], jac=jacobian, **_solverargs(precision))
+	return (
+			np.mean(res.fun[:-1]**2),
+			'cone',
+			(vec3(res.x[:3]), vec3(res.x[3:6] / np.linalg.norm(res.x[3:6]))),
+			)
+
+_fitters = {
+	'plane': _fit_plane,
+	'sphere': _fit_sphere,
+	'cylinder': _fit_cylinder,
+	'cone': _fit_cone,
+	}
+
+
+
+# ---------   remeshing ----------
+
+def remesh(mesh: Mesh, lengths, sharp=0.5, iterations=5, fit=True) -> Mesh:
+	''' Remesh so that the edges get close to the wanted length around each point, keeping the shape of the mesh.
+
+	Each iteration splits the too long edges, collapses the too short ones, flips edges so that points get 6 neighbors, then moves the points to the middle of their neighbors and back onto the original surface. This is done natively.
+
+	Outlines, frontiers between groups and edges sharper than `sharp` are kept like in `simplify`. Points on them slide along the original edges, the other points stay on the original faces of their group.
 
-	#print('---', best[1])
-	return best[1], best[2]
+	Parameters:
+		lengths (float|array):  wanted edge length around each point of the mesh, or the same length for all points
+		sharp (float):   angle (radians) above which an edge is kept as a sharp edge
+		iterations (int):  number of passes of splits, collapses, flips and relaxation
+		fit (bool):   if True, the points inside groups recognized as a plane, sphere or cylinder by `guesssurface` are projected on these ideal surfaces instead of staying on the original faces
 
+	Returns:
+		a new mesh with the same groups
+	'''
+	lengths = np.ascontiguousarray(np.broadcast_to(np.asarray(lengths, dtype='f8'), (len(mesh.points),)))
+	result = core.remesh(mesh, numpy_to_typedlist(lengths, float), sharp, iterations)
+	if fit:
+		_project_fits(mesh, result)
+	return result
 
+def homogenize(mesh: Mesh, length=None, sharp=0.5, iterations=5, fit=True) -> Mesh:
+	''' Remesh so that all the edges get close to the same length, giving nearly equilateral triangles everywhere. See `remesh` for the parameters.
 
-# replace et lisse les points des groupes (contours puis surfaces)
-def homogenize(mesh):
-	pass
+	This is useful to get uniform triangles on imported meshes, that often have very long and thin triangles.
 
-# découpe les faces et replace les points résultants pour améliorer la résolution des surfaes courbes (groupe par groupe)
-def subdivide(mesh, density):
-	pass
+	Parameters:
+		length (float):  wanted edge length, defaults to the mean edge length of the mesh
+
+	Example:
+		>>> part = read('myfile.stl')
+		>>> part.mergeclose()
+		>>> part = homogenize(segmentation(part))
+	'''
+	if length is None:
+		length = _edgelengths(mesh).mean()
+	return remesh(mesh, length, sharp, iterations, fit)
+
+def subdivide(mesh: Mesh, density=8, sharp=0.5, iterations=5, fit=True) -> Mesh:
+	''' Refine a mesh where its surface is curved, so that curved groups get a resolution like the one of generated meshes. See `remesh` for the parameters.
+
+	The edge length wanted around each point is its radius of curvature divided by `density`, but never longer than its current edges. So flat areas keep their resolution while the curved ones are refined, and with `fit` their new points lie on the ideal surfaces.
+
+	Parameters:
+		density (float):  number of edges per radian of curvature
 
-# retire les points les moins importants a la forme pour réduire la densité
-def simplify(mesh, density):
-	pass
+	Example:
+		>>> part = subdivide(segmentation(part), density=12)
+	'''
+	lengths = np.zeros(len(mesh.points))
+	counts = np.zeros(len(mesh.points))
+	edges = _edges(mesh)
+	for column in edges.T:
+		np.add.at(lengths, column, _edgelengths(mesh, edges))
+		np.add.at(counts, column, 1)
+	lengths /= np.maximum(counts, 1)
+	with np.errstate(divide='ignore'):
+		lengths = np.minimum(lengths, 1 / (density * _curvatures(mesh, sharp)))
+	return remesh(mesh, lengths, sharp, iterations, fit)
+
+def _edges(mesh) -> np.ndarray:
+	''' array of shape (n,2) of all the edges of each face '''
+	faces = typedlist_view(mesh.faces).astype(np.int64)
+	return np.stack([faces, np.roll(faces, -1, axis=1)], axis=2).reshape(-1, 2)
+
+def _edgelengths(mesh, edges=None) -> np.ndarray:
+	if edges is None:
+		edges = _edges(mesh)
+	points = typedlist_view(mesh.points)
+	return np.linalg.norm(points[edges[:,1]] - points[edges[:,0]], axis=1)
+
+def _facepairs(mesh) -> tuple:
+	''' pairs of faces sharing an edge, found by sorting the edge keys. Return the edges as oriented in the first face of each pair, the first faces and the second faces '''
+	edges = _edges(mesh)
+	keys = np.sort(edges, axis=1)
+	order = np.lexsort((keys[:,1], keys[:,0]))
+	keys = keys[order]
+	shared = np.flatnonzero(np.all(keys[1:] == keys[:-1], axis=1))
+	first, second = order[shared], order[shared+1]
+	return edges[first], first // 3, second // 3
+
+def _curvatures(mesh, sharp) -> np.ndarray:
+	''' curvature around each point: the largest angle between the normals of faces sharing an edge, by distance between their centers. Sharp edges and frontiers between groups are ignored '''
+	points = typedlist_view(mesh.points)
+	faces = typedlist_view(mesh.faces).astype(np.int64)
+	tracks = typedlist_view(mesh.tracks)
+	normals = typedlist_to_numpy(mesh.facenormals(), 'f8')
+	centers = points[faces].mean(axis=1)
+	edges, f1, f2 = _facepairs(mesh)
+	angles = np.arccos(np.clip(np.sum(normals[f1] * normals[f2], axis=1), -1, 1))
+	smooth = (angles <= sharp) & (tracks[f1] == tracks[f2])
+	curvature = angles[smooth] / np.maximum(np.linalg.norm(centers[f1] - centers[f2], axis=1)[smooth], mesh.precision())
+	result = np.zeros(len(points))
+	for column in edges[smooth].T:
+		np.maximum.at(result, column, curvature)
+	return result
+
+_fits = MeshCache()
+
+def _project_fits(original, result):
+	''' project the points inside groups of `result` on the ideal surface of the same group in `original`, when `guesssurfaces` recognizes it '''
+	points = typedlist_view(result.points)
+	faces = typedlist_view(result.faces).astype(np.int64)
+	tracks = np.repeat(typedlist_view(result.tracks).astype(np.int64), 3)
+	# points used by only one group
+	low = np.full(len(points), len(original.groups))
+	high = np.full(len(points), -1)
+	np.minimum.at(low, faces.ravel(), tracks)
+	np.maximum.at(high, faces.ravel(), tracks)
+	# the original faces are chords of the ideal surface, so the fits are accepted up to a fraction of their size
+	# the fits are kept while the original mesh does not change, for the successive remeshings of a same mesh
+	fits = _fits.get(original, 'fits',
+		(original.points, original.faces, original.tracks, len(original.groups)),
+		lambda: guesssurfaces(original))
+	for group in np.unique(tracks):
+		inside = np.flatnonzero((low == group) & (high == group))
+		if not len(inside) or not fits[group]:
+			continue
+		kind, parameters, _ = fits[group]
+		part = original.group({int(group)})
+		reference = typedlist_view(part.points)[np.unique(typedlist_view(part.faces))]
+		selected = points[inside]
+		if kind == 'plane':
+			origin, normal = np.array(parameters[0]), np.array(normalize(parameters[1]))
+			selected -= np.outer((selected - origin) @ normal, normal)
+		else:
+			if kind == 'sphere':
+				center = np.array(parameters)
+				offsets, references = selected - center, reference - center
+			elif kind == 'cylinder':
+				origin, direction = np.array(parameters[0]), np.array(normalize(parameters[1]))
+				offsets = selected - origin
+				offsets -= np.outer(offsets @ direction, direction)
+				references = reference - origin
+				references -= np.outer(references @ direction, direction)
+			else:
+				continue
+			radius = np.linalg.norm(references, axis=1).mean()
+			distances = np.linalg.norm(offsets, axis=1, keepdims=True)
+			selected += offsets * (radius / np.maximum(distances, original.precision()) - 1)
+		points[inside] = selected
+
+def simplify(mesh: Mesh, target=None, error=None, sharp=0.5) -> Mesh:
+	''' Reduce the number of faces of a mesh while keeping its shape, by collapsing its edges in order of least quadric error.
+
+	The quadric error of a point is the sum of its squared distances to the planes of the original faces around it, so collapses happen first where the surface is flat and last where it is curved. The collapses stop when the `target` number of faces is reached, or when the next collapse would move the surface further than `error` from its original faces.
+
+	Outlines, frontiers between groups and edges sharper than `sharp` are kept: their points only slide along them and points where several of them meet or where they turn sharply don't move, so the groups keep their outlines. Collapses that would flip faces or make the surface non-manifold are skipped.
+
+	This is particularly useful on imported meshes, that often have many more triangles than their shape needs.
+
+	Parameters:
+		target (int|float):  number of faces to reach, or a fraction of the current number of faces if it is a float below 1
+		error (float):  maximum distance the surface can move. Defaults to no limit when a target is given, else to the mesh precision so that only flat areas are simplified
+		sharp (float):  angle (radians) above which an edge is kept as a sharp edge
+
+	Returns:
+		a new mesh with the same groups, the points unused by the remaining faces are removed
+
+	Examples:
+		>>> part = read('myfile.stl')
+		>>> part.mergeclose()
+		>>> part = simplify(part, 0.1)   # keep a tenth of the faces
+		>>> part = simplify(part, error=0.01)   # remove faces as long as the shape moves less than 0.01
+	'''
+	if target is None:
+		target = 0
+	elif isinstance(target, float) and target < 1:
+		target = int(target * len(mesh.faces))
+	if error is None:
+		error = inf if target else mesh.precision()
+	return core.simplify(mesh, int(target), error, sharp)
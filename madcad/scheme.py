@@ -37,7 +37,7 @@ from .box import boundingbox, Box
 from .rendering import Display
 from .common import resourcedir
 from .mesh import Mesh, Web, Wire, web, wire, mesh_distance
-from .hashing import connpp
+from .hashing import connpp, Topology
 from .rendering import Scene, Displayable, writeproperty
 from .text import textsize
 from .text.displays import TextDisplay
@@ -830,7 +830,7 @@ def mesh_curvatures(mesh, conn=None, normals=None, propagate=2):
 
 	Parameters:
 		mesh:			the surface/line to search
-		conn:			a point-to-point connectivity (computed if not provided)
+		conn:			a point-to-point connectivity or a `Topology` (computed if not provided)
 		normals:		the vertex normals (computed if not provided)
 		propagate(int):	the maximum propagation rank for points to pick for the regression
 
@@ -855,9 +855,16 @@ def mesh_curvatures(mesh, conn=None, normals=None, propagate=2):
 		return seen
 	
 	if isinstance(mesh, Mesh):		
-		if not conn:	conn = connpp(mesh.faces)
+		if not conn:	conn = mesh.topology()
+		if isinstance(conn, Topology):
+			# points linked to each point, read from the compressed rows
+			offsets, items = conn.pointpoints[0].tolist(), conn.pointpoints[1].tolist()
+			conn = [items[start:stop]  for start, stop in zip(offsets, offsets[1:])]
+			linked = (p  for p, row in enumerate(conn)  if row)
+		else:
+			linked = iter(conn)
 		if not normals:	normals = mesh.vertexnormals()
-		it = ( (p, propagate_pp(conn, [p], propagate))   for p in conn )
+		it = ( (p, propagate_pp(conn, [p], propagate))   for p in linked )
 	elif isinstance(mesh, Web):	
 		if not conn:	conn = connpp(mesh.edges)
 		if not normals:	
@@ -2,7 +2,7 @@
 
 from .mathutils import vec3, anglebt, dot, distance_pe, distance_ae, uvec2, inf
 from .mesh import Mesh, Web
-from .hashing import connpp, connef
+from .hashing import connpp
 
 __all__ = ['select', 'stopangle', 'crossover', 'straight', 'short', 'selexpr', 'edgenear']
 
@@ -116,13 +116,14 @@ def faceangle(minangle):
 	''' stop when angle between adjacent faces is strictly lower than minangle '''
 	def stop(shared,last,curr,next):
 		mesh = shared['mesh']
-		if 'connef' not in shared:
-			shared['connef'] = connef = connef(context['mesh'])
+		if 'topology' not in shared:
+			shared['topology'] = topology = mesh.topology()
 		else:
-			connef = shared['connef']
-		if (curr,next) in connef and (next,curr) in connef:
-			nl = mesh.facenormal(connef[(curr,next)])
-			nr = mesh.facenormal(connef[(next,curr)])
+			topology = shared['topology']
+		left, right = topology.faceof(curr, next), topology.faceof(next, curr)
+		if left >= 0 and right >= 0:
+			nl = mesh.facenormal(left)
+			nr = mesh.facenormal(right)
 			return anglebt(nl, nr) <= minangle
 		else:
 			return True
@@ -4,6 +4,9 @@
 #version 330
 
 in vec3 v_position;	// vertex position
+#ifdef INSTANCED
+in mat4 i_pose;		// pose of the instance, when drawing instances
+#endif
 uniform mat4 pose;
 uniform mat4 view;	// view matrix (camera orientation)
 uniform mat4 proj;	// projection matrix (perspective or orthographic)
@@ -17,5 +20,9 @@ flat out uint identcolor;
 void main() {
 	uint ident = (start_ident + item_ident);
 	identcolor = ident;
+#ifdef INSTANCED
+	gl_Position = proj * view * i_pose * vec4(v_position,1)  + vec4(0,0,layer,0);
+#else
 	gl_Position = proj * view * vec4(v_position,1)  + vec4(0,0,layer,0);	// set vertex position for render
+#endif
 }
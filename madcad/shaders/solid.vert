@@ -6,6 +6,9 @@
 in vec3 v_position;	// vertex position
 in vec3 v_normal;	// vertex normal
 in int v_flags;
+#ifdef INSTANCED
+in mat4 i_pose;		// pose of the instance, when drawing instances
+#endif
 uniform int u_flags;
 uniform mat4 world;	// world matrix (object pose)
 uniform mat4 view;	// view matrix (camera orientation)
@@ -28,10 +31,15 @@ vec3 sight_direction(vec4 p) {
 void main() {
 	flags = v_flags | u_flags;
 	
-	vec4 p = world * vec4(v_position, 1);
+#ifdef INSTANCED
+	mat4 pose = world * i_pose;
+#else
+	mat4 pose = world;
+#endif
+	vec4 p = pose * vec4(v_position, 1);
 	// world space vectors for the fragment shader
 	sight = transpose(mat3(view)) * sight_direction(view*p);
-	normal = mat3(world) * v_normal;
+	normal = mat3(pose) * v_normal;
 	
 	gl_Position = proj * view * p;	// set vertex position for render
 	// with an offset to display wires on the top of faces
@@ -5,6 +5,9 @@
 
 in vec3 v_position;	// vertex position
 in int v_flags;
+#ifdef INSTANCED
+in mat4 i_pose;		// pose of the instance, when drawing instances
+#endif
 uniform int u_flags;
 uniform mat4 view;	// view matrix (camera orientation)
 uniform mat4 proj;	// projection matrix (perspective or orthographic)
@@ -17,7 +20,11 @@ flat out int flags;
 void main() {
 	flags = v_flags | u_flags;
 	
+#ifdef INSTANCED
+	gl_Position = proj * view * i_pose * vec4(v_position,1);
+#else
 	gl_Position = proj * view * vec4(v_position,1); 				// set vertex position for render
+#endif
 	// with an offset to display wires on the top of faces
 	int highlight = (1+int((flags&HOVERED)!=0)+int((flags&SELECTED)!=0));
 	gl_Position[2] += layer * highlight * gl_Position[3];
@@ -8,7 +8,7 @@ from . import settings
 from . import core
 from .mesh import Mesh, Web, Wire, web
 from .blending import convexhull
-from .hashing import suites, connef
+from .hashing import suites, invalidate
 from .mathutils import (
 		NUMPREC, vec3, vec2, perp, norminf, distance_pe, isfinite, noproject,
 		perpdot, dirbase, imax, normalize, inverse, dmat2, dvec2, distance2,
@@ -523,47 +523,17 @@ def triangulation_closest(outline, normal=None, prec=None):
 '''
 
 
-def retriangulate(mesh):
-	''' switch diagonals to improve the surface smoothness '''
-	from .bevel import registerface, arrangeface # circular import
-	pts = mesh.points
-	faces = mesh.faces
-	# second pass:	improve triangles by switching quand diagonals
-	conn = connef(faces)
-	scores = {}
-	def update_score(edge):
-		a,b,c = arrangeface(faces[conn[edge]], edge[0])
-		ab = pts[b]-pts[a]
-		lab = length(ab)
-		# check if diagonal is good for exchange
-		x = dot(pts[c]-pts[a], ab) / (lab*lab) 
-		if x < 0 or 1 < x:
-			scores[edge] = 0
-		else:
-			# if then, record the difference of heights
-			h = length(noproject(pts[c]-pts[a], ab/lab))
-			scores[edge] = lab/h - 2
-	for edge in conn:
-		update_score(edge)
+def retriangulate(mesh, sharp=0.2):
+	''' Switch the diagonals of quads to improve the triangles of a mesh, typically the thin triangles left by booleans and extrusions. The mesh faces are modified in place.
 	
-	while True:
-		a,b = min(scores, key=lambda e:scores[e])
-		if scores[edge] <= NUMPREC:	break
-		fc = conn[(a,b)]
-		fd = conn[(b,a)]
-		_,_,c = arrangeface(faces[fc], a)
-		_,_,d = arrangeface(faces[fd], b)
-		faces[fc] = (d,a,c)
-		faces[fd] = (c,b,d)
-		registerface(conn, fc)
-		registerface(conn, fd)
-		# update scores
-		update_score((d,a))
-		update_score((a,c))
-		update_score((c,d))
-		update_score((d,a))
-		update_score((a,c))
-		update_score((c,d))
+	Edges are flipped when it increases the smallest angle of their two faces, the largest increases first. Outlines, frontiers between groups and edges with an angle above `sharp` are never flipped, nor flipped into, so the groups and the shape of the mesh are kept.
+	
+	Parameters:
+		mesh(Mesh):     the mesh to improve
+		sharp(float):   angle above which an edge is kept (radians)
+	'''
+	mesh.faces[:] = core.retriangulate(mesh, sharp)
+	invalidate(mesh)
 
 	
 def discretise_refine(curve: '[(x, f(x))]', func: 'f(float) -> float', resolution=None, simplify=True):
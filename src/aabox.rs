@@ -1,5 +1,6 @@
 use crate::math::*;
 
+#[derive(Clone, Copy, Debug)]
 pub struct AABox<const D: usize> {
     pub min: Vector<Float, D>,
     pub max: Vector<Float, D>,
@@ -20,4 +21,31 @@ impl<const D: usize> AABox<D> {
             max: self.max.zip(other).map(|(a, b)|  a.max(b)),
         }
     }
+    pub fn union(&self, other: &Self) -> Self {
+        Self {
+            min: self.min.zip(other.min).map(|(a, b)|  a.min(b)),
+            max: self.max.zip(other.max).map(|(a, b)|  a.max(b)),
+        }
+    }
+    /// squared distance from a point to the box, zero if the point is inside
+    pub fn distance2(&self, point: Vector<Float, D>) -> Float {
+        (self.min - point).zip(point - self.max)
+            .map(|(a, b)|  a.max(b).max(0.))
+            .square_length()
+    }
+    /// parameter at which a ray enters the box, or `None` if it misses it
+    ///
+    /// `inverse` is the componentwise inverse of the ray direction, infinite components are supported
+    pub fn ray_entry(&self, origin: Vector<Float, D>, inverse: Vector<Float, D>) -> Option<Float> {
+        let mut enter: Float = 0.;
+        let mut exit = Float::INFINITY;
+        for i in 0 .. D {
+            let a = (self.min[i] - origin[i]) * inverse[i];
+            let b = (self.max[i] - origin[i]) * inverse[i];
+            // NaN arises from a ray in the plane of a slab, and is ignored by min and max
+            enter = enter.max(a.min(b));
+            exit = exit.min(a.max(b));
+        }
+        (enter <= exit).then_some(enter)
+    }
 }
@@ -7,6 +7,7 @@
 use crate::math::*;
 use crate::mesh::*;
 use crate::hashing::*;
+use crate::aabox::AABox;
 use crate::triangulation::{triangulation_closest, distance_pe};
 
 use std::borrow::Cow;
@@ -336,18 +337,97 @@ fn apply_merges(
 
 // ---- cut_surface ----
 
+/// Triangle-triangle intersections between all faces of a surface and the faces of an other
+struct SurfaceIntersections {
+    /// for each face of m1, whether it is in the neighborhood of m2
+    near: Vec<bool>,
+    /// for each face of m1, the m2 faces it intersects and the intersection vertices
+    faces: Vec<Vec<(usize, IntersectionVertex, IntersectionVertex)>>,
+}
+
+/// Minimum number of faces processed by one thread in `intersect_surfaces`
+const FACES_PER_THREAD: usize = 256;
+
+/// Intersect all faces of `m1` with the faces of `m2` registered in `prox2`
+///
+/// The faces of `m1` are split in contiguous chunks processed on `threads` threads (`0` means all available cores).
+/// The result is the same regardless of the number of threads.
+fn intersect_surfaces(
+    m1: &Surface,
+    m2: &Surface,
+    prox2: &PositionMap<usize>,
+    prec: Float,
+    threads: usize,
+) -> SurfaceIntersections {
+    let intersect_chunk = |range: std::ops::Range<usize>| {
+        let mut near = Vec::with_capacity(range.len());
+        let mut faces = Vec::with_capacity(range.len());
+        for f1 in range {
+            let f1_pts = m1.simplexpoints(f1);
+            let f1_keys = prox2.keysfor_triangle(&f1_pts);
+            let nearby: FxHashSet<usize> = prox2.get(&f1_keys).copied().collect();
+            let mut found = Vec::new();
+            for &f2 in &nearby {
+                let f2_pts = m2.simplexpoints(f2);
+                if let Some((iv_a, iv_b)) = intersect_triangles(&f1_pts, &f2_pts, 8.0 * prec) {
+                    found.push((f2, iv_a, iv_b));
+                }
+            }
+            near.push(!nearby.is_empty());
+            faces.push(found);
+        }
+        SurfaceIntersections {near, faces}
+    };
+
+    let total = m1.simplices.len();
+    let threads = match threads {
+        0 => std::thread::available_parallelism().map(|n| n.get()).unwrap_or(1),
+        n => n,
+    };
+    let threads = threads.min(total / FACES_PER_THREAD).max(1);
+    if threads == 1 {
+        return intersect_chunk(0 .. total);
+    }
+
+    let chunk = total.div_ceil(threads);
+    let chunks: Vec<SurfaceIntersections> = std::thread::scope(|scope| {
+        let workers: Vec<_> = (0 .. total).step_by(chunk)
+            .map(|start| {
+                let intersect_chunk = &intersect_chunk;
+                scope.spawn(move || intersect_chunk(start .. (start + chunk).min(total)))
+            })
+            .collect();
+        workers.into_iter()
+            .map(|worker| worker.join().expect("intersection thread panicked"))
+            .collect()
+    });
+    let mut result = SurfaceIntersections {
+        near: Vec::with_capacity(total),
+        faces: Vec::with_capacity(total),
+    };
+    for chunk in chunks {
+        result.near.extend(chunk.near);
+        result.faces.extend(chunk.faces);
+    }
+    result
+}
+
+
 /// Cut m1 faces at their intersections with m2.
 ///
 /// Returns `(cutted, frontier)` where:
 /// - `cutted` is m1 with intersected faces retriangulated
 /// - `frontier` is a Web whose edges are intersection edges, tracks are the causing m2 face indices
 ///
+/// `threads` is the number of threads used to intersect the triangles, `0` means all available cores
+///
 /// Port of madcad.boolean.cut_surface
 // #[multiversion(targets = "simd")]
 pub fn cut_surface(
     m1: &Surface,
     m2: &Surface,
     prec: Float,
+    threads: usize,
 ) -> (Surface<'static>, Web<'static>) {
     // Point set wrapping m1's points (allows adding new intersection points)
     let mut points = PointSet::wrap(prec, m1.points.to_vec());
@@ -366,6 +446,9 @@ pub fn cut_surface(
         prox2.add_triangle(&pts, f2);
     }
 
+    // Triangle-triangle intersections, computed in parallel ahead of the sequential retriangulation
+    let intersections = intersect_surfaces(m1, m2, &prox2, prec, threads);
+
     // Edge-to-face connectivity for m1
     let faces_raw: Vec<[Index; 3]> = m1.simplices.iter().map(|f| *f.as_array()).collect();
     let conn = connef(&faces_raw);
@@ -385,9 +468,7 @@ pub fn cut_surface(
         if grp[i] != -1 { continue; }
 
         // Check if face i is near m2
-        let face_pts = m1.simplexpoints(i);
-        let face_keys = prox2.keysfor_triangle(&face_pts);
-        if !prox2.contains(&face_keys) { continue; }
+        if !intersections.near[i] { continue; }
 
         let normal = m1.facenormal(i);
         if !is_finite_vec(normal) { continue; }
@@ -435,17 +516,9 @@ pub fn cut_surface(
 
         for &f1 in &surf {
             let f = m1.simplices[f1];
-            let f1_pts = m1.simplexpoints(f1);
-            let f1_keys = prox2.keysfor_triangle(&f1_pts);
-            let nearby: FxHashSet<usize> = prox2.get(&f1_keys).copied().collect();
-
-            for f2 in nearby {
-                let f2_pts = m2.simplexpoints(f2);
-                let (iv_a, iv_b) = match intersect_triangles(&f1_pts, &f2_pts, 8.0 * prec) {
-                    Some(r) => r,
-                    None => continue,
-                };
 
+            for (f2, iv_a, iv_b) in &intersections.faces[f1] {
+                let f2 = *f2;
                 let ia = iv_a.point;
                 let ib = iv_b.point;
                 if (ia - ib).square_length() <= prec * prec { continue; }
@@ -455,7 +528,7 @@ pub fn cut_surface(
                 segts.insert(seg, f2);
 
                 // Cut outline edges where intersection points land on boundary
-                let ivs = [&iv_a, &iv_b];
+                let ivs = [iv_a, iv_b];
                 let seg_positions = [ia, ib];
 
                 for idx in 0..2 {
@@ -555,6 +628,7 @@ pub fn cut_surface(
 ///
 /// - `side`: false keeps the outside, true keeps the inside
 /// - `strict`: if true, error when a face is on both sides of the piercing surface
+/// - `threads`: number of threads used for the intersections, `0` means all available cores
 ///
 /// Port of madcad.boolean.pierce_surface
 // #[multiversion(targets = "simd")]
@@ -564,8 +638,9 @@ pub fn pierce_surface(
     side: bool,
     prec: Float,
     strict: bool,
+    threads: usize,
 ) -> Result<Surface<'static>, String> {
-    let (cut, frontier) = cut_surface(m1, m2, prec);
+    let (cut, frontier) = cut_surface(m1, m2, prec, threads);
 
     let faces_raw: Vec<[Index; 3]> = cut.simplices.iter().map(|f| *f.as_array()).collect();
     let mut conn1 = connef(&faces_raw);
@@ -679,6 +754,287 @@ pub fn pierce_surface(
 }
 
 
+// ---- web booleans ----
+
+/// Intersection between 2 segments
+///
+/// Port of madcad.boolean.intersect_edges
+pub fn intersect_edges(e1: &[Vec3; 2], e2: &[Vec3; 2], prec: Float) -> Option<Vec3> {
+    let d1 = e1[1] - e1[0];
+    let d2 = e2[1] - e2[0];
+    let g = e1[0] - e2[0];
+    let p = e2[0] + unproject(noproject(g, d1), d2);
+    if !is_finite_vec(p) { return None; }
+    if (e1[0] - p).dot(d1) > prec || (p - e1[1]).dot(d1) > prec { return None; }
+    if (e2[0] - p).dot(d2) > prec || (p - e2[1]).dot(d2) > prec { return None; }
+    Some(p)
+}
+
+/// Intersection between a segment and a triangle
+///
+/// In case of intersection with an edge of the triangle or an extremity of the edge, return the formed point.
+/// Port of madcad.boolean.intersect_edge_face
+pub fn intersect_edge_face(edge: &[Vec3; 2], face: &[Vec3; 3], prec: Float) -> Option<Vec3> {
+    let n = (face[1] - face[0]).cross(face[2] - face[0]);
+    let [a, b] = *edge;
+    let da = (face[0] - a).dot(n);
+    let db = (face[0] - b).dot(n);
+    let p = if da.abs() <= prec { a }
+        else if db.abs() <= prec { b }
+        // the segment doesn't reach the plane
+        else if da * db > 0.0 { return None; }
+        else {
+            let edgedir = b - a;
+            let proj = edgedir.dot(n);
+            // the segment is parallel to the plane
+            if proj.abs() <= prec { return None; }
+            a + edgedir * da / proj
+        };
+
+    // check that the point is inside the triangle
+    for i in 0..3 {
+        let prev = face[(i + 2) % 3];
+        if (face[i] - p).dot(n.cross(face[i] - prev).normalize()) > prec {
+            return None;
+        }
+    }
+    Some(p)
+}
+
+/// Cut the edges of `w1` at their intersections with the simplices of `reference`
+///
+/// `rasterize` gives the cells of a reference simplex, and `intersect` the intersection point of an edge with a reference simplex.
+/// When `ends` is true, the extremities of a cutted edge are always kept in its subdivision, even if an intersection point is merged with it.
+fn cut_web_with<const S: usize>(
+    w1: &Web,
+    reference: &Mesh<'_, 3, S>,
+    prec: Float,
+    rasterize: impl Fn(&PositionMap<usize>, &[Vec3; S]) -> Vec<CellKey>,
+    intersect: impl Fn(&[Vec3; 2], &[Vec3; S], Float) -> Option<Vec3>,
+    ends: bool,
+) -> (Web<'static>, Wire<'static>) {
+    let mut points = PointSet::wrap(prec, w1.points.to_vec());
+
+    // spatial proximity map for reference simplices, with the same cell size as python's meshcellsize
+    let bounds = AABox::from_iter(reference.points.iter().cloned().filter(|&p| is_finite_vec(p)));
+    let mut prox: PositionMap<usize> = PositionMap::new(meshcellsize(bounds.max - bounds.min, reference.points.len()));
+    for (e2, _) in reference.simplices.iter().enumerate() {
+        let keys = rasterize(&prox, &reference.simplexpoints(e2));
+        prox.add(&keys, e2);
+    }
+
+    let mut edges: Vec<UVec2> = Vec::with_capacity(w1.simplices.len());
+    let mut tracks: Vec<Index> = Vec::with_capacity(w1.simplices.len());
+    let mut frontier_indices: Vec<Index> = Vec::new();
+    let mut frontier_tracks: Vec<Index> = Vec::new();
+
+    for e1 in 0..w1.simplices.len() {
+        let e = w1.simplices[e1];
+        let e1_pts = w1.simplexpoints(e1);
+
+        // collect simplices in reference that can have intersection with e1
+        let keys = prox.keysfor_segment(&e1_pts);
+        let mut close: Vec<usize> = prox.get(&keys).copied().collect();
+        close.sort_unstable();
+        close.dedup();
+
+        // compute intersections, the first simplex causing a point is kept
+        let mut segts: Vec<(Index, usize)> = Vec::new();
+        for e2 in close {
+            if let Some(intersect) = intersect(&e1_pts, &reference.simplexpoints(e2), prec) {
+                let seg = points.add(intersect);
+                if !segts.iter().any(|&(p, _)| p == seg) {
+                    segts.push((seg, e2));
+                }
+            }
+        }
+
+        // keep the non intersected edges as is
+        if segts.is_empty() {
+            edges.push(e);
+            tracks.push(w1.tracks[e1]);
+            continue;
+        }
+
+        // reweb the cutted edge
+        let direction = e1_pts[1] - e1_pts[0];
+        let key = |p: Index|  points.points()[p as usize].dot(direction);
+        segts.sort_by(|a, b|  key(a.0).partial_cmp(&key(b.0)).unwrap_or(std::cmp::Ordering::Equal));
+        for &(seg, e2) in &segts {
+            frontier_indices.push(seg);
+            frontier_tracks.push(e2 as Index);
+        }
+
+        let mut suite: Vec<Index> = segts.iter().map(|&(seg, _)| seg).collect();
+        if ends || suite[0] != e[0] { suite.insert(0, e[0]); }
+        if ends || suite[suite.len() - 1] != e[1] { suite.push(e[1]); }
+        for pair in suite.windows(2) {
+            edges.push(UVec2::from([pair[0], pair[1]]));
+            tracks.push(w1.tracks[e1]);
+        }
+    }
+
+    let points = points.unwrap();
+    (
+        Web {
+            points: Cow::Owned(points.clone()),
+            simplices: Cow::Owned(edges),
+            tracks: Cow::Owned(tracks),
+        },
+        Wire {
+            points: Cow::Owned(points),
+            simplices: Cow::Owned(frontier_indices.into_iter().map(|i| Vector::from([i])).collect()),
+            tracks: Cow::Owned(frontier_tracks),
+        },
+    )
+}
+
+/// Cut the web edges at their intersections with the `reference` web
+///
+/// Returns `(cutted, frontier)` where:
+/// - `cutted` is w1 with the edges cutted, representing the same lines as before
+/// - `frontier` is a Wire of the intersection points, tracks are the causing edge indices in `reference`
+///
+/// Port of madcad.boolean.cut_web
+pub fn cut_web(w1: &Web, reference: &Web, prec: Float) -> (Web<'static>, Wire<'static>) {
+    cut_web_with(w1, reference, prec,
+        |prox, s|  prox.keysfor_segment(s),
+        intersect_edges,
+        false)
+}
+
+/// Cut the web edges at their intersections with the `reference` surface
+///
+/// Returns `(cutted, frontier)` like `cut_web`, frontier tracks are the causing face indices in `reference`
+///
+/// Port of madcad.boolean.cut_web_mesh
+pub fn cut_web_mesh(w1: &Web, reference: &Surface, prec: Float) -> (Web<'static>, Wire<'static>) {
+    cut_web_with(w1, reference, prec,
+        |prox, s|  prox.keysfor_triangle(s),
+        intersect_edge_face,
+        true)
+}
+
+/// Keep only the edges of the web marked in `used`
+fn select_edges(web: Web<'static>, used: impl Fn(usize) -> bool) -> Web<'static> {
+    let mut edges = Vec::new();
+    let mut tracks = Vec::new();
+    for (i, (&e, &t)) in web.simplices.iter().zip(web.tracks.iter()).enumerate() {
+        if used(i) {
+            edges.push(e);
+            tracks.push(t);
+        }
+    }
+    Web {
+        points: web.points,
+        simplices: Cow::Owned(edges),
+        tracks: Cow::Owned(tracks),
+    }
+}
+
+/// Curve barycenter of a web, mirroring madcad.mesh.Web.barycenter
+fn web_barycenter(web: &Web) -> Vec3 {
+    let mut acc = Vec3::zero();
+    let mut tot = 0.0;
+    for ei in 0..web.simplices.len() {
+        let [a, b] = web.simplexpoints(ei);
+        let weight = (b - a).length();
+        tot += weight;
+        acc += (a + b) * weight;
+    }
+    if web.simplices.is_empty() { Vec3::zero() }
+    else { acc / (2.0 * tot) }
+}
+
+/// Pierce w1 with the `reference` web: cut and select the edges on one side of the reference
+///
+/// - `side`: false keeps the outside, true keeps the inside
+///
+/// Each island of the web is entered from its point the most exterior, and the side flips at every frontier point crossed.
+/// Port of madcad.boolean.pierce_web
+pub fn pierce_web(w1: &Web, reference: &Web, side: bool, prec: Float) -> Web<'static> {
+    let (cut, frontier) = cut_web(w1, reference, prec);
+    let edges: Vec<[Index; 2]> = cut.simplices.iter().map(|e| *e.as_array()).collect();
+    let conn = connpe(&edges);
+    let stops: FxHashSet<Index> = frontier.simplices.iter().map(|i| i[0]).collect();
+
+    // 0 for unvisited edges, 1 for kept edges, 2 for discarded edges
+    let mut used: Vec<u8> = vec![0; edges.len()];
+
+    // sort points by distance to a "center"
+    let center = web_barycenter(&cut);
+    let mut order: Vec<Index> = (0 .. cut.points.len() as Index).collect();
+    let key = |i: Index|  (cut.points[i as usize] - center).square_length();
+    order.sort_by(|&a, &b|  key(a).partial_cmp(&key(b)).unwrap_or(std::cmp::Ordering::Equal));
+
+    // always start an island from the most exterior
+    for start in order {
+        if stops.contains(&start) { continue; }
+        // islands are only started from points with an unvisited edge
+        match conn.get(&start).next() {
+            Some(&ei) if used[ei] == 0 => {},
+            _ => continue,
+        }
+
+        // propagate
+        let mut front: Vec<(Index, bool)> = vec![(start, !side)];
+        while let Some((last, keep)) = front.pop() {
+            for &ei in conn.get(&last) {
+                if used[ei] != 0 { continue; }
+                used[ei] = if keep { 1 } else { 2 };
+                let current = if edges[ei][0] == last { edges[ei][1] } else { edges[ei][0] };
+                front.push((current, keep ^ stops.contains(&current)));
+            }
+        }
+    }
+
+    select_edges(cut, |i|  used[i] == 1)
+}
+
+/// Pierce w1 with the `reference` surface: cut and select the edges on one side of the surface
+///
+/// - `side`: false keeps the outside, true keeps the inside
+///
+/// Port of madcad.boolean.pierce_web_mesh
+pub fn pierce_web_mesh(w1: &Web, reference: &Surface, side: bool, prec: Float) -> Web<'static> {
+    let (cut, frontier) = cut_web_mesh(w1, reference, prec);
+    let edges: Vec<[Index; 2]> = cut.simplices.iter().map(|e| *e.as_array()).collect();
+    let conn = connpe(&edges);
+    let stops: FxHashSet<Index> = frontier.simplices.iter().map(|i| i[0]).collect();
+
+    let mut used: Vec<bool> = vec![false; edges.len()];
+
+    for (p1, &fi) in frontier.simplices.iter().map(|i| i[0]).zip(frontier.tracks.iter()) {
+        let mut front: Vec<Index> = Vec::new();
+
+        // check which side to keep
+        let normal = reference.facenormal(fi as usize);
+        for &ei in conn.get(&p1) {
+            let e1 = edges[ei];
+            let next = if e1[0] == p1 { e1[1] } else { e1[0] };
+            let outside = (cut.points[next as usize] - cut.points[p1 as usize]).dot(normal) > 0.0;
+            if side ^ outside {
+                front.push(next);
+                used[ei] = true;
+            }
+        }
+
+        // propagate
+        while let Some(last) = front.pop() {
+            if stops.contains(&last) { continue; }
+            for &ei in conn.get(&last) {
+                if used[ei] { continue; }
+                used[ei] = true;
+                front.push(if edges[ei][0] == last { edges[ei][1] } else { edges[ei][0] });
+            }
+        }
+    }
+
+    select_edges(cut, |i|  used[i])
+}
+
+
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -776,7 +1132,7 @@ mod tests {
     fn test_cut_mesh_crossing_quads() {
         let m1 = make_quad(0.0, 2.0);
         let m2 = make_vertical_quad(0.0, 2.0);
-        let (cut, frontier) = cut_surface(&m1, &m2, 1e-6);
+        let (cut, frontier) = cut_surface(&m1, &m2, 1e-6, 1);
 
         // The cut mesh should have more faces than original (faces were split)
         assert!(cut.simplices.len() >= m1.simplices.len());
@@ -788,18 +1144,61 @@ mod tests {
     fn test_cut_mesh_no_intersection() {
         let m1 = make_quad(0.0, 1.0);
         let m2 = make_quad(5.0, 1.0); // far away, parallel
-        let (cut, frontier) = cut_surface(&m1, &m2, 1e-6);
+        let (cut, frontier) = cut_surface(&m1, &m2, 1e-6, 1);
 
         // No intersection: cut mesh should have same faces
         assert_eq!(cut.simplices.len(), m1.simplices.len());
         assert!(frontier.simplices.is_empty());
     }
 
+    /// square grid of `n*n` quads, slightly waved so that neighboring faces are not coplanar
+    fn make_grid(n: usize, size: Float) -> Surface<'static> {
+        let mut points = Vec::new();
+        for i in 0 ..= n {
+            for j in 0 ..= n {
+                let (x, y) = (i as Float / n as Float, j as Float / n as Float);
+                let z = 0.01 * size * ((x * 17.0).sin() + (y * 13.0).cos());
+                points.push(Vec3::from([size * (2.0 * x - 1.0), size * (2.0 * y - 1.0), z]));
+            }
+        }
+        let mut simplices = Vec::new();
+        for i in 0 .. n {
+            for j in 0 .. n {
+                let a = (i * (n + 1) + j) as Index;
+                let b = a + (n + 1) as Index;
+                simplices.push(UVec3::from([a, b, b + 1]));
+                simplices.push(UVec3::from([a, b + 1, a + 1]));
+            }
+        }
+        let tracks = vec![0; simplices.len()];
+        Surface {
+            points: Cow::Owned(points),
+            simplices: Cow::Owned(simplices),
+            tracks: Cow::Owned(tracks),
+        }
+    }
+
+    #[test]
+    fn test_cut_mesh_threads() {
+        let m1 = make_grid(40, 2.0);
+        let m2 = make_vertical_quad(0.1, 3.0);
+        let (cut1, frontier1) = cut_surface(&m1, &m2, 1e-6, 1);
+        let (cut4, frontier4) = cut_surface(&m1, &m2, 1e-6, 4);
+
+        // The result must not depend on the number of threads
+        assert!(!frontier1.simplices.is_empty());
+        let arrays = |v: &[UVec3]| v.iter().map(|f| *f.as_array()).collect::<Vec<_>>();
+        assert_eq!(cut1.points.len(), cut4.points.len());
+        assert_eq!(arrays(&cut1.simplices), arrays(&cut4.simplices));
+        assert_eq!(frontier1.simplices.len(), frontier4.simplices.len());
+        assert_eq!(frontier1.tracks.as_ref(), frontier4.tracks.as_ref());
+    }
+
     #[test]
     fn test_pierce_mesh_crossing_quads() {
         let m1 = make_quad(0.0, 2.0);
         let m2 = make_vertical_quad(0.0, 2.0);
-        let result = pierce_surface(&m1, &m2, false, 1e-6, false).unwrap();
+        let result = pierce_surface(&m1, &m2, false, 1e-6, false, 1).unwrap();
 
         // Should keep only faces on one side
         assert!(!result.simplices.is_empty());
@@ -810,12 +1209,82 @@ mod tests {
     fn test_pierce_mesh_no_intersection() {
         let m1 = make_quad(0.0, 1.0);
         let m2 = make_quad(5.0, 1.0);
-        let result = pierce_surface(&m1, &m2, false, 1e-6, false).unwrap();
+        let result = pierce_surface(&m1, &m2, false, 1e-6, false, 1).unwrap();
 
         // No intersection: should return all faces
         assert_eq!(result.simplices.len(), m1.simplices.len());
     }
 
+    fn make_segment(a: [Float; 3], b: [Float; 3]) -> Web<'static> {
+        Web {
+            points: Cow::Owned(vec![Vec3::from(a), Vec3::from(b)]),
+            simplices: Cow::Owned(vec![UVec2::from([0, 1])]),
+            tracks: Cow::Owned(vec![0]),
+        }
+    }
+
+    #[test]
+    fn test_intersect_edges() {
+        let e1 = [Vec3::from([-1.0, 0.0, 0.0]), Vec3::from([1.0, 0.0, 0.0])];
+        let e2 = [Vec3::from([0.5, -1.0, 0.0]), Vec3::from([0.5, 1.0, 0.0])];
+        let p = intersect_edges(&e1, &e2, 1e-6).unwrap();
+        assert!((p - Vec3::from([0.5, 0.0, 0.0])).length() < 1e-12);
+
+        let e3 = [Vec3::from([2.0, -1.0, 0.0]), Vec3::from([2.0, 1.0, 0.0])];
+        assert!(intersect_edges(&e1, &e3, 1e-6).is_none());
+    }
+
+    #[test]
+    fn test_cut_web_crossing() {
+        let w1 = make_segment([-1.0, 0.0, 0.0], [1.0, 0.0, 0.0]);
+        let w2 = make_segment([0.0, -1.0, 0.0], [0.0, 1.0, 0.0]);
+        let (cut, frontier) = cut_web(&w1, &w2, 1e-6);
+
+        // the edge is split in two at the intersection point
+        assert_eq!(cut.simplices.len(), 2);
+        assert_eq!(frontier.simplices.len(), 1);
+        assert_eq!(frontier.tracks.as_ref(), &[0]);
+        let p = cut.points[frontier.simplices[0][0] as usize];
+        assert!(p.length() < 1e-12);
+
+        // each side of the reference is kept by one of the sides
+        let outside = pierce_web(&w1, &w2, false, 1e-6);
+        let inside = pierce_web(&w1, &w2, true, 1e-6);
+        assert_eq!(outside.simplices.len() + inside.simplices.len(), 2);
+    }
+
+    #[test]
+    fn test_pierce_web_first_edge_island() {
+        // the first edge is an island on its own, away from the reference
+        let w1 = Web {
+            points: Cow::Owned(vec![
+                Vec3::from([3.0, 0.0, 0.0]), Vec3::from([4.0, 0.0, 0.0]),
+                Vec3::from([-1.0, 0.0, 0.0]), Vec3::from([1.0, 0.0, 0.0]),
+                ]),
+            simplices: Cow::Owned(vec![UVec2::from([0, 1]), UVec2::from([2, 3])]),
+            tracks: Cow::Owned(vec![0, 0]),
+        };
+        let w2 = make_segment([0.0, -1.0, 0.0], [0.0, 1.0, 0.0]);
+        let outside = pierce_web(&w1, &w2, false, 1e-6);
+        let inside = pierce_web(&w1, &w2, true, 1e-6);
+        assert_eq!((outside.simplices.len(), inside.simplices.len()), (2, 1));
+    }
+
+    #[test]
+    fn test_pierce_web_mesh_crossing() {
+        let w1 = make_segment([0.0, 0.0, -1.0], [0.0, 0.0, 1.0]);
+        let m2 = make_quad(0.0, 2.0);
+        let (cut, frontier) = cut_web_mesh(&w1, &m2, 1e-6);
+        assert_eq!(cut.simplices.len(), 2);
+        assert_eq!(frontier.simplices.len(), 1);
+
+        // the quad normal is +Z so the outside is the upper half
+        let outside = pierce_web_mesh(&w1, &m2, false, 1e-6);
+        assert_eq!(outside.simplices.len(), 1);
+        let e = outside.simplices[0];
+        assert!(outside.points[e[0] as usize][2] + outside.points[e[1] as usize][2] > 0.0);
+    }
+
     #[test]
     fn test_line_simplification_collinear() {
         let points = vec![
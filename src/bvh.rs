@@ -0,0 +1,463 @@
+/*!
+    Bounding volume hierarchy over simplices, for batched proximity queries
+
+    The hierarchy only stores the primitives bounding boxes and their order, the primitives themselves are given back to the queries through closures.
+*/
+
+use crate::math::*;
+use crate::aabox::AABox;
+use rustc_hash::FxHashMap;
+
+/// Maximum number of primitives in a leaf node
+const LEAF: usize = 4;
+/// Minimum number of queries processed by one thread
+const QUERIES_PER_THREAD: usize = 1024;
+
+struct Node {
+    bounds: AABox<3>,
+    /// first child node if internal, first primitive in `order` if leaf
+    start: usize,
+    /// number of primitives in a leaf, 0 for an internal node whose children are `start` and `start+1`
+    count: usize,
+}
+
+pub struct Bvh {
+    nodes: Vec<Node>,
+    order: Vec<Index>,
+}
+
+impl Bvh {
+    /// Build the hierarchy from the bounding boxes of the primitives
+    pub fn new(boxes: &[AABox<3>]) -> Self {
+        let centers: Vec<Vec3> = boxes.iter().map(|b| (b.min + b.max) * 0.5).collect();
+        let mut bvh = Self {
+            nodes: Vec::with_capacity(2 * boxes.len() / LEAF + 1),
+            order: (0 .. boxes.len() as Index).collect(),
+        };
+        bvh.nodes.push(Node {bounds: AABox::empty(), start: 0, count: 0});
+        bvh.split(0, 0, boxes.len(), boxes, &centers);
+        bvh
+    }
+
+    /// Build the hierarchy for the given simplices
+    pub fn from_simplices<const S: usize>(points: &[Vec3], simplices: &[[Index; S]]) -> Self {
+        let boxes: Vec<AABox<3>> = simplices.iter()
+            .map(|simplex| AABox::from_iter(simplex.iter().map(|&p| points[p as usize])))
+            .collect();
+        Self::new(&boxes)
+    }
+
+    fn split(&mut self, node: usize, start: usize, stop: usize, boxes: &[AABox<3>], centers: &[Vec3]) {
+        self.nodes[node].bounds = self.order[start .. stop].iter()
+            .fold(AABox::empty(), |bounds, &i| bounds.union(&boxes[i as usize]));
+        if stop - start <= LEAF {
+            self.nodes[node].start = start;
+            self.nodes[node].count = stop - start;
+            return;
+        }
+        // split at the median center along the largest spread
+        let spread = AABox::from_iter(self.order[start .. stop].iter().map(|&i| centers[i as usize]));
+        let size = spread.max - spread.min;
+        let axis = if size[0] >= size[1] && size[0] >= size[2] {0}
+            else if size[1] >= size[2] {1}
+            else {2};
+        let mid = (start + stop) / 2;
+        self.order[start .. stop].select_nth_unstable_by(mid - start, |&a, &b|
+            centers[a as usize][axis].total_cmp(&centers[b as usize][axis]));
+
+        let child = self.nodes.len();
+        self.nodes.push(Node {bounds: AABox::empty(), start: 0, count: 0});
+        self.nodes.push(Node {bounds: AABox::empty(), start: 0, count: 0});
+        self.nodes[node].start = child;
+        self.nodes[node].count = 0;
+        self.split(child, start, mid, boxes, centers);
+        self.split(child+1, mid, stop, boxes, centers);
+    }
+
+    /// Number of primitives in the hierarchy
+    pub fn len(&self) -> usize {
+        self.order.len()
+    }
+
+    /// True if there is no primitive in the hierarchy
+    pub fn is_empty(&self) -> bool {
+        self.order.is_empty()
+    }
+
+    /// Find the primitive at minimal distance from `point`
+    ///
+    /// `distance2` gives the squared distance from the point to a primitive. Among primitives at the same distance, the lowest index is returned.
+    /// Returns the primitive index and its squared distance, or `None` if there is no primitive
+    pub fn nearest(&self, point: Vec3, mut distance2: impl FnMut(Index) -> Float) -> Option<(Index, Float)> {
+        if self.order.is_empty() {
+            return None;
+        }
+        let mut best: Option<(Index, Float)> = None;
+        let mut bound = Float::INFINITY;
+        let mut stack = vec![(0, self.nodes[0].bounds.distance2(point))];
+        while let Some((node, reach)) = stack.pop() {
+            // nodes at the same distance are still explored, to find the lowest index
+            if reach > bound {
+                continue;
+            }
+            let node = &self.nodes[node];
+            if node.count != 0 {
+                for &primitive in &self.order[node.start .. node.start + node.count] {
+                    let d = distance2(primitive);
+                    if d < bound || (d == bound && best.is_some_and(|(i, _)| primitive < i)) {
+                        bound = d;
+                        best = Some((primitive, d));
+                    }
+                }
+            }
+            else {
+                let children = [node.start, node.start+1]
+                    .map(|child| (child, self.nodes[child].bounds.distance2(point)));
+                // push the farthest first so the nearest is explored first
+                if children[0].1 <= children[1].1 {
+                    stack.extend([children[1], children[0]]);
+                } else {
+                    stack.extend(children);
+                }
+            }
+        }
+        best
+    }
+
+    /// Find the first primitive hit by a ray
+    ///
+    /// `hit` gives the ray parameter at which a primitive is hit, if it is. Only hits at a positive parameter are considered.
+    /// Returns the primitive index and the parameter of the hit, or `None` if no primitive is hit
+    pub fn raycast(&self, origin: Vec3, direction: Vec3, mut hit: impl FnMut(Index) -> Option<Float>) -> Option<(Index, Float)> {
+        if self.order.is_empty() {
+            return None;
+        }
+        let inverse = direction.map(|x| 1. / x);
+        let mut best: Option<(Index, Float)> = None;
+        let mut bound = Float::INFINITY;
+        let mut stack = Vec::new();
+        if let Some(entry) = self.nodes[0].bounds.ray_entry(origin, inverse) {
+            stack.push((0, entry));
+        }
+        while let Some((node, entry)) = stack.pop() {
+            if entry > bound {
+                continue;
+            }
+            let node = &self.nodes[node];
+            if node.count != 0 {
+                for &primitive in &self.order[node.start .. node.start + node.count] {
+                    if let Some(t) = hit(primitive)
+                    && t >= 0. && (t < bound || (t == bound && best.is_some_and(|(i, _)| primitive < i))) {
+                        bound = t;
+                        best = Some((primitive, t));
+                    }
+                }
+            }
+            else {
+                let mut children = [node.start, node.start+1]
+                    .map(|child| (child, self.nodes[child].bounds.ray_entry(origin, inverse)));
+                // push the farthest first so the nearest is explored first
+                if children[0].1.unwrap_or(Float::INFINITY) <= children[1].1.unwrap_or(Float::INFINITY) {
+                    children.swap(0, 1);
+                }
+                stack.extend(children.into_iter()
+                    .filter_map(|(child, entry)| entry.map(|entry| (child, entry))));
+            }
+        }
+        best
+    }
+}
+
+/// Part of a triangle where a closest point lies
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum Feature {
+    /// corner of the triangle
+    Vertex(usize),
+    /// side `i` of a triangle joins its corners `i` and `i+1`
+    Edge(usize),
+    /// interior of the triangle
+    Face,
+}
+
+/// Closest point to `point` on a segment
+pub fn closest_segment(point: Vec3, segment: &[Vec3; 2]) -> Vec3 {
+    let [a, b] = *segment;
+    let direction = b - a;
+    let length2 = direction.square_length();
+    if length2 == 0. {
+        return a;
+    }
+    a + direction * ((point - a).dot(direction) / length2).clamp(0., 1.)
+}
+
+/// Closest point to `point` on a triangle (from Ericson's Real-Time Collision Detection)
+pub fn closest_triangle(point: Vec3, triangle: &[Vec3; 3]) -> Vec3 {
+    closest_triangle_feature(point, triangle).0
+}
+
+/// Closest point to `point` on a triangle, and the part of the triangle it lies on
+pub fn closest_triangle_feature(point: Vec3, triangle: &[Vec3; 3]) -> (Vec3, Feature) {
+    let [a, b, c] = *triangle;
+    let ab = b - a;
+    let ac = c - a;
+    let ap = point - a;
+    let d1 = ab.dot(ap);
+    let d2 = ac.dot(ap);
+    if d1 <= 0. && d2 <= 0. {
+        return (a, Feature::Vertex(0));
+    }
+    let bp = point - b;
+    let d3 = ab.dot(bp);
+    let d4 = ac.dot(bp);
+    if d3 >= 0. && d4 <= d3 {
+        return (b, Feature::Vertex(1));
+    }
+    let vc = d1*d4 - d3*d2;
+    if vc <= 0. && d1 >= 0. && d3 <= 0. {
+        return (a + ab * (d1 / (d1 - d3)), Feature::Edge(0));
+    }
+    let cp = point - c;
+    let d5 = ab.dot(cp);
+    let d6 = ac.dot(cp);
+    if d6 >= 0. && d5 <= d6 {
+        return (c, Feature::Vertex(2));
+    }
+    let vb = d5*d2 - d1*d6;
+    if vb <= 0. && d2 >= 0. && d6 <= 0. {
+        return (a + ac * (d2 / (d2 - d6)), Feature::Edge(2));
+    }
+    let va = d3*d6 - d5*d4;
+    if va <= 0. && d4 - d3 >= 0. && d5 - d6 >= 0. {
+        return (b + (c - b) * ((d4 - d3) / ((d4 - d3) + (d5 - d6))), Feature::Edge(1));
+    }
+    let denom = va + vb + vc;
+    if denom == 0. {
+        // degenerated triangle, the closest point is on one of its sides
+        return [[a, b], [b, c], [c, a]].iter()
+            .map(|side| closest_segment(point, side))
+            .enumerate()
+            .min_by(|(_, x), (_, y)| (*x - point).square_length().total_cmp(&(*y - point).square_length()))
+            .map(|(i, closest)| (closest, Feature::Edge(i)))
+            .unwrap();
+    }
+    (a + ab * (vb / denom) + ac * (vc / denom), Feature::Face)
+}
+
+/// Ray parameter at which a ray crosses a triangle, if it does (Möller-Trumbore algorithm)
+pub fn intersect_triangle(origin: Vec3, direction: Vec3, triangle: &[Vec3; 3]) -> Option<Float> {
+    let [a, b, c] = *triangle;
+    let ab = b - a;
+    let ac = c - a;
+    let p = direction.cross(ac);
+    let det = ab.dot(p);
+    if det == 0. {
+        return None;
+    }
+    let ao = origin - a;
+    let u = ao.dot(p) / det;
+    if !(0. ..= 1.).contains(&u) {
+        return None;
+    }
+    let q = ao.cross(ab);
+    let v = direction.dot(q) / det;
+    if v < 0. || u + v > 1. {
+        return None;
+    }
+    Some(ac.dot(q) / det)
+}
+
+/// Angle weighted pseudo-normals of a triangle mesh, giving the side of a point relative to a closed surface (from Baerentzen and Aanaes, Signed distance computation using the angle weighted pseudonormal)
+pub struct PseudoNormals {
+    faces: Vec<Vec3>,
+    vertices: Vec<Vec3>,
+    edges: FxHashMap<[Index; 2], Vec3>,
+}
+
+impl PseudoNormals {
+    pub fn new(points: &[Vec3], faces: &[[Index; 3]]) -> Self {
+        let mut normals = Self {
+            faces: Vec::with_capacity(faces.len()),
+            vertices: vec![Vec3::zero(); points.len()],
+            edges: FxHashMap::default(),
+        };
+        for face in faces {
+            let corners = face.map(|p| points[p as usize]);
+            let normal = (corners[1] - corners[0]).cross(corners[2] - corners[0]);
+            let length = normal.length();
+            let normal = if length > 0. {normal / length} else {normal};
+            normals.faces.push(normal);
+            for i in 0 .. 3 {
+                let previous = corners[(i+2) % 3] - corners[i];
+                let next = corners[(i+1) % 3] - corners[i];
+                let angle = (previous.dot(next) / (previous.length() * next.length())).clamp(-1., 1.).acos();
+                if angle.is_finite() {
+                    let vertex = &mut normals.vertices[face[i] as usize];
+                    *vertex += normal * angle;
+                }
+                let edge = [face[i], face[(i+1) % 3]];
+                let sum = normals.edges.entry([edge[0].min(edge[1]), edge[0].max(edge[1])])
+                    .or_insert(Vec3::zero());
+                *sum += normal;
+            }
+        }
+        normals
+    }
+
+    /// pseudo-normal at the closest point found on the given face
+    pub fn normal(&self, face: &[Index; 3], primitive: Index, feature: Feature) -> Vec3 {
+        match feature {
+            Feature::Face => self.faces[primitive as usize],
+            Feature::Vertex(i) => self.vertices[face[i] as usize],
+            Feature::Edge(i) => {
+                let edge = [face[i], face[(i+1) % 3]];
+                self.edges[&[edge[0].min(edge[1]), edge[0].max(edge[1])]]
+            },
+        }
+    }
+}
+
+/// Run `query` for every index in `0 .. count`, splitting the work on all available cores
+pub fn map_parallel<T: Send>(count: usize, query: impl Fn(usize) -> T + Sync) -> Vec<T> {
+    let threads = std::thread::available_parallelism().map(|n| n.get()).unwrap_or(1)
+        .min(count / QUERIES_PER_THREAD)
+        .max(1);
+    if threads == 1 {
+        return (0 .. count).map(query).collect();
+    }
+    let chunk = count.div_ceil(threads);
+    std::thread::scope(|scope| {
+        let workers: Vec<_> = (0 .. count).step_by(chunk)
+            .map(|start| {
+                let query = &query;
+                scope.spawn(move || (start .. (start + chunk).min(count)).map(query).collect::<Vec<T>>())
+            })
+            .collect();
+        workers.into_iter()
+            .flat_map(|worker| worker.join().expect("query thread panicked"))
+            .collect()
+    })
+}
+
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn grid(n: usize) -> (Vec<Vec3>, Vec<[Index; 3]>) {
+        let mut points = Vec::new();
+        let mut faces = Vec::new();
+        for i in 0 ..= n {
+            for j in 0 ..= n {
+                points.push(Vec3::from([i as Float, j as Float, ((i*j) % 3) as Float * 0.1]));
+            }
+        }
+        let row = (n + 1) as Index;
+        for i in 0 .. n as Index {
+            for j in 0 .. n as Index {
+                let a = i*row + j;
+                faces.push([a, a+row, a+row+1]);
+                faces.push([a, a+row+1, a+1]);
+            }
+        }
+        (points, faces)
+    }
+
+    #[test]
+    fn test_nearest_matches_brute_force() {
+        let (points, faces) = grid(12);
+        let bvh = Bvh::from_simplices(&points, &faces);
+        let distance2 = |point: Vec3, f: Index| {
+            let triangle = faces[f as usize].map(|p| points[p as usize]);
+            (closest_triangle(point, &triangle) - point).square_length()
+        };
+        for k in 0 .. 50 {
+            let point = Vec3::from([(k * 7 % 13) as Float - 0.3, (k * 5 % 11) as Float + 0.2, (k % 4) as Float - 1.5]);
+            let (found, d) = bvh.nearest(point, |f| distance2(point, f)).unwrap();
+            let expected = (0 .. faces.len() as Index)
+                .min_by(|&a, &b| distance2(point, a).total_cmp(&distance2(point, b)))
+                .unwrap();
+            assert_eq!(d, distance2(point, expected));
+            assert_eq!(found, expected);
+        }
+    }
+
+    #[test]
+    fn test_closest_triangle() {
+        let triangle = [
+            Vec3::from([0., 0., 0.]),
+            Vec3::from([1., 0., 0.]),
+            Vec3::from([0., 1., 0.]),
+            ];
+        assert!((closest_triangle(Vec3::from([0.2, 0.2, 1.]), &triangle) - Vec3::from([0.2, 0.2, 0.])).length() < 1e-12);
+        assert_eq!(closest_triangle(Vec3::from([-1., -1., 0.]), &triangle), triangle[0]);
+        assert_eq!(closest_triangle(Vec3::from([0.5, -1., 0.]), &triangle), Vec3::from([0.5, 0., 0.]));
+        assert_eq!(closest_triangle(Vec3::from([1., 1., 0.]), &triangle), Vec3::from([0.5, 0.5, 0.]));
+    }
+
+    #[test]
+    fn test_raycast() {
+        let (points, faces) = grid(12);
+        let bvh = Bvh::from_simplices(&points, &faces);
+        let hit = |origin: Vec3, direction: Vec3, f: Index|
+            intersect_triangle(origin, direction, &faces[f as usize].map(|p| points[p as usize]));
+        let direction = Vec3::from([0., 0., -1.]);
+        for k in 0 .. 50 {
+            let origin = Vec3::from([(k * 7 % 13) as Float * 0.9 + 0.05, (k * 5 % 11) as Float + 0.1, 2.]);
+            let found = bvh.raycast(origin, direction, |f| hit(origin, direction, f));
+            let expected = (0 .. faces.len() as Index)
+                .filter_map(|f| hit(origin, direction, f).filter(|&t| t >= 0.).map(|t| (f, t)))
+                .min_by(|a, b| a.1.total_cmp(&b.1).then(a.0.cmp(&b.0)));
+            assert_eq!(found, expected);
+            assert!(found.is_some());
+        }
+        // rays going away from the grid
+        let origin = Vec3::from([5.5, 5.5, 2.]);
+        assert!(bvh.raycast(origin, -direction, |f| hit(origin, -direction, f)).is_none());
+        assert!(bvh.raycast(origin, Vec3::from([1., 0., 0.]), |f| hit(origin, Vec3::from([1., 0., 0.]), f)).is_none());
+    }
+
+    #[test]
+    fn test_closest_feature() {
+        let triangle = [
+            Vec3::from([0., 0., 0.]),
+            Vec3::from([1., 0., 0.]),
+            Vec3::from([0., 1., 0.]),
+            ];
+        assert_eq!(closest_triangle_feature(Vec3::from([0.2, 0.2, 1.]), &triangle).1, Feature::Face);
+        assert_eq!(closest_triangle_feature(Vec3::from([2., -1., 0.]), &triangle).1, Feature::Vertex(1));
+        assert_eq!(closest_triangle_feature(Vec3::from([0.5, -1., 0.]), &triangle).1, Feature::Edge(0));
+        assert_eq!(closest_triangle_feature(Vec3::from([1., 1., 0.]), &triangle).1, Feature::Edge(1));
+        assert_eq!(closest_triangle_feature(Vec3::from([-1., 0.5, 0.]), &triangle).1, Feature::Edge(2));
+    }
+
+    #[test]
+    fn test_pseudo_normals() {
+        // closed tetrahedron
+        let points = [
+            Vec3::from([0., 0., 0.]),
+            Vec3::from([1., 0., 0.]),
+            Vec3::from([0., 1., 0.]),
+            Vec3::from([0., 0., 1.]),
+            ];
+        let faces = [[0, 2, 1], [0, 1, 3], [1, 2, 3], [0, 3, 2]];
+        let normals = PseudoNormals::new(&points, &faces);
+        let bvh = Bvh::from_simplices(&points, &faces);
+        let side = |point: Vec3| {
+            let (face, _) = bvh.nearest(point, |f| (closest_triangle(point, &faces[f as usize].map(|p| points[p as usize])) - point).square_length()).unwrap();
+            let (closest, feature) = closest_triangle_feature(point, &faces[face as usize].map(|p| points[p as usize]));
+            (point - closest).dot(normals.normal(&faces[face as usize], face, feature))
+        };
+        assert!(side(Vec3::from([0.1, 0.1, 0.1])) < 0.);
+        assert!(side(Vec3::from([-1., -1., -1.])) > 0.);
+        assert!(side(Vec3::from([0.5, 0.5, -0.1])) > 0.);
+        assert!(side(Vec3::from([2., 2., 2.])) > 0.);
+        assert!(side(Vec3::from([0.2, 0.2, 0.3])) < 0.);
+    }
+
+    #[test]
+    fn test_empty() {
+        let bvh = Bvh::new(&[]);
+        assert!(bvh.nearest(Vec3::from([0., 0., 0.]), |_| 0.).is_none());
+        assert!(bvh.raycast(Vec3::from([0., 0., 0.]), Vec3::from([1., 0., 0.]), |_| Some(0.)).is_none());
+    }
+}
@@ -168,7 +168,7 @@ where
 // ---- PositionMap: Spatial Hash Map ----
 
 /// Hash key type for spatial hashing — plain array that implements Hash + Eq
-type CellKey = [i64; 3];
+pub type CellKey = [i64; 3];
 
 /// Convert rasterize::IVec3 (IVec3) to CellKey
 #[inline]
@@ -265,6 +265,26 @@ impl<T> PositionMap<T> {
         }
     }
 
+    /// Group objects by cell, each object being associated with the key at the same position.
+    ///
+    /// Cells are listed in order of first appearance, and objects keep their order in each cell
+    pub fn group(keys: &[IVec3], objs: &[T]) -> Vec<(CellKey, Vec<T>)>
+    where
+        T: Clone,
+    {
+        let mut cells = FxHashMap::<CellKey, usize>::default();
+        let mut groups: Vec<(CellKey, Vec<T>)> = Vec::new();
+        for (&key, obj) in keys.iter().zip(objs) {
+            let key = to_cell_key(key);
+            let group = *cells.entry(key).or_insert_with(|| {
+                groups.push((key, Vec::new()));
+                groups.len() - 1
+            });
+            groups[group].1.push(obj.clone());
+        }
+        groups
+    }
+
     /// Get all objects potentially at the given cell keys (may contain duplicates)
     pub fn get<'a>(&'a self, keys: &'a [CellKey]) -> impl Iterator<Item = &'a T> + 'a {
         keys.iter().flat_map(|k| {
@@ -439,6 +459,44 @@ impl PointSet {
         None
     }
 
+    /// Merge the points closer than `cellsize`, as successive calls to `add` would do.
+    ///
+    /// Returns the merged points and the index of each given point in the merged buffer
+    pub fn merge(cellsize: Float, points: &[Vec3]) -> (Vec<Vec3>, Vec<Index>) {
+        let mut set = PointSet::new(cellsize);
+        set.dict.reserve(points.len());
+        let remap = points.iter().map(|&pt| set.add(pt)).collect();
+        (set.unwrap(), remap)
+    }
+
+    /// Add points to a hash table indexing `count` points, as successive calls to `add` would do.
+    ///
+    /// This allows to extend a point set whose table and buffer are stored elsewhere.
+    /// Returns the index of each given point in the set, and the positions in `points` of the points actually inserted
+    pub fn extend_table(cellsize: Float, dict: &mut FxHashMap<CellKey, Index>, count: Index, points: &[Vec3]) -> (Vec<Index>, Vec<Index>) {
+        let mut set = PointSet {
+            cellsize,
+            points: Vec::new(),
+            dict: std::mem::take(dict),
+        };
+        let mut indices = Vec::with_capacity(points.len());
+        let mut inserted = Vec::new();
+        for (i, &pt) in points.iter().enumerate() {
+            let idx = match set.get(pt) {
+                Some(idx) => idx,
+                None => {
+                    let idx = count + inserted.len() as Index;
+                    set.dict.insert(set.keyfor(pt), idx);
+                    inserted.push(i as Index);
+                    idx
+                },
+            };
+            indices.push(idx);
+        }
+        *dict = set.dict;
+        (indices, inserted)
+    }
+
     /// Add points from an iterator
     pub fn update(&mut self, iter: impl IntoIterator<Item = Vec3>) {
         for pt in iter {
@@ -797,6 +855,51 @@ mod tests {
         assert_eq!(ps.get(Vec3::from([5.0, 5.0, 5.0])), None);
     }
 
+    #[test]
+    fn test_pointset_merge() {
+        let (points, remap) = PointSet::merge(0.1, &[
+            Vec3::from([0.0, 0.0, 0.0]),
+            Vec3::from([1.0, 0.0, 0.0]),
+            Vec3::from([0.0, 0.0, 0.01]),
+            Vec3::from([1.0, 1.0, 0.0]),
+            Vec3::from([1.0, 0.0, 0.0]),
+            ]);
+        assert_eq!(points.len(), 3);
+        assert_eq!(remap, vec![0, 1, 0, 2, 1]);
+    }
+
+    #[test]
+    fn test_positionmap_group() {
+        let keys = [
+            IVec3::from([0, 0, 0]),
+            IVec3::from([1, 0, 0]),
+            IVec3::from([0, 0, 0]),
+            IVec3::from([-1, 2, 0]),
+            IVec3::from([1, 0, 0]),
+            ];
+        let groups = PositionMap::group(&keys, &[4, 3, 2, 1, 0]);
+        assert_eq!(groups, vec![
+            ([0, 0, 0], vec![4, 2]),
+            ([1, 0, 0], vec![3, 0]),
+            ([-1, 2, 0], vec![1]),
+            ]);
+    }
+
+    #[test]
+    fn test_pointset_extend_table() {
+        let mut ps = PointSet::new(0.1);
+        ps.add(Vec3::from([1.0, 2.0, 3.0]));
+        let mut dict = ps.dict.clone();
+        let (indices, inserted) = PointSet::extend_table(0.1, &mut dict, 1, &[
+            Vec3::from([5.0, 5.0, 5.0]),
+            Vec3::from([1.0, 2.0, 3.0]),
+            Vec3::from([5.0, 5.0, 5.0]),
+            ]);
+        assert_eq!(indices, vec![1, 0, 1]);
+        assert_eq!(inserted, vec![0]);
+        assert_eq!(dict.len(), 2);
+    }
+
     #[test]
     fn test_pointset_wrap() {
         let pts = vec![
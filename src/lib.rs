@@ -25,10 +25,12 @@ pub mod wrapping;
 pub mod hashing;
 pub mod math;
 pub mod mesh;
+pub mod reverse;
 pub mod aabox;
 pub mod triangulation;
 pub mod rasterize;
 pub mod hull;
+pub mod bvh;
 pub mod test;
 
 use pyo3::prelude::*;
@@ -36,6 +38,12 @@ use pyo3::create_exception;
 use pyo3::exceptions::{PyException, PyValueError};
 use pyo3::marker::Ungil;
 use pyo3::types::{PyList, PyDict};
+use crate::math::{Index, Float, Vec3, UVec2};
+use vecmat::prelude::*;
+use crate::rasterize::IVec3;
+use rustc_hash::FxHashMap;
+use std::sync::OnceLock;
+use crate::wrapping::{PyTypedList, PyWeb, PyWire, PaddedUVec3};
 
 create_exception!(core, TriangulationError, PyException);
 
@@ -57,6 +65,9 @@ mod core {
     #[pymodule_export]
     use super::TriangulationError;
 
+    #[pymodule_export]
+    use super::PyBvh;
+
     #[pyfunction]
     fn triangulation_loop_d2(
         py: Python<'_>,
@@ -91,6 +102,92 @@ mod core {
             .map_err(|e| PyValueError::new_err(e))
     }
 
+    #[pyfunction]
+    fn rasterize_segments(
+        py: Python<'_>,
+        web: PyWeb,
+        cell: Float,
+    ) -> PyResult<(PyTypedList<IVec3>, PyTypedList<Index>)> {
+        let web = web.borrow();
+        let (keys, owners) = may_detach(py, web.simplices.len() > 1_000, ||
+            super::rasterize::rasterize_segments(&web.points[..], web.simplices.iter().map(|e| *e.as_array()), cell))
+            .map_err(|e| PyValueError::new_err(e))?;
+        Ok((PyTypedList::new(py, keys)?, PyTypedList::new(py, owners)?))
+    }
+
+    #[pyfunction]
+    fn rasterize_triangles(
+        py: Python<'_>,
+        mesh: PySurface,
+        cell: Float,
+    ) -> PyResult<(PyTypedList<IVec3>, PyTypedList<Index>)> {
+        let surface = mesh.borrow();
+        let (keys, owners) = may_detach(py, surface.simplices.len() > 1_000, ||
+            super::rasterize::rasterize_triangles(&surface.points[..], surface.simplices.iter().map(|f| *f.as_array()), cell))
+            .map_err(|e| PyValueError::new_err(e))?;
+        Ok((PyTypedList::new(py, keys)?, PyTypedList::new(py, owners)?))
+    }
+
+    #[pyfunction]
+    fn positionmap_ingest(
+        dict: &Bound<'_, PyDict>,
+        keys: PyTypedList<IVec3>,
+        objs: PyTypedList<Index>,
+    ) -> PyResult<()> {
+        let py = dict.py();
+        // the python dict is only accessed once per cell
+        for (key, objs) in super::hashing::PositionMap::group(keys.as_slice(), objs.as_slice()) {
+            let key = (key[0], key[1], key[2]);
+            match dict.get_item(key)? {
+                Some(cell) => {cell.call_method1("extend", (objs,))?;},
+                None => dict.set_item(key, PyList::new(py, objs)?)?,
+            }
+        }
+        Ok(())
+    }
+
+    #[pyfunction]
+    fn pointset_update(
+        py: Python<'_>,
+        cellsize: Float,
+        dict: &Bound<'_, PyDict>,
+        count: Index,
+        points: PyTypedList<Vec3>,
+    ) -> PyResult<(PyTypedList<Index>, PyTypedList<Index>)> {
+        let points = points.as_slice();
+        // only the entries of the cells the new points can fall in are read from the python dict
+        let set = super::hashing::PointSet::new(cellsize);
+        let mut table = FxHashMap::default();
+        for &pt in points {
+            for key in set.keysfor(pt) {
+                if table.contains_key(&key) {continue}
+                if let Some(index) = dict.get_item((key[0], key[1], key[2]))? {
+                    table.insert(key, index.extract::<Index>()?);
+                }
+            }
+        }
+        let (indices, inserted) = may_detach(py, points.len() > 1_000, ||
+            super::hashing::PointSet::extend_table(cellsize, &mut table, count, points));
+        // and only the new entries are written back
+        for (i, &position) in inserted.iter().enumerate() {
+            let key = set.keyfor(points[position as usize]);
+            dict.set_item((key[0], key[1], key[2]), count + i as Index)?;
+        }
+        Ok((PyTypedList::new(py, indices)?, PyTypedList::new(py, inserted)?))
+    }
+
+    #[pyfunction]
+    fn mergeclose(
+        py: Python<'_>,
+        points: PyTypedList<Vec3>,
+        limit: Float,
+    ) -> PyResult<(PyTypedList<Vec3>, PyTypedList<Index>)> {
+        let points = points.as_slice();
+        let (merged, remap) = may_detach(py, points.len() > 1_000, ||
+            super::hashing::PointSet::merge(limit, points));
+        Ok((PyTypedList::new(py, merged)?, PyTypedList::new(py, remap)?))
+    }
+
     #[pyfunction]
     fn vertexnormals(
         py: Python<'_>,
@@ -102,6 +199,243 @@ mod core {
         PyTypedList::new(py, normals)
     }
 
+    #[pyfunction]
+    fn facenormals(
+        py: Python<'_>,
+        mesh: PySurface,
+    ) -> PyResult<PyTypedList<Vec3>> {
+        let surface = mesh.borrow();
+        let normals = may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.facenormals());
+        PyTypedList::new(py, normals)
+    }
+
+    #[pyfunction]
+    fn surface(
+        py: Python<'_>,
+        mesh: PySurface,
+    ) -> Float {
+        let surface = mesh.borrow();
+        may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.area())
+    }
+
+    #[pyfunction]
+    fn barycenter_surface(
+        py: Python<'_>,
+        mesh: PySurface,
+    ) -> Option<(Float, Float, Float)> {
+        let surface = mesh.borrow();
+        may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.area_barycenter())
+            .map(|p| (p[0], p[1], p[2]))
+    }
+
+    #[pyfunction]
+    fn volume(
+        py: Python<'_>,
+        mesh: PySurface,
+    ) -> Float {
+        let surface = mesh.borrow();
+        may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.volume())
+    }
+
+    #[pyfunction]
+    fn edgenormals(
+        py: Python<'_>,
+        mesh: PySurface,
+    ) -> PyResult<(PyTypedList<UVec2>, PyTypedList<Vec3>)> {
+        let surface = mesh.borrow();
+        let (edges, normals) = may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.edgenormals());
+        let edges: Vec<UVec2> = edges.into_iter().map(UVec2::from).collect();
+        Ok((PyTypedList::new(py, edges)?, PyTypedList::new(py, normals)?))
+    }
+
+    #[pyfunction]
+    fn tangents(
+        py: Python<'_>,
+        mesh: PySurface,
+    ) -> PyResult<(PyTypedList<Index>, PyTypedList<Vec3>)> {
+        let surface = mesh.borrow();
+        let tangents = may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.tangents())
+            .map_err(PyValueError::new_err)?;
+        let (points, tangents): (Vec<Index>, Vec<Vec3>) = tangents.into_iter().unzip();
+        Ok((PyTypedList::new(py, points)?, PyTypedList::new(py, tangents)?))
+    }
+
+    /// adjacency of the faces of a surface, see `madcad.hashing.Topology` for the meaning of the returned buffers
+    #[pyfunction]
+    fn topology_surface(
+        py: Python<'_>,
+        mesh: PySurface,
+    ) -> PyResult<(
+        PyTypedList<UVec2>, PyTypedList<PaddedUVec3>, PyTypedList<PaddedUVec3>,
+        PyTypedList<Index>, PyTypedList<Index>,
+        PyTypedList<Index>, PyTypedList<Index>,
+        PyTypedList<Index>, PyTypedList<Index>,
+    )> {
+        let surface = mesh.borrow();
+        let topology = may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.topology());
+        let padded = |sides: Vec<[Index; 3]>| -> Vec<PaddedUVec3> {
+            sides.into_iter().map(|s| UVec3::from(s).into()).collect()
+        };
+        Ok((
+            PyTypedList::new(py, topology.edges.into_iter().map(UVec2::from).collect())?,
+            PyTypedList::new(py, padded(topology.faceedges))?,
+            PyTypedList::new(py, padded(topology.neighbours))?,
+            PyTypedList::new(py, topology.edgefaces.offsets)?,
+            PyTypedList::new(py, topology.edgefaces.items)?,
+            PyTypedList::new(py, topology.pointfaces.offsets)?,
+            PyTypedList::new(py, topology.pointfaces.items)?,
+            PyTypedList::new(py, topology.pointpoints.offsets)?,
+            PyTypedList::new(py, topology.pointpoints.items)?,
+        ))
+    }
+
+    /// label of the connected component of each face of a surface, and the number of components
+    #[pyfunction]
+    fn components_surface(
+        py: Python<'_>,
+        mesh: PySurface,
+    ) -> PyResult<(PyTypedList<Index>, Index)> {
+        let surface = mesh.borrow();
+        let (labels, count) = may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.components());
+        Ok((PyTypedList::new(py, labels)?, count))
+    }
+
+    /// label of the connected component of each edge of a web, and the number of components
+    #[pyfunction]
+    fn components_web(
+        py: Python<'_>,
+        web: PyWeb,
+    ) -> PyResult<(PyTypedList<Index>, Index)> {
+        let web = web.borrow();
+        let (labels, count) = may_detach(py, web.simplices.len() > 1_000, ||
+            web.components());
+        Ok((PyTypedList::new(py, labels)?, count))
+    }
+
+    /// subdivide the faces of a surface, cutting their edges as many times as given for their group
+    #[pyfunction]
+    fn subdivide_surface(
+        py: Python<'_>,
+        mesh: PySurface,
+        divisions: PyTypedList<Index>,
+    ) -> PyResult<PySurface> {
+        let surface = mesh.borrow();
+        let divisions = divisions.as_slice();
+        let result = may_detach(py, surface.simplices.len() > 1_000, ||
+            surface.subdivide(divisions));
+        let faces: Vec<PaddedUVec3> = result.simplices.into_owned().into_iter().map(|v| v.into()).collect();
+        Ok(PySurface {
+            points: PyTypedList::new(py, result.points.into_owned())?,
+            faces: PyTypedList::new(py, faces)?,
+            tracks: PyTypedList::new(py, result.tracks.into_owned())?,
+            groups: mesh.groups.clone_ref(py),
+            options: PyDict::new(py).unbind(),
+        })
+    }
+
+    /// subdivide the edges of a web, cutting them as many times as given for their group
+    #[pyfunction]
+    fn subdivide_web(
+        py: Python<'_>,
+        web: PyWeb,
+        divisions: PyTypedList<Index>,
+    ) -> PyResult<PyWeb> {
+        let borrowed = web.borrow();
+        let divisions = divisions.as_slice();
+        let result = may_detach(py, borrowed.simplices.len() > 1_000, ||
+            borrowed.subdivide(divisions));
+        Ok(PyWeb {
+            points: PyTypedList::new(py, result.points.into_owned())?,
+            faces: PyTypedList::new(py, result.simplices.into_owned())?,
+            tracks: PyTypedList::new(py, result.tracks.into_owned())?,
+            groups: web.groups.clone_ref(py),
+            options: PyDict::new(py).unbind(),
+        })
+    }
+
+    /// decimate a surface by collapsing its edges in order of their quadric error
+    #[pyfunction]
+    fn simplify(
+        py: Python<'_>,
+        mesh: PySurface,
+        target: usize,
+        error: Float,
+        sharp: Float,
+    ) -> PyResult<PySurface> {
+        let surface = mesh.borrow();
+        let result = may_detach(py, surface.simplices.len() > 1_000, ||
+            super::reverse::simplify(&surface, target, error, sharp));
+        let faces: Vec<PaddedUVec3> = result.simplices.into_owned().into_iter().map(|v| v.into()).collect();
+        Ok(PySurface {
+            points: PyTypedList::new(py, result.points.into_owned())?,
+            faces: PyTypedList::new(py, faces)?,
+            tracks: PyTypedList::new(py, result.tracks.into_owned())?,
+            groups: mesh.groups.clone_ref(py),
+            options: PyDict::new(py).unbind(),
+        })
+    }
+
+    /// flip the edges of a surface to increase the smallest angles of its faces
+    #[pyfunction]
+    fn retriangulate(
+        py: Python<'_>,
+        mesh: PySurface,
+        sharp: Float,
+    ) -> PyResult<PyTypedList<PaddedUVec3>> {
+        let surface = mesh.borrow();
+        let faces = may_detach(py, surface.simplices.len() > 1_000, ||
+            super::reverse::retriangulate(&surface, sharp));
+        let padded: Vec<PaddedUVec3> = faces.into_iter().map(|v| v.into()).collect();
+        PyTypedList::new(py, padded)
+    }
+
+    /// remesh a surface toward the given edge length around each point
+    #[pyfunction]
+    fn remesh(
+        py: Python<'_>,
+        mesh: PySurface,
+        lengths: PyTypedList<Float>,
+        sharp: Float,
+        iterations: usize,
+    ) -> PyResult<PySurface> {
+        let surface = mesh.borrow();
+        let lengths = lengths.as_slice();
+        let result = may_detach(py, surface.simplices.len() > 1_000, ||
+            super::reverse::remesh(&surface, lengths, sharp, iterations));
+        let faces: Vec<PaddedUVec3> = result.simplices.into_owned().into_iter().map(|v| v.into()).collect();
+        Ok(PySurface {
+            points: PyTypedList::new(py, result.points.into_owned())?,
+            faces: PyTypedList::new(py, faces)?,
+            tracks: PyTypedList::new(py, result.tracks.into_owned())?,
+            groups: mesh.groups.clone_ref(py),
+            options: PyDict::new(py).unbind(),
+        })
+    }
+
+    /// group faces into regions of similar curvature
+    #[pyfunction]
+    fn grow_regions(
+        py: Python<'_>,
+        curvatures: PyTypedList<Float>,
+        neighbors: PyTypedList<UVec2>,
+        tolerance: Float,
+        prec: Float,
+    ) -> PyResult<(PyTypedList<Index>, PyTypedList<Float>)> {
+        let curvatures = curvatures.as_slice();
+        let neighbors: Vec<[Index; 2]> = neighbors.as_slice().iter().map(|e| *e.as_array()).collect();
+        let (tracks, estimates) = may_detach(py, curvatures.len() > 10_000, ||
+            super::reverse::grow_regions(curvatures, &neighbors, tolerance, prec));
+        Ok((PyTypedList::new(py, tracks)?, PyTypedList::new(py, estimates)?))
+    }
+
     #[pyfunction]
     fn split_surface(
         py: Python<'_>,
@@ -170,17 +504,19 @@ mod core {
     }
 
     #[pyfunction]
+    #[pyo3(signature = (m1, m2, prec, threads=0))]
     fn cut_surface(
         py: Python<'_>,
         m1: PySurface,
         m2: PySurface,
         prec: Float,
+        threads: usize,
     ) -> PyResult<(PySurface, PyWeb)> {
         let s1 = m1.borrow();
         let s2 = m2.borrow();
 
         let (cut, frontier) = may_detach(py, s1.simplices.len() + s2.simplices.len() > 100, ||
-            super::boolean::cut_surface(&s1, &s2, prec));
+            super::boolean::cut_surface(&s1, &s2, prec, threads));
 
         let cut_faces: Vec<PaddedUVec3> = cut.simplices.into_owned().into_iter().map(|v| v.into()).collect();
         let front_edges = frontier.simplices.into_owned();
@@ -204,6 +540,7 @@ mod core {
     }
 
     #[pyfunction]
+    #[pyo3(signature = (m1, m2, side, prec, strict, threads=0))]
     fn pierce_surface(
         py: Python<'_>,
         m1: PySurface,
@@ -211,12 +548,13 @@ mod core {
         side: bool,
         prec: Float,
         strict: bool,
+        threads: usize,
     ) -> PyResult<PySurface> {
         let s1 = m1.borrow();
         let s2 = m2.borrow();
 
         let result = may_detach(py, s1.simplices.len() + s2.simplices.len() > 100, ||
-            super::boolean::pierce_surface(&s1, &s2, side, prec, strict))
+            super::boolean::pierce_surface(&s1, &s2, side, prec, strict, threads))
             .map_err(|e| PyValueError::new_err(e))?;
 
         let result_faces: Vec<PaddedUVec3> = result.simplices.into_owned().into_iter().map(|v| v.into()).collect();
@@ -229,6 +567,224 @@ mod core {
             options: PyDict::new(py).unbind(),
         })
     }
+
+    #[pyfunction]
+    fn cut_web(
+        py: Python<'_>,
+        w1: PyWeb,
+        reference: PyWeb,
+        prec: Float,
+    ) -> PyResult<(PyWeb, PyWire)> {
+        let w = w1.borrow();
+        let r = reference.borrow();
+        let (cut, frontier) = may_detach(py, w.simplices.len() + r.simplices.len() > 100, ||
+            super::boolean::cut_web(&w, &r, prec));
+        web_cut_result(py, &w1, cut, frontier)
+    }
+
+    #[pyfunction]
+    fn cut_web_mesh(
+        py: Python<'_>,
+        w1: PyWeb,
+        reference: PySurface,
+        prec: Float,
+    ) -> PyResult<(PyWeb, PyWire)> {
+        let w = w1.borrow();
+        let r = reference.borrow();
+        let (cut, frontier) = may_detach(py, w.simplices.len() + r.simplices.len() > 100, ||
+            super::boolean::cut_web_mesh(&w, &r, prec));
+        web_cut_result(py, &w1, cut, frontier)
+    }
+
+    #[pyfunction]
+    fn pierce_web(
+        py: Python<'_>,
+        w1: PyWeb,
+        reference: PyWeb,
+        side: bool,
+        prec: Float,
+    ) -> PyResult<PyWeb> {
+        let w = w1.borrow();
+        let r = reference.borrow();
+        let result = may_detach(py, w.simplices.len() + r.simplices.len() > 100, ||
+            super::boolean::pierce_web(&w, &r, side, prec));
+        web_pierce_result(py, &w1, result)
+    }
+
+    #[pyfunction]
+    fn pierce_web_mesh(
+        py: Python<'_>,
+        w1: PyWeb,
+        reference: PySurface,
+        side: bool,
+        prec: Float,
+    ) -> PyResult<PyWeb> {
+        let w = w1.borrow();
+        let r = reference.borrow();
+        let result = may_detach(py, w.simplices.len() + r.simplices.len() > 100, ||
+            super::boolean::pierce_web_mesh(&w, &r, side, prec));
+        web_pierce_result(py, &w1, result)
+    }
+}
+
+/// Bounding volume hierarchy over the segments or triangles of a mesh, for batched proximity queries
+#[pyclass(name="Bvh", module="madcad.core", frozen)]
+pub struct PyBvh {
+    points: Vec<Vec3>,
+    simplices: Simplices,
+    bvh: bvh::Bvh,
+    /// computed on first signed distance query
+    normals: OnceLock<bvh::PseudoNormals>,
+}
+enum Simplices {
+    Segments(Vec<[Index; 2]>),
+    Triangles(Vec<[Index; 3]>),
+}
+impl PyBvh {
+    /// closest point to `point` on the given primitive
+    fn closest_on(&self, point: Vec3, primitive: Index) -> Vec3 {
+        match &self.simplices {
+            Simplices::Segments(edges) => bvh::closest_segment(point,
+                &edges[primitive as usize].map(|p| self.points[p as usize])),
+            Simplices::Triangles(faces) => bvh::closest_triangle(point,
+                &faces[primitive as usize].map(|p| self.points[p as usize])),
+        }
+    }
+    /// nearest primitive to `point` and its squared distance
+    fn nearest_one(&self, point: Vec3) -> (Index, Float) {
+        self.bvh.nearest(point, |primitive| (self.closest_on(point, primitive) - point).square_length())
+            .expect("empty hierarchy")
+    }
+    fn check_empty(&self) -> PyResult<()> {
+        if self.bvh.is_empty() {
+            return Err(PyValueError::new_err("no primitive to query"));
+        }
+        Ok(())
+    }
+}
+#[pymethods]
+impl PyBvh {
+    #[staticmethod]
+    fn segments(
+        py: Python<'_>,
+        points: PyTypedList<Vec3>,
+        edges: PyTypedList<UVec2>,
+    ) -> Self {
+        let points = points.as_slice().to_vec();
+        let edges: Vec<[Index; 2]> = edges.as_slice().iter().map(|e| *e.as_array()).collect();
+        let bvh = may_detach(py, edges.len() > 1_000, ||
+            bvh::Bvh::from_simplices(&points, &edges));
+        Self {points, simplices: Simplices::Segments(edges), bvh, normals: OnceLock::new()}
+    }
+
+    #[staticmethod]
+    fn triangles(
+        py: Python<'_>,
+        points: PyTypedList<Vec3>,
+        faces: PyTypedList<PaddedUVec3>,
+    ) -> Self {
+        let points = points.as_slice().to_vec();
+        let faces: Vec<[Index; 3]> = faces.as_slice().iter().map(|f| f.data).collect();
+        let bvh = may_detach(py, faces.len() > 1_000, ||
+            bvh::Bvh::from_simplices(&points, &faces));
+        Self {points, simplices: Simplices::Triangles(faces), bvh, normals: OnceLock::new()}
+    }
+
+    fn __len__(&self) -> usize {
+        self.bvh.len()
+    }
+
+    /// index of the nearest primitive to each query point, and its distance
+    fn nearest(
+        &self,
+        py: Python<'_>,
+        points: PyTypedList<Vec3>,
+    ) -> PyResult<(PyTypedList<Index>, PyTypedList<Float>)> {
+        self.check_empty()?;
+        let queries = points.as_slice();
+        let found = may_detach(py, queries.len() > 100, ||
+            bvh::map_parallel(queries.len(), |i| self.nearest_one(queries[i])));
+        let (indices, distances): (Vec<Index>, Vec<Float>) = found.into_iter()
+            .map(|(primitive, distance2)| (primitive, distance2.sqrt()))
+            .unzip();
+        Ok((PyTypedList::new(py, indices)?, PyTypedList::new(py, distances)?))
+    }
+
+    /// index of the nearest primitive to each query point, its distance and the closest point on it
+    fn closest(
+        &self,
+        py: Python<'_>,
+        points: PyTypedList<Vec3>,
+    ) -> PyResult<(PyTypedList<Index>, PyTypedList<Float>, PyTypedList<Vec3>)> {
+        self.check_empty()?;
+        let queries = points.as_slice();
+        let found = may_detach(py, queries.len() > 100, ||
+            bvh::map_parallel(queries.len(), |i| {
+                let (primitive, distance2) = self.nearest_one(queries[i]);
+                (primitive, distance2.sqrt(), self.closest_on(queries[i], primitive))
+            }));
+        let mut indices = Vec::with_capacity(found.len());
+        let mut distances = Vec::with_capacity(found.len());
+        let mut closest = Vec::with_capacity(found.len());
+        for (primitive, distance, point) in found {
+            indices.push(primitive);
+            distances.push(distance);
+            closest.push(point);
+        }
+        Ok((PyTypedList::new(py, indices)?, PyTypedList::new(py, distances)?, PyTypedList::new(py, closest)?))
+    }
+
+    /// index of the nearest face to each query point, and the distance signed by the side of the surface: negative inside and positive outside
+    fn signed_distance(
+        &self,
+        py: Python<'_>,
+        points: PyTypedList<Vec3>,
+    ) -> PyResult<(PyTypedList<Index>, PyTypedList<Float>)> {
+        self.check_empty()?;
+        let Simplices::Triangles(faces) = &self.simplices else {
+            return Err(PyValueError::new_err("signed distance is only defined for triangles"));
+        };
+        let queries = points.as_slice();
+        let found = may_detach(py, queries.len() > 100, || {
+            let normals = self.normals.get_or_init(|| bvh::PseudoNormals::new(&self.points, faces));
+            bvh::map_parallel(queries.len(), |i| {
+                let point = queries[i];
+                let (primitive, distance2) = self.nearest_one(point);
+                let face = &faces[primitive as usize];
+                let (closest, feature) = bvh::closest_triangle_feature(point, &face.map(|p| self.points[p as usize]));
+                let side = (point - closest).dot(normals.normal(face, primitive, feature));
+                (primitive, if side < 0. {-distance2.sqrt()} else {distance2.sqrt()})
+            })
+        });
+        let (indices, distances): (Vec<Index>, Vec<Float>) = found.into_iter().unzip();
+        Ok((PyTypedList::new(py, indices)?, PyTypedList::new(py, distances)?))
+    }
+
+    /// index of the first face hit by each ray and the ray parameter at the hit, or `Index::MAX` and infinity for rays hitting nothing
+    fn raycast(
+        &self,
+        py: Python<'_>,
+        origins: PyTypedList<Vec3>,
+        directions: PyTypedList<Vec3>,
+    ) -> PyResult<(PyTypedList<Index>, PyTypedList<Float>)> {
+        let Simplices::Triangles(faces) = &self.simplices else {
+            return Err(PyValueError::new_err("raycast is only defined for triangles"));
+        };
+        let origins = origins.as_slice();
+        let directions = directions.as_slice();
+        if origins.len() != directions.len() {
+            return Err(PyValueError::new_err("origins and directions must have the same length"));
+        }
+        let found = may_detach(py, origins.len() > 100, ||
+            bvh::map_parallel(origins.len(), |i| {
+                let (origin, direction) = (origins[i], directions[i]);
+                self.bvh.raycast(origin, direction, |primitive|
+                    bvh::intersect_triangle(origin, direction, &faces[primitive as usize].map(|p| self.points[p as usize])))
+                .unwrap_or((Index::MAX, Float::INFINITY))
+            }));
+        let (indices, distances): (Vec<Index>, Vec<Float>) = found.into_iter().unzip();
+        Ok((PyTypedList::new(py, indices)?, PyTypedList::new(py, distances)?))
+    }
 }
 
 /// run the given closure detached from python thread if required, otherwise run it attached
@@ -240,3 +796,44 @@ where
     if detach { py.detach(f) }
     else { f() }
 }
+
+/// convert a cutted web and its frontier to python objects
+fn web_cut_result(
+    py: Python<'_>,
+    w1: &PyWeb,
+    cut: mesh::Web<'static>,
+    frontier: mesh::Wire<'static>,
+) -> PyResult<(PyWeb, PyWire)> {
+    let indices: Vec<Index> = frontier.simplices.iter().map(|i| i[0]).collect();
+    Ok((
+        PyWeb {
+            points: PyTypedList::new(py, cut.points.into_owned())?,
+            faces: PyTypedList::new(py, cut.simplices.into_owned())?,
+            tracks: PyTypedList::new(py, cut.tracks.into_owned())?,
+            groups: w1.groups.clone_ref(py),
+            options: PyDict::new(py).unbind(),
+        },
+        PyWire {
+            points: PyTypedList::new(py, frontier.points.into_owned())?,
+            indices: PyTypedList::new(py, indices)?,
+            tracks: PyTypedList::new(py, frontier.tracks.into_owned())?,
+            groups: PyList::empty(py).unbind(),
+            options: PyDict::new(py).unbind(),
+        },
+    ))
+}
+
+/// convert a pierced web to a python object
+fn web_pierce_result(
+    py: Python<'_>,
+    w1: &PyWeb,
+    result: mesh::Web<'static>,
+) -> PyResult<PyWeb> {
+    Ok(PyWeb {
+        points: PyTypedList::new(py, result.points.into_owned())?,
+        faces: PyTypedList::new(py, result.simplices.into_owned())?,
+        tracks: PyTypedList::new(py, result.tracks.into_owned())?,
+        groups: w1.groups.clone_ref(py),
+        options: PyDict::new(py).unbind(),
+    })
+}
@@ -103,14 +103,304 @@ impl<'a, const D: usize, const S: usize> Mesh<'a, D, S> {
     }
 }
 
+/// Compressed rows of indices, row `i` is `items[offsets[i] .. offsets[i+1]]`
+pub struct Csr {
+    pub offsets: Vec<Index>,
+    pub items: Vec<Index>,
+}
+impl Csr {
+    /// Group `(row, item)` pairs by row, keeping their order within each row
+    pub fn from_pairs(rows: usize, pairs: &[(Index, Index)]) -> Self {
+        let mut offsets = vec![0; rows + 1];
+        for &(row, _) in pairs {
+            offsets[row as usize + 1] += 1;
+        }
+        for i in 0 .. rows {
+            offsets[i + 1] += offsets[i];
+        }
+        let mut fill = offsets.clone();
+        let mut items = vec![0; pairs.len()];
+        for &(row, item) in pairs {
+            items[fill[row as usize] as usize] = item;
+            fill[row as usize] += 1;
+        }
+        Self {offsets, items}
+    }
+    pub fn row(&self, i: usize) -> &[Index] {
+        &self.items[self.offsets[i] as usize .. self.offsets[i + 1] as usize]
+    }
+}
+
+/// Union-find over indices, used to label connected components
+///
+/// The representative of a set is always its lowest index
+pub struct Components {
+    parents: Vec<Index>,
+}
+impl Components {
+    pub fn new(count: usize) -> Self {
+        Self {parents: (0 .. count as Index).collect()}
+    }
+    /// Representative of the set containing `i`
+    pub fn find(&mut self, mut i: Index) -> Index {
+        // path halving
+        while self.parents[i as usize] != i {
+            let grand = self.parents[self.parents[i as usize] as usize];
+            self.parents[i as usize] = grand;
+            i = grand;
+        }
+        i
+    }
+    /// Merge the sets containing `a` and `b`
+    pub fn union(&mut self, a: Index, b: Index) {
+        let (a, b) = (self.find(a), self.find(b));
+        if a < b {
+            self.parents[b as usize] = a;
+        } else if b < a {
+            self.parents[a as usize] = b;
+        }
+    }
+    /// Label of each index and number of labels, labels are numbered in order of the lowest index of their set
+    pub fn labels(mut self) -> (Vec<Index>, Index) {
+        let mut labels = vec![0; self.parents.len()];
+        let mut count = 0;
+        for i in 0 .. self.parents.len() {
+            let root = self.find(i as Index) as usize;
+            if root == i {
+                labels[i] = count;
+                count += 1;
+            } else {
+                // the representative is lower so already labeled
+                labels[i] = labels[root];
+            }
+        }
+        (labels, count)
+    }
+}
+
+/// Adjacency of the faces of a surface, mirroring madcad.hashing.Topology
+///
+/// Side `k` of a face `f` is the edge `(f[k-1], f[k])`, so that the sides follow the same order as `connef` lookups in madcad
+pub struct Topology {
+    /// unoriented edges, in order of first appearance in the faces
+    pub edges: Vec<[Index; 2]>,
+    /// index in `edges` of each side of each face
+    pub faceedges: Vec<[Index; 3]>,
+    /// face owning the reverse of each side of each face, `Index::MAX` if none. Like `connef`, the last face wins when several own the same oriented edge
+    pub neighbours: Vec<[Index; 3]>,
+    /// faces around each edge
+    pub edgefaces: Csr,
+    /// faces around each point
+    pub pointfaces: Csr,
+    /// points linked by an edge to each point, in order of appearance like `connpp`
+    pub pointpoints: Csr,
+}
+
 // Specific implementations for Surface
 impl Surface<'_> {
+    /// Build the adjacency of the faces
+    pub fn topology(&self) -> Topology {
+        let faces = &self.simplices;
+        let mut oriented: FxHashMap<[Index; 2], Index> = FxHashMap::default();
+        let mut index: FxHashMap<[Index; 2], Index> = FxHashMap::default();
+        let mut edges = Vec::new();
+        let mut faceedges = Vec::with_capacity(faces.len());
+        let mut edgefaces = Vec::with_capacity(3 * faces.len());
+        let mut pointfaces = Vec::with_capacity(3 * faces.len());
+        let mut pointpoints = Vec::with_capacity(6 * faces.len());
+        for (fi, face) in faces.iter().enumerate() {
+            let fi = fi as Index;
+            let mut sides = [0; 3];
+            for k in 0 .. 3 {
+                let [a, b] = [face[(k + 2) % 3], face[k]];
+                oriented.insert([a, b], fi);
+                let edge = edgekey(a, b);
+                let ei = *index.entry(edge).or_insert_with(|| {
+                    edges.push(edge);
+                    (edges.len() - 1) as Index
+                });
+                sides[k] = ei;
+                edgefaces.push((ei, fi));
+                pointfaces.push((face[k], fi));
+                pointpoints.push((a, b));
+                pointpoints.push((b, a));
+            }
+            faceedges.push(sides);
+        }
+        let neighbours = faces.iter()
+            .map(|face| std::array::from_fn(|k|
+                oriented.get(&[face[k], face[(k + 2) % 3]]).copied().unwrap_or(Index::MAX)))
+            .collect();
+        // remove duplicated links, keeping the first appearance
+        let mut pointpoints = Csr::from_pairs(self.points.len(), &pointpoints);
+        let mut offsets = Vec::with_capacity(pointpoints.offsets.len());
+        let mut items = Vec::with_capacity(pointpoints.items.len());
+        offsets.push(0);
+        for p in 0 .. self.points.len() {
+            let start = items.len();
+            for &n in pointpoints.row(p) {
+                if !items[start ..].contains(&n) {
+                    items.push(n);
+                }
+            }
+            offsets.push(items.len() as Index);
+        }
+        pointpoints = Csr {offsets, items};
+
+        Topology {
+            edgefaces: Csr::from_pairs(edges.len(), &edgefaces),
+            pointfaces: Csr::from_pairs(self.points.len(), &pointfaces),
+            pointpoints,
+            edges,
+            faceedges,
+            neighbours,
+        }
+    }
+
+    /// Label of the connected component of each face, and the number of components
+    ///
+    /// Faces are connected when one owns the reverse of a side of the other, like the `neighbours` of `Topology`
+    pub fn components(&self) -> (Vec<Index>, Index) {
+        let faces = &self.simplices;
+        let mut oriented: FxHashMap<[Index; 2], Index> = FxHashMap::default();
+        oriented.reserve(3 * faces.len());
+        for (fi, face) in faces.iter().enumerate() {
+            for k in 0 .. 3 {
+                oriented.insert([face[(k + 2) % 3], face[k]], fi as Index);
+            }
+        }
+        let mut components = Components::new(faces.len());
+        for (fi, face) in faces.iter().enumerate() {
+            for k in 0 .. 3 {
+                if let Some(&neighbour) = oriented.get(&[face[k], face[(k + 2) % 3]]) {
+                    components.union(fi as Index, neighbour);
+                }
+            }
+        }
+        components.labels()
+    }
+
     /// Get the unit normal of face `fi`
     pub fn facenormal(&self, fi: usize) -> Vec3 {
         let [a, b, c] = self.simplexpoints(fi);
         (b - a).cross(c - a).normalize()
     }
 
+    /// Unit normal of every face
+    pub fn facenormals(&self) -> Vec<Vec3> {
+        (0 .. self.simplices.len()).map(|fi| self.facenormal(fi)).collect()
+    }
+
+    /// Total area of the faces
+    pub fn area(&self) -> Float {
+        let doubled: Float = (0 .. self.simplices.len())
+            .map(|fi| {
+                let [a, b, c] = self.simplexpoints(fi);
+                (b - a).cross(c - a).length()
+            })
+            .sum();
+        doubled * 0.5
+    }
+
+    /// Barycenter of the faces weighted by their area, mirroring madcad.mesh.Mesh.barycenter
+    pub fn area_barycenter(&self) -> Option<Vec3> {
+        if self.simplices.is_empty() {
+            return None;
+        }
+        let (sum, total) = (0 .. self.simplices.len())
+            .map(|fi| {
+                let [a, b, c] = self.simplexpoints(fi);
+                let weight = (b - a).cross(c - a).length();
+                ((a + b + c) * weight, weight)
+            })
+            .fold((Vec3::zero(), 0.), |(sum, total), (p, w)| (sum + p, total + w));
+        if total > 0. {
+            return Some(sum / (3. * total));
+        }
+        // all the faces are degenerated, so they get the same weight
+        let sum = (0 .. self.simplices.len())
+            .map(|fi| self.simplexpoints(fi).into_iter().fold(Vec3::zero(), |sum, p| sum + p))
+            .fold(Vec3::zero(), |sum, p| sum + p);
+        Some(sum / (3 * self.simplices.len()) as Float)
+    }
+
+    /// Volume enclosed by the faces, meaningful only if they form closed envelopes
+    pub fn volume(&self) -> Float {
+        let Some(origin) = self.area_barycenter() else {
+            return 0.;
+        };
+        let sextuple: Float = (0 .. self.simplices.len())
+            .map(|fi| {
+                let [a, b, c] = self.simplexpoints(fi).map(|p| p - origin);
+                a.dot(b.cross(c))
+            })
+            .sum();
+        sextuple / 6.
+    }
+
+    /// Unit normal of each unoriented edge, as the normalized sum of the normals of its faces
+    ///
+    /// Edges are returned in order of first appearance in the faces
+    pub fn edgenormals(&self) -> (Vec<[Index; 2]>, Vec<Vec3>) {
+        let mut index: FxHashMap<[Index; 2], usize> = FxHashMap::default();
+        let mut edges = Vec::new();
+        let mut normals: Vec<Vec3> = Vec::new();
+        for (fi, face) in self.simplices.iter().enumerate() {
+            let normal = self.facenormal(fi);
+            for k in 0 .. 3 {
+                let edge = edgekey(face[k], face[(k + 1) % 3]);
+                let i = *index.entry(edge).or_insert_with(|| {
+                    edges.push(edge);
+                    normals.push(Vec3::zero());
+                    edges.len() - 1
+                });
+                normals[i] += normal;
+            }
+        }
+        for n in normals.iter_mut() {
+            *n = n.normalize();
+        }
+        (edges, normals)
+    }
+
+    /// Tangent to the surface at each outline point, normal to the outline and pointing outward of the surface
+    ///
+    /// Mirrors madcad.mesh.Mesh.tangents, and fails if the outline is not made of simple loops
+    pub fn tangents(&self) -> Result<Vec<(Index, Vec3)>, &'static str> {
+        // outline edges reversed, with the normal of their face
+        let mut outline: FxHashMap<[Index; 2], Vec3> = FxHashMap::default();
+        for (fi, face) in self.simplices.iter().enumerate() {
+            for k in 0 .. 3 {
+                let [a, b] = [face[k], face[(k + 1) % 3]];
+                if outline.remove(&[a, b]).is_none() {
+                    outline.insert([b, a], self.facenormal(fi));
+                }
+            }
+        }
+        // edge reaching and leaving each outline point
+        let mut reaching: FxHashMap<Index, (Index, Vec3)> = FxHashMap::default();
+        let mut leaving: Vec<(Index, Index, Vec3)> = Vec::with_capacity(outline.len());
+        for (&[a, b], &normal) in outline.iter() {
+            if reaching.insert(b, (a, normal)).is_some() {
+                return Err("non-manifold mesh");
+            }
+            leaving.push((a, b, normal));
+        }
+        leaving.sort_unstable_by_key(|&(a, _, _)| a);
+        if leaving.windows(2).any(|pair| pair[0].0 == pair[1].0) {
+            return Err("non-manifold mesh");
+        }
+        leaving.into_iter()
+            .map(|(point, next, after)| {
+                let &(previous, before) = reaching.get(&point).ok_or("non-manifold mesh")?;
+                let c = before.cross(after);
+                let o = (self.points[previous as usize] - self.points[next as usize]).cross(before + after);
+                let blend = (c.square_length() / o.square_length() / NUMPREC).clamp(0., 1.);
+                Ok((point, (o * (1. - blend) + c * blend).normalize()))
+            })
+            .collect()
+    }
+
     /// Set of oriented edges delimiting the surface boundary
     pub fn outlines_oriented(&self) -> FxHashSet<[Index; 2]> {
         let mut edges: FxHashSet<[Index; 2]> = FxHashSet::default();
@@ -257,6 +547,175 @@ impl Surface<'_> {
         frontier
     }
 
+    /// Subdivide every face, cutting each of its edges `divisions[track]` times
+    ///
+    /// Points are shared by construction: the original points keep their indices, followed by the points cut on each edge in order of first appearance, then the points inside each face.
+    /// An edge between faces with different counts is cut like the face with the most cuts. Such faces get a regular grid in their middle, bound to their border by a strip.
+    pub fn subdivide(&self, divisions: &[Index]) -> Surface<'static> {
+        let faces = &self.simplices;
+        let cuts = |fi: usize| divisions.get(self.tracks[fi] as usize).copied().unwrap_or(0) as usize;
+
+        // number the edges with the most cuts of their faces
+        let mut index: FxHashMap<[Index; 2], usize> = FxHashMap::default();
+        let mut edges: Vec<([Index; 2], usize)> = Vec::new();
+        let mut faceedges = Vec::with_capacity(faces.len());
+        for (fi, face) in faces.iter().enumerate() {
+            let mut sides = [0; 3];
+            for s in 0 .. 3 {
+                let key = edgekey(face[s], face[(s + 1) % 3]);
+                let ei = *index.entry(key).or_insert_with(|| {
+                    edges.push((key, 0));
+                    edges.len() - 1
+                });
+                edges[ei].1 = edges[ei].1.max(cuts(fi));
+                sides[s] = ei;
+            }
+            faceedges.push(sides);
+        }
+        let uniform = |fi: usize| faceedges[fi].iter().all(|&ei| edges[ei].1 == cuts(fi));
+
+        // reserve the new points and faces
+        let mut npoints = self.points.len();
+        let mut edgestart = Vec::with_capacity(edges.len());
+        for &(_, m) in &edges {
+            edgestart.push(npoints);
+            npoints += m;
+        }
+        let mut facestart = Vec::with_capacity(faces.len());
+        let mut nfaces = 0;
+        for (fi, sides) in faceedges.iter().enumerate() {
+            let k = cuts(fi);
+            facestart.push(npoints);
+            if uniform(fi) {
+                npoints += k * k.saturating_sub(1) / 2;
+                nfaces += (k + 1) * (k + 1);
+            } else {
+                let s = k.saturating_sub(2);
+                let border: usize = 3 + sides.iter().map(|&ei| edges[ei].1).sum::<usize>();
+                npoints += (k * k.saturating_sub(1) / 2).max(1);
+                nfaces += s * s + border + if s > 0 {3 * s} else {0};
+            }
+        }
+
+        let mut points = Vec::with_capacity(npoints);
+        points.extend_from_slice(&self.points);
+        for &([a, b], m) in &edges {
+            let (a, b) = (self.points[a as usize], self.points[b as usize]);
+            for t in 1 ..= m {
+                points.push(a + (b - a) * (t as Float / (m + 1) as Float));
+            }
+        }
+        for fi in 0 .. faces.len() {
+            let k = cuts(fi);
+            let [a, b, c] = self.simplexpoints(fi);
+            if k >= 2 {
+                let n = 1. / (k + 1) as Float;
+                for i in 1 .. k {
+                    for j in 1 ..= k - i {
+                        points.push(a * ((k + 1 - i - j) as Float * n) + b * (i as Float * n) + c * (j as Float * n));
+                    }
+                }
+            } else if !uniform(fi) {
+                points.push((a + b + c) * (1. / 3.));
+            }
+        }
+
+        // point at position `t` on the side `s` of a face, counting from `face[s]` to `face[s+1]`
+        let sidepoint = |fi: usize, s: usize, t: usize| -> Index {
+            let (a, b) = (faces[fi][s], faces[fi][(s + 1) % 3]);
+            let (key, m) = edges[faceedges[fi][s]];
+            let start = edgestart[faceedges[fi][s]];
+            if t == 0 {a}
+            else if t == m + 1 {b}
+            else if a == key[0] {(start + t - 1) as Index}
+            else {(start + m - t) as Index}
+        };
+        // point at grid coordinates `(i,j)` of a face cut `k` times, `i` counting toward `face[1]` and `j` toward `face[2]`
+        let gridpoint = |fi: usize, k: usize, i: usize, j: usize| -> Index {
+            let u = k + 1 - i - j;
+            if j == 0 {sidepoint(fi, 0, i)}
+            else if u == 0 {sidepoint(fi, 1, j)}
+            else if i == 0 {sidepoint(fi, 2, u)}
+            else {
+                // interior points are numbered by rows of `i`
+                let (s, i, j) = (k - 2, i - 1, j - 1);
+                (facestart[fi] + i * (s + 1) - i * i.saturating_sub(1) / 2 + j) as Index
+            }
+        };
+
+        let mut newfaces = Vec::with_capacity(nfaces);
+        let mut tracks = Vec::with_capacity(nfaces);
+        for fi in 0 .. faces.len() {
+            let k = cuts(fi);
+            let n = k + 1;
+            if uniform(fi) {
+                for i in 0 .. n {
+                    for j in 0 .. n - i {
+                        newfaces.push(UVec3::from([gridpoint(fi, k, i, j), gridpoint(fi, k, i + 1, j), gridpoint(fi, k, i, j + 1)]));
+                        if i + j + 1 < n {
+                            newfaces.push(UVec3::from([gridpoint(fi, k, i + 1, j), gridpoint(fi, k, i + 1, j + 1), gridpoint(fi, k, i, j + 1)]));
+                        }
+                    }
+                }
+            } else {
+                // regular grid in the middle
+                for i in 1 .. n {
+                    for j in 1 .. n - i {
+                        if i + j + 2 <= n {
+                            newfaces.push(UVec3::from([gridpoint(fi, k, i, j), gridpoint(fi, k, i + 1, j), gridpoint(fi, k, i, j + 1)]));
+                        }
+                        if i + j + 3 <= n {
+                            newfaces.push(UVec3::from([gridpoint(fi, k, i + 1, j), gridpoint(fi, k, i + 1, j + 1), gridpoint(fi, k, i, j + 1)]));
+                        }
+                    }
+                }
+                // loops around the border and around the middle grid, with their position along the sides
+                let mut outer = Vec::new();
+                for s in 0 .. 3 {
+                    let m = edges[faceedges[fi][s]].1;
+                    for t in 0 ..= m {
+                        outer.push((sidepoint(fi, s, t), s as Float + t as Float / (m + 1) as Float));
+                    }
+                }
+                let mut inner = Vec::new();
+                if k >= 3 {
+                    let s = k - 2;
+                    for t in 0 .. s {
+                        inner.push((gridpoint(fi, k, 1 + t, 1), t as Float / s as Float));
+                    }
+                    for t in 0 .. s {
+                        inner.push((gridpoint(fi, k, k - 1 - t, 1 + t), 1. + t as Float / s as Float));
+                    }
+                    for t in 0 .. s {
+                        inner.push((gridpoint(fi, k, 1, k - 1 - t), 2. + t as Float / s as Float));
+                    }
+                } else {
+                    inner.push((facestart[fi] as Index, 0.));
+                }
+                // strip between the loops, advancing on the loop whose next point comes first
+                let (p, q) = (outer.len(), inner.len());
+                let position = |ring: &[(Index, Float)], i: usize| if i < ring.len() {ring[i].1} else {3.};
+                let (mut io, mut ii) = (0, if q == 1 {1} else {0});
+                while io < p || ii < q {
+                    if io < p && (ii >= q || position(outer.as_slice(), io + 1) <= position(inner.as_slice(), ii + 1)) {
+                        newfaces.push(UVec3::from([outer[io].0, outer[(io + 1) % p].0, inner[ii % q].0]));
+                        io += 1;
+                    } else {
+                        newfaces.push(UVec3::from([outer[io % p].0, inner[(ii + 1) % q].0, inner[ii % q].0]));
+                        ii += 1;
+                    }
+                }
+            }
+            tracks.resize(newfaces.len(), self.tracks[fi]);
+        }
+
+        Surface {
+            points: Cow::Owned(points),
+            simplices: Cow::Owned(newfaces),
+            tracks: Cow::Owned(tracks),
+        }
+    }
+
     /// Prepare display buffers: split at group frontiers and sharp edges,
     /// compute vertex normals, and convert to GPU-ready formats.
     pub fn display_buffers(&self, sharp_angle: Float) -> DisplayBuffers {
@@ -319,6 +778,85 @@ impl Surface<'_> {
     }
 }
 
+// Specific implementations for Web
+impl Web<'_> {
+    /// Label of the connected component of each edge, and the number of components
+    ///
+    /// Edges are connected when they share a point, whatever their orientation
+    pub fn components(&self) -> (Vec<Index>, Index) {
+        let mut components = Components::new(self.simplices.len());
+        // first edge reaching each point
+        let mut first = vec![Index::MAX; self.points.len()];
+        for (ei, edge) in self.simplices.iter().enumerate() {
+            for &p in edge.as_array() {
+                let p = p as usize;
+                if first[p] == Index::MAX {
+                    first[p] = ei as Index;
+                } else {
+                    components.union(first[p], ei as Index);
+                }
+            }
+        }
+        components.labels()
+    }
+
+    /// Subdivide every edge, cutting it `divisions[track]` times
+    ///
+    /// Like for `Surface::subdivide`, the original points keep their indices and edges joining the same points share their cut points. Such edges are cut like the one with the most cuts.
+    pub fn subdivide(&self, divisions: &[Index]) -> Web<'static> {
+        let cuts = |ei: usize| divisions.get(self.tracks[ei] as usize).copied().unwrap_or(0) as usize;
+
+        // number the unoriented edges with the most cuts of the edges joining their points
+        let mut index: FxHashMap<[Index; 2], usize> = FxHashMap::default();
+        let mut keys: Vec<([Index; 2], usize)> = Vec::new();
+        let mut edgekeys = Vec::with_capacity(self.simplices.len());
+        for (ei, edge) in self.simplices.iter().enumerate() {
+            let key = edgekey(edge[0], edge[1]);
+            let ki = *index.entry(key).or_insert_with(|| {
+                keys.push((key, 0));
+                keys.len() - 1
+            });
+            keys[ki].1 = keys[ki].1.max(cuts(ei));
+            edgekeys.push(ki);
+        }
+
+        let mut points = Vec::with_capacity(self.points.len() + keys.iter().map(|&(_, m)| m).sum::<usize>());
+        points.extend_from_slice(&self.points);
+        let mut starts = Vec::with_capacity(keys.len());
+        for &([a, b], m) in &keys {
+            starts.push(points.len());
+            let (a, b) = (self.points[a as usize], self.points[b as usize]);
+            for t in 1 ..= m {
+                points.push(a + (b - a) * (t as Float / (m + 1) as Float));
+            }
+        }
+
+        let count = edgekeys.iter().map(|&ki| keys[ki].1 + 1).sum();
+        let mut edges = Vec::with_capacity(count);
+        let mut tracks = Vec::with_capacity(count);
+        for (ei, edge) in self.simplices.iter().enumerate() {
+            let (key, m) = keys[edgekeys[ei]];
+            let start = starts[edgekeys[ei]];
+            let point = |t: usize| -> Index {
+                if t == 0 {edge[0]}
+                else if t == m + 1 {edge[1]}
+                else if edge[0] == key[0] {(start + t - 1) as Index}
+                else {(start + m - t) as Index}
+            };
+            for t in 0 ..= m {
+                edges.push(UVec2::from([point(t), point(t + 1)]));
+            }
+            tracks.resize(edges.len(), self.tracks[ei]);
+        }
+
+        Web {
+            points: Cow::Owned(points),
+            simplices: Cow::Owned(edges),
+            tracks: Cow::Owned(tracks),
+        }
+    }
+}
+
 // Specific implementations for Wire (used by triangulation_outline)
 impl Wire<'_> {
     /// Get the ith point of the wire
@@ -399,6 +937,147 @@ pub fn simplex_revert<T: Copy, const N: usize>(mut simplex: [T; N]) -> [T; N] {
 mod tests {
     use super::*;
 
+    fn pyramid() -> Surface<'static> {
+        // square pyramid without its base
+        let points = vec![
+            Vec3::from([0., 0., 0.]),
+            Vec3::from([1., 0., 0.]),
+            Vec3::from([1., 1., 0.]),
+            Vec3::from([0., 1., 0.]),
+            Vec3::from([0.5, 0.5, 1.]),
+            ];
+        let faces = vec![
+            UVec3::from([0, 1, 4]),
+            UVec3::from([1, 2, 4]),
+            UVec3::from([2, 3, 4]),
+            UVec3::from([3, 0, 4]),
+            ];
+        Surface {
+            points: Cow::Owned(points),
+            simplices: Cow::Owned(faces),
+            tracks: Cow::Owned(vec![0; 4]),
+        }
+    }
+
+    #[test]
+    fn test_components() {
+        // two pyramids sharing no edge, the second one split in two by a flipped face
+        let mut surface = pyramid();
+        let mut faces = surface.simplices.to_vec();
+        faces.extend(surface.simplices.iter().map(|f| *f + UVec3::from([5, 5, 5])));
+        faces[5] = UVec3::from([6, 9, 7]);
+        surface.points.to_mut().extend(pyramid().points.iter().map(|p| *p + Vec3::from([2., 0., 0.])));
+        surface.simplices = Cow::Owned(faces);
+        let (labels, count) = surface.components();
+        assert_eq!(count, 3);
+        assert_eq!(labels, vec![0, 0, 0, 0, 1, 2, 1, 1]);
+
+        let web = Web {
+            points: Cow::Owned(vec![Vec3::zero(); 6]),
+            simplices: Cow::Owned(vec![
+                UVec2::from([0, 1]), UVec2::from([4, 5]), UVec2::from([2, 1]), UVec2::from([3, 2]), UVec2::from([5, 3]),
+                UVec2::from([4, 5]),
+                ]),
+            tracks: Cow::Owned(vec![0; 6]),
+        };
+        assert_eq!(web.components(), (vec![0; 6], 1));
+        let web = Web {simplices: Cow::Owned(web.simplices[.. 3].to_vec()), .. web};
+        assert_eq!(web.components(), (vec![0, 1, 0], 2));
+    }
+
+    #[test]
+    fn test_subdivide() {
+        let surface = pyramid();
+        for k in 0 .. 4 {
+            let sub = surface.subdivide(&[k]);
+            let k = k as usize;
+            // each of the 8 edges brings k points, each face k(k-1)/2 inner points
+            assert_eq!(sub.points.len(), 5 + 8 * k + 4 * k * k.saturating_sub(1) / 2);
+            assert_eq!(sub.simplices.len(), 4 * (k + 1) * (k + 1));
+            assert_eq!(&sub.points[.. 5], &surface.points[..]);
+            assert!((sub.area() - surface.area()).abs() < 1e-12);
+            // every inner edge is shared by exactly two faces
+            assert_eq!(sub.outlines_oriented().len(), 4 * (k + 1));
+        }
+        // faces with different counts stay connected
+        let mut surface = pyramid();
+        surface.tracks = Cow::Owned(vec![0, 1, 0, 1]);
+        for divisions in [[0, 1], [2, 0], [1, 4]] {
+            let sub = surface.subdivide(&divisions);
+            assert!((sub.area() - surface.area()).abs() < 1e-12);
+            // the base edges are cut like their own face
+            let border = 4 + 2 * (divisions[0] + divisions[1]) as usize;
+            assert_eq!(sub.outlines_oriented().len(), border);
+            assert_eq!(sub.components().1, 1);
+        }
+
+        let web = Web {
+            points: Cow::Owned(vec![Vec3::zero(), Vec3::from([1., 0., 0.]), Vec3::from([1., 1., 0.])]),
+            simplices: Cow::Owned(vec![UVec2::from([0, 1]), UVec2::from([1, 2]), UVec2::from([1, 0])]),
+            tracks: Cow::Owned(vec![0, 1, 1]),
+        };
+        let sub = web.subdivide(&[1, 2]);
+        assert_eq!(sub.points.len(), 3 + 2 + 2);
+        assert_eq!(sub.simplices.len(), 3 + 3 + 3);
+        assert_eq!(sub.tracks[..], [0, 0, 0, 1, 1, 1, 1, 1, 1]);
+        assert_eq!(sub.simplices[6 ..], [UVec2::from([1, 4]), UVec2::from([4, 3]), UVec2::from([3, 0])]);
+    }
+
+    #[test]
+    fn test_surface_measures() {
+        let mut surface = pyramid();
+        let side = (1.25 as Float).sqrt() * 0.5;
+        assert!((surface.area() - 4. * side).abs() < 1e-12);
+        let barycenter = surface.area_barycenter().unwrap();
+        assert!((barycenter - Vec3::from([0.5, 0.5, 1./3.])).length() < 1e-12);
+        // closing the pyramid gives its volume
+        surface.simplices.to_mut().extend([UVec3::from([0, 2, 1]), UVec3::from([0, 3, 2])]);
+        assert!((surface.volume() - 1./3.).abs() < 1e-12);
+        assert_eq!(surface.facenormals().len(), 6);
+        // degenerated faces have no area but still a barycenter
+        surface.points.to_mut()[4] = Vec3::from([0.5, 0., 0.]);
+        surface.simplices.to_mut().truncate(1);
+        assert!((surface.area_barycenter().unwrap() - Vec3::from([0.5, 0., 0.])).length() < 1e-12);
+        assert_eq!(surface.volume(), 0.);
+    }
+
+    #[test]
+    fn test_edgenormals() {
+        let surface = pyramid();
+        let (edges, normals) = surface.edgenormals();
+        assert_eq!(edges.len(), 8);
+        let i = edges.iter().position(|&e| e == [0, 1]).unwrap();
+        assert!((normals[i] - surface.facenormal(0)).length() < 1e-12);
+        let i = edges.iter().position(|&e| e == [0, 4]).unwrap();
+        assert!(normals[i][2] > 0. && normals[i][0] < 0. && normals[i][1] < 0.);
+    }
+
+    #[test]
+    fn test_tangents() {
+        let tangents = pyramid().tangents().unwrap();
+        assert_eq!(tangents.iter().map(|&(p, _)| p).collect::<Vec<_>>(), vec![0, 1, 2, 3]);
+        for (p, tangent) in tangents {
+            // outline points are on the base, tangents go down and outward
+            let outward = pyramid().points[p as usize] - Vec3::from([0.5, 0.5, 0.]);
+            assert!(tangent[2] < 0. && tangent.dot(outward) > 0.);
+        }
+    }
+
+    #[test]
+    fn test_topology() {
+        let surface = pyramid();
+        let topology = surface.topology();
+        assert_eq!(topology.edges.len(), 8);
+        // face 0 is (0,1,4), its side 1 is (0,1) which is on the outline
+        assert_eq!(topology.neighbours[0], [3, Index::MAX, 1]);
+        assert_eq!(topology.edges[topology.faceedges[0][1] as usize], [0, 1]);
+        assert_eq!(topology.edgefaces.row(topology.faceedges[0][0] as usize), &[0, 3]);
+        assert_eq!(topology.pointfaces.row(4), &[0, 1, 2, 3]);
+        assert_eq!(topology.pointfaces.row(0), &[0, 3]);
+        assert_eq!(topology.pointpoints.row(0), &[4, 1, 3]);
+        assert_eq!(topology.pointpoints.row(4), &[0, 1, 2, 3]);
+    }
+
     #[test]
     fn test_simplex_phase_face() {
         assert_eq!(simplex_phase([0, 1, 2], 0), [0, 1, 2]);
@@ -238,10 +238,58 @@ pub fn rasterize_triangle(space: &[Vec3; 3], cell: Float) -> Result<Vec<IVec3>,
 }
 
 
+/// Rasterize all the segments of a web in one pass.
+///
+/// Returns the keys of every segment concatenated, and for each key the index of the segment it belongs to.
+pub fn rasterize_segments(points: &[Vec3], edges: impl IntoIterator<Item=[Index; 2]>, cell: Float) -> Result<(Vec<IVec3>, Vec<Index>), &'static str> {
+    let mut keys = Vec::new();
+    let mut owners = Vec::new();
+    for (i, edge) in edges.into_iter().enumerate() {
+        let cells = rasterize_segment(&edge.map(|p| points[p as usize]), cell)?;
+        owners.resize(owners.len() + cells.len(), i as Index);
+        keys.extend(cells);
+    }
+    Ok((keys, owners))
+}
+
+/// Rasterize all the triangles of a mesh in one pass.
+///
+/// Returns the keys of every triangle concatenated, and for each key the index of the triangle it belongs to.
+pub fn rasterize_triangles(points: &[Vec3], faces: impl IntoIterator<Item=[Index; 3]>, cell: Float) -> Result<(Vec<IVec3>, Vec<Index>), &'static str> {
+    let mut keys = Vec::new();
+    let mut owners = Vec::new();
+    for (i, face) in faces.into_iter().enumerate() {
+        let cells = rasterize_triangle(&face.map(|p| points[p as usize]), cell)?;
+        owners.resize(owners.len() + cells.len(), i as Index);
+        keys.extend(cells);
+    }
+    Ok((keys, owners))
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
 
+    #[test]
+    fn test_rasterize_triangles_owners() {
+        let points = [
+            Vec3::from([0.1, 0.1, 0.1]),
+            Vec3::from([2.9, 0.1, 0.1]),
+            Vec3::from([0.1, 2.9, 0.1]),
+            Vec3::from([0.1, 0.1, 2.9]),
+            ];
+        let faces = [[0, 1, 2], [0, 1, 3]];
+        let (keys, owners) = rasterize_triangles(&points, faces, 1.0).unwrap();
+        assert_eq!(keys.len(), owners.len());
+        let mut start = 0;
+        for (i, face) in faces.iter().enumerate() {
+            let expected = rasterize_triangle(&face.map(|p| points[p as usize]), 1.0).unwrap();
+            assert!(owners[start .. start + expected.len()].iter().all(|&o| o == i as Index));
+            assert_eq!(keys[start .. start + expected.len()], expected[..]);
+            start += expected.len();
+        }
+    }
+
     #[test]
     fn test_snap_down() {
         assert_eq!(snap_down(5.3, 1.0), 5.0);
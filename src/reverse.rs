@@ -0,0 +1,928 @@
+/*!
+    Reverse engineering of meshes, mirroring madcad.reverse
+
+    These algorithms are meant to clean up meshes coming from other softwares, like STL imports
+*/
+
+use crate::math::*;
+use crate::mesh::*;
+use crate::hashing::edgekey;
+use crate::bvh::{Bvh, closest_triangle, closest_segment};
+
+use std::borrow::Cow;
+use std::cmp::Ordering;
+use std::collections::BinaryHeap;
+use std::collections::hash_map::Entry;
+use rustc_hash::{FxHashMap, FxHashSet};
+
+/// minimum cosine between the normals of a face before and after a collapse
+const FLIP_COSINE: Float = 0.2;
+
+/// Symmetric 4x4 matrix summing the squared distances to a set of planes
+///
+/// Coefficients are the upper triangle, row by row
+#[derive(Copy, Clone, Debug, Default)]
+struct Quadric([Float; 10]);
+
+impl Quadric {
+    /// squared distance to the plane passing by `origin` with the unit `normal`
+    fn plane(origin: Vec3, normal: Vec3) -> Self {
+        let [a, b, c] = *normal.as_array();
+        let d = -normal.dot(origin);
+        Quadric([a*a, a*b, a*c, a*d, b*b, b*c, b*d, c*c, c*d, d*d])
+    }
+
+    fn add(&self, other: &Self) -> Self {
+        let mut sum = self.0;
+        for (s, o) in sum.iter_mut().zip(other.0) {
+            *s += o;
+        }
+        Quadric(sum)
+    }
+
+    /// sum of the squared distances from the point to the planes
+    fn error(&self, p: Vec3) -> Float {
+        let q = &self.0;
+        let [x, y, z] = *p.as_array();
+        q[0]*x*x + q[4]*y*y + q[7]*z*z + q[9]
+        + 2.*(q[1]*x*y + q[2]*x*z + q[5]*y*z + q[3]*x + q[6]*y + q[8]*z)
+    }
+
+    /// point with the least error, or None if the planes don't constrain a single point
+    fn minimum(&self) -> Option<Vec3> {
+        let q = &self.0;
+        let det = |c0: [Float; 3], c1: [Float; 3], c2: [Float; 3]|
+            c0[0]*(c1[1]*c2[2] - c2[1]*c1[2])
+            - c1[0]*(c0[1]*c2[2] - c2[1]*c0[2])
+            + c2[0]*(c0[1]*c1[2] - c1[1]*c0[2]);
+        let (c0, c1, c2) = ([q[0], q[1], q[2]], [q[1], q[4], q[5]], [q[2], q[5], q[7]]);
+        let rhs = [-q[3], -q[6], -q[8]];
+        let d = det(c0, c1, c2);
+        let scale = q[0] + q[4] + q[7];
+        if d.abs() <= 1e-9 * scale*scale*scale || !d.is_normal() {
+            return None;
+        }
+        Some(Vec3::from([det(rhs, c1, c2) / d, det(c0, rhs, c2) / d, det(c0, c1, rhs) / d]))
+    }
+}
+
+/// possible collapse of the edge `a,b`, valid as long as the stamps of its points didn't change
+struct Collapse {
+    cost: Float,
+    position: Vec3,
+    a: Index,
+    b: Index,
+    stamps: [u32; 2],
+}
+impl PartialEq for Collapse {
+    fn eq(&self, other: &Self) -> bool { self.cost == other.cost }
+}
+impl Eq for Collapse {}
+impl PartialOrd for Collapse {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> { Some(self.cmp(other)) }
+}
+impl Ord for Collapse {
+    // reversed, so that the heap pops the cheapest collapse first
+    fn cmp(&self, other: &Self) -> Ordering { other.cost.total_cmp(&self.cost) }
+}
+
+/// Candidate edge flip, ordered by the gain in smallest angle of its faces
+struct Flip {
+    gain: Float,
+    a: Index,
+    b: Index,
+}
+impl PartialEq for Flip {
+    fn eq(&self, other: &Self) -> bool { self.gain == other.gain }
+}
+impl Eq for Flip {}
+impl PartialOrd for Flip {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> { Some(self.cmp(other)) }
+}
+impl Ord for Flip {
+    fn cmp(&self, other: &Self) -> Ordering { self.gain.total_cmp(&other.gain) }
+}
+
+/// smallest angle of a triangle
+fn smallest_angle(triangle: [Vec3; 3]) -> Float {
+    (0 .. 3).map(|i| anglebt(triangle[(i + 1) % 3] - triangle[i], triangle[(i + 2) % 3] - triangle[i]))
+        .fold(Float::INFINITY, Float::min)
+}
+
+/// Surface under edition: the faces around each point are kept up to date along the collapses, splits and flips
+struct Editing {
+    points: Vec<Vec3>,
+    faces: Vec<[Index; 3]>,
+    tracks: Vec<Index>,
+    alive: Vec<bool>,
+    pointfaces: Vec<Vec<usize>>,
+    quadrics: Vec<Quadric>,
+    /// edges to keep: outlines, group frontiers and sharp edges, with the feature line they belong to
+    features: FxHashMap<[Index; 2], Index>,
+    /// number of feature edges around each point
+    valences: Vec<u32>,
+    /// points where a feature line turns sharply
+    corners: Vec<bool>,
+    stamps: Vec<u32>,
+}
+
+impl Editing {
+    fn new(surface: &Surface, sharp: Float) -> Self {
+        let points = surface.points.to_vec();
+        let faces: Vec<[Index; 3]> = surface.simplices.iter().map(|f| *f.as_array()).collect();
+        let mut pointfaces = vec![Vec::new(); points.len()];
+        let mut edgefaces: FxHashMap<[Index; 2], Vec<usize>> = FxHashMap::default();
+        for (fi, face) in faces.iter().enumerate() {
+            for s in 0 .. 3 {
+                pointfaces[face[s] as usize].push(fi);
+                edgefaces.entry(edgekey(face[s], face[(s + 1) % 3])).or_default().push(fi);
+            }
+        }
+        let normals: Vec<Option<Vec3>> = (0 .. faces.len()).map(|fi| {
+            let [a, b, c] = faces[fi].map(|i| points[i as usize]);
+            let normal = (b - a).cross(c - a);
+            let length = normal.length();
+            (length > 0.).then(|| normal * (1. / length))
+        }).collect();
+
+        let mut quadrics = vec![Quadric::default(); points.len()];
+        for (fi, face) in faces.iter().enumerate() {
+            if let Some(normal) = normals[fi] {
+                let plane = Quadric::plane(points[face[0] as usize], normal);
+                for &p in face {
+                    quadrics[p as usize] = quadrics[p as usize].add(&plane);
+                }
+            }
+        }
+        // feature edges are kept by planes orthogonal to their faces, so their points can only slide along them
+        let mut features = FxHashMap::default();
+        let mut valences = vec![0; points.len()];
+        for (&[a, b], adjacent) in &edgefaces {
+            let feature = match adjacent[..] {
+                [f1, f2] => surface.tracks[f1] != surface.tracks[f2]
+                    || match (normals[f1], normals[f2]) {
+                        (Some(n1), Some(n2)) => anglebt(n1, n2) > sharp,
+                        _ => false,
+                        },
+                _ => true,
+            };
+            if !feature { continue }
+            features.insert([a, b], 0);
+            valences[a as usize] += 1;
+            valences[b as usize] += 1;
+            let (pa, pb) = (points[a as usize], points[b as usize]);
+            for &fi in adjacent {
+                if let Some(normal) = normals[fi] {
+                    let side = (pb - pa).cross(normal);
+                    let length = side.length();
+                    if length > 0. {
+                        let plane = Quadric::plane(pa, side * (1. / length));
+                        quadrics[a as usize] = quadrics[a as usize].add(&plane);
+                        quadrics[b as usize] = quadrics[b as usize].add(&plane);
+                    }
+                }
+            }
+        }
+        // feature lines turning sharply are cut at the turn
+        let mut ends = vec![Vec::new(); points.len()];
+        for &[a, b] in features.keys() {
+            ends[a as usize].push(b);
+            ends[b as usize].push(a);
+        }
+        let corners: Vec<bool> = ends.iter().enumerate().map(|(p, ends)| match ends[..] {
+            [x, y] => anglebt(points[p] - points[x as usize], points[y as usize] - points[p]) > sharp,
+            _ => false,
+            }).collect();
+        // feature edges are numbered by line, lines stopping where they meet, end or turn
+        let mut lines: FxHashMap<[Index; 2], Index> = FxHashMap::default();
+        let mut count = 0;
+        for &start in features.keys() {
+            if lines.contains_key(&start) { continue }
+            let line = count;
+            count += 1;
+            lines.insert(start, line);
+            let mut front = vec![start];
+            while let Some(edge) = front.pop() {
+                for p in edge {
+                    if ends[p as usize].len() != 2 || corners[p as usize] { continue }
+                    for &q in &ends[p as usize] {
+                        let next = edgekey(p, q);
+                        if let Entry::Vacant(entry) = lines.entry(next) {
+                            entry.insert(line);
+                            front.push(next);
+                        }
+                    }
+                }
+            }
+        }
+        let features = lines;
+        Editing {
+            tracks: surface.tracks.to_vec(),
+            corners,
+            alive: vec![true; faces.len()],
+            stamps: vec![0; points.len()],
+            points, faces, pointfaces, quadrics, features, valences,
+        }
+    }
+
+    /// points connected to the given point by an edge
+    fn neighbors(&self, p: Index) -> Vec<Index> {
+        let mut neighbors = Vec::new();
+        for &fi in &self.pointfaces[p as usize] {
+            for q in self.faces[fi] {
+                if q != p && !neighbors.contains(&q) {
+                    neighbors.push(q);
+                }
+            }
+        }
+        neighbors
+    }
+
+    /// 0 for a free point, 1 for a point on a feature line, 2 for a point where feature lines meet, end or turn
+    fn kind(&self, p: Index) -> u32 {
+        match self.valences[p as usize] {
+            0 => 0,
+            2 if !self.corners[p as usize] => 1,
+            _ => 2,
+        }
+    }
+
+    /// where the features allow to collapse the edge `a,b`: on `a` (`Greater`), on `b` (`Less`) or anywhere between them (`Equal`)
+    ///
+    /// Points on a feature line can only move along it and points where feature lines meet, end or turn don't move
+    fn direction(&self, a: Index, b: Index) -> Option<Ordering> {
+        let (ka, kb) = (self.kind(a), self.kind(b));
+        let feature = self.features.contains_key(&edgekey(a, b));
+        if (ka > 0 && kb > 0 && !feature) || (ka == 2 && kb == 2) {
+            return None;
+        }
+        Some(ka.cmp(&kb))
+    }
+
+    /// cheapest collapse of the edge `a,b` if the features allow it
+    fn collapse(&self, a: Index, b: Index) -> Option<Collapse> {
+        let (pa, pb) = (self.points[a as usize], self.points[b as usize]);
+        let quadric = self.quadrics[a as usize].add(&self.quadrics[b as usize]);
+        let mut candidates = Vec::with_capacity(4);
+        match self.direction(a, b)? {
+            Ordering::Greater => candidates.push(pa),
+            Ordering::Less => candidates.push(pb),
+            Ordering::Equal => {
+                candidates.extend(quadric.minimum());
+                candidates.extend([pa, pb, (pa + pb) * 0.5]);
+            }
+        }
+        let (cost, position) = candidates.into_iter()
+            .map(|p| (quadric.error(p).max(0.), p))
+            .min_by(|x, y| x.0.total_cmp(&y.0))?;
+        Some(Collapse {
+            cost, position, a, b,
+            stamps: [self.stamps[a as usize], self.stamps[b as usize]],
+        })
+    }
+
+    /// check that collapsing the edge keeps a manifold surface and doesn't flip faces
+    fn valid(&self, c: &Collapse) -> bool {
+        let (a, b) = (c.a, c.b);
+        let shared: Vec<usize> = self.pointfaces[a as usize].iter().copied()
+            .filter(|&fi| self.faces[fi].contains(&b))
+            .collect();
+        if shared.is_empty() {
+            return false;
+        }
+        // link condition: the only common neighbors are the opposite points of the collapsed faces
+        let na = self.neighbors(a);
+        let nb = self.neighbors(b);
+        let common = na.iter().filter(|p| nb.contains(p)).count();
+        if common != shared.len() || na.len() + nb.len() - common - 2 <= shared.len() {
+            return false;
+        }
+        for (p, other) in [(a, b), (b, a)] {
+            for &fi in &self.pointfaces[p as usize] {
+                let face = self.faces[fi];
+                if face.contains(&other) { continue }
+                let before = face.map(|i| self.points[i as usize]);
+                let after = face.map(|i| if i == p {c.position} else {self.points[i as usize]});
+                let n0 = (before[1] - before[0]).cross(before[2] - before[0]);
+                let n1 = (after[1] - after[0]).cross(after[2] - after[0]);
+                if n0.square_length() == 0. { continue }
+                if n1.dot(n0) <= FLIP_COSINE * n0.length() * n1.length() {
+                    return false;
+                }
+            }
+        }
+        true
+    }
+
+    /// merge `b` into `a`, return the number of faces removed and the points whose feature valence changed
+    fn apply(&mut self, c: &Collapse) -> (usize, Vec<Index>) {
+        let (a, b) = (c.a, c.b);
+        let mut changed = Vec::new();
+        // feature edges of b are moved to a, merging with the ones a already has
+        for q in self.neighbors(b) {
+            let Some(line) = self.features.remove(&edgekey(b, q)) else { continue };
+            if q == a {
+                self.valences[a as usize] -= 1;
+            } else if let Entry::Vacant(entry) = self.features.entry(edgekey(a, q)) {
+                entry.insert(line);
+                self.valences[a as usize] += 1;
+            } else {
+                self.valences[q as usize] -= 1;
+                changed.push(q);
+            }
+        }
+        self.valences[b as usize] = 0;
+        self.corners[a as usize] |= self.corners[b as usize];
+
+        let mut removed = 0;
+        for fi in std::mem::take(&mut self.pointfaces[b as usize]) {
+            if self.faces[fi].contains(&a) {
+                self.alive[fi] = false;
+                removed += 1;
+                for p in self.faces[fi] {
+                    if p != b {
+                        self.pointfaces[p as usize].retain(|&f| f != fi);
+                    }
+                }
+            } else {
+                for p in self.faces[fi].iter_mut() {
+                    if *p == b { *p = a; }
+                }
+                self.pointfaces[a as usize].push(fi);
+            }
+        }
+        self.points[a as usize] = c.position;
+        self.quadrics[a as usize] = self.quadrics[a as usize].add(&self.quadrics[b as usize]);
+        self.stamps[a as usize] += 1;
+        self.stamps[b as usize] += 1;
+        for &q in &changed {
+            self.stamps[q as usize] += 1;
+        }
+        changed.push(a);
+        (removed, changed)
+    }
+
+    /// edges of the living faces
+    fn edges(&self) -> Vec<[Index; 2]> {
+        let mut edges: Vec<[Index; 2]> = self.faces.iter().zip(&self.alive)
+            .filter(|&(_, &alive)| alive)
+            .flat_map(|(f, _)| [edgekey(f[0], f[1]), edgekey(f[1], f[2]), edgekey(f[2], f[0])])
+            .collect();
+        edges.sort_unstable();
+        edges.dedup();
+        edges
+    }
+
+    /// faces sharing the edge `a,b`
+    fn edgefaces(&self, a: Index, b: Index) -> Vec<usize> {
+        self.pointfaces[a as usize].iter().copied()
+            .filter(|&fi| self.faces[fi].contains(&b))
+            .collect()
+    }
+
+    /// cut the edge `a,b` at its middle, return the new point
+    fn split(&mut self, a: Index, b: Index) -> Index {
+        let m = self.points.len() as Index;
+        self.points.push((self.points[a as usize] + self.points[b as usize]) * 0.5);
+        self.quadrics.push(self.quadrics[a as usize].add(&self.quadrics[b as usize]));
+        self.pointfaces.push(Vec::new());
+        self.stamps.push(0);
+        self.valences.push(0);
+        self.corners.push(false);
+        if let Some(line) = self.features.remove(&edgekey(a, b)) {
+            self.features.insert(edgekey(a, m), line);
+            self.features.insert(edgekey(m, b), line);
+            self.valences[m as usize] = 2;
+        }
+        for fi in self.edgefaces(a, b) {
+            let face = self.faces[fi];
+            let s = (0 .. 3).find(|&s| edgekey(face[s], face[(s + 1) % 3]) == edgekey(a, b)).unwrap();
+            let (p, q, c) = (face[s], face[(s + 1) % 3], face[(s + 2) % 3]);
+            // the face keeps the first half of the edge, a new face takes the second
+            let new = self.faces.len();
+            self.faces[fi] = [p, m, c];
+            self.faces.push([m, q, c]);
+            self.tracks.push(self.tracks[fi]);
+            self.alive.push(true);
+            self.pointfaces[q as usize].retain(|&f| f != fi);
+            self.pointfaces[q as usize].push(new);
+            self.pointfaces[c as usize].push(new);
+            self.pointfaces[m as usize].extend([fi, new]);
+        }
+        m
+    }
+
+    /// the quad around the edge `a,b` if its diagonal can be switched: its faces `f1 = (p, q, c)` and `f2 = (q, p, d)` and its points `[p, q, c, d]`
+    fn quad(&self, a: Index, b: Index) -> Option<(usize, usize, [Index; 4])> {
+        if self.features.contains_key(&edgekey(a, b)) {
+            return None;
+        }
+        let [f1, f2] = self.edgefaces(a, b)[..] else { return None };
+        // orient the edge like the first face
+        let face = self.faces[f1];
+        let s = face.iter().position(|&x| x == a).unwrap();
+        let (p, q) = if face[(s + 1) % 3] == b {(a, b)} else {(b, a)};
+        let c = face.into_iter().find(|&x| x != a && x != b).unwrap();
+        let d = self.faces[f2].into_iter().find(|&x| x != a && x != b).unwrap();
+        if c == d || self.neighbors(c).contains(&d) {
+            return None;
+        }
+        Some((f1, f2, [p, q, c, d]))
+    }
+
+    /// faces replacing a quad once its diagonal is switched, if they keep the orientation of the quad
+    fn turned(&self, f1: usize, f2: usize, [p, q, c, d]: [Index; 4]) -> Option<[[Index; 3]; 2]> {
+        let reference = self.normal(self.faces[f1]) + self.normal(self.faces[f2]);
+        let turned = [[c, p, d], [d, q, c]];
+        for new in turned {
+            let n = self.normal(new);
+            if n.dot(reference) <= FLIP_COSINE * n.length() * reference.length() {
+                return None;
+            }
+        }
+        Some(turned)
+    }
+
+    /// replace the faces of a quad by the faces with its other diagonal
+    fn turn(&mut self, f1: usize, f2: usize, [p, q, c, d]: [Index; 4], [n1, n2]: [[Index; 3]; 2]) {
+        self.faces[f1] = n1;
+        self.faces[f2] = n2;
+        self.pointfaces[p as usize].retain(|&f| f != f2);
+        self.pointfaces[q as usize].retain(|&f| f != f1);
+        self.pointfaces[c as usize].push(f2);
+        self.pointfaces[d as usize].push(f1);
+    }
+
+    /// non normalized normal of a face
+    fn normal(&self, face: [Index; 3]) -> Vec3 {
+        let [x, y, z] = face.map(|i| self.points[i as usize]);
+        (y - x).cross(z - x)
+    }
+
+    /// flip the edge `a,b` between its two faces if it brings the number of edges around their points closer to the regular one, return whether it was flipped
+    fn flip(&mut self, a: Index, b: Index) -> bool {
+        let Some((f1, f2, quad)) = self.quad(a, b) else { return false };
+        let [p, q, c, d] = quad;
+        let deviation = |x: Index, change: i64| {
+            let regular = if self.kind(x) > 0 {4} else {6};
+            (self.neighbors(x).len() as i64 + change - regular).abs()
+        };
+        let before = deviation(p, 0) + deviation(q, 0) + deviation(c, 0) + deviation(d, 0);
+        let after = deviation(p, -1) + deviation(q, -1) + deviation(c, 1) + deviation(d, 1);
+        if after >= before {
+            return false;
+        }
+        let Some(turned) = self.turned(f1, f2, quad) else { return false };
+        self.turn(f1, f2, quad, turned);
+        true
+    }
+
+    /// flip increasing the smallest angle of the faces around the edge `a,b`, if there is one keeping the features
+    fn improvement(&self, a: Index, b: Index, sharp: Float) -> Option<Flip> {
+        let (f1, f2, quad) = self.quad(a, b)?;
+        let turned = self.turned(f1, f2, quad)?;
+        // the new diagonal must not be a sharp edge
+        if anglebt(self.normal(turned[0]), self.normal(turned[1])) > sharp {
+            return None;
+        }
+        let smallest = |faces: [[Index; 3]; 2]| faces.into_iter()
+            .map(|face| smallest_angle(face.map(|i| self.points[i as usize])))
+            .fold(Float::INFINITY, Float::min);
+        let gain = smallest(turned) - smallest([self.faces[f1], self.faces[f2]]);
+        (gain > 0.).then_some(Flip {gain, a, b})
+    }
+
+    /// the edited surface, keeping only the used points in their order
+    fn result(self) -> Surface<'static> {
+        let mut used = vec![false; self.points.len()];
+        for (fi, face) in self.faces.iter().enumerate() {
+            if self.alive[fi] {
+                for &p in face {
+                    used[p as usize] = true;
+                }
+            }
+        }
+        let mut reindex = vec![Index::MAX; self.points.len()];
+        let mut points = Vec::new();
+        for p in 0 .. used.len() {
+            if used[p] {
+                reindex[p] = points.len() as Index;
+                points.push(self.points[p]);
+            }
+        }
+        let mut simplices = Vec::new();
+        let mut tracks = Vec::new();
+        for (fi, face) in self.faces.iter().enumerate() {
+            if !self.alive[fi] { continue }
+            simplices.push(UVec3::from(face.map(|p| reindex[p as usize])));
+            tracks.push(self.tracks[fi]);
+        }
+        Surface {
+            points: Cow::Owned(points),
+            simplices: Cow::Owned(simplices),
+            tracks: Cow::Owned(tracks),
+        }
+    }
+}
+
+/// Switch the diagonals of quads to improve the triangles of a surface, typically the thin triangles left by booleans and extrusions
+///
+/// Edges are flipped when it increases the smallest angle of their two faces, the largest increases first. Outlines, frontiers between groups and edges with an angle above `sharp` are never flipped, nor flipped into.
+/// Each flip increases the sorted list of the smallest angles of all faces, so the flips end even where quads are not planar.
+///
+/// Returns the faces in their original order, so they keep their tracks
+pub fn retriangulate(surface: &Surface, sharp: Float) -> Vec<UVec3> {
+    let mut state = Editing::new(surface, sharp);
+    let mut heap: BinaryHeap<Flip> = state.edges().into_iter()
+        .filter_map(|[a, b]| state.improvement(a, b, sharp))
+        .collect();
+    while let Some(flip) = heap.pop() {
+        // candidates are pushed again when their quad changes, so outdated ones are skipped
+        match state.improvement(flip.a, flip.b, sharp) {
+            Some(current) if current.gain == flip.gain => {},
+            _ => continue,
+        }
+        let Some((f1, f2, quad)) = state.quad(flip.a, flip.b) else { continue };
+        let Some(turned) = state.turned(f1, f2, quad) else { continue };
+        state.turn(f1, f2, quad, turned);
+        let [p, q, c, d] = quad;
+        for [x, y] in [[p, c], [c, q], [q, d], [d, p]] {
+            heap.extend(state.improvement(x, y, sharp));
+        }
+    }
+    state.faces.into_iter().map(UVec3::from).collect()
+}
+
+/// Group faces into regions of similar curvature, growing each region from the least curved face not yet grouped
+///
+/// `neighbors` are the pairs of faces a region can grow across, typically the ones sharing a smooth edge. A face joins a region when its curvature differs from the average curvature of the region by less than `tolerance` times this average (plus `prec`).
+/// When the first face of a region is flat, its average starts from its most similar neighbor, because faces on the border of a curved surface often appear flat.
+///
+/// Returns the region of each face and the average curvature of each region
+pub fn grow_regions(curvatures: &[Float], neighbors: &[[Index; 2]], tolerance: Float, prec: Float) -> (Vec<Index>, Vec<Float>) {
+    let pairs: Vec<(Index, Index)> = neighbors.iter().flat_map(|&[a, b]| [(a, b), (b, a)]).collect();
+    let adjacency = Csr::from_pairs(curvatures.len(), &pairs);
+    let mut order: Vec<usize> = (0 .. curvatures.len()).collect();
+    order.sort_by(|&a, &b| curvatures[a].abs().total_cmp(&curvatures[b].abs()));
+
+    let mut tracks = vec![Index::MAX; curvatures.len()];
+    let mut estimates = Vec::new();
+    // last region that tried each face, so a region tries a face only once
+    let mut reached = vec![Index::MAX; curvatures.len()];
+    let mut front = Vec::new();
+    for seed in order {
+        if tracks[seed] != Index::MAX { continue }
+        let region = estimates.len() as Index;
+        tracks[seed] = region;
+        reached[seed] = region;
+        let mut estimate = curvatures[seed];
+        let mut samples = 1.;
+        if estimate.abs() < prec {
+            let similarity = |j: Index| (curvatures[j as usize] - curvatures[seed]).abs();
+            if let Some(j) = adjacency.row(seed).iter().copied()
+                    .filter(|&j| tracks[j as usize] == Index::MAX)
+                    .min_by(|&i, &j| similarity(i).total_cmp(&similarity(j))) {
+                estimate = curvatures[j as usize];
+            }
+        }
+        front.clear();
+        front.extend_from_slice(adjacency.row(seed));
+        while let Some(j) = front.pop() {
+            let j = j as usize;
+            if tracks[j] != Index::MAX || reached[j] == region { continue }
+            reached[j] = region;
+            if (curvatures[j] - estimate).abs() / (estimate.abs() + prec) > tolerance { continue }
+            tracks[j] = region;
+            estimate = (estimate * samples + curvatures[j]) / (samples + 1.);
+            samples += 1.;
+            front.extend_from_slice(adjacency.row(j));
+        }
+        estimates.push(estimate);
+    }
+    (tracks, estimates)
+}
+
+/// Decimate a surface by collapsing its edges in order of increasing quadric error
+///
+/// The error of a point is the sum of its squared distances to the planes of the original faces around it. Collapses go on until the surface has no more than `target` faces, or until the cheapest collapse has an error above `error`.
+/// Outlines, frontiers between groups and edges with an angle above `sharp` are kept: their points only slide along them, and points where they meet, end or turn sharply don't move.
+/// Collapses that would flip a face or make the surface non-manifold are skipped.
+///
+/// The remaining points keep their order, unused points are removed.
+pub fn simplify(surface: &Surface, target: usize, error: Float, sharp: Float) -> Surface<'static> {
+    let mut state = Editing::new(surface, sharp);
+    let mut heap = BinaryHeap::new();
+    let edges: FxHashSet<[Index; 2]> = state.faces.iter()
+        .flat_map(|f| [edgekey(f[0], f[1]), edgekey(f[1], f[2]), edgekey(f[2], f[0])])
+        .collect();
+    for &[a, b] in &edges {
+        heap.extend(state.collapse(a, b));
+    }
+    let mut remaining = state.faces.len();
+    while remaining > target {
+        let Some(collapse) = heap.pop() else { break };
+        if collapse.stamps != [state.stamps[collapse.a as usize], state.stamps[collapse.b as usize]] {
+            continue;
+        }
+        if collapse.cost > error * error {
+            break;
+        }
+        if !state.valid(&collapse) {
+            continue;
+        }
+        let (removed, changed) = state.apply(&collapse);
+        remaining -= removed;
+        for p in changed {
+            for q in state.neighbors(p) {
+                heap.extend(state.collapse(p, q));
+            }
+        }
+    }
+    state.result()
+}
+
+/// Original surface that remeshed points are brought back onto
+struct Reference<'a> {
+    surface: &'a Surface<'a>,
+    faces: Vec<[Index; 3]>,
+    facetree: Bvh,
+    edges: Vec<[Index; 2]>,
+    lines: Vec<Index>,
+    edgetree: Bvh,
+}
+
+impl<'a> Reference<'a> {
+    fn new(surface: &'a Surface<'a>, features: &FxHashMap<[Index; 2], Index>) -> Self {
+        let faces: Vec<[Index; 3]> = surface.simplices.iter().map(|f| *f.as_array()).collect();
+        let (edges, lines): (Vec<[Index; 2]>, Vec<Index>) = features.iter().map(|(&edge, &line)| (edge, line)).unzip();
+        Reference {
+            facetree: Bvh::from_simplices(&surface.points, &faces),
+            edgetree: Bvh::from_simplices(&surface.points, &edges),
+            surface, faces, edges, lines,
+        }
+    }
+
+    /// closest point on the original faces of the given group
+    fn face(&self, point: Vec3, track: Index) -> Option<Vec3> {
+        let triangle = |fi: Index| self.faces[fi as usize].map(|p| self.surface.points[p as usize]);
+        let (fi, _) = self.facetree.nearest(point, |fi|
+            if self.surface.tracks[fi as usize] == track {
+                (closest_triangle(point, &triangle(fi)) - point).square_length()
+            } else {
+                Float::INFINITY
+            })?;
+        Some(closest_triangle(point, &triangle(fi)))
+    }
+
+    /// closest point on the original edges of the given feature line
+    fn edge(&self, point: Vec3, line: Index) -> Option<Vec3> {
+        let segment = |ei: Index| self.edges[ei as usize].map(|p| self.surface.points[p as usize]);
+        let (ei, _) = self.edgetree.nearest(point, |ei|
+            if self.lines[ei as usize] == line {
+                (closest_segment(point, &segment(ei)) - point).square_length()
+            } else {
+                Float::INFINITY
+            })?;
+        Some(closest_segment(point, &segment(ei)))
+    }
+}
+
+/// Remesh a surface so that its edges get close to the given lengths, keeping its shape
+///
+/// `lengths` gives the wanted edge length around each point. Each iteration splits the edges longer than 4/3 of their length, collapses the ones shorter than 4/5, flips edges to get 6 edges around each point, then moves each point to the middle of its neighbors and back onto the original surface.
+/// Outlines, frontiers between groups and edges with an angle above `sharp` are kept like in `simplify`. Points on them slide along their original feature line, other points stay on the original faces of their group.
+pub fn remesh(surface: &Surface, lengths: &[Float], sharp: Float, iterations: usize) -> Surface<'static> {
+    let mut state = Editing::new(surface, sharp);
+    let reference = Reference::new(surface, &state.features);
+    let mut lengths = lengths.to_vec();
+    lengths.resize(surface.points.len(), Float::INFINITY);
+    let target = |lengths: &[Float], a: Index, b: Index| 0.5 * (lengths[a as usize] + lengths[b as usize]);
+
+    for _ in 0 .. iterations {
+        for [a, b] in state.edges() {
+            let wanted = target(&lengths, a, b);
+            if (state.points[a as usize] - state.points[b as usize]).length() > 4./3. * wanted {
+                state.split(a, b);
+                lengths.push(wanted);
+            }
+        }
+        for [a, b] in state.edges() {
+            if state.edgefaces(a, b).is_empty() { continue }
+            let (pa, pb) = (state.points[a as usize], state.points[b as usize]);
+            let wanted = target(&lengths, a, b);
+            if (pa - pb).length() >= 4./5. * wanted { continue }
+            let position = match state.direction(a, b) {
+                Some(Ordering::Greater) => pa,
+                Some(Ordering::Less) => pb,
+                Some(Ordering::Equal) => (pa + pb) * 0.5,
+                None => continue,
+            };
+            // collapses must not create long edges
+            if state.neighbors(a).into_iter().chain(state.neighbors(b))
+                .any(|q| (state.points[q as usize] - position).length() > 4./3. * target(&lengths, a, q).min(target(&lengths, b, q))) {
+                continue
+            }
+            let collapse = Collapse {
+                cost: 0., position, a, b,
+                stamps: [state.stamps[a as usize], state.stamps[b as usize]],
+            };
+            if state.valid(&collapse) {
+                state.apply(&collapse);
+                lengths[a as usize] = wanted;
+            }
+        }
+        for [a, b] in state.edges() {
+            state.flip(a, b);
+        }
+
+        // tangential relaxation, then projection on the original surface
+        let moved: Vec<Option<Vec3>> = (0 .. state.points.len()).map(|p| {
+            let faces = &state.pointfaces[p];
+            if faces.is_empty() { return None }
+            let point = state.points[p];
+            let neighbors = state.neighbors(p as Index);
+            match state.kind(p as Index) {
+                0 => {
+                    let center = neighbors.iter().fold(Vec3::zero(), |sum, &q| sum + state.points[q as usize])
+                        * (1. / neighbors.len() as Float);
+                    let normal = faces.iter().fold(Vec3::zero(), |sum, &fi| {
+                        let [x, y, z] = state.faces[fi].map(|i| state.points[i as usize]);
+                        sum + (y - x).cross(z - x)
+                    });
+                    if normal.square_length() == 0. { return None }
+                    reference.face(point + noproject(center - point, normal), state.tracks[faces[0]])
+                },
+                1 => {
+                    let line: Vec<Index> = neighbors.into_iter()
+                        .filter(|&q| state.features.contains_key(&edgekey(p as Index, q)))
+                        .collect();
+                    let [x, y] = line[..] else { return None };
+                    reference.edge((state.points[x as usize] + state.points[y as usize]) * 0.5,
+                        state.features[&edgekey(p as Index, x)])
+                },
+                _ => None,
+            }
+        }).collect();
+        for (p, position) in moved.into_iter().enumerate() {
+            if let Some(position) = position {
+                state.points[p] = position;
+            }
+        }
+    }
+    state.result()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// flat square of `n*n` cells, the first half in group 0 and the second in group 1
+    fn grid(n: usize) -> Surface<'static> {
+        let mut points = Vec::new();
+        for i in 0 ..= n {
+            for j in 0 ..= n {
+                points.push(Vec3::from([i as Float, j as Float, 0.]));
+            }
+        }
+        let row = (n + 1) as Index;
+        let mut simplices = Vec::new();
+        let mut tracks = Vec::new();
+        for i in 0 .. n as Index {
+            for j in 0 .. n as Index {
+                let a = i*row + j;
+                simplices.push(UVec3::from([a, a + row, a + 1]));
+                simplices.push(UVec3::from([a + 1, a + row, a + row + 1]));
+                tracks.extend([(2*i >= n as Index) as Index; 2]);
+            }
+        }
+        Surface {
+            points: Cow::Owned(points),
+            simplices: Cow::Owned(simplices),
+            tracks: Cow::Owned(tracks),
+        }
+    }
+
+    #[test]
+    fn test_simplify() {
+        let mut surface = grid(4);
+        surface.tracks = Cow::Owned(vec![0; surface.simplices.len()]);
+        // flat faces collapse down to the corners
+        let simplified = simplify(&surface, 0, 1e-9, 0.5);
+        assert_eq!(simplified.simplices.len(), 2);
+        assert_eq!(simplified.points.len(), 4);
+        assert!((simplified.area() - surface.area()).abs() < 1e-12);
+        assert!(simplified.simplices.iter().all(|f| f.as_array().iter().all(|&p| (p as usize) < 4)));
+        // the frontier between groups is kept
+        let surface = grid(4);
+        let simplified = simplify(&surface, 0, 1e-9, 0.5);
+        assert_eq!(simplified.simplices.len(), 4);
+        assert_eq!(simplified.points.len(), 6);
+        assert!((simplified.area() - surface.area()).abs() < 1e-12);
+        assert!(simplified.tracks.iter().filter(|&&t| t == 1).count() == 2);
+        // a target stops the collapses
+        let simplified = simplify(&surface, 20, Float::INFINITY, 0.5);
+        assert!(simplified.simplices.len() <= 20 && simplified.simplices.len() >= 19);
+    }
+
+    #[test]
+    fn test_remesh() {
+        let surface = grid(4);
+        let remeshed = remesh(&surface, &vec![0.5; surface.points.len()], 0.5, 3);
+        assert!(remeshed.simplices.len() > 4 * surface.simplices.len());
+        assert!((remeshed.area() - surface.area()).abs() < 1e-12);
+        assert!(remeshed.points.iter().all(|p| p[2] == 0.));
+        // no edge is far from the wanted length
+        for fi in 0 .. remeshed.simplices.len() {
+            let [a, b, c] = remeshed.simplexpoints(fi);
+            assert!([b - a, c - b, a - c].iter().all(|e| e.length() < 1.));
+        }
+        // faces stay on their side of the frontier between groups
+        for fi in 0 .. remeshed.simplices.len() {
+            let [a, b, c] = remeshed.simplexpoints(fi);
+            assert_eq!((a[0] + b[0] + c[0]) / 3. > 2., remeshed.tracks[fi] == 1);
+        }
+        // coarser lengths collapse the grid
+        let remeshed = remesh(&surface, &vec![2.; surface.points.len()], 0.5, 3);
+        assert!(remeshed.simplices.len() < surface.simplices.len());
+        assert!((remeshed.area() - surface.area()).abs() < 1e-12);
+    }
+
+    #[test]
+    fn test_feature_lines() {
+        let surface = grid(4);
+        let state = Editing::new(&surface, 0.5);
+        // the outline is cut at its corners and where the frontier between groups meets it
+        let lines: FxHashSet<Index> = state.features.values().copied().collect();
+        assert_eq!(lines.len(), 7);
+        let frontier: Vec<Index> = state.features.iter()
+            .filter(|&(&[a, b], _)| a / 5 == 2 && b / 5 == 2)
+            .map(|(_, &line)| line)
+            .collect();
+        assert_eq!(frontier.len(), 4);
+        assert!(frontier.iter().all(|&line| line == frontier[0]));
+        // a point on the frontier close to the outline stays on the frontier
+        let reference = Reference::new(&surface, &state.features);
+        let projected = reference.edge(Vec3::from([2.4, 0.1, 0.]), frontier[0]).unwrap();
+        assert!((projected - Vec3::from([2., 0.1, 0.])).length() < 1e-12);
+        let outline = state.features[&edgekey(10, 15)];
+        let projected = reference.edge(Vec3::from([2.4, 0.1, 0.]), outline).unwrap();
+        assert!((projected - Vec3::from([2.4, 0., 0.])).length() < 1e-12);
+    }
+
+    #[test]
+    fn test_grow_regions() {
+        // a chain of faces: flat, then curved, then flat again across a sharp edge
+        let curvatures = [0., 0., 1., 1.1, 0.9, 0., 0.];
+        let neighbors = [[0, 1], [1, 2], [2, 3], [3, 4], [5, 6]];
+        let (tracks, estimates) = grow_regions(&curvatures, &neighbors, 0.5, 1e-3);
+        assert_eq!(tracks, [0, 0, 2, 2, 2, 1, 1]);
+        assert_eq!(estimates.len(), 3);
+        assert!((estimates[2] - 1.).abs() < 1e-12);
+        // without neighbors each face is its own region
+        let (tracks, _) = grow_regions(&curvatures, &[], 0.5, 1e-3);
+        assert_eq!(tracks.len(), 7);
+        assert_eq!(tracks.iter().collect::<FxHashSet<_>>().len(), 7);
+    }
+
+    #[test]
+    fn test_retriangulate() {
+        // a grid sheared along its diagonals so they make thin triangles
+        let mut surface = grid(4);
+        for point in surface.points.to_mut() {
+            let [x, y, z] = *point.as_array();
+            *point = Vec3::from([x - 0.9 * y, y, z]);
+        }
+        let smallest = |surface: &Surface| surface.simplices.iter()
+            .map(|f| smallest_angle((*f.as_array()).map(|i| surface.points[i as usize])))
+            .fold(Float::INFINITY, Float::min);
+        let before = smallest(&surface);
+        let faces = retriangulate(&surface, 0.2);
+        assert_eq!(faces.len(), surface.simplices.len());
+        let result = Surface {
+            points: surface.points.clone(),
+            simplices: Cow::Owned(faces),
+            tracks: surface.tracks.clone(),
+        };
+        assert!(smallest(&result) > before);
+        // the frontier between the two groups is kept
+        let frontier = |surface: &Surface| {
+            let mut edges = FxHashMap::default();
+            for (f, &track) in surface.simplices.iter().zip(surface.tracks.iter()) {
+                let f = *f.as_array();
+                for s in 0 .. 3 {
+                    edges.entry(edgekey(f[s], f[(s + 1) % 3])).or_insert_with(Vec::new).push(track);
+                }
+            }
+            let mut frontier: Vec<[Index; 2]> = edges.into_iter()
+                .filter(|(_, tracks)| tracks.len() == 2 && tracks[0] != tracks[1])
+                .map(|(e, _)| e)
+                .collect();
+            frontier.sort();
+            frontier
+        };
+        assert_eq!(frontier(&result), frontier(&surface));
+        // a second pass has nothing left to improve
+        let faces = |simplices: &[UVec3]| simplices.iter().map(|f| *f.as_array()).collect::<Vec<_>>();
+        assert_eq!(faces(&retriangulate(&result, 0.2)), faces(&result.simplices));
+    }
+}
@@ -12,6 +12,7 @@ use std::marker::PhantomData;
 use crate::math::*;
 use crate::mesh::*;
 use crate::aabox::*;
+use crate::rasterize::IVec3;
 
 
 /// trait mirroring arrex and glm dtype definitions
@@ -68,6 +69,12 @@ unsafe impl DType for UVec2 {
         py.import("madcad.mathutils").unwrap().getattr("uvec2").unwrap()
     }
 }
+unsafe impl DType for IVec3 {
+    fn py_format() -> &'static CStr   {c"qqq"}
+    fn py_dtype(py: Python<'_>) -> Bound<'_, PyAny>  {
+        py.import("madcad.mathutils").unwrap().getattr("i64vec3").unwrap()
+    }
+}
 /// Padded UVec3 for Python buffer compatibility (uvec3 has 4 bytes padding to 16 bytes)
 #[repr(C)]
 #[derive(Clone, Copy)]
@@ -326,6 +333,7 @@ impl<'py> IntoPyObject<'py> for PySurface {
 #[derive(FromPyObject)]
 pub struct PyWeb {
     pub points: PyTypedList<Vec3>,
+    #[pyo3(attribute("edges"))]
     pub faces: PyTypedList<UVec2>,
     pub tracks: PyTypedList<Index>,
     pub groups: Py<PyList>,
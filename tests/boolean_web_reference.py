@@ -0,0 +1,264 @@
+''' Former pure python implementations of the web booleans, kept as reference for the native ones in `madcad.boolean`
+
+	The native versions must give the same edges, tracks and frontiers. They deviate from these on purpose in the following points, that the references here already include or that `same` ignores:
+
+	- `pierce_web` can start an island from the first edge, the former implementation skipped edge `0` by testing `not ei`
+	- the cutted webs and frontiers use a new points buffer, the former implementations appended the intersection points to the input web points
+
+	These are used by `test_boolean.py` and `benchmarks/boolean_web.py`
+'''
+from operator import itemgetter
+
+from madcad import *
+from madcad import standard
+from madcad.boolean import intersect_edges, intersect_edge_face
+from madcad.hashing import PointSet, PositionMap, meshcellsize, connpe
+from madcad.gear import gearprofile
+from madcad.mathutils import distance2
+
+
+# ------- reference python implementations -------
+
+def cut_web(w1: Web, ref: Web, prec=None) -> '(Web, Wire)':
+	''' Cut the web edges at their intersectsions with the `ref` web
+
+		Return:
+			`(cutted, frontier)`
+
+				:cutted(Web):	is `w1` with the edges cutted, but representing the same lines as before
+				:frontier(Wire): is a Web where edges are the intersection edges, and whose groups are the causing faces in `ref`
+		'''
+	if not prec:  prec = w1.precision()
+	frontier = Wire(w1.points, [], [], groups=ref.edges)
+
+	# topology informations for optimization
+	points = PointSet(prec, manage=w1.points)
+	prox = PositionMap(meshcellsize(ref))
+	for e in range(len(ref.edges)):
+		prox.add(ref.edgepoints(e), e)
+	conn = connpe(w1.edges)
+
+	mn = Web(w1.points, groups=w1.groups)  # resulting web
+	for e1 in range(len(w1.edges)):
+		processed = False  # flag enabled when the edge is reconstructed
+
+		# collect edges in ref that can have intersection with e1
+		close = set( prox.get(w1.edgepoints(e1)) )
+		if close:
+			# no need to get the straight zone around because on the case of an edge, it will not grow in complexity more than the number of cut segments
+			# and an edge is easy to reweb after multiple intersections
+			# compute intersections
+			segts = {}
+			for e2 in close:
+				intersect = intersect_edges(w1.edgepoints(e1), ref.edgepoints(e2), prec)
+				if intersect:
+					seg = points.add(intersect)
+					segts.setdefault(seg, e2)
+
+			# reconstruct the geometries
+			if segts:
+				e = w1.edges[e1]
+				# reweb the cutted edge
+				direction = w1.points[e[1]] - w1.points[e[0]]
+				sorted_segts = sorted(segts.items(), key=lambda s: dot(w1.points[s[0]], direction))
+				# append the rewebed edge in association with the original track
+				frontier += Wire(
+						w1.points,
+						map(itemgetter(0), sorted_segts),
+						map(itemgetter(1), sorted_segts),
+						ref.edges,
+						)
+
+				suite = list(map(itemgetter(0), sorted_segts))
+				if suite[0] != e[0]:	suite.insert(0, e[0])
+				if suite[-1] != e[-1]:	suite.append(e[-1])
+				mn += web(Wire(
+						w1.points,
+						suite,
+						[w1.tracks[e1]] * len(suite),
+						w1.groups,
+						))
+				processed = True
+
+		# keep the non intersected faces as is
+		if not processed:
+			mn.edges.append(w1.edges[e1])
+			mn.tracks.append(w1.tracks[e1])
+
+	mn.check()
+	return mn, frontier
+
+def pierce_web(web, ref, side=False, prec=None) -> Web:
+
+	if not prec:	prec = web.precision()
+	web, frontier = cut_web(web, ref, prec)
+	conn = connpe(web.edges)		# connectivity
+	stops = set(frontier.indices)	# propagation stop points
+
+	used = [0] * len(web.edges)		# whether to keep the matching edges or not
+
+	# sort points by distance to a "center"
+	center = web.barycenter()
+	order = sorted(range(len(web.points)), key=lambda i:  distance2(web.points[i], center))
+
+	# always start an island from the most exterior
+	for start in order:
+		if start in stops:	continue
+		ei = next(conn[start], None)
+		if ei is None or used[ei]:	continue
+
+		# propagate
+		front = [(start, not side)]		# points on the propagation front
+		while front:
+			last, keep = front.pop()
+			for ei in conn[last]:
+				if used[ei]:	continue
+				used[ei] = 1 if keep else 2
+				direction = int(web.edges[ei][0] == last)
+				current = web.edges[ei][direction]
+				front.append((current, keep ^ (current in stops)))
+
+	# filter web content to keep
+	return Web(
+				web.points,
+				[e  for u,e in zip(used, web.edges) if u == 1],
+				[t  for u,t in zip(used, web.tracks) if u == 1],
+				web.groups,
+				)
+
+
+def cut_web_mesh(w1: Web, ref: Mesh, prec=None) -> '(Web, Wire)':
+	''' Cut the web inplace at its intersections with the `ref` web.
+
+	Return:
+		`(cutted, frontier)`
+	'''
+	if not prec:  prec = w1.precision()
+	frontier = Wire(w1.points, [], [], groups=ref.faces)
+
+	# topology informations for optimization
+	points = PointSet(prec, manage=w1.points)
+	prox = PositionMap(meshcellsize(ref))
+	for f in range(len(ref.faces)):
+		prox.add(ref.facepoints(f), f)
+	conn = connpe(w1.edges)
+
+	mn = Web(w1.points, groups=w1.groups)  # resulting web
+	for e1 in range(len(w1.edges)):
+		processed = False	# flag enabled when the edge is reconstructed
+
+		# collect edges in ref that can have intersection with e1
+		close = set(prox.get(w1.edgepoints(e1)))
+		if close:
+
+			# no need to get the straight zone around because on the case of an edge, it will not grow in complexity more than the number of cut segments
+			# and an edge is easy to remesh after multiple intersections
+			# compute intersections
+			segts = {}
+			for f2 in close:
+				intersect = intersect_edge_face(w1.edgepoints(e1), ref.facepoints(f2), prec)
+				if intersect:
+					seg = points.add(intersect)
+					segts.setdefault(seg, f2)
+
+			# reconstruct the geometries
+			if segts:
+				e = w1.edges[e1]
+				# reweb the cutted edge
+				direction = w1.points[e[1]] - w1.points[e[0]]
+				sorted_segts = sorted(segts.items(), key=lambda s: dot(w1.points[s[0]], direction))
+				# append the rewebed edge in association with the original track
+				frontier += Wire(
+						w1.points,
+						list(map(itemgetter(0), sorted_segts)),
+						list(map(itemgetter(1), sorted_segts)),
+						ref.faces,
+						)
+				mn += web(Wire(
+						w1.points,
+						[e[0]] + list(map(itemgetter(0), sorted_segts)) + [e[1]],
+						[w1.tracks[e1]] * (len(sorted_segts)+2),
+						w1.groups,
+						))
+				processed = True
+
+		# keep the non intersected faces as is
+		if not processed:
+			mn.edges.append(w1.edges[e1])
+			mn.tracks.append(w1.tracks[e1])
+
+	return mn, frontier
+
+
+def pierce_web_mesh(w1: Web, ref: Mesh, side=False, prec=None) -> Web:
+
+	if not prec:	prec = w1.precision()
+
+	w1, frontier = cut_web_mesh(w1, ref, prec)
+	conn = connpe(w1.edges)			# connectivity
+	stops = set(frontier.indices)	# propagation stop points
+
+	used = [False] * len(w1.edges)	# whether to keep the matching edges
+
+	for p1, fi in zip(frontier.indices, frontier.tracks):
+		front = []	# points on the propagation front
+
+		# check which side to keep
+		normal = ref.facenormal(fi)
+		for ei in conn[p1]:
+			e1 = w1.edges[ei]
+			direction = int(e1[0] == p1)
+			if side ^ (dot(w1.points[e1[direction]] - w1.points[p1], normal) > 0):
+				front.append(e1[direction])
+				used[ei] = True
+
+		# propagate
+		while front:
+			last = front.pop()
+			if last in stops:	continue
+
+			for ei in conn[last]:
+				if used[ei]:	continue
+				used[ei] = True
+				direction = int(w1.edges[ei][0] == last)
+				next = w1.edges[ei][direction]
+				front.append(next)
+
+	# filter web content to keep
+	return Web(
+			w1.points,
+			[e  for u,e in zip(used, w1.edges) if u],
+			[t  for u,t in zip(used, w1.tracks) if u],
+			w1.groups,
+			)
+
+
+
+# ------- test cases -------
+
+def outlines(teeth):
+	''' a gear outline and a circle crossing all its teeth '''
+	profile = web(repeat(gearprofile(1, teeth), teeth, rotatearound(2*pi/teeth, (O,Z))))
+	profile.mergeclose()
+	radius = teeth / (2*pi)
+	circle = web(Circle((O,Z), radius, resolution=('div', 8*teeth)))
+	return profile, circle
+
+def sections():
+	''' the standard sections, each with a circle crossing it around its center '''
+	for name in ('section_s', 'section_w', 'section_l', 'section_c', 'section_tslot'):
+		section = web(getattr(standard, name)())
+		section.mergeclose()
+		box = section.box()
+		circle = web(Circle((box.center, Z), 0.35 * length(box.size), resolution=('div', 64)))
+		yield name, section, circle
+
+def same(a, b):
+	''' check that two webs or wires represent the same edges or points with the same tracks '''
+	def key(w):
+		if isinstance(w, Wire):
+			return sorted((tuple(w.points[i]), t)  for i, t in zip(w.indices, w.tracks))
+		return sorted(
+			(tuple(sorted((tuple(w.points[e[0]]), tuple(w.points[e[1]])))), t)
+			for e, t in zip(w.edges, w.tracks))
+	return key(a) == key(b)
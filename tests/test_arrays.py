@@ -0,0 +1,30 @@
+import numpy as np
+from madcad import *
+
+def test_arrays():
+	m = brick(center=vec3(0), width=vec3(1))
+	arrays = m.arrays()
+	assert arrays['points'].shape == (len(m.points), 3) and arrays['points'].dtype == 'f8'
+	assert arrays['faces'].shape == (len(m.faces), 3) and arrays['faces'].dtype == 'u4'
+	assert arrays['tracks'].shape == (len(m.faces),) and arrays['tracks'].dtype == 'u4'
+	# views share memory with the mesh buffers
+	arrays['points'] *= 2
+	assert m.points[0] == 2*brick(center=vec3(0), width=vec3(1)).points[0]
+	arrays['faces'][0] = arrays['faces'][0, ::-1]
+	assert m.faces[0] == uvec3(*arrays['faces'][0].tolist())
+	arrays['tracks'][:] = 3
+	assert set(m.tracks) == {3}
+	# constructors adopt arrays of the same layout
+	new = Mesh(arrays['points'], arrays['faces'], arrays['tracks'], m.groups)
+	arrays['points'][0] = (1,2,3)
+	arrays['faces'][1] = (0,1,2)
+	assert new.points[0] == vec3(1,2,3) and new.faces[1] == uvec3(0,1,2)
+	# other arrays are converted
+	new = Mesh(np.zeros((3,3)), np.array([[0,1,2]]))
+	assert new.faces[0] == uvec3(0,1,2) and new.tracks[0] == 0
+	new.check()
+	
+	w = Web([vec3(0), vec3(1)], [(0,1)])
+	assert w.arrays()['edges'].tolist() == [[0,1]]
+	w = Wire([vec3(0), vec3(1)])
+	assert set(w.arrays()) == {'points', 'indices'}
@@ -1,10 +1,13 @@
 from copy import deepcopy
 from pnprint import nprint
+import pickle
 
 from madcad import *
-from madcad.boolean import pierce, boolean, difference, cut_mesh, pierce_web, boolean_web
+from madcad.boolean import pierce, boolean, union, difference, intersection, cut_mesh, pierce_web, boolean_web, union_many, difference_many, cut_web, cut_web_mesh, pierce_web_mesh, _disjoint_layers
+from madcad.hashing import SurfaceIndex
 from madcad.generation import brick
 from . import visualcheck
+from . import boolean_web_reference as reference
 
 m1 = brick(width=vec3(2))
 m2 = (deepcopy(m1)
@@ -120,6 +123,38 @@ def test_boolean_web_mesh():
 
 		
 @visualcheck
+def test_web_reference():
+	cases = [reference.outlines(teeth)  for teeth in (10, 30)]
+	cases.extend((section, circle)  for name, section, circle in reference.sections())
+	for profile, circle in cases:
+		cylinder = extrusion(circle, Z, alignment=0.5)
+		for ref, cut, piercing, cut_ref, piercing_ref in [
+				(circle, cut_web, pierce_web, reference.cut_web, reference.pierce_web),
+				(cylinder, cut_web_mesh, pierce_web_mesh, reference.cut_web_mesh, reference.pierce_web_mesh),
+				]:
+			points = deepcopy(profile.points)
+			cutted, frontier = cut(profile, ref)
+			expected = cut_ref(deepcopy(profile), ref)
+			assert frontier.indices
+			assert frontier.points is cutted.points
+			assert reference.same(cutted, expected[0])
+			assert reference.same(frontier, expected[1])
+			for side in (False, True):
+				assert reference.same(piercing(profile, ref, side), piercing_ref(deepcopy(profile), ref, side))
+			# the input web is not extended with the intersection points
+			assert profile.points == points
+
+def test_threads():
+	# the result does not depend on the number of threads intersecting the triangles
+	a = icosphere(vec3(0), 1, resolution=('div', 4))
+	b = icosphere(vec3(0.6, 0.2, 0.1), 0.8, resolution=('div', 4))
+	for operation in (union, intersection, difference):
+		single = operation(a, b, threads=1)
+		parallel = operation(a, b, threads=None)
+		assert list(single.points) == list(parallel.points)
+		assert list(single.faces) == list(parallel.faces)
+		assert list(single.tracks) == list(parallel.tracks)
+
 def test_sidecases():
 	z = vec3(0,0,1)
 	cut_tool = icosphere(vec3(0), 1, resolution=("div", 1))
@@ -204,3 +239,101 @@ def test_repetition():
 	
 	return [res]
 
+
+@visualcheck
+def test_difference_many():
+	base = brick(width=vec3(10, 10, 2))
+	# disjoint tools cutted in one pass, and overlapping tools needing several passes
+	tools = [cylinder(vec3(x,y,-2), vec3(x,y,2), 0.3)   for x in range(-4,5,2)  for y in (-4,4)]
+	tools += [cylinder(vec3(x,0,-2), vec3(x,0,2), 0.8)   for x in (-1,0,1)]
+	
+	result = difference_many(base, tools)
+	result.check()
+	assert result.isenvelope()
+	
+	chained = base
+	for tool in tools:
+		chained = difference(chained, tool)
+	assert abs(result.volume() - chained.volume()) < 1e-6
+	
+	return [result]
+
+@visualcheck
+def test_union_many():
+	spheres = [icosphere(vec3(0.7*i, 0.1*i, 0), 0.5)   for i in range(5)]
+	inner = icosphere(vec3(0), 0.2)
+	
+	result = union_many([*spheres, inner])
+	result.check()
+	assert result.isenvelope()
+	
+	chained = spheres[0]
+	for sphere in spheres[1:]:
+		chained = union(chained, sphere)
+	assert abs(result.volume() - chained.volume()) < 1e-6
+	
+	return [result]
+
+def test_union_many_empty():
+	result = union_many([])
+	assert isinstance(result, Mesh)
+	assert not result.faces
+	result = union_many([Mesh(), Mesh()])
+	assert isinstance(result, Mesh)
+	assert not result.faces
+
+def test_disjoint_layers():
+	# disjoint boxes all fit in one layer, more than the initial capacity of a layer
+	bricks = [brick(center=vec3(2*i, 0, 0), width=vec3(1))   for i in range(20)]
+	assert _disjoint_layers(bricks, 1e-6) == [bricks]
+	# overlapping boxes alternate between two layers
+	bricks = [brick(center=vec3(0.8*i, 0, 0), width=vec3(1))   for i in range(20)]
+	assert _disjoint_layers(bricks, 1e-6) == [bricks[0::2], bricks[1::2]]
+
+@visualcheck
+def test_surfaceindex():
+	housing = difference(brick(width=vec3(6, 6, 2)), cylinder(vec3(0,0,-2), vec3(0,0,2), 1))
+	index = SurfaceIndex(pickle.loads(pickle.dumps(SurfaceIndex(housing))).mesh)
+	tools = [icosphere(vec3(x, 2, 1), 0.4)   for x in (-2, 0, 2)]
+	tools.append(cylinder(vec3(0,-2,-2), vec3(0,-2,2), 0.5))
+	
+	results = []
+	for tool in tools:
+		expected = difference(index.mesh, tool)
+		result = difference(index.mesh, tool, index=index)
+		result.check()
+		assert result.isenvelope()
+		assert abs(result.volume() - expected.volume()) < 1e-6
+		results.append(result)
+		
+		# the tool can also be the indexed mesh
+		result = intersection(index.mesh, tool, index=SurfaceIndex(tool))
+		assert result.isenvelope()
+		assert abs(result.volume() - intersection(index.mesh, tool).volume()) < 1e-6
+	
+	for i, result in enumerate(results):
+		results[i] = result.transform(translate(8*i*X))
+	return results
+
+def test_surfaceindex_pierce():
+	from madcad.boolean import pierce_mesh
+	def faces(mesh):
+		return sorted(
+			(tuple(sorted(tuple(mesh.points[i])  for i in face)), track)
+			for face, track in zip(mesh.faces, mesh.tracks))
+	housing = difference(brick(width=vec3(6, 6, 2)), cylinder(vec3(0,0,-2), vec3(0,0,2), 1))
+	for tool in [icosphere(vec3(2, 2, 1), 0.4), icosphere(vec3(2.5, 0, 1), 0.4), cylinder(vec3(0,-2,-2), vec3(0,-2,2), 0.5), icosphere(vec3(10), 1)]:
+		for a, b in [(housing, tool), (tool, housing)]:
+			for side in (False, True):
+				expected = faces(pierce_mesh(a, b, side))
+				# the index only prunes the faces given to the intersection, whichever mesh it is built on
+				assert faces(pierce_mesh(a, b, side, index=SurfaceIndex(a))) == expected
+				assert faces(pierce_mesh(a, b, side, index=SurfaceIndex(b))) == expected
+
+def test_surfaceindex_extent():
+	housing = brick(width=vec3(6, 6, 2))
+	index = SurfaceIndex(housing)
+	# huge query boxes are clipped to the indexed cells
+	assert sorted(index.near(icosphere(vec3(0), 1), 1e4).tolist()) == list(range(len(housing.faces)))
+	assert len(index.near(icosphere(vec3(100), 1))) == 0
+	assert len(index.around([vec3(3, 3, 1)], 0.1)) > 0
@@ -0,0 +1,35 @@
+from madcad import *
+from madcad.mesh import *
+
+def test_concat():
+	part = brick(width=vec3(1))
+	other = icosahedron(vec3(3), 1)
+	parts = [part, other, part.transform(vec3(1)), other]
+	chained = Mesh()
+	for p in parts:
+		chained += p
+	concatenated = Mesh.concat(parts)
+	concatenated.check()
+	assert len(concatenated.faces) == len(chained.faces)
+	assert [concatenated.facepoints(f)  for f in concatenated.faces] == [chained.facepoints(f)  for f in chained.faces]
+	assert [concatenated.groups[t]  for t in concatenated.tracks] == [chained.groups[t]  for t in chained.tracks]
+	# buffers shared by several parts are not duplicated
+	assert len(concatenated.points) == 2*len(part.points) + len(other.points)
+	single = Mesh.concat([part, part])
+	assert len(single.points) == len(part.points)
+	single += other
+	assert len(part.points) == 8 and len(part.groups) == 6
+	assert len(Mesh.concat([]).faces) == 0
+	
+	builder = Builder(Mesh)
+	for p in parts:
+		builder += p
+	assert builder.build().faces == concatenated.faces
+	
+	frontiers = [web(part.frontiers()), web(other.frontiers())]
+	assert Web.concat(frontiers).edges == (frontiers[0] + frontiers[1]).edges
+	lines = [wire([vec3(0), vec3(1)]), Wire([vec3(2), vec3(3)], tracks=[0,0]), wire([vec3(4)])]
+	concatenated = Wire.concat(lines)
+	concatenated.check()
+	assert concatenated.indices == (lines[0] + lines[1] + lines[2]).indices
+	assert concatenated.tracks == typedlist([0, 0, 1, 1, 2], 'I')
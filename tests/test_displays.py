@@ -98,3 +98,39 @@ def test_transparent_background():
 	for i in range(5):
 		view.enable_alpha = (i % 2 == 0)
 		view.render(size)
+
+def test_instances_container():
+	m = brick(center=vec3(2,0,0), width=vec3(1))
+	transforms = [rotate(i*0.1, Z)  for i in range(5)]
+	instances = Instances(m, transforms)
+	assert len(instances) == 5
+	concatenated = instances.mesh()
+	assert concatenated.faces == m.transform_many(transforms).faces
+	assert instances.box().contains(concatenated.box())
+	box, expected = Instances(m, [vec3(1,2,3)]).box(), m.box().transform(translate(vec3(1,2,3)))
+	assert distance(box.min, expected.min) < NUMPREC and distance(box.max, expected.max) < NUMPREC
+	
+	moved = instances.transform(vec3(0,0,3))
+	assert moved.base is m
+	assert max(distance(a,b)  for a,b in zip(moved.mesh().points, concatenated.transform(vec3(0,0,3)).points)) < NUMPREC
+	box, expected = Solid(part=instances).transform(vec3(0,0,3)).deloc('part').box(), moved.box()
+	assert distance(box.min, expected.min) < NUMPREC and distance(box.max, expected.max) < NUMPREC
+	assert Instances(m).box().isempty()
+
+def test_instances():
+	part = brick(width=vec3(1))
+	poses = [translate(vec3(2*i,0,0)) * rotate(0.3*i, Z)  for i in range(4)]
+	scene = Scene({
+		'parts': Instances(part, poses),
+		'frontiers': Instances(web(part.frontiers()), poses),
+		'empty': Instances(part),
+		})
+	scene.prepare()
+	box = scene.root.displays['parts'].box
+	expected = Instances(part, poses).box()
+	assert distance(vec3(box.min), expected.min) < 1e-5 and distance(vec3(box.max), expected.max) < 1e-5
+	
+	size = uvec2(200, 150)
+	view = Offscreen3D(scene, size, view=fmat4(1), proj=fmat4(1))
+	view.render(size)
+	assert view.color.shape == (150, 200, 3)
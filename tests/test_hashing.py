@@ -1,5 +1,5 @@
 from pnprint import nprint
-from madcad import vec3, Mesh, Web, show
+from madcad import vec3, uvec3, Mesh, Web, show, icosphere, brick
 from madcad.hashing import *
 from . import visualcheck
 
@@ -60,3 +60,84 @@ def test_asso():
 	
 	assert set(m[1]) == {'truc', 'bidule', 2, 'machin'}
 	assert set(m[12]) == {'chose'}
+
+def test_positionmap_bulk():
+	from madcad.generation import icosphere
+	surface = icosphere(vec3(0), 1, resolution=('div', 3))
+	web = Web(surface.points, sorted(surface.edges()))
+	
+	reference = PositionMap(0.2)
+	for i in range(len(surface.faces)):
+		reference.add(surface.facepoints(i), i)
+	m = PositionMap(0.2)
+	m.add_mesh(surface)
+	assert m.dict == reference.dict
+	
+	reference = PositionMap(0.2)
+	for i in range(len(web.edges)):
+		reference.add(web.edgepoints(i), i)
+	m = PositionMap(0.2)
+	m.add_web(web)
+	assert m.dict == reference.dict
+	
+	# cells already filled are extended
+	for i in range(len(web.edges)):
+		reference.add(web.edgepoints(i), i)
+	m.add_web(web)
+	assert m.dict == reference.dict
+
+def test_pointset_update_array():
+	import numpy as np
+	points = np.random.default_rng(0).random((300,3)).round(1)
+	
+	reference = PointSet(0.01)
+	reference.add(vec3(0.5))
+	expected = [reference.add(vec3(p))  for p in points]
+	s = PointSet(0.01)
+	s.add(vec3(0.5))
+	indices = s.update_array(points)
+	assert indices.tolist() == expected
+	assert s.points == reference.points
+	assert s.dict == reference.dict
+	
+	# inserting by chunks gives the same set
+	chunked = PointSet(0.01)
+	chunked.add(vec3(0.5))
+	indices = np.concatenate([chunked.update_array(chunk)  for chunk in np.array_split(points, 7)])
+	assert indices.tolist() == expected
+	assert chunked.dict == reference.dict
+
+def test_topology():
+	m = icosphere(vec3(0), 1) + brick(center=vec3(3,0,0), width=vec3(1))
+	topology = m.topology()
+	assert m.topology() is topology
+	assert topology.connef() == connef(m.faces)
+	assert topology.connpp() == connpp(m.faces)
+	for f, face in enumerate(m.faces):
+		for k in range(3):
+			assert topology.neighbours[f][k] == connef(m.faces).get((face[k], face[k-1]), -1)
+			assert f in Topology.row(topology.edgefaces, topology.faceedges[f][k])
+			assert tuple(topology.edges[topology.faceedges[f][k]]) == edgekey(face[k-1], face[k])
+			assert f in Topology.row(topology.pointfaces, face[k])
+	
+	for a, b in connef(m.faces):
+		assert topology.faceof(a, b) == connef(m.faces)[(a,b)]
+	assert topology.faceof(0, 0) == -1
+	# legacy connectivity gives the same islands
+	assert [island.faces for island in m.islands(conn=connef(m.faces))] == [island.faces for island in m.islands()]
+	
+	# the cached topology follows the faces
+	m.faces.pop()
+	m.tracks.pop()
+	assert m.topology() is not topology
+	assert len(m.topology().neighbours) == len(m.faces)
+	assert -1 in m.topology().neighbours
+	topology = m.topology()
+	m.orient()
+	assert m.topology() is not topology
+	# even when the faces are rewritten in place
+	topology = m.topology()
+	a, b, c = m.faces[0]
+	m.faces[0] = uvec3(a, c, b)
+	assert m.topology() is not topology
+	assert tuple(m.topology().faces[0]) == (a, c, b)
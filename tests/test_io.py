@@ -1,9 +1,10 @@
+import os
 from madcad.mathutils import vec3
 from madcad.mesh import Web
 from madcad.generation import extrusion
 from madcad.io import *
 
-def test_io():
+def test_io(tmp_path):
 	original = extrusion(
 			Web(
 				[vec3(1,1,0), vec3(-1,1,0), vec3(-1,-1,0), vec3(1,-1,0)],
@@ -14,13 +15,121 @@ def test_io():
 	original.check()
 
 	# test ply
-	write(original, 'tests/test_io.ply')
-	ply = read('tests/test_io.ply')
+	write(original, str(tmp_path/'test_io.ply'))
+	ply = read(str(tmp_path/'test_io.ply'))
 	ply.check()
 	assert ply.issurface()
 
 	# test stl
-	write(original, 'tests/test_io.stl')
-	stl = read('tests/test_io.stl')
+	write(original, str(tmp_path/'test_io.stl'))
+	stl = read(str(tmp_path/'test_io.stl'))
 	stl.check()
 	assert stl.issurface()
+
+	# test stl variants
+	for text in (False, True):
+		write(original, str(tmp_path/'test_io.stl'), text=text)
+		stl = read(str(tmp_path/'test_io.stl'), merge=True)
+		stl.check()
+		assert stl.issurface()
+		assert len(stl.points) == len(original.points)
+		assert len(stl.faces) == len(original.faces)
+
+def test_stl_chunks(tmp_path, monkeypatch):
+	from madcad import io
+	from madcad.generation import icosphere
+	original = icosphere(vec3(0), 1)
+	for text in (False, True):
+		write(original, str(tmp_path/'test_io.stl'), text=text)
+		whole = read(str(tmp_path/'test_io.stl'), merge=True)
+		# points met in previous chunks are merged as well
+		with monkeypatch.context() as patch:
+			patch.setattr(io, '_stl_chunk', 7)
+			patch.setattr(io, '_stl_text_chunk', 1000)
+			chunked = read(str(tmp_path/'test_io.stl'), merge=True)
+			separate = read(str(tmp_path/'test_io.stl'))
+		assert len(whole.points) == len(original.points)
+		assert chunked.points == whole.points
+		assert list(chunked.faces) == list(whole.faces)
+		assert len(separate.points) == 3*len(original.faces)
+		assert [separate.facepoints(i)  for i in range(len(separate.faces))] == [whole.facepoints(i)  for i in range(len(whole.faces))]
+
+def test_ply_polygons(tmp_path):
+	from plyfile import PlyData, PlyElement
+	import numpy as np
+	
+	# a square, a concave quad, a convex hexagon and a concave pentagon
+	points = [(0,0,0), (1,0,0), (1,1,0), (0,1,0),  (2,0,0), (3,0,0), (2.2,0.2,0), (2,1,0)]
+	points += [(5+np.cos(t), np.sin(t), 0)  for t in np.linspace(0, 2*np.pi, 7)[:-1]]
+	points += [(7,0,0), (9,0,0), (8,0.2,0), (9,2,0), (7,2,0)]
+	polygons = [[0,1,2,3], [4,5,6,7], list(range(8,14)), [14,15,17,16,18]]
+	vertices = np.array(points, dtype=[('x','f4'), ('y','f4'), ('z','f4')])
+	faces = np.empty(len(polygons), dtype=[('vertex_indices', 'O'), ('group', 'u2')])
+	for i, polygon in enumerate(polygons):
+		faces['vertex_indices'][i] = np.array(polygon, 'i4')
+	faces['group'] = range(len(polygons))
+	PlyData([PlyElement.describe(vertices, 'vertex'), PlyElement.describe(faces, 'face')]).write(str(tmp_path/'test_io.ply'))
+	
+	ply = read(str(tmp_path/'test_io.ply'))
+	ply.check()
+	assert len(ply.groups) == len(polygons)
+	assert list(ply.tracks) == [0,0, 1,1, 2,2,2,2, 3,3,3]
+	for i in range(len(ply.faces)):
+		assert ply.facenormal(i).z > 0
+
+def test_madcad():
+	from madcad.mesh import Wire
+	original = extrusion(
+			Web(
+				[vec3(1,1,0), vec3(-1,1,0), vec3(-1,-1,0), vec3(1,-1,0)],
+				[(0,1), (1,2), (2,3), (3,0)],
+				[0,1,2,3],
+				),
+			vec3(0,0,0.5))
+	original.options['color'] = (0.5, 0.5, 1)
+	
+	for obj in (original, original.frontiers(), Wire(original.points)):
+		write(obj, 'tests/test_io.madcad')
+		loaded = read('tests/test_io.madcad')
+		assert type(loaded) is type(obj)
+		assert loaded.points == obj.points
+		assert loaded.groups == obj.groups
+		assert loaded.options == obj.options
+	assert loaded.indices == obj.indices
+	
+	# the mapped buffers can be modified without changing the file
+	loaded = read('tests/test_io.madcad')
+	loaded.points[0] = vec3(5)
+	loaded.points.append(vec3(6))
+	assert read('tests/test_io.madcad').points == obj.points
+	del loaded
+	os.remove('tests/test_io.madcad')
+
+def test_cachefunc():
+	import tempfile
+	from madcad.generation import icosphere
+	
+	storage = Cache(tempfile.mkdtemp(), size=40_000, memory=1)
+	calls = []
+	@cachefunc(storage=storage)
+	def moved(mesh, offset=vec3(1)):
+		calls.append(offset)
+		return mesh.transform(offset)
+	
+	small = icosphere(vec3(0), 1)
+	big = icosphere(vec3(0), 2)
+	# meshes with the same counts are distinguished by their content
+	assert moved(small).box().max.x < moved(big).box().max.x
+	assert len(calls) == 2
+	assert moved(small).box().max.x < 2.1
+	assert len(calls) == 2
+	assert storage.stats()['loads'] == 1
+	
+	# the least recently used files are removed beyond the size budget
+	for i in range(5):
+		moved(small, vec3(i))
+	stats = storage.stats()
+	assert stats['misses'] == 7
+	assert stats['size'] <= storage.size
+	storage.clear()
+	assert storage.stats()['files'] == 0
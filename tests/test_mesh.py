@@ -39,6 +39,11 @@ def test_islands():
 	assert len(l) == 2
 	l[0].check()
 	l[1].check()
+	assert all(island.points is m.points  for island in l)
+	labels, count = m.islandlabels()
+	assert count == 2
+	assert labels.tolist() == [0]*20 + [1]*12
+	assert sum(len(island.faces)  for island in l) == len(m.faces)
 
 def test_frontiers():
 	bri = brick(center=vec3(2,0,0), width=vec3(0.5))
@@ -126,6 +131,27 @@ def test_split():
 		for p in face:
 			assert p < len(m.points)
 
+def test_mergeclose():
+	# a brick has its points duplicated for each face group
+	m = brick(center=vec3(0), width=vec3(1))
+	m.points.extend(m.points)
+	m.faces.extend(uvec3(f) + len(m.points)//2  for f in list(m.faces))
+	m.tracks.extend(list(m.tracks))
+	merges = m.mergeclose()
+	assert len(merges) == 16
+	assert merges.max() == len(m.points)-1
+	assert len(m.points) == 8
+	assert len(m.faces) == 24
+	m.check()
+	
+	w = m.outlines().own(points=True)
+	w.points.append(w.points[0])
+	w.edges.append(uvec2(len(w.points)-1, 1))
+	w.tracks.append(0)
+	w.mergeclose()
+	assert len(w.points) == 8
+	assert w.edges[-1] == uvec2(0,1)
+
 def test_vertexnormals():
 	# subdivide a triangle diagonal on 2 axes, project onto a unit sphere,
 	# then check that vertex normals are approximately radial
@@ -0,0 +1,26 @@
+from madcad import *
+
+def test_pyramid():
+	# square pyramid without its base
+	m = Mesh(
+		[vec3(0,0,0), vec3(1,0,0), vec3(1,1,0), vec3(0,1,0), vec3(0.5,0.5,1)],
+		[uvec3(0,1,4), uvec3(1,2,4), uvec3(2,3,4), uvec3(3,0,4)],
+		)
+	assert distance(m.barycenter(), vec3(0.5, 0.5, 1/3)) < 1e-6
+	assert distance(m.facenormals()[0], normalize(vec3(0,-1,0.5))) < 1e-6
+	normals = m.edgenormals()
+	assert len(normals) == 8
+	assert distance(normals[(0,1)], m.facenormal(0)) < 1e-6
+	assert distance(normals[(0,4)], normalize(m.facenormal(0) + m.facenormal(3))) < 1e-6
+	tangents = m.tangents()
+	assert sorted(tangents) == [0,1,2,3]
+	for p, t in tangents.items():
+		assert t.z < 0 and dot(t, m.points[p] - vec3(0.5,0.5,0)) > 0
+
+def test_barycenter_degenerated():
+	assert Mesh().barycenter() == vec3(0)
+	# faces without area are weighted equally
+	m = Mesh([vec3(0), vec3(1,0,0), vec3(2,0,0), vec3(0,3,0)], [uvec3(0,1,2), uvec3(0,2,3)])
+	assert distance(Mesh(m.points, m.faces[:1]).barycenter(), vec3(1,0,0)) < 1e-6
+	assert Mesh(m.points, m.faces[:1]).volume() == 0
+	assert distance(m.barycenter(), (vec3(0,3,0) + vec3(2,0,0))/3) < 1e-6
@@ -0,0 +1,57 @@
+from random import random, seed as random_seed
+from madcad import *
+from madcad.query import nearest, tree, closest_points, signed_distance, raycast
+
+def test_nearest():
+	random_seed(7)
+	m = icosphere(vec3(0), 1, resolution=('div', 3))
+	queries = [vec3(random(), random(), random())*4 - 2  for i in range(50)]
+	indices, distances = nearest(m, queries)
+	for p, i, d in zip(queries, indices, distances):
+		expected = min(distance_pt(p, m.facepoints(f))  for f in range(len(m.faces)))
+		assert abs(d - expected) < NUMPREC
+		assert abs(distance_pt(p, m.facepoints(i)) - expected) < NUMPREC
+	assert m.facenear(queries[0]) == indices[0]
+	
+	# the cached tree follows the mesh modifications, replaced buffers as well as in place modifications
+	assert tree(m) is tree(m)
+	m.points[m.faces[0][0]] = vec3(3)
+	assert m.facenear(vec3(3)) in {f  for f,face in enumerate(m.faces)  if m.faces[0][0] in face}
+	m.points = m.points + [vec3(-3)]
+	m.faces = m.faces + [uvec3(len(m.points)-1, 0, 1)]
+	m.tracks = m.tracks + [0]
+	assert m.facenear(vec3(-3)) == len(m.faces)-1
+	
+	p = m.points[5]
+	assert m.pointnear(p + vec3(1e-3)) == 5
+	assert m.pointat(p) == 5
+	assert m.pointat(vec3(10)) is None
+	m.points[5] = vec3(10)
+	assert m.pointat(vec3(10)) == 5
+	assert m.usepointat(vec3(10)) == 5
+	assert m.usepointat(vec3(11)) == len(m.points)-1
+	assert m.pointat(vec3(11)) == len(m.points)-1
+	
+	c = Circle((vec3(0), Z), 1).mesh()
+	for p in queries[:10]:
+		assert c.edgenear(p) == min(range(len(c.indices)-1), key=lambda i: distance_pe(p, c.edgepoints(i)))
+
+def test_signed_distance():
+	triangle = (vec3(0,0,1), vec3(1,0,1), vec3(0,1,1))
+	assert distance_pt(vec3(0.2,0.2,0), triangle) == 1
+	assert distance_pt(vec3(2,2,1), triangle) == distance(vec3(2,2,1), vec3(0.5,0.5,1))
+	m = icosphere(vec3(0), 1, resolution=('div', 2))
+	queries = [vec3(0), vec3(0.5,0,0.1), vec3(2,0,0), vec3(0,-1.5,0.3)]
+	distances = signed_distance(m, queries)
+	assert (distances[:2] < 0).all()
+	assert (distances[2:] > 0).all()
+	closest, indices = closest_points(m, queries)
+	for p, c, d, i in zip(queries, closest, distances, indices):
+		assert abs(length(p - vec3(c)) - abs(d)) < 1e-6
+		assert distance_pt(vec3(c), m.facepoints(i)) < 1e-6
+	
+	indices, parameters = raycast(m, [vec3(0), vec3(0,0,3), vec3(0,0,3)], [X, -Z, Z])
+	assert indices[2] == -1 and parameters[2] == inf
+	assert 0.9 < parameters[0] < 1
+	assert abs(parameters[1] - 2) < 0.1
+	assert distance_pt(vec3(0,0,3) - Z*parameters[1], m.facepoints(indices[1])) < 1e-9
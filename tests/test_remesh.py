@@ -0,0 +1,45 @@
+from madcad import *
+from madcad.reverse import remesh, homogenize, subdivide, _edgelengths, _fits
+from madcad.query import signed_distance, nearest
+
+def test_homogenize():
+	part = cylinder(vec3(0), vec3(0,0,2), 1, resolution=('div', 16))
+	part.mergeclose()
+	homogenized = homogenize(part, 0.3, fit=False)
+	homogenized.check()
+	assert homogenized.isenvelope()
+	assert homogenized.groups is part.groups
+	lengths = _edgelengths(homogenized)
+	assert abs(lengths.mean() - 0.3) < 0.05
+	assert lengths.std() < 0.25 * lengths.mean()
+	# points stay on the original surface, and on the original frontiers
+	assert abs(signed_distance(part, homogenized.points)).max() < part.precision()
+	frontiers = homogenized.frontiers()
+	frontiers.strippoints()
+	assert nearest(part.frontiers(), frontiers.points)[1].max() < part.precision()
+
+def test_remesh_fit():
+	part = cylinder(vec3(0), vec3(0,0,2), 1, resolution=('div', 16))
+	part.mergeclose()
+	# with fit, the points inside the side are on the ideal cylinder
+	remeshed = remesh(part, 0.3)
+	remeshed.check()
+	assert remeshed.isenvelope()
+	assert remeshed.volume() > part.volume()
+	assert abs(remeshed.volume() - 2*pi) < abs(part.volume() - 2*pi)
+	# the surfaces of the original mesh are fitted once for successive remeshings
+	fits = _fits.entries[(id(part), 'fits')][1]
+	remesh(part, 0.2)
+	assert _fits.entries[(id(part), 'fits')][1] is fits
+
+def test_subdivide():
+	sphere = icosphere(vec3(0), 1, resolution=('div', 3))
+	subdivided = subdivide(sphere, density=4)
+	subdivided.check()
+	assert subdivided.isenvelope()
+	assert len(subdivided.faces) > len(sphere.faces)
+	# new points are on the ideal sphere
+	assert abs(4/3*pi - subdivided.volume()) < abs(4/3*pi - sphere.volume())
+	# flat areas keep their resolution
+	part = brick(width=vec3(1))
+	assert len(subdivide(part).faces) == len(part.faces)
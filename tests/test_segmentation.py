@@ -1,6 +1,6 @@
 import os
 from madcad import *
-from madcad.reverse import segmentation
+from madcad.reverse import segmentation, guesssurface, guesssurfaces
 from . import visualcheck
 
 @visualcheck
@@ -12,3 +12,48 @@ def test_segmentation():
 
 	return [segmentation(part, tolerance=5, sharp=0.2)]
 
+
+def test_segmentation_groups():
+	# a segmentation of a cylinder without its groups finds back its side and its two caps
+	part = cylinder(vec3(0), vec3(0,0,2), 1, resolution=('div', 60))
+	part.mergeclose()
+	part = Mesh(part.points, part.faces)
+	segmented = segmentation(part)
+	assert len(segmented.groups) == 3
+	assert sorted(len(segmented.group({i}).faces)  for i in range(3)) == [59, 59, 122]
+
+def test_guesssurface():
+	placement = rotatearound(0.5, Axis(vec3(1,1,0), normalize(vec3(1,2,3))))
+	axis = mat3(placement) * vec3(0,0,1)
+	# the faces are chords of the ideal surfaces, so the fit is precise only up to their size
+	part = cylinder(vec3(0), vec3(0,0,2), 1, resolution=('div', 20)).transform(placement)
+	part.mergeclose()
+	kind, (origin, direction) = guesssurface(part.group({0}), 1e-3)
+	assert kind == 'cylinder'
+	assert length(cross(direction, axis)) < 1e-6
+	assert length(noproject(origin - placement * vec3(0), direction)) < 1e-6
+	kind, (origin, normal) = guesssurface(part.group({1}), 1e-3)
+	assert kind == 'plane'
+	assert length(cross(normal, axis)) < 1e-6
+
+	kind, center = guesssurface(icosphere(vec3(1,2,3), 2, resolution=('div', 10)), 1e-3)
+	assert kind == 'sphere'
+	assert distance(center, vec3(1,2,3)) < 1e-6
+
+	part = cone(vec3(0,0,3), vec3(0), 1, resolution=('div', 20)).transform(placement)
+	part.mergeclose()
+	kind, (apex, direction) = guesssurface(part.group({0}), 1e-3)
+	assert kind == 'cone'
+	assert length(cross(direction, axis)) < 1e-3
+
+def test_guesssurfaces():
+	part = cylinder(vec3(0), vec3(0,0,2), 1, resolution=('div', 20))
+	part.mergeclose()
+	# the sphere is large enough to be fitted on subsets of its faces
+	part = Mesh.concat([part, icosphere(vec3(5,0,0), 2, resolution=('div', 40))])
+	fits = guesssurfaces(part, workers=1)
+	assert [fit[0]  for fit in fits] == ['cylinder', 'plane', 'plane', 'sphere']
+	assert distance(fits[3][1], vec3(5,0,0)) < 1e-6
+	assert all(fit[2] < 1e-3  for fit in fits)
+	# the process pool gives the same results
+	assert [fit[:2]  for fit in guesssurfaces(part, workers=2)] == [fit[:2]  for fit in fits]
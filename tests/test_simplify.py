@@ -0,0 +1,48 @@
+from madcad import *
+from madcad.reverse import simplify
+from madcad.query import signed_distance, nearest
+
+def test_simplify_flat():
+	# flat faces are merged down to the minimum needed by the outlines
+	part = brick(width=vec3(1)).subdivide(5)
+	simplified = simplify(part)
+	simplified.check()
+	assert simplified.isenvelope()
+	assert len(simplified.faces) == 12
+	assert len(simplified.points) == 8
+	assert simplified.groups is part.groups
+	assert abs(simplified.volume() - part.volume()) < part.precision()
+
+def test_simplify_target():
+	sphere = icosphere(vec3(0), 1, resolution=('div', 8))
+	simplified = simplify(sphere, 0.2)
+	simplified.check()
+	assert simplified.isenvelope()
+	assert len(simplified.faces) <= 0.2*len(sphere.faces)
+	assert len(simplify(sphere, 100).faces) <= 100
+
+def test_simplify_error():
+	sphere = icosphere(vec3(0), 1, resolution=('div', 8))
+	for error in [0.03, 0.1]:
+		simplified = simplify(sphere, error=error)
+		simplified.check()
+		assert simplified.isenvelope()
+		assert len(simplified.faces) < len(sphere.faces)
+		assert abs(signed_distance(sphere, simplified.points)).max() <= error
+
+def test_simplify_groups():
+	# frontiers between groups are kept
+	part = cylinder(vec3(0), vec3(0,0,2), 1, resolution=('div', 40)).subdivide(3)
+	part.mergeclose()
+	simplified = simplify(part, error=0.01)
+	simplified.check()
+	assert simplified.isenvelope()
+	assert len(simplified.faces) < len(part.faces)
+	# the points of the frontiers only slide along them
+	frontiers = part.frontiers()
+	kept = simplified.frontiers()
+	kept.strippoints()
+	assert nearest(frontiers, kept.points)[1].max() < part.precision()
+	assert len(kept.edges) < len(frontiers.edges)
+	for group in range(len(part.groups)):
+		assert simplified.group(group).isvalid()
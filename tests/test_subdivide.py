@@ -0,0 +1,40 @@
+from madcad import *
+from madcad.mesh import *
+
+def test_subdivide():
+	ico = icosahedron(vec3(0), 1)
+	for div in range(4):
+		sub = ico.subdivide(div)
+		sub.check()
+		assert sub.isenvelope()
+		assert sub.points[:len(ico.points)] == ico.points
+		assert len(sub.faces) == len(ico.faces) * (div+1)**2
+		# no duplicated points to merge
+		assert len(sub.points) == len(ico.points) + 30*div + 20*div*(div-1)//2
+		assert abs(sub.volume() - ico.volume()) < 1e-9
+	
+	# groups with different numbers of cuts stay connected
+	part = brick(width=vec3(1))
+	sub = part.subdivide([0, 1, 2, 3, 4, 5])
+	sub.check()
+	assert sub.isenvelope()
+	assert abs(sub.surface() - part.surface()) < 1e-9
+	assert all(min(distance(a,b)  for a,b in ((p0,p1), (p1,p2), (p2,p0))) > 0.1
+		for p0, p1, p2 in map(sub.facepoints, sub.faces))
+	normals = sub.facenormals()
+	assert all(distance(normals[i], part.facenormal(sub.tracks[i]*2)) < 1e-9  for i in range(len(sub.faces)))
+	
+	w = web(part.frontiers())
+	sub = w.subdivide(2)
+	sub.check()
+	assert len(sub.edges) == 3*len(w.edges)
+	assert len(sub.points) == len(w.points) + 2*len(w.edges)
+	
+	line = wire([vec3(0), vec3(1,0,0), vec3(1,1,0)])
+	line.tracks = typedlist([0, 1, 1], 'I')
+	line.groups = [None, None]
+	sub = line.subdivide([0, 2])
+	sub.check()
+	assert sub.indices == typedlist([0, 1, 3, 4, 2], 'I')
+	assert sub.tracks == typedlist([0, 1, 1, 1, 1], 'I')
+	assert distance(sub.points[3], vec3(1, 1/3, 0)) < NUMPREC
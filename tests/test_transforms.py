@@ -0,0 +1,25 @@
+from madcad import *
+
+def test_transform_many():
+	m = brick(center=vec3(2,0,0), width=vec3(1))
+	for trans in [translate(vec3(1,2,3)) * rotate(0.3, normalize(vec3(1,2,3))) * scale(vec3(1,2,3)), vec3(1,2,3), quat(rotate(0.5, Z)), 2.5]:
+		transformed = m.transform(trans)
+		assert transformed.faces is m.faces
+		assert all(distance(a, transformer(trans)(b)) < NUMPREC  for a,b in zip(transformed.points, m.points))
+	assert m.transform(lambda p: 2*p).points == m.transform(2).points
+	
+	transforms = [rotate(i*0.1, Z)  for i in range(5)]
+	many = m.transform_many(transforms)
+	many.check()
+	expected = Mesh(groups=m.groups)
+	for trans in transforms:
+		expected += m.transform(trans)
+	assert many.faces == expected.faces
+	assert many.tracks == expected.tracks
+	assert many.groups is m.groups
+	assert max(distance(a,b)  for a,b in zip(many.points, expected.points)) < NUMPREC
+	assert len(m.transform_many([]).faces) == 0
+	
+	w = web(Circle(Axis(O,Z), 1))
+	assert w.transform_many(transforms).edges == (w + w.transform(mat4()) + w.transform(mat4()) + w.transform(mat4()) + w.transform(mat4())).edges
+	assert len(repeataround(m, 8).faces) == 8*len(m.faces)
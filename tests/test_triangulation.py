@@ -131,3 +131,25 @@ def test_triangulation_circles():
 	face.check()
 	assert face.issurface()
 	return face
+
+def test_retriangulate():
+	from madcad import Mesh, Axis, extrusion, anglebt
+	from madcad.triangulation import retriangulate
+	from madcad.hashing import edgekey
+	def smallest(mesh):
+		return [min(anglebt(mesh.points[f[i-1]] - mesh.points[f[i]], mesh.points[f[i-2]] - mesh.points[f[i]])  for i in range(3))
+				for f in mesh.faces]
+	mesh = extrusion(triangulation(web(Circle(Axis(O,Z), 1))), vec3(0,0,1))
+	mesh.mergeclose()
+	before = deepcopy(mesh)
+	faces = mesh.faces
+	retriangulate(mesh)
+	assert mesh.faces is faces
+	mesh.check()
+	assert mesh.isenvelope()
+	assert sum(smallest(mesh)) > sum(smallest(before))
+	assert min(smallest(mesh)) >= min(smallest(before))
+	# groups and their frontiers are kept
+	assert mesh.tracks == before.tracks
+	frontiers = lambda mesh: sorted(edgekey(*e)  for e in mesh.frontiers().edges)
+	assert frontiers(mesh) == frontiers(before)
@@ -35,7 +35,12 @@ def test_islands():
         [vec3(0), vec3(1,0,0), vec3(1,0,0), vec3(2,1,0), vec3(1,3,0), vec3(1,5,4), vec3(2,5,0)], 
         [(0,1), (1,2), (2,3), (4, 5), (5,6), (6,4)])
     m.check()
-    assert len(m.islands()) == 2
+    islands = m.islands()
+    assert len(islands) == 2
+    assert [len(island.edges) for island in islands] == [3, 3]
+    labels, count = m.islandlabels()
+    assert count == 2 and labels.tolist() == [0, 0, 0, 1, 1, 1]
+    assert m.groupislands().tracks == typedlist([0, 0, 0, 1, 1, 1], 'I')
 
 def test_frontiers():
     bri = brick(center=vec3(2,0,0), width=vec3(0.5))